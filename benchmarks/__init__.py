@@ -0,0 +1,4 @@
+"""
+基准测试
+合成 Soundminer 数据库生成器、确定性桩编码器和流水线基准（不需要真实曲库和模型）
+"""
@@ -0,0 +1,310 @@
+"""
+分类瀑布流基准 + 黄金文件校验
+在固定语料上逐条运行 DataProcessor._extract_category，记录各级命中数、各级耗时和吞吐，
+并把结果 CatID 与黄金文件逐条对比：优化 Level -1 ~ 2 时可以验证输出完全一致
+
+语料由 synthetic_db 按固定种子生成，经 SoundminerImporter 导入（与真实流水线相同的 rich_context_text）；
+Level 2 使用桩编码器和桩 Platinum Centroids，不需要模型。
+各级耗时按"在该级得出结果的记录"统计，包含前面各级未命中的开销。
+
+用法:
+    python -m benchmarks.classification_benchmark                   # 与默认黄金文件对比
+    python -m benchmarks.classification_benchmark --update-golden   # 重新生成黄金文件（确认输出变化是预期的）
+    python -m benchmarks.classification_benchmark --rows 100k --golden none --output cls_report.json
+
+与黄金文件不一致时以退出码 1 结束（可用于 CI）。
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.index_manifest import hash_file
+from benchmarks.stub_encoder import StubVectorEngine
+from benchmarks.synthetic_db import GENERATOR_VERSION, default_db_name, generate_soundminer_db, parse_size
+from benchmarks.run_benchmarks import collect_environment, generate_stub_centroids
+
+
+GOLDEN_SCHEMA = 1
+DEFAULT_GOLDEN = Path(__file__).parent / "golden" / "classification_3k.json"
+DEFAULT_ROWS = 3000
+
+# 分类结果依赖的配置文件（黄金文件记录其哈希，配置变化时提示）
+CLASSIFICATION_INPUTS = (
+    "data_config/rules.json",
+    "data_config/ucs_catid_list.csv",
+    "data_config/ucs_alias.csv",
+    "data_config/ucs_definitions.json",
+)
+
+# _extract_category 返回的级别说明 -> 级别键
+LEVEL_PREFIXES = (
+    ("Level -1", "level_-1"),
+    ("Level 0", "level_0"),
+    ("Level 1", "level_1"),
+    ("Level 2", "level_2"),
+)
+LEVEL_KEYS = tuple(key for _, key in LEVEL_PREFIXES) + ("uncategorized",)
+
+# 黄金文件必须覆盖的级别（任何一级没有命中时，该级的回归无法被发现）
+REQUIRED_LEVELS = tuple(key for _, key in LEVEL_PREFIXES)
+
+
+class GoldenMismatchError(Exception):
+    """分类结果与黄金文件不一致"""
+    pass
+
+
+class CoverageError(Exception):
+    """语料没有覆盖分类瀑布流的所有级别"""
+    pass
+
+
+def level_key(level_description: str) -> str:
+    """'Level 0 (规则)' -> 'level_0'；未分类 -> 'uncategorized'"""
+    for prefix, key in LEVEL_PREFIXES:
+        if level_description.startswith(prefix):
+            return key
+    return "uncategorized"
+
+
+def inputs_digest(config_root: Path) -> Dict[str, str]:
+    """分类输入配置的内容哈希"""
+    return {
+        name: hash_file(config_root / name) if (config_root / name).exists() else ""
+        for name in CLASSIFICATION_INPUTS
+    }
+
+
+def load_corpus(rows: int, seed: int, work_dir: Path) -> List[Dict]:
+    """生成（或复用）合成数据库并经 SoundminerImporter 导入为元数据字典"""
+    from dataclasses import asdict
+    from core import UCSManager
+    from data import SoundminerImporter
+
+    db_path = generate_soundminer_db(work_dir / default_db_name(rows, seed), rows, seed=seed)
+    ucs_manager = UCSManager()
+    ucs_manager.load_all()
+    importer = SoundminerImporter(str(db_path), ucs_manager=ucs_manager)
+    try:
+        return [asdict(meta) for meta in importer.import_all()]
+    finally:
+        importer.close()
+
+
+def build_processor(work_dir: Path, dim: int, seed: int):
+    """DataProcessor（只用于 _extract_category）+ 桩编码器 + 桩 Platinum Centroids"""
+    from core import DataProcessor, UCSManager
+
+    encoder = StubVectorEngine(dim=dim, seed=seed)
+    processor = DataProcessor(None, encoder, cache_dir=str(work_dir / "classification_cache"))
+    processor.ucs_manager = UCSManager()
+    processor.ucs_manager.load_all()
+    generate_stub_centroids(encoder, processor.centroid_store)
+    processor._load_platinum_centroids()
+    return processor
+
+
+def classify_corpus(processor, corpus: Sequence[Dict]) -> Dict:
+    """
+    逐条运行分类瀑布流
+
+    Returns:
+        {'catids': [...], 'levels': [...], 'latency_us': (N,) ndarray, 'elapsed_s': float}
+    """
+    catids: List[str] = []
+    levels: List[str] = []
+    latency = np.zeros(len(corpus), dtype=np.float64)
+    clock = time.perf_counter
+    extract = processor._extract_category
+
+    start = clock()
+    for i, meta in enumerate(corpus):
+        t0 = clock()
+        result = extract(dict(meta))
+        latency[i] = clock() - t0
+        if result:
+            catid, level = result
+        else:
+            catid, level = "UNCATEGORIZED", ""
+        catids.append(catid)
+        levels.append(level_key(level))
+    elapsed = clock() - start
+
+    return {'catids': catids, 'levels': levels, 'latency_us': latency * 1e6, 'elapsed_s': elapsed}
+
+
+def summarize_levels(levels: Sequence[str], latency_us: np.ndarray) -> Dict[str, Dict]:
+    """各级命中数和耗时分布（微秒）"""
+    levels = np.asarray(levels)
+    summary = {}
+    for key in LEVEL_KEYS:
+        mask = levels == key
+        hits = int(mask.sum())
+        entry = {'hits': hits, 'share': round(hits / max(1, len(levels)), 4)}
+        if hits:
+            values = latency_us[mask]
+            entry.update({
+                'mean_us': round(float(values.mean()), 2),
+                'p50_us': round(float(np.percentile(values, 50)), 2),
+                'p95_us': round(float(np.percentile(values, 95)), 2),
+                'total_ms': round(float(values.sum()) / 1000.0, 2),
+            })
+        summary[key] = entry
+    return summary
+
+
+def diff_against_golden(golden: Dict, rec_ids: Sequence[int], catids: Sequence[str], levels: Sequence[str]) -> List[Dict]:
+    """逐条对比 CatID 和命中级别，返回不一致的记录"""
+    golden_records = golden.get('records', {})
+    mismatches = []
+    for rec_id, catid, level in zip(rec_ids, catids, levels):
+        expected = golden_records.get(str(rec_id))
+        if expected is None:
+            mismatches.append({'recID': rec_id, 'expected': None, 'actual': [catid, level]})
+        elif expected != [catid, level]:
+            mismatches.append({'recID': rec_id, 'expected': expected, 'actual': [catid, level]})
+    missing = set(golden_records) - {str(r) for r in rec_ids}
+    for rec_id in sorted(missing, key=int):
+        mismatches.append({'recID': int(rec_id), 'expected': golden_records[rec_id], 'actual': None})
+    return mismatches
+
+
+def write_golden(path: Path, corpus_config: Dict, digest: Dict[str, str], rec_ids, catids, levels) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'schema': GOLDEN_SCHEMA,
+        'corpus': corpus_config,
+        'inputs': digest,
+        'records': {str(r): [c, lv] for r, c, lv in zip(rec_ids, catids, levels)},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=0, sort_keys=False)
+        f.write("\n")
+
+
+def run_classification_benchmark(
+    rows: int = DEFAULT_ROWS,
+    seed: int = 0,
+    dim: int = 128,
+    golden_path: Optional[Path] = DEFAULT_GOLDEN,
+    update_golden: bool = False,
+    work_dir: Optional[Path] = None
+) -> Dict:
+    """运行基准，返回报告（包含与黄金文件的对比结果）"""
+    work_dir = Path(work_dir) if work_dir else Path(tempfile.mkdtemp(prefix="sc_cls_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    config_root = Path(__file__).parent.parent
+    corpus_config = {'rows': rows, 'seed': seed, 'dim': dim, 'generator': GENERATOR_VERSION}
+
+    corpus = load_corpus(rows, seed, work_dir)
+    processor = build_processor(work_dir, dim, seed)
+    result = classify_corpus(processor, corpus)
+    rec_ids = [meta['recID'] for meta in corpus]
+
+    report = {
+        'environment': collect_environment(),
+        'corpus': corpus_config,
+        'records': len(corpus),
+        'elapsed_s': round(result['elapsed_s'], 4),
+        'records_per_s': round(len(corpus) / result['elapsed_s'], 1) if result['elapsed_s'] > 0 else None,
+        'levels': summarize_levels(result['levels'], result['latency_us']),
+        'golden': None,
+    }
+
+    if golden_path is None:
+        return report
+
+    uncovered = [key for key in REQUIRED_LEVELS if not report['levels'][key]['hits']]
+    if uncovered:
+        raise CoverageError(f"语料没有命中以下级别: {', '.join(uncovered)}（黄金文件无法覆盖这些级别）")
+
+    digest = inputs_digest(config_root)
+    if update_golden or not golden_path.exists():
+        write_golden(golden_path, corpus_config, digest, rec_ids, result['catids'], result['levels'])
+        report['golden'] = {'path': str(golden_path), 'updated': True}
+        return report
+
+    with open(golden_path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    if golden.get('corpus') != corpus_config:
+        raise GoldenMismatchError(f"黄金文件的语料配置 {golden.get('corpus')} 与本次 {corpus_config} 不同")
+
+    mismatches = diff_against_golden(golden, rec_ids, result['catids'], result['levels'])
+    changed_inputs = [name for name, value in digest.items() if golden.get('inputs', {}).get(name) != value]
+    report['golden'] = {
+        'path': str(golden_path),
+        'updated': False,
+        'mismatches': len(mismatches),
+        'examples': mismatches[:20],
+        'changed_inputs': changed_inputs,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分类瀑布流吞吐基准 + 黄金文件校验')
+    parser.add_argument('--rows', default=str(DEFAULT_ROWS), help='语料记录数（10k / 100k 或具体数字）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dim', type=int, default=128, help='桩编码器向量维度')
+    parser.add_argument('--golden', default=str(DEFAULT_GOLDEN), help="黄金文件路径（'none' 表示不校验）")
+    parser.add_argument('--update-golden', action='store_true', help='用本次结果覆盖黄金文件')
+    parser.add_argument('--work-dir', default=None, help='语料数据库和临时缓存目录（默认临时目录）')
+    parser.add_argument('--output', default=None, help='JSON 报告路径')
+    args = parser.parse_args()
+
+    golden_path = None if args.golden.lower() == 'none' else Path(args.golden)
+    try:
+        report = run_classification_benchmark(
+            rows=parse_size(args.rows), seed=args.seed, dim=args.dim,
+            golden_path=golden_path, update_golden=args.update_golden, work_dir=args.work_dir
+        )
+    except GoldenMismatchError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    except CoverageError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    print(f"[RESULT] {report['records']} 条，{report['elapsed_s']:.2f}s，{report['records_per_s']} 条/s")
+    print(f"{'level':<15}{'hits':>8}{'share':>8}{'mean µs':>10}{'p95 µs':>10}{'total ms':>11}")
+    for key, entry in report['levels'].items():
+        if entry['hits']:
+            print(f"{key:<15}{entry['hits']:>8}{entry['share']:>8.1%}{entry['mean_us']:>10.1f}"
+                  f"{entry['p95_us']:>10.1f}{entry['total_ms']:>11.1f}")
+        else:
+            print(f"{key:<15}{0:>8}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"[OK] 报告已写出: {output}")
+
+    golden = report['golden']
+    if golden is None:
+        return
+    if golden['updated']:
+        print(f"[OK] 黄金文件已更新: {golden['path']}")
+        return
+    if golden['changed_inputs']:
+        print(f"[WARNING] 分类配置与生成黄金文件时不同: {', '.join(golden['changed_inputs'])}")
+    if golden['mismatches']:
+        print(f"[ERROR] 与黄金文件不一致: {golden['mismatches']} 条")
+        for item in golden['examples']:
+            print(f"      recID={item['recID']}: 期望 {item['expected']}，实际 {item['actual']}")
+        sys.exit(1)
+    print(f"[OK] 与黄金文件完全一致（{report['records']} 条）")
+
+
+if __name__ == "__main__":
+    main()
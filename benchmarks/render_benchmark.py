@@ -0,0 +1,300 @@
+"""
+无头渲染基准
+Qt offscreen 平台下用合成坐标和元数据构建 SonicUniverse，
+按脚本化的缩放 / 平移路径把 HexGridLayer.paint / DetailScatterLayer.paint 绘制到 QImage，
+记录每帧绘制耗时、Python 内存分配和绘制量（六边形 / 点 / 标签）
+
+分配统计只覆盖 Python 层（tracemalloc 峰值和净增 block 数），Qt 内部的 C++ 分配不计入；
+分配统计在单独一轮中采集，不影响计时。
+
+用法:
+    python -m benchmarks.render_benchmark                       # 默认 100k 点
+    python -m benchmarks.render_benchmark --points 1m --frames 60 --output render_report.json
+    python -m benchmarks.render_benchmark --no-allocations
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PySide6.QtWidgets import QApplication, QStyleOptionGraphicsItem
+from PySide6.QtGui import QImage, QPainter, QColor
+from PySide6.QtCore import QRectF
+
+from benchmarks.synthetic_db import load_catid_vocabulary, parse_size
+from benchmarks.run_benchmarks import collect_environment
+
+
+REPORT_SCHEMA = 1
+
+# 每个 LOD 的代表缩放级别（与 HexGridLayer.update_lod 的阈值对应）
+LOD_ZOOMS = {0: 0.4, 1: 1.5, 2: 4.0}
+
+BACKGROUND = QColor('#0B0C0E')
+
+
+def build_synthetic_scene_data(points: int, n_categories: int = 120, seed: int = 0):
+    """
+    合成场景数据：每个 CatID 一个高斯团簇，团簇大小服从长尾分布
+
+    Returns:
+        (metadata, coords) - 元数据字典列表和 (N, 2) 坐标（0-3000）
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = load_catid_vocabulary()
+    step = max(1, len(vocabulary) // n_categories)
+    cat_ids = [cat_id for cat_id, _ in vocabulary[::step][:n_categories]]
+
+    weights = 1.0 / np.arange(1, len(cat_ids) + 1) ** 0.8
+    weights /= weights.sum()
+    assignment = rng.choice(len(cat_ids), size=points, p=weights)
+
+    centers = rng.uniform(200, 2800, size=(len(cat_ids), 2))
+    spreads = rng.uniform(40, 160, size=len(cat_ids))
+    coords = centers[assignment] + rng.normal(size=(points, 2)) * spreads[assignment, None]
+
+    metadata = [
+        {'recID': i + 1, 'filename': f"{cat_ids[c]}_{i:07d}.wav", 'category': cat_ids[c]}
+        for i, c in enumerate(assignment.tolist())
+    ]
+    return metadata, coords
+
+
+def scripted_paths(scene_rect: QRectF, frames: int) -> Dict[str, List[Tuple[float, float, float]]]:
+    """
+    脚本化相机路径：{路径名: [(zoom, center_x, center_y), ...]}
+
+    - lod{n}_pan: 固定缩放，沿对角线平移穿过场景
+    - zoom_ramp: 从全景连续放大到 LOD 2（跨越所有 LOD 阈值）
+    """
+    cx, cy = scene_rect.center().x(), scene_rect.center().y()
+    w, h = scene_rect.width(), scene_rect.height()
+    paths = {}
+    for lod, zoom in LOD_ZOOMS.items():
+        path = []
+        for i in range(frames):
+            t = i / max(1, frames - 1)
+            path.append((
+                zoom,
+                cx + (t - 0.5) * w * 0.6,
+                cy + math.sin(t * math.pi * 2) * h * 0.2,
+            ))
+        paths[f"lod{lod}_pan"] = path
+
+    zoom_min, zoom_max = 0.25, 6.0
+    paths['zoom_ramp'] = [
+        (zoom_min * (zoom_max / zoom_min) ** (i / max(1, frames - 1)), cx, cy)
+        for i in range(frames)
+    ]
+    return paths
+
+
+class RenderHarness:
+    """把场景图层绘制到 QImage 的离屏相机"""
+
+    def __init__(self, scene, width: int = 1280, height: int = 800):
+        self.scene = scene
+        self.width = width
+        self.height = height
+        self.image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        self.option = QStyleOptionGraphicsItem()
+
+    def render_frame(self, zoom: float, center_x: float, center_y: float) -> Dict:
+        """绘制一帧，返回各图层耗时和绘制量"""
+        scene = self.scene
+        scene.update_lod(zoom)
+        visible = QRectF(
+            center_x - self.width / 2 / zoom,
+            center_y - self.height / 2 / zoom,
+            self.width / zoom,
+            self.height / zoom,
+        )
+        self.option.exposedRect = visible
+
+        self.image.fill(BACKGROUND)
+        painter = QPainter(self.image)
+        painter.scale(zoom, zoom)
+        painter.translate(-visible.left(), -visible.top())
+
+        t0 = time.perf_counter()
+        scene.hex_layer.paint(painter, self.option, None)
+        t1 = time.perf_counter()
+        scene.scatter_layer.paint(painter, self.option, None)
+        t2 = time.perf_counter()
+        painter.end()
+
+        hex_stats = scene.hex_layer.last_paint_stats
+        scatter_stats = scene.scatter_layer.last_paint_stats
+        return {
+            'zoom': round(zoom, 4),
+            'lod': scene.hex_layer.current_lod,
+            'hex_ms': round((t1 - t0) * 1000.0, 3),
+            'scatter_ms': round((t2 - t1) * 1000.0, 3),
+            'total_ms': round((t2 - t0) * 1000.0, 3),
+            'hex_batches': hex_stats.get('batches', 0),
+            'hexes': hex_stats.get('hexes', 0),
+            'labels': hex_stats.get('labels', 0),
+            'points': scatter_stats.get('points', 0),
+        }
+
+    def render_frame_allocations(self, zoom: float, center_x: float, center_y: float) -> Dict:
+        """绘制一帧并统计 Python 分配（需已启动 tracemalloc）"""
+        tracemalloc.reset_peak()
+        before_bytes, _ = tracemalloc.get_traced_memory()
+        before_blocks = sys.getallocatedblocks()
+        self.render_frame(zoom, center_x, center_y)
+        after_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        return {
+            'py_peak_kb': round((peak_bytes - before_bytes) / 1024.0, 2),
+            'py_net_kb': round((after_bytes - before_bytes) / 1024.0, 2),
+            'py_net_blocks': sys.getallocatedblocks() - before_blocks,
+        }
+
+
+def _summarize(frames: Sequence[Dict]) -> Dict:
+    totals = np.array([f['total_ms'] for f in frames]) if frames else np.zeros(0)
+    if len(totals) == 0:
+        return {'frames': 0}
+    summary = {
+        'frames': len(frames),
+        'mean_ms': round(float(totals.mean()), 3),
+        'p50_ms': round(float(np.percentile(totals, 50)), 3),
+        'p95_ms': round(float(np.percentile(totals, 95)), 3),
+        'max_ms': round(float(totals.max()), 3),
+        'hex_mean_ms': round(float(np.mean([f['hex_ms'] for f in frames])), 3),
+        'scatter_mean_ms': round(float(np.mean([f['scatter_ms'] for f in frames])), 3),
+        'mean_hexes': round(float(np.mean([f['hexes'] for f in frames])), 1),
+        'mean_points': round(float(np.mean([f['points'] for f in frames])), 1),
+        'mean_labels': round(float(np.mean([f['labels'] for f in frames])), 1),
+    }
+    if 'py_peak_kb' in frames[0]:
+        summary['py_peak_kb_max'] = max(f['py_peak_kb'] for f in frames)
+        summary['py_net_blocks_mean'] = round(float(np.mean([f['py_net_blocks'] for f in frames])), 1)
+    return summary
+
+
+def run_render_benchmark(
+    points: int,
+    frames: int = 40,
+    warmup: int = 2,
+    width: int = 1280,
+    height: int = 800,
+    allocations: bool = True,
+    seed: int = 0
+) -> Dict:
+    """构建场景并运行所有相机路径，返回报告"""
+    if QApplication.instance() is None:
+        QApplication([])
+
+    from core import UCSManager, build_category_codes
+    from ui.visualizer import SonicUniverse
+
+    metadata, coords = build_synthetic_scene_data(points, seed=seed)
+    ucs_manager = UCSManager()
+    ucs_manager.load_all()
+    category_codes = build_category_codes(metadata, ucs_manager=ucs_manager)
+
+    t0 = time.perf_counter()
+    scene = SonicUniverse(
+        metadata, np.zeros((points, 4), dtype=np.float32), coords_2d=coords,
+        ucs_manager=ucs_manager, async_build=False, category_codes=category_codes
+    )
+    build_s = time.perf_counter() - t0
+
+    harness = RenderHarness(scene, width, height)
+    paths = scripted_paths(scene.sceneRect(), frames)
+
+    results = {}
+    for name, path in paths.items():
+        # 预热：首帧会惰性构建颜色路径 / Pen 缓存
+        for zoom, x, y in path[:warmup]:
+            harness.render_frame(zoom, x, y)
+        frame_results = [harness.render_frame(zoom, x, y) for zoom, x, y in path]
+
+        if allocations:
+            tracemalloc.start()
+            try:
+                for frame, (zoom, x, y) in zip(frame_results, path):
+                    frame.update(harness.render_frame_allocations(zoom, x, y))
+            finally:
+                tracemalloc.stop()
+
+        by_lod = {}
+        for frame in frame_results:
+            by_lod.setdefault(str(frame['lod']), []).append(frame)
+        results[name] = {
+            'summary': _summarize(frame_results),
+            'by_lod': {lod: _summarize(items) for lod, items in sorted(by_lod.items())},
+            'frames': frame_results,
+        }
+
+    snapshot = scene._current_snapshot
+    return {
+        'schema': REPORT_SCHEMA,
+        'environment': collect_environment(),
+        'config': {
+            'points': points, 'frames': frames, 'warmup': warmup,
+            'viewport': [width, height], 'allocations': allocations, 'seed': seed,
+        },
+        'scene': {
+            'build_s': round(build_s, 3),
+            'hex_cells': len(snapshot.grid_map) if snapshot is not None else 0,
+            'color_batches': len(snapshot.color_batches or []) if snapshot is not None else 0,
+        },
+        'paths': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sonic Compass 无头渲染基准')
+    parser.add_argument('--points', default='100k', help='点数（10k / 100k / 1m 或具体数字）')
+    parser.add_argument('--frames', type=int, default=40, help='每条路径的帧数')
+    parser.add_argument('--warmup', type=int, default=2, help='每条路径的预热帧数（不计入）')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=800)
+    parser.add_argument('--no-allocations', action='store_true', help='跳过 tracemalloc 分配统计')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='JSON 报告路径')
+    args = parser.parse_args()
+
+    report = run_render_benchmark(
+        parse_size(args.points), frames=args.frames, warmup=args.warmup,
+        width=args.width, height=args.height,
+        allocations=not args.no_allocations, seed=args.seed
+    )
+
+    scene = report['scene']
+    print(f"[INFO] 场景构建 {scene['build_s']:.2f}s，{scene['hex_cells']} 个六边形，{scene['color_batches']} 个颜色分块")
+    print(f"{'path':<12}{'lod':>4}{'frames':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'hexes':>9}{'points':>9}{'labels':>8}")
+    for name, result in report['paths'].items():
+        for lod, summary in result['by_lod'].items():
+            print(
+                f"{name:<12}{lod:>4}{summary['frames']:>8}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+                f"{summary['max_ms']:>10.2f}{summary['mean_hexes']:>9.0f}{summary['mean_points']:>9.0f}{summary['mean_labels']:>8.0f}"
+            )
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"[OK] 报告已写出: {output}")
+
+    # 与其他 Qt 测试脚本一致：跳过解释器退出时的 Qt 对象析构
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
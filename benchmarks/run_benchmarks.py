@@ -0,0 +1,304 @@
+"""
+流水线基准
+合成数据库 + 确定性桩编码器，测量导入、分类、向量化、搜索、UMAP 布局、六边形分箱和标签生成，
+输出可在不同提交之间对比的 JSON 报告
+
+阶段耗时来自 core.instrumentation（各模块已有的 log_span / perf 计时），
+基准本身不复制被测代码。
+
+用法:
+    python -m benchmarks.run_benchmarks                          # 默认 10k
+    python -m benchmarks.run_benchmarks --sizes 10k 100k 1m --output bench_report.json
+    python -m benchmarks.run_benchmarks --compare old_report.json  # 与旧报告对比
+    python -m benchmarks.run_benchmarks --stages index search          # 只测索引构建和搜索
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.centroids import CentroidMatrix, CentroidStore
+from core.instrumentation import perf
+from benchmarks.stub_encoder import StubVectorEngine
+from benchmarks.synthetic_db import default_db_name, generate_soundminer_db, load_catid_vocabulary, parse_size
+
+
+REPORT_SCHEMA = 1
+
+# 可选阶段（import / classify / encode 由同一次 build_index 完成，总是一起运行）
+ALL_STAGES = ('index', 'search', 'layout', 'scene')
+
+# 报告中的阶段名 -> perf 直方图名
+STAGE_METRICS = {
+    'import': 'index.import',
+    'classification': 'index.arbitration',
+    'encoding': 'index.encode',
+    'centroid_predict': 'index.centroid_predict',
+    'index_save': 'index.save',
+    'lexical_index': 'index.lexical',
+    'index_total': 'index.build',
+    'search_encode': 'search.encode',
+    'search_lexical': 'search.lexical',
+    'search_rank': 'search.rank',
+    'search_hybrid': 'search.hybrid',
+    'layout_ucs': 'layout.ucs',
+    'layout_gravity': 'layout.gravity',
+    'hex_binning': 'scene.bin',
+    'density_paths': 'scene.density_paths',
+    'color_paths': 'scene.color_paths',
+    'labels': 'scene.labels',
+    'scene_total': 'scene.build_request',
+}
+
+# 超过该行数跳过 UMAP 布局（1M 行的 UMAP 需要数小时）
+DEFAULT_LAYOUT_MAX_ROWS = 100_000
+
+
+def generate_stub_centroids(encoder: StubVectorEngine, store: CentroidStore, config_dir: str = "data_config") -> int:
+    """
+    用桩编码器生成 Platinum Centroids（格式与 tools/generate_platinum_centroids.py 一致: .npy 矩阵 + 索引）
+
+    Returns:
+        质心数量
+    """
+    vocabulary = load_catid_vocabulary(config_dir)
+    definitions = {cat_id: " ".join(words) for cat_id, words in vocabulary}
+    vectors = encoder.encode_batch(list(definitions.values()), normalize_embeddings=True)
+    centroids = CentroidMatrix.from_dict(dict(zip(definitions, vectors)))
+    store.save(centroids, definitions, encoder.model_path)
+    return len(centroids)
+
+
+def build_queries(n: int, seed: int = 0) -> List[str]:
+    """确定性查询列表（2-3 个 CatID 定义词）"""
+    vocabulary = load_catid_vocabulary()
+    rng = np.random.default_rng(seed + 1)
+    queries = []
+    for i in range(n):
+        _, words = vocabulary[int(rng.integers(0, len(vocabulary)))]
+        picks = rng.integers(0, len(words), size=2 + i % 2)
+        queries.append(" ".join(words[p] for p in picks))
+    return queries
+
+
+def fallback_coordinates(embeddings: np.ndarray) -> np.ndarray:
+    """没有布局结果时的确定性 2D 坐标（前两个主成分，缩放到 0-3000）"""
+    centered = embeddings - embeddings.mean(axis=0)
+    _, _, vt = np.linalg.svd(centered[: min(len(centered), 20_000)], full_matrices=False)
+    coords = centered @ vt[:2].T
+    span = np.ptp(coords, axis=0)
+    span[span == 0] = 1.0
+    return (coords - coords.min(axis=0)) / span.max() * 3000.0
+
+
+def _stage_summary(snapshot: Dict) -> Dict[str, Dict]:
+    histograms = snapshot['histograms']
+    stages = {}
+    for stage, metric in STAGE_METRICS.items():
+        summary = histograms.get(metric)
+        if summary and summary.get('count'):
+            stages[stage] = {
+                'ms': round(summary['mean'] * summary['count'], 3),
+                'count': summary['count'],
+                'p50_ms': summary['p50'],
+                'p95_ms': summary['p95'],
+            }
+    return stages
+
+
+def _classification_stats(metadata: Sequence[Dict]) -> Dict[str, float]:
+    total = len(metadata) or 1
+    uncategorized = sum(1 for m in metadata if m.get('category') in (None, '', 'UNCATEGORIZED'))
+    ai_predicted = sum(1 for m in metadata if m.get('is_ai_predicted'))
+    return {
+        'records': len(metadata),
+        'uncategorized_ratio': round(uncategorized / total, 4),
+        'ai_predicted': ai_predicted,
+    }
+
+
+def run_size(
+    rows: int,
+    work_dir: Path,
+    stages: Sequence[str] = ALL_STAGES,
+    dim: int = 128,
+    seed: int = 0,
+    n_queries: int = 50,
+    layout_max_rows: int = DEFAULT_LAYOUT_MAX_ROWS,
+    table: str = 'justinmetadata'
+) -> Dict:
+    """运行一个规模的基准，返回该规模的报告"""
+    from core import DataProcessor, SearchCore, UCSManager
+    from data import SoundminerImporter
+
+    result = {'rows': rows, 'skipped': {}, 'wall_s': {}}
+
+    t0 = time.perf_counter()
+    db_path = generate_soundminer_db(work_dir / default_db_name(rows, seed), rows, seed=seed, table=table)
+    result['wall_s']['generate_db'] = round(time.perf_counter() - t0, 3)
+
+    ucs_manager = UCSManager()
+    ucs_manager.load_all()
+    encoder = StubVectorEngine(dim=dim, seed=seed)
+
+    cache_dir = work_dir / f"cache_{rows}_s{seed}"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    processor = DataProcessor(SoundminerImporter(str(db_path), ucs_manager=ucs_manager), encoder, cache_dir=str(cache_dir))
+    processor.ucs_manager = ucs_manager
+    result['centroids'] = generate_stub_centroids(encoder, processor.centroid_store)
+
+    perf.reset()
+
+    # 1. 导入 + 分类 + 向量化（build_index 内部的 index.* 计时）
+    t0 = time.perf_counter()
+    metadata, embeddings = processor.build_index(force_rebuild=True)
+    processor.importer.close()
+    result['wall_s']['index'] = round(time.perf_counter() - t0, 3)
+    result['classification'] = _classification_stats(metadata)
+    category_codes = processor.load_category_codes()
+
+    # 2. 搜索
+    if 'search' in stages:
+        search_core = SearchCore(
+            encoder, metadata=metadata, embeddings=embeddings, category_codes=category_codes,
+            lexical_index=processor.load_lexical_index()
+        )
+        for query in build_queries(n_queries, seed=seed):
+            search_core.search_by_text(query, top_k=50)
+
+    # 3. UMAP 布局
+    coords = None
+    if 'layout' in stages:
+        if rows > layout_max_rows:
+            result['skipped']['layout'] = f"rows > {layout_max_rows}"
+        else:
+            from core.layout_engine import UMAP_AVAILABLE, compute_ucs_layout, compute_gravity_layout
+            if UMAP_AVAILABLE:
+                coords, _ = compute_ucs_layout(metadata, embeddings, ucs_manager, category_codes=category_codes)
+                compute_gravity_layout(metadata, embeddings)
+            else:
+                result['skipped']['layout'] = "umap-learn 未安装"
+
+    # 4. 六边形分箱 + 标签（同步构建场景）
+    if 'scene' in stages:
+        if coords is None:
+            coords = fallback_coordinates(embeddings)
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PySide6.QtWidgets import QApplication
+        if QApplication.instance() is None:
+            QApplication([])
+        from ui.visualizer import SonicUniverse
+        scene = SonicUniverse(
+            metadata, embeddings, coords_2d=coords, ucs_manager=ucs_manager,
+            async_build=False, category_codes=category_codes
+        )
+        snapshot = scene._current_snapshot
+        result['hex_cells'] = len(snapshot.grid_map) if snapshot is not None else 0
+
+    snapshot = perf.snapshot()
+    result['stages'] = _stage_summary(snapshot)
+    result['metrics'] = snapshot
+    return result
+
+
+def collect_environment() -> Dict[str, str]:
+    """报告头：解释器、依赖版本和当前提交"""
+    environment = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    try:
+        environment['git_commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent.parent, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        environment['git_commit'] = ''
+    return environment
+
+
+def compare_reports(baseline: Dict, current: Dict) -> List[str]:
+    """逐规模、逐阶段对比两份报告，返回文本行（ratio > 1 表示变慢）"""
+    lines = [f"{'rows':>9}  {'stage':<18}{'baseline ms':>13}{'current ms':>13}{'ratio':>8}"]
+    for size, current_result in current.get('sizes', {}).items():
+        baseline_stages = baseline.get('sizes', {}).get(size, {}).get('stages', {})
+        for stage, values in current_result.get('stages', {}).items():
+            old = baseline_stages.get(stage)
+            if old is None:
+                lines.append(f"{size:>9}  {stage:<18}{'-':>13}{values['ms']:>13.1f}{'new':>8}")
+                continue
+            ratio = values['ms'] / old['ms'] if old['ms'] > 0 else float('inf')
+            lines.append(f"{size:>9}  {stage:<18}{old['ms']:>13.1f}{values['ms']:>13.1f}{ratio:>8.2f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sonic Compass 流水线基准（合成数据 + 桩编码器）')
+    parser.add_argument('--sizes', nargs='+', default=['10k'], help='规模（10k / 100k / 1m 或具体数字）')
+    parser.add_argument('--stages', nargs='+', default=list(ALL_STAGES), choices=ALL_STAGES,
+                        help='要运行的阶段（index 总是运行）')
+    parser.add_argument('--work-dir', default='cache/benchmarks', help='合成数据库和索引缓存目录（可复用）')
+    parser.add_argument('--output', default=None, help='JSON 报告路径（默认 <work-dir>/report_<commit>.json）')
+    parser.add_argument('--compare', default=None, help='对比的旧报告')
+    parser.add_argument('--dim', type=int, default=128, help='桩编码器向量维度')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--queries', type=int, default=50, help='搜索查询数')
+    parser.add_argument('--layout-max-rows', type=int, default=DEFAULT_LAYOUT_MAX_ROWS,
+                        help='超过该行数跳过 UMAP 布局')
+    parser.add_argument('--table', default='justinmetadata', help='合成数据库表名')
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        'schema': REPORT_SCHEMA,
+        'environment': collect_environment(),
+        'config': {
+            'dim': args.dim, 'seed': args.seed, 'queries': args.queries,
+            'stages': args.stages, 'layout_max_rows': args.layout_max_rows, 'table': args.table,
+        },
+        'sizes': {},
+    }
+
+    for size in args.sizes:
+        rows = parse_size(size)
+        print(f"[INFO] 基准: {rows} 条记录 ...")
+        result = run_size(
+            rows, work_dir, stages=args.stages, dim=args.dim, seed=args.seed,
+            n_queries=args.queries, layout_max_rows=args.layout_max_rows, table=args.table
+        )
+        report['sizes'][str(rows)] = result
+        for stage, values in result['stages'].items():
+            print(f"      {stage:<18}{values['ms']:>12.1f} ms  (n={values['count']})")
+        for stage, reason in result['skipped'].items():
+            print(f"      {stage:<18}{'跳过':>12}  ({reason})")
+
+    output = Path(args.output) if args.output else work_dir / f"report_{report['environment']['git_commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"[OK] 报告已写出: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print("\n".join(compare_reports(baseline, report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+确定性桩编码器
+不下载模型、不依赖 torch：特征哈希词袋向量，同样的文本在任何机器上得到同样的向量
+
+接口与 VectorEngine 一致（encode / encode_batch / get_embedding_dim），
+可以直接传给 DataProcessor、SearchCore 和 generate_stub_centroids。
+共享词语的文本余弦相似度更高，搜索和质心匹配的结果有意义（但不代表真实模型的质量）。
+"""
+
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# 每个词映射到的向量分量数（多个分量降低哈希碰撞的影响）
+SLOTS_PER_TOKEN = 3
+
+
+class StubVectorEngine:
+    """确定性桩编码器（特征哈希）"""
+
+    def __init__(self, dim: int = 128, seed: int = 0):
+        """
+        Args:
+            dim: 向量维度
+            seed: 哈希种子（不同种子得到不同但同样确定的向量空间）
+        """
+        self.dim = int(dim)
+        self.seed = int(seed)
+        self.device = "cpu"
+        self.model_path = f"stub://hash-{self.dim}-{self.seed}"
+        self._token_cache: Dict[str, Tuple[Tuple[int, ...], Tuple[float, ...]]] = {}
+
+    def _token_slots(self, token: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        """词 -> (分量下标, 符号)；使用 crc32，结果与进程 / 平台无关"""
+        cached = self._token_cache.get(token)
+        if cached is None:
+            slots, signs = [], []
+            for k in range(SLOTS_PER_TOKEN):
+                h = zlib.crc32(f"{self.seed}:{k}:{token}".encode('utf-8'))
+                slots.append(h % self.dim)
+                signs.append(1.0 if (h >> 31) & 1 else -1.0)
+            cached = (tuple(slots), tuple(signs))
+            self._token_cache[token] = cached
+        return cached
+
+    def _encode_chunk(self, texts: List[str]) -> np.ndarray:
+        rows, cols, values = [], [], []
+        for i, text in enumerate(texts):
+            for token in _TOKEN_PATTERN.findall((text or "").lower()):
+                slots, signs = self._token_slots(token)
+                rows.extend((i,) * SLOTS_PER_TOKEN)
+                cols.extend(slots)
+                values.extend(signs)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(vectors, (np.asarray(rows), np.asarray(cols)), np.asarray(values, dtype=np.float32))
+        return vectors
+
+    def encode_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress: bool = False,
+        normalize_embeddings: bool = True
+    ) -> np.ndarray:
+        """
+        批量编码（batch_size / show_progress 仅为接口兼容，内部按固定块大小处理）
+
+        Returns:
+            (N, dim) float32
+        """
+        chunk = 8192
+        parts = [self._encode_chunk(texts[start:start + chunk]) for start in range(0, len(texts), chunk)]
+        vectors = np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def encode(self, text: str, normalize_embeddings: bool = True) -> np.ndarray:
+        """编码单条文本，返回 (dim,)"""
+        return self.encode_batch([text], normalize_embeddings=normalize_embeddings)[0]
+
+    def get_embedding_dim(self) -> int:
+        return self.dim
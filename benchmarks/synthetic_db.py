@@ -0,0 +1,272 @@
+"""
+合成 Soundminer 数据库生成器
+按 SoundminerImporter 读取的表结构（justinmetadata / items）生成固定种子的 SQLite 文件
+
+记录类型（按比例混合，覆盖分类瀑布流的各级）:
+- ucs:       UCS 文件名（CatID_FXName_Creator_Library.wav）+ category 字段为 CatID（Level -1）
+- ucs_nocat: UCS 文件名，category 为空（Level -1 文件名短路）
+- rule:      普通文件名，描述包含 rules.json 中的短语（Level 0 强规则）
+- explicit:  普通文件名 + 有效的 category 字段（Level 1 显式 Metadata）
+- keywords:  普通文件名，描述 / 关键词来自 CatID 定义（Level 2 AI）
+- noise:     无任何类别信号（最终 UNCATEGORIZED）
+
+用法:
+    python -m benchmarks.synthetic_db --rows 100k --out bench_data/soundminer_100k.sqlite
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.importer import SoundminerImporter
+
+
+# 规模预设（命令行可以写 10k / 100k / 1m）
+SIZE_PRESETS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# 生成器版本（记录类型或生成规则变化时递增；写入数据库文件名和黄金文件的语料配置）
+GENERATOR_VERSION = 2
+
+# 记录类型及比例
+RECORD_KINDS = ('ucs', 'ucs_nocat', 'rule', 'explicit', 'keywords', 'noise')
+RECORD_KIND_WEIGHTS = (0.50, 0.12, 0.08, 0.08, 0.14, 0.08)
+
+COLUMNS = (
+    'recID', 'filename', 'filepath', 'description', 'keywords', 'category',
+    'VendorCategory', 'Library', 'BWDescription', 'Notes', 'FXName',
+)
+
+_LIBRARIES = (
+    'BOOM', 'SoundMorph', 'Sonniss', 'ProSoundEffects', 'HISSandaROAR', 'Tonsturm',
+    'SoundIdeas', 'BlastwaveFX', 'Articulated', 'Krotos', 'FieldRec', 'Foley_Lab',
+)
+_CREATORS = ('JD', 'AK', 'MR', 'LS', 'TW', 'HB', 'NV', 'EC')
+_NOISE_WORDS = ('take', 'mix', 'final', 'print', 'alt', 'render', 'stem', 'test', 'v2', 'edit')
+
+# 找不到 ucs_definitions.json 时使用的最小词表
+_FALLBACK_VOCABULARY = (
+    ('AIRBlow', ('air', 'blow', 'gust', 'puff', 'vent')),
+    ('WPNGun', ('gun', 'shot', 'rifle', 'pistol', 'fire')),
+    ('AMBForst', ('forest', 'birds', 'wind', 'trees', 'ambience')),
+    ('FIREBrst', ('fire', 'burst', 'flame', 'whoosh', 'ignite')),
+    ('WATRFlow', ('water', 'flow', 'stream', 'river', 'trickle')),
+    ('DOORWood', ('door', 'wood', 'creak', 'open', 'close')),
+)
+
+
+def parse_size(value: str) -> int:
+    """'10k' / '1m' / '25000' -> 行数"""
+    text = str(value).strip().lower()
+    if text in SIZE_PRESETS:
+        return SIZE_PRESETS[text]
+    multiplier = 1
+    if text.endswith('k'):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith('m'):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def load_catid_vocabulary(config_dir: str = "data_config") -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    从 ucs_definitions.json 读取 CatID 及其定义词语（按 CatID 排序，保证确定性）
+
+    Returns:
+        [(CatID, (word, ...)), ...]
+    """
+    path = Path(config_dir) / "ucs_definitions.json"
+    if not path.exists():
+        return list(_FALLBACK_VOCABULARY)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        definitions = json.load(f)
+
+    vocabulary = []
+    for cat_id in sorted(definitions):
+        words = tuple(
+            w.strip().lower() for w in str(definitions[cat_id]).replace('.', ',').split(',')
+            if w.strip() and len(w.strip()) < 24
+        )
+        if words:
+            vocabulary.append((cat_id, words))
+    return vocabulary or list(_FALLBACK_VOCABULARY)
+
+
+def load_rule_phrases(config_dir: str = "data_config") -> List[str]:
+    """
+    读取 rules.json 中的强规则短语（排序，保证确定性）
+
+    Returns:
+        短语列表；文件不存在时为空（rule 类型退化为 keywords）
+    """
+    path = Path(config_dir) / "rules.json"
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    return sorted(str(phrase).strip().lower() for phrase in rules if str(phrase).strip())
+
+
+def default_db_name(rows: int, seed: int) -> str:
+    """基准使用的数据库文件名（包含生成器版本，旧版本生成的文件不会被复用）"""
+    return f"soundminer_{rows}_s{seed}_v{GENERATOR_VERSION}.sqlite"
+
+
+def _pick_words(rng: np.random.Generator, words: Sequence[str], n: int) -> List[str]:
+    picks = rng.integers(0, len(words), size=n)
+    return [words[i] for i in picks]
+
+
+def generate_rows(
+    rows: int,
+    seed: int = 0,
+    vocabulary: Optional[List[Tuple[str, Tuple[str, ...]]]] = None,
+    start_id: int = 1,
+    rule_phrases: Optional[Sequence[str]] = None
+):
+    """
+    逐条生成记录（生成器，按 COLUMNS 顺序返回元组）
+
+    同样的 rows / seed / 词表 / 规则短语总是生成同样的数据。
+    """
+    vocabulary = vocabulary or load_catid_vocabulary()
+    rule_phrases = list(rule_phrases) if rule_phrases is not None else load_rule_phrases()
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(len(RECORD_KINDS), size=rows, p=RECORD_KIND_WEIGHTS)
+    catid_index = rng.integers(0, len(vocabulary), size=rows)
+    library_index = rng.integers(0, len(_LIBRARIES), size=rows)
+    creator_index = rng.integers(0, len(_CREATORS), size=rows)
+    rule_index = rng.integers(0, max(1, len(rule_phrases)), size=rows)
+
+    for i in range(rows):
+        rec_id = start_id + i
+        kind = RECORD_KINDS[kinds[i]]
+        cat_id, words = vocabulary[catid_index[i]]
+        library = _LIBRARIES[library_index[i]]
+
+        if kind == 'noise':
+            noise = _pick_words(rng, _NOISE_WORDS, 2)
+            filename = f"{noise[0].title()}_{rec_id:07d}_{noise[1]}.wav"
+            yield (
+                rec_id, filename, f"/Volumes/SFX/{library}/Misc/{filename}",
+                '', '', 'MISC', '', library, '', '', '',
+            )
+            continue
+
+        fx_words = _pick_words(rng, words, 2)
+        fx_name = " ".join(w.title() for w in fx_words)
+        description_words = _pick_words(rng, words, 5)
+        description = " ".join(description_words).capitalize()
+        keywords = ", ".join(_pick_words(rng, words, 4))
+
+        if kind == 'rule' and rule_phrases:
+            # 强规则短语嵌在描述中间（整词匹配）
+            filename = f"{library}_{rec_id:07d}.wav"
+            description = f"{description} {rule_phrases[rule_index[i]]} {fx_words[0]}"
+            category = ''
+        elif kind in ('rule', 'keywords'):
+            filename = f"{library}_{rec_id:07d}.wav"
+            category = ''
+        elif kind == 'explicit':
+            # 非 UCS 文件名，类别只来自 category 字段
+            filename = f"{library}_{rec_id:07d}_{_NOISE_WORDS[creator_index[i] % len(_NOISE_WORDS)]}.wav"
+            category = cat_id
+        else:
+            creator = _CREATORS[creator_index[i]]
+            filename = f"{cat_id}_{fx_name.replace(' ', '-')}_{creator}_{library}.wav"
+            category = cat_id if kind == 'ucs' else ''
+
+        yield (
+            rec_id, filename, f"/Volumes/SFX/{library}/{cat_id[:4]}/{filename}",
+            description, keywords, category,
+            cat_id[:4] if kind == 'ucs' else '', library,
+            description if rec_id % 3 == 0 else '', '', fx_name,
+        )
+
+
+def generate_soundminer_db(
+    path,
+    rows: int,
+    seed: int = 0,
+    table: str = 'justinmetadata',
+    vocabulary: Optional[List[Tuple[str, Tuple[str, ...]]]] = None,
+    batch_size: int = 20_000,
+    overwrite: bool = False
+) -> Path:
+    """
+    生成合成 Soundminer 数据库
+
+    Args:
+        path: 输出 .sqlite 路径
+        rows: 记录数
+        seed: 随机种子
+        table: 表名（SoundminerImporter.SUPPORTED_TABLES 之一）
+        vocabulary: CatID 词表（默认读取 data_config/ucs_definitions.json）
+        batch_size: 每次 executemany 的行数
+        overwrite: 已存在时是否重新生成（否则直接复用）
+
+    Returns:
+        数据库路径
+    """
+    if table not in SoundminerImporter.SUPPORTED_TABLES:
+        raise ValueError(f"不支持的表名: {table}，支持: {SoundminerImporter.SUPPORTED_TABLES}")
+
+    path = Path(path)
+    if path.exists() and not overwrite:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(str(tmp_path))
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        column_sql = ", ".join(
+            f"{name} INTEGER PRIMARY KEY" if name == 'recID' else f"{name} TEXT"
+            for name in COLUMNS
+        )
+        conn.execute(f"CREATE TABLE {table} ({column_sql})")
+        insert_sql = f"INSERT INTO {table} VALUES ({', '.join('?' * len(COLUMNS))})"
+
+        batch = []
+        for row in generate_rows(rows, seed=seed, vocabulary=vocabulary):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert_sql, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(insert_sql, batch)
+        conn.commit()
+    finally:
+        conn.close()
+
+    tmp_path.replace(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成 Soundminer 数据库（基准测试用）')
+    parser.add_argument('--rows', default='10k', help='记录数（10k / 100k / 1m 或具体数字）')
+    parser.add_argument('--out', required=True, help='输出 .sqlite 路径')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--table', default='justinmetadata', choices=SoundminerImporter.SUPPORTED_TABLES)
+    parser.add_argument('--overwrite', action='store_true', help='已存在时重新生成')
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    path = generate_soundminer_db(args.out, rows, seed=args.seed, table=args.table, overwrite=args.overwrite)
+    print(f"[OK] 已生成 {rows} 条记录: {path}")
+
+
+if __name__ == "__main__":
+    main()
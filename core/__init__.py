@@ -1,25 +1,66 @@
 """
 核心业务逻辑模块
 包含数据处理、搜索、向量引擎和 UCS 管理
+
+vector_engine（torch / sentence_transformers）和 layout_engine（umap）
+为延迟导入：首次访问对应属性时才加载，浏览地图的启动路径不会触发。
 """
 
+import importlib
+
 from .data_processor import DataProcessor, inject_category_vectors
+from .log import get_logger, setup_logging, log_span, ProgressReporter
+from .instrumentation import Instrumentation, perf
+from .index_manifest import IndexManifest, ManifestEntry
+from .category_codes import CategoryCodes, build_category_codes
+from .centroids import CentroidMatrix, CentroidPredictions
+from .lexical_index import LexicalIndex, LexicalIndexError
 from .search_core import SearchCore
-from .vector_engine import VectorEngine
+from .scatter_engine import ScatterEngine
+from .lazy_vector_engine import LazyVectorEngine
 from .ucs_manager import UCSManager
 from .category_color_mapper import CategoryColorMapper
 from . import umap_config
-from .layout_engine import (
-    compute_ucs_layout,
-    compute_gravity_layout,
-    load_ucs_coordinates_config
-)
+
+# 属性名 -> (子模块, 属性)
+_LAZY_ATTRIBUTES = {
+    'VectorEngine': ('.vector_engine', 'VectorEngine'),
+    'compute_ucs_layout': ('.layout_engine', 'compute_ucs_layout'),
+    'compute_gravity_layout': ('.layout_engine', 'compute_gravity_layout'),
+    'load_ucs_coordinates_config': ('.layout_engine', 'load_ucs_coordinates_config'),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module_name, attr = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
+    'get_logger',
+    'setup_logging',
+    'log_span',
+    'ProgressReporter',
+    'Instrumentation',
+    'perf',
     'DataProcessor',
     'inject_category_vectors',
+    'IndexManifest',
+    'ManifestEntry',
+    'CategoryCodes',
+    'build_category_codes',
+    'CentroidMatrix',
+    'CentroidPredictions',
+    'LexicalIndex',
+    'LexicalIndexError',
     'SearchCore',
+    'ScatterEngine',
     'VectorEngine',
+    'LazyVectorEngine',
     'UCSManager',
     'CategoryColorMapper',
     'umap_config',
@@ -27,4 +68,3 @@ __all__ = [
     'compute_gravity_layout',
     'load_ucs_coordinates_config',
 ]
-
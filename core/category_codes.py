@@ -0,0 +1,191 @@
+"""
+类别整数编码
+在索引时一次性将 CatID / 主类别编码为 int16 数组，并持久化查找表，
+分组、过滤、取色、标签和 UMAP 监督都可以直接用 NumPy 索引，不再逐条处理字符串
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+UNCATEGORIZED = "UNCATEGORIZED"
+UNCATEGORIZED_CODE = -1
+
+
+class CategoryCodesError(Exception):
+    """类别编码错误"""
+    pass
+
+
+@dataclass
+class CategoryCodes:
+    """
+    每条记录的类别编码（-1 表示未分类）
+
+    - catid_code[i]: CatID 在 catid_table 中的下标
+    - main_category_code[i]: 主类别在 main_category_table 中的下标
+    - catid_to_main[c]: CatID 编码 -> 主类别编码
+    """
+    catid_code: np.ndarray
+    main_category_code: np.ndarray
+    catid_table: List[str]
+    main_category_table: List[str]
+    catid_to_main: np.ndarray
+    _catid_lookup: Optional[Dict[str, int]] = field(default=None, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.catid_code)
+
+    @property
+    def num_catids(self) -> int:
+        return len(self.catid_table)
+
+    @property
+    def num_main_categories(self) -> int:
+        return len(self.main_category_table)
+
+    def catid_of(self, code: int) -> str:
+        """CatID 编码 -> CatID（-1 -> UNCATEGORIZED）"""
+        return self.catid_table[code] if code >= 0 else UNCATEGORIZED
+
+    def main_category_of(self, code: int) -> str:
+        """主类别编码 -> 主类别名称（-1 -> UNCATEGORIZED）"""
+        return self.main_category_table[code] if code >= 0 else UNCATEGORIZED
+
+    def code_for_catid(self, cat_id: Optional[str]) -> int:
+        """CatID -> 编码（未知或未分类为 -1）"""
+        if self._catid_lookup is None:
+            self._catid_lookup = {c: i for i, c in enumerate(self.catid_table)}
+        if not cat_id:
+            return UNCATEGORIZED_CODE
+        return self._catid_lookup.get(cat_id, UNCATEGORIZED_CODE)
+
+    def main_category_labels(self) -> List[str]:
+        """
+        每条记录的主类别名称列表（未分类为 "UNCATEGORIZED"）
+
+        供 inject_category_vectors 使用（OneHotEncoder 需要字符串标签）
+        """
+        table = np.array(self.main_category_table + [UNCATEGORIZED], dtype=object)
+        # -1 正好索引到末尾的 UNCATEGORIZED
+        return table[self.main_category_code].tolist()
+
+    def supervision_targets(self) -> np.ndarray:
+        """UMAP 监督学习标签：主类别编码，未分类为 -1（UMAP 视为无标签）"""
+        return self.main_category_code.astype(np.int32)
+
+    def catid_mask(self, predicate) -> np.ndarray:
+        """
+        按 CatID 过滤：predicate 只对查找表中的每个 CatID 调用一次
+
+        Args:
+            predicate: CatID -> bool（未分类记录以 "UNCATEGORIZED" 传入）
+
+        Returns:
+            (N,) bool
+        """
+        table_mask = np.array(
+            [bool(predicate(cat_id)) for cat_id in self.catid_table] + [bool(predicate(UNCATEGORIZED))],
+            dtype=bool
+        )
+        return table_mask[self.catid_code]
+
+    def save(self, path: Path) -> None:
+        """保存到 .npz（查找表以定长字符串数组保存，读取不需要 pickle）"""
+        path = Path(path)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(
+            tmp_path,
+            catid_code=self.catid_code,
+            main_category_code=self.main_category_code,
+            catid_to_main=self.catid_to_main,
+            catid_table=np.array(self.catid_table, dtype=str),
+            main_category_table=np.array(self.main_category_table, dtype=str),
+        )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'CategoryCodes':
+        """从 .npz 读取"""
+        try:
+            with np.load(Path(path), allow_pickle=False) as data:
+                return cls(
+                    catid_code=data['catid_code'].astype(np.int16, copy=False),
+                    main_category_code=data['main_category_code'].astype(np.int16, copy=False),
+                    catid_table=data['catid_table'].tolist(),
+                    main_category_table=data['main_category_table'].tolist(),
+                    catid_to_main=data['catid_to_main'].astype(np.int16, copy=False),
+                )
+        except (OSError, KeyError, ValueError) as e:
+            raise CategoryCodesError(f"读取类别编码失败 {path}: {e}") from e
+
+
+def build_category_codes(
+    metadata: Sequence[Dict],
+    ucs_manager=None,
+    color_mapper=None
+) -> CategoryCodes:
+    """
+    从元数据构建类别编码
+
+    CatID -> 主类别的映射优先使用 UCSManager.get_main_category_by_id，
+    其次 CategoryColorMapper.get_category_from_catid；每个 CatID 只解析一次。
+
+    Args:
+        metadata: 元数据列表（'category' 字段为 CatID）
+        ucs_manager: UCSManager 实例（可选）
+        color_mapper: CategoryColorMapper 实例（可选）
+    """
+    # 1. CatID 字典编码（按首次出现顺序）
+    lookup = {UNCATEGORIZED: UNCATEGORIZED_CODE, '': UNCATEGORIZED_CODE, None: UNCATEGORIZED_CODE}
+    catid_table: List[str] = []
+
+    def code_of(cat_id):
+        code = lookup.get(cat_id)
+        if code is None:
+            code = len(catid_table)
+            catid_table.append(cat_id)
+            lookup[cat_id] = code
+        return code
+
+    catid_code = np.fromiter(
+        (code_of(m.get('category') if isinstance(m, dict) else getattr(m, 'category', None)) for m in metadata),
+        dtype=np.int32, count=len(metadata)
+    )
+    if len(catid_table) > np.iinfo(np.int16).max:
+        raise CategoryCodesError(f"CatID 数量过多，无法用 int16 编码: {len(catid_table)}")
+
+    # 2. CatID -> 主类别（按查找表逐项解析）
+    main_lookup: Dict[str, int] = {}
+    main_category_table: List[str] = []
+    catid_to_main = np.full(len(catid_table), UNCATEGORIZED_CODE, dtype=np.int16)
+    for code, cat_id in enumerate(catid_table):
+        main_category = None
+        if ucs_manager is not None:
+            main_category = ucs_manager.get_main_category_by_id(cat_id)
+        elif color_mapper is not None:
+            main_category = color_mapper.get_category_from_catid(cat_id)
+        if not main_category or main_category == UNCATEGORIZED:
+            continue
+        main_code = main_lookup.get(main_category)
+        if main_code is None:
+            main_code = len(main_category_table)
+            main_category_table.append(main_category)
+            main_lookup[main_category] = main_code
+        catid_to_main[code] = main_code
+
+    # 3. 逐条主类别编码：查表（-1 保持 -1）
+    catid_code = catid_code.astype(np.int16)
+    main_with_uncategorized = np.append(catid_to_main, np.int16(UNCATEGORIZED_CODE))
+    main_category_code = main_with_uncategorized[catid_code]
+
+    return CategoryCodes(
+        catid_code=catid_code,
+        main_category_code=main_category_code,
+        catid_table=catid_table,
+        main_category_table=main_category_table,
+        catid_to_main=catid_to_main,
+    )
@@ -5,10 +5,46 @@ Category 颜色映射器
 
 import hashlib
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
+
+import numpy as np
 from PySide6.QtGui import QColor
 
 
+# 未分类 / 空 key 的颜色
+UNCATEGORIZED_COLOR = '#333333'
+
+
+def build_rgba_lut(colors: Sequence[QColor], alpha: Optional[int] = None) -> np.ndarray:
+    """
+    QColor 列表 -> RGBA 查找表
+
+    末尾追加一行未分类颜色，类别编码 -1 正好索引到它，
+    因此 lut[codes] 一次完成逐点 / 逐格取色。
+
+    Args:
+        colors: 与类别编码查找表对齐的颜色
+        alpha: 统一覆盖的透明度（None 表示使用颜色自身的 alpha）
+
+    Returns:
+        (len(colors) + 1, 4) uint8
+    """
+    default = QColor(UNCATEGORIZED_COLOR)
+    lut = np.array(
+        [c.getRgb() for c in colors] + [default.getRgb()],
+        dtype=np.uint8
+    ).reshape(-1, 4)
+    if alpha is not None:
+        lut[:, 3] = alpha
+    return lut
+
+
+def rgba_to_argb32(rgba: np.ndarray) -> np.ndarray:
+    """(N, 4) uint8 RGBA -> (N,) uint32 ARGB（与 QColor.rgba() / QColor.fromRgba 一致）"""
+    rgba = np.asarray(rgba, dtype=np.uint32).reshape(-1, 4)
+    return (rgba[:, 3] << 24) | (rgba[:, 0] << 16) | (rgba[:, 1] << 8) | rgba[:, 2]
+
+
 class CategoryColorMapper:
     """
     Category 颜色映射器 - 简化版
@@ -29,6 +65,7 @@ class CategoryColorMapper:
         # 核心映射表
         self.catid_to_category: Dict[str, str] = {}  # CatID -> 主类别名 (如 "AIRBLOW" -> "AIR")
         self.category_to_color: Dict[str, QColor] = {}  # 主类别名 -> 颜色 (如 "AIR" -> Green)
+        self._color_cache: Dict[str, QColor] = {}  # 原始 key -> 颜色（get_color 结果缓存）
         
         self._load_data()
     
@@ -68,32 +105,32 @@ class CategoryColorMapper:
             # 清洗列名
             df.columns = [c.strip() for c in df.columns]
             
-            # 第一步：收集所有唯一的主类别
-            unique_categories = set()
-            for _, row in df.iterrows():
-                if 'Category' in row:
-                    cat = str(row['Category']).strip().upper()
-                    if cat:
-                        unique_categories.add(cat)
+            if 'Category' not in df.columns:
+                print("[WARNING] Color Mapper: CSV 缺少 Category 列")
+                return
+            
+            def normalize(column):
+                # 整列规范化（NaN 经 str 化为 "NAN"，与逐行 str() 一致）
+                values = df[column].to_numpy(dtype=object).astype(str)
+                return np.char.upper(np.char.strip(values)).astype(object)
+            
+            categories = normalize('Category')
+            cat_ids = normalize('CatID') if 'CatID' in df.columns else np.full(len(df), '', dtype=object)
             
-            # 第二步：为 82 个主类别分配颜色（按字母顺序，确保确定性）
-            sorted_categories = sorted(unique_categories)
+            # 第一步：为 82 个主类别分配颜色（按字母顺序，确保确定性）
+            sorted_categories = sorted(set(categories[categories != ''].tolist()))
             total = len(sorted_categories)
             
             for idx, category in enumerate(sorted_categories):
                 self.category_to_color[category] = self._generate_category_color(category, idx, total)
             
-            # 第三步：建立 CatID → 主类别 映射
-            for _, row in df.iterrows():
-                cat_id = str(row.get('CatID', '')).strip().upper()
-                category = str(row.get('Category', '')).strip().upper()
-                
-                if cat_id and category:
-                    self.catid_to_category[cat_id] = category
-                    
-                # 同时把主类别名也作为键（方便直接用主类别查颜色）
-                if category:
-                    self.catid_to_category[category] = category
+            # 第二步：建立 CatID → 主类别 映射
+            # 每行依次写入 (CatID -> 主类别) 和 (主类别 -> 主类别)，
+            # 交错展开后一次写入字典，后写覆盖先写的顺序与逐行处理相同
+            keys = np.stack([cat_ids, categories], axis=1).ravel()
+            values = np.repeat(categories, 2)
+            valid = (keys != '') & (values != '')
+            self.catid_to_category.update(zip(keys[valid].tolist(), values[valid].tolist()))
             
             print(f"[INFO] Color Mapper: 已加载 {len(self.catid_to_category)} 个 CatID 映射")
             print(f"[INFO] Color Mapper: 已生成 {len(self.category_to_color)} 个主类别颜色")
@@ -116,14 +153,24 @@ class CategoryColorMapper:
             QColor 对象
         """
         if not key:
-            return QColor('#333333')
+            return QColor(UNCATEGORIZED_COLOR)
         
+        # 同一 key 只解析一次（返回的 QColor 为共享对象，调用方修改前需复制）
+        cached = self._color_cache.get(key)
+        if cached is not None:
+            return cached
+        color = self._resolve_color(key)
+        self._color_cache[key] = color
+        return color
+    
+    def _resolve_color(self, key: str) -> QColor:
+        """key -> 颜色（未缓存的完整查找流程）"""
         # 规范化：去除空白并转大写
         normalized_key = str(key).strip().upper()
         
         # UNCATEGORIZED 返回灰色
         if not normalized_key or normalized_key == "UNCATEGORIZED":
-            return QColor('#333333')
+            return QColor(UNCATEGORIZED_COLOR)
         
         # 第一步：通过 CatID 查找主类别
         category = self.catid_to_category.get(normalized_key)
@@ -148,6 +195,20 @@ class CategoryColorMapper:
         hash_val = int(hash_obj.hexdigest(), 16)
         return QColor.fromHsv(abs(hash_val) % 360, 200, 220)
     
+    def build_color_lut(self, keys: Sequence[Optional[str]], alpha: Optional[int] = None) -> np.ndarray:
+        """
+        按类别编码查找表构建 RGBA 查找表
+        
+        Args:
+            keys: 编码 -> key（如 CategoryCodes.catid_table / main_category_table）
+            alpha: 统一覆盖的透明度
+            
+        Returns:
+            (len(keys) + 1, 4) uint8，最后一行为未分类颜色（对应编码 -1），
+            用法：lut[codes]
+        """
+        return build_rgba_lut([self.get_color(key) for key in keys], alpha)
+    
     # 向后兼容方法
     def get_color_for_catid(self, catid: Optional[str], filename: Optional[str] = None) -> QColor:
         """向后兼容"""
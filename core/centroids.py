@@ -0,0 +1,333 @@
+"""
+Platinum Centroids 矩阵
+754 个 CatID 质心按行堆叠为 (n, dim) float32 矩阵（与 CatID 数组一一对应），
+质心预测用分块矩阵乘法 + argmax 完成，不再逐条记录、逐个质心调用 np.dot
+
+质心以 .npy 矩阵 + JSON 索引（CatID 顺序、每条定义的哈希、模型、矩阵文件哈希）保存，
+生成工具据此只重新编码定义有变化的 CatID
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# AI 预测阈值（超参数，可调：太少预测 -> 降到 0.35；瞎猜 -> 升到 0.5）
+AI_PREDICTION_THRESHOLD = 0.4
+
+# 每条记录保留的候选数（调阈值时不必重新计算相似度）
+PREDICTION_TOP_K = 3
+
+# 每块的行数：(chunk_rows, n_centroids) 的分数矩阵约 24 MB
+PREDICT_CHUNK_ROWS = 8192
+
+CENTROID_INDEX_VERSION = 2
+
+# 缓存目录中的质心文件
+CENTROID_MATRIX_FILE = "platinum_centroids.npy"
+CENTROID_INDEX_FILE = "platinum_centroids_index.json"
+
+
+class CentroidError(Exception):
+    """质心矩阵错误"""
+    pass
+
+
+@dataclass
+class CentroidMatrix:
+    """
+    堆叠后的质心
+
+    - cat_ids[c]: 第 c 行对应的 CatID
+    - matrix[c]: 第 c 个质心向量（已归一化，点积即余弦相似度）
+    """
+    cat_ids: np.ndarray
+    matrix: np.ndarray
+
+    @classmethod
+    def from_dict(cls, centroids: Dict[str, np.ndarray]) -> 'CentroidMatrix':
+        """{CatID: Vector} -> 矩阵（行顺序与字典顺序一致）"""
+        if not centroids:
+            return cls(cat_ids=np.zeros(0, dtype=str), matrix=np.zeros((0, 0), dtype=np.float32))
+        cat_ids = np.array(list(centroids.keys()), dtype=str)
+        matrix = np.ascontiguousarray(
+            np.stack([np.asarray(v, dtype=np.float32).reshape(-1) for v in centroids.values()])
+        )
+        return cls(cat_ids=cat_ids, matrix=matrix)
+
+    def __len__(self) -> int:
+        return len(self.cat_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+
+    def best_match(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        单个向量的最佳 CatID（同分时取靠前的质心）
+
+        Returns:
+            (cat_id, score)；没有质心时为 (None, -1.0)
+        """
+        if len(self) == 0:
+            return None, -1.0
+        scores = self.matrix @ np.asarray(vector, dtype=np.float32).reshape(-1)
+        best = int(np.argmax(scores))
+        return str(self.cat_ids[best]), float(scores[best])
+
+    def top_k(
+        self,
+        embeddings: np.ndarray,
+        k: int = PREDICTION_TOP_K,
+        chunk_rows: int = PREDICT_CHUNK_ROWS
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每行向量的前 k 个质心（分块矩阵乘法）
+
+        Args:
+            embeddings: (m, dim) 归一化向量
+            k: 候选数
+            chunk_rows: 每块的行数
+
+        Returns:
+            (indices, scores)：(m, k) 的质心行号（int32）和相似度（float32），按相似度降序，
+            同分时行号小的在前（第一列与逐个比较取最大值的结果一致）
+        """
+        m = len(embeddings)
+        k = max(1, min(k, len(self)))
+        indices = np.zeros((m, k), dtype=np.int32)
+        scores = np.zeros((m, k), dtype=np.float32)
+        if m == 0 or len(self) == 0:
+            return indices[:, :0], scores[:, :0]
+        if embeddings.shape[1] != self.dim:
+            raise CentroidError(f"向量维度 {embeddings.shape[1]} 与质心维度 {self.dim} 不一致")
+
+        centroids_t = self.matrix.T
+        for start in range(0, m, chunk_rows):
+            chunk = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+            similarities = chunk @ centroids_t
+            if k == 1:
+                top = np.argmax(similarities, axis=1)[:, None]
+            else:
+                # 质心轴很短（≤754）：完整稳定排序，同分时行号小的在前；
+                # argpartition 在多于 k 个同分值跨越边界时会任意取舍，第一列可能与逐个比较不一致
+                top = np.argsort(-similarities, axis=1, kind='stable')[:, :k]
+            indices[start:start + len(chunk)] = top
+            scores[start:start + len(chunk)] = np.take_along_axis(similarities, top, axis=1)
+        return indices, scores
+
+    def predict(self, embeddings: np.ndarray, rows: np.ndarray, k: int = PREDICTION_TOP_K) -> 'CentroidPredictions':
+        """对 embeddings 中指定的行做质心预测"""
+        rows = np.asarray(rows, dtype=np.int64)
+        indices, scores = self.top_k(embeddings[rows], k=k)
+        return CentroidPredictions(
+            rows=rows,
+            top_indices=indices,
+            top_scores=scores,
+            cat_ids=self.cat_ids
+        )
+
+
+@dataclass
+class CentroidPredictions:
+    """
+    质心预测结果（索引时保存，调整阈值时直接复用）
+
+    - rows[j]: 元数据行号
+    - top_indices[j] / top_scores[j]: 该行的前 k 个质心行号和相似度（降序）
+    - cat_ids: 质心行号 -> CatID
+    """
+    rows: np.ndarray
+    top_indices: np.ndarray
+    top_scores: np.ndarray
+    cat_ids: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def accepted(self, threshold: float = AI_PREDICTION_THRESHOLD) -> Iterator[Tuple[int, str, float]]:
+        """最佳相似度超过阈值的预测：(行号, CatID, 相似度)"""
+        if self.top_scores.shape[1] == 0:
+            return
+        keep = np.flatnonzero(self.top_scores[:, 0] > threshold)
+        best = self.top_indices[keep, 0]
+        for row, code, score in zip(self.rows[keep].tolist(), best.tolist(), self.top_scores[keep, 0].tolist()):
+            yield row, str(self.cat_ids[code]), score
+
+    def candidates(self, j: int) -> List[Tuple[str, float]]:
+        """第 j 条预测的候选 [(CatID, 相似度), ...]"""
+        return [
+            (str(self.cat_ids[code]), float(score))
+            for code, score in zip(self.top_indices[j].tolist(), self.top_scores[j].tolist())
+        ]
+
+    def save(self, path: Path) -> None:
+        """保存到 .npz（CatID 以定长字符串数组保存，读取不需要 pickle）"""
+        path = Path(path)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(
+            tmp_path,
+            rows=self.rows,
+            top_indices=self.top_indices,
+            top_scores=self.top_scores,
+            cat_ids=np.asarray(self.cat_ids, dtype=str),
+        )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'CentroidPredictions':
+        """从 .npz 读取"""
+        try:
+            with np.load(Path(path), allow_pickle=False) as data:
+                return cls(
+                    rows=data['rows'].astype(np.int64, copy=False),
+                    top_indices=data['top_indices'].astype(np.int32, copy=False),
+                    top_scores=data['top_scores'].astype(np.float32, copy=False),
+                    cat_ids=data['cat_ids'],
+                )
+        except (OSError, KeyError, ValueError) as e:
+            raise CentroidError(f"读取质心预测失败 {path}: {e}") from e
+
+
+def definition_hash(description: str) -> str:
+    """CatID 定义文本的哈希（blake2b，16 字节）"""
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def file_hash(path) -> str:
+    """文件内容的哈希（blake2b，16 字节）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class CentroidPlan:
+    """质心生成计划：与已保存的质心比较后，哪些 CatID 需要重新编码"""
+    to_encode: List[str] = field(default_factory=list)  # 新增或定义有变化
+    reused: List[str] = field(default_factory=list)  # 定义未变化，沿用已保存的向量
+    removed: List[str] = field(default_factory=list)  # 已从定义中删除
+    reason: str = ""  # 需要全部重新编码的原因（文件缺失 / 模型变化等）
+
+    @property
+    def up_to_date(self) -> bool:
+        return not self.to_encode and not self.removed and not self.reason
+
+
+class CentroidStore:
+    """
+    缓存目录中的质心文件
+
+    - platinum_centroids.npy: (n, dim) float32 矩阵
+    - platinum_centroids_index.json: {version, model, dim, cat_ids, hashes, matrix_hash}，cat_ids[i] 对应矩阵第 i 行
+
+    两个文件分别替换，中途中断时矩阵和索引可能不配套；索引记录矩阵文件的哈希，
+    不一致时 load() 报错、plan() 要求全部重新编码。
+    """
+
+    def __init__(self, cache_dir):
+        cache_dir = Path(cache_dir)
+        self.matrix_path = cache_dir / CENTROID_MATRIX_FILE
+        self.index_path = cache_dir / CENTROID_INDEX_FILE
+
+    def exists(self) -> bool:
+        return self.matrix_path.exists() and self.index_path.exists()
+
+    def read_index(self) -> Optional[Dict]:
+        """读取索引；文件不存在或已损坏时返回 None"""
+        if not self.index_path.exists():
+            return None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != CENTROID_INDEX_VERSION:
+            return None
+        return index
+
+    def matrix_matches(self, index: Dict) -> bool:
+        """矩阵文件是否与索引配套（哈希一致）"""
+        try:
+            return file_hash(self.matrix_path) == index.get('matrix_hash')
+        except OSError:
+            return False
+
+    def load(self) -> CentroidMatrix:
+        """读取质心矩阵"""
+        index = self.read_index()
+        if index is None:
+            raise CentroidError(f"质心索引不存在或已损坏: {self.index_path}")
+        if not self.matrix_matches(index):
+            raise CentroidError(f"质心矩阵与索引不配套（保存时可能被中断）: {self.matrix_path}")
+        try:
+            matrix = np.load(self.matrix_path, allow_pickle=False)
+        except (OSError, ValueError) as e:
+            raise CentroidError(f"读取质心矩阵失败 {self.matrix_path}: {e}") from e
+        cat_ids = index.get('cat_ids', [])
+        if matrix.ndim != 2 or len(matrix) != len(cat_ids):
+            raise CentroidError(f"质心矩阵形状 {matrix.shape} 与索引中的 {len(cat_ids)} 个 CatID 不一致")
+        return CentroidMatrix(
+            cat_ids=np.array(cat_ids, dtype=str),
+            matrix=np.ascontiguousarray(matrix, dtype=np.float32)
+        )
+
+    def plan(self, definitions: Dict[str, str], model: str) -> CentroidPlan:
+        """
+        对比定义与已保存的质心
+
+        Args:
+            definitions: {CatID: 定义文本}（按输出顺序）
+            model: 编码模型标识（模型变化时全部重新编码）
+        """
+        index = self.read_index()
+        if index is None or not self.matrix_path.exists():
+            return CentroidPlan(to_encode=list(definitions), reason="质心文件不存在")
+        if not self.matrix_matches(index):
+            return CentroidPlan(to_encode=list(definitions), reason="质心矩阵与索引不配套")
+        if index.get('model') != model:
+            return CentroidPlan(to_encode=list(definitions), reason=f"模型变化: {index.get('model')} -> {model}")
+
+        stored = index.get('hashes', {})
+        plan = CentroidPlan()
+        for cat_id, description in definitions.items():
+            if stored.get(cat_id) == definition_hash(description):
+                plan.reused.append(cat_id)
+            else:
+                plan.to_encode.append(cat_id)
+        plan.removed = [cat_id for cat_id in stored if cat_id not in definitions]
+        # 只有顺序变化时也重写（矩阵行顺序与定义顺序一致）
+        if not plan.to_encode and not plan.removed and list(stored) != list(definitions):
+            plan.reason = "CatID 顺序变化"
+        return plan
+
+    def save(self, centroids: CentroidMatrix, definitions: Dict[str, str], model: str) -> None:
+        """
+        保存矩阵和索引（先写临时文件再替换）
+
+        索引最后写入并记录矩阵文件的哈希：两次替换之间中断时，旧索引与新矩阵的哈希不一致，
+        读取时能发现，不会把新矩阵的行错配到旧的 CatID 顺序上。
+        """
+        tmp_matrix = self.matrix_path.with_name(self.matrix_path.stem + '.tmp.npy')
+        np.save(tmp_matrix, np.ascontiguousarray(centroids.matrix, dtype=np.float32))
+        matrix_hash = file_hash(tmp_matrix)
+        tmp_matrix.replace(self.matrix_path)
+
+        index = {
+            'version': CENTROID_INDEX_VERSION,
+            'model': model,
+            'dim': centroids.dim,
+            'cat_ids': [str(cat_id) for cat_id in centroids.cat_ids],
+            'hashes': {str(cat_id): definition_hash(definitions[cat_id]) for cat_id in centroids.cat_ids},
+            'matrix_hash': matrix_hash,
+        }
+        tmp_index = self.index_path.with_suffix('.json.tmp')
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        tmp_index.replace(self.index_path)
@@ -4,12 +4,20 @@
 实现"慢速AI计算"到"极速本地搜索"的转换
 """
 
+import logging
 import pickle
+import time
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
 
+from .index_manifest import IndexManifest, ManifestEntry
+from .category_codes import CategoryCodes, CategoryCodesError, build_category_codes
+from .centroids import AI_PREDICTION_THRESHOLD, CentroidError, CentroidMatrix, CentroidPredictions, CentroidStore
+from .lexical_index import FTS5_AVAILABLE, LexicalIndex, LexicalIndexError
+from .log import get_logger, log_span, ProgressReporter
+
 # 导入 PySide6 Signal 机制
 try:
     from PySide6.QtCore import QObject, Signal
@@ -26,6 +34,12 @@ except ImportError:
     QT_AVAILABLE = False
 
 
+logger = get_logger('data_processor')
+
+# 关键词索引文件名前缀（每次构建写入 lexical_index_<时间戳>.sqlite，当前文件记录在索引清单中）
+LEXICAL_INDEX_PREFIX = "lexical_index"
+
+
 class DataProcessorError(Exception):
     """数据处理器错误"""
     pass
@@ -68,10 +82,22 @@ class DataProcessor(QObject):
         self.coordinates_cache_path = self.cache_dir / "coordinates.npy"  # 旧格式（向后兼容）
         self.coordinates_ucs_cache_path = self.cache_dir / "coordinates_ucs.npy"  # UCS模式
         self.coordinates_gravity_cache_path = self.cache_dir / "coordinates_gravity.npy"  # Gravity模式
-        self.platinum_centroids_path = self.cache_dir / "platinum_centroids_754.pkl"  # 754 CatID 版本
+        self.centroid_store = CentroidStore(self.cache_dir)  # Platinum Centroids（.npy 矩阵 + JSON 索引）
+        self.platinum_centroids_path = self.cache_dir / "platinum_centroids_754.pkl"  # 旧版 pickle 质心（只读兼容）
+        self.manifest_path = self.cache_dir / "index_manifest.json"
+        self.category_codes_path = self.cache_dir / "category_codes.npz"  # CatID / 主类别整数编码
+        self.centroid_predictions_path = self.cache_dir / "centroid_predictions.npz"  # 未分类记录的前 3 个质心候选
+        
+        # 索引清单（首次使用时读取一次）与已加载的索引（所有使用方共享同一份数组）
+        self._manifest: Optional[IndexManifest] = None
+        self._loaded_index: Optional[Tuple[List[Dict], np.ndarray]] = None
+        self._category_codes: Optional[CategoryCodes] = None
+        self._lexical_index: Optional[LexicalIndex] = None
         
         # AI 语义仲裁相关
         self.category_centroids: Dict[str, np.ndarray] = {}  # Category -> 质心向量（从 Platinum Centroids 加载）
+        self._centroid_matrix: Optional[CentroidMatrix] = None  # 堆叠后的质心（按需从 category_centroids 生成）
+        self._centroid_matrix_source: Optional[Tuple[int, int]] = None  # 生成时 category_centroids 的 (id, 长度)
         self.ucs_manager = None  # 将在需要时初始化
         
         # 强规则映射（从 rules.json 加载）
@@ -111,8 +137,12 @@ class DataProcessor(QObject):
         if QT_AVAILABLE:
             self.progress_signal.emit(5, "Loading data from database...")
         
+        build_span = log_span(logger, 'index.build', level=logging.INFO)
+        
         # 1. 从数据库获取数据
+        span = log_span(logger, 'index.import', limit=limit)
         metadata_list = self.importer.import_all(limit=limit)
+        span.end(records=len(metadata_list))
         
         # 2. 提取语义文本并转换为字典格式，同时进行智能分类
         texts = []
@@ -125,26 +155,23 @@ class DataProcessor(QObject):
                 self.ucs_manager = UCSManager()
                 self.ucs_manager.load_all()
         except Exception as e:
-            print(f"[WARNING] 无法初始化 UCSManager: {e}")
+            logger.warning(f"无法初始化 UCSManager: {e}")
             self.ucs_manager = None
         
         # 【Platinum Centroids】加载预定义的标准质心（而不是从用户数据计算）
         if QT_AVAILABLE:
             self.progress_signal.emit(10, "Loading platinum centroids...")
-        print("[INFO] 正在加载 Platinum Centroids（标准 UCS 定义质心）...")
-        import sys
-        sys.stdout.flush()  # 强制刷新输出
+        logger.info("正在加载 Platinum Centroids（标准 UCS 定义质心）...")
         self._load_platinum_centroids()
         if self.category_centroids:
-            print(f"[INFO] Platinum Centroids 加载完成，共 {len(self.category_centroids)} 个标准质心")
+            logger.info(f"Platinum Centroids 加载完成，共 {len(self.category_centroids)} 个标准质心")
         else:
-            print("[WARNING] Platinum Centroids 未找到，AI 仲裁将无法工作")
-            print("   请先运行: python tools/generate_platinum_centroids.py")
-        sys.stdout.flush()
+            logger.warning("Platinum Centroids 未找到，AI 仲裁将无法工作，请先运行: python tools/generate_platinum_centroids.py")
         
         # Phase 3.5: 处理元数据并应用 Smart Metadata Arbitration
-        print(f"[INFO] 处理 {len(metadata_list)} 条记录，应用 Smart Metadata Arbitration...")
-        sys.stdout.flush()
+        logger.info(f"处理 {len(metadata_list)} 条记录，应用 Smart Metadata Arbitration...")
+        span = log_span(logger, 'index.arbitration', records=len(metadata_list))
+        progress = ProgressReporter(logger, "AI 语义仲裁", total=len(metadata_list))
         processed_count = 0
         for meta in metadata_list:
             # Phase 3.5: 优先使用 rich_context_text，向后兼容 semantic_text
@@ -181,15 +208,12 @@ class DataProcessor(QObject):
                 metadata_dicts.append(meta_dict)
                 processed_count += 1
                 
-                # 每处理 1000 条输出一次进度
-                if processed_count % 1000 == 0:
-                    print(f"   [进度] 已处理 {processed_count}/{len(metadata_list)} 条记录...")
-                    import sys
-                    sys.stdout.flush()  # 强制刷新输出
+                # 限频输出进度（不再每 1000 条 print + flush）
+                progress.update(processed_count)
         
-        print(f"[INFO] AI 语义仲裁完成，处理了 {processed_count} 条记录")
-        import sys
-        sys.stdout.flush()
+        progress.finish()
+        span.end(processed=processed_count)
+        logger.info(f"AI 语义仲裁完成，处理了 {processed_count} 条记录")
         
         if not texts:
             raise DataProcessorError("没有可用的语义文本数据")
@@ -198,9 +222,8 @@ class DataProcessor(QObject):
         if QT_AVAILABLE:
             self.progress_signal.emit(20, "Encoding vectors...")
         
-        print(f"[INFO] 开始向量化 {len(texts)} 条文本...")
-        import sys
-        sys.stdout.flush()
+        logger.info(f"开始向量化 {len(texts)} 条文本...")
+        span = log_span(logger, 'index.encode', texts=len(texts), batch_size=batch_size)
         
         try:
             from tqdm import tqdm
@@ -215,53 +238,48 @@ class DataProcessor(QObject):
             normalize_embeddings=True
         )
         
-        print(f"[INFO] 向量化完成，向量维度: {embeddings.shape}")
-        sys.stdout.flush()
+        span.end(dim=int(embeddings.shape[1]) if embeddings.ndim == 2 else 0)
+        logger.info(f"向量化完成，向量维度: {embeddings.shape}")
         
         # 4. 【新增】AI 质心预测（针对 UNCATEGORIZED 项目）
+        centroid_predictions = None
         if self.category_centroids and len(embeddings) > 0:
-            print(f"[INFO] 开始AI质心预测（针对未分类项目）...")
-            sys.stdout.flush()
-            ai_predicted_count = 0
+            logger.info("开始AI质心预测（针对未分类项目）...")
+            centroids = self.centroid_matrix()
+            span = log_span(logger, 'index.centroid_predict', centroids=len(centroids))
             
-            for i, meta_dict in enumerate(metadata_dicts):
-                if i >= len(embeddings):
-                    break
-                
-                # 检查是否为未分类项目
-                current_category = meta_dict.get('category', '')
-                if not current_category or current_category == 'UNCATEGORIZED':
-                    # 计算与所有质心的余弦相似度
-                    embedding = embeddings[i]
-                    best_cat_id = None
-                    best_score = -1.0
-                    
-                    for cat_id, centroid in self.category_centroids.items():
-                        # 已归一化，直接点积即可（余弦相似度）
-                        score = np.dot(embedding, centroid)
-                        if score > best_score:
-                            best_score = score
-                            best_cat_id = cat_id
-                    
-                    # 阈值检查（超参数，可调：太少预测 -> 降到 0.35；瞎猜 -> 升到 0.5）
-                    if best_cat_id and best_score > 0.4:
-                        meta_dict['category'] = best_cat_id
-                        meta_dict['is_ai_predicted'] = True
-                        ai_predicted_count += 1
-                        if ai_predicted_count <= 10:  # 只打印前10个，避免输出过多
-                            filename = meta_dict.get('filename', 'Unknown')
-                            print(f"   [AI预测] {filename} -> {best_cat_id} (相似度: {best_score:.3f})")
+            # 未分类的行（分块矩阵乘法一次算出与所有质心的余弦相似度，保留前 3 个候选）
+            rows = np.array([
+                i for i, meta_dict in enumerate(metadata_dicts[:len(embeddings)])
+                if not meta_dict.get('category', '') or meta_dict.get('category') == 'UNCATEGORIZED'
+            ], dtype=np.int64)
+            try:
+                centroid_predictions = centroids.predict(embeddings, rows)
+            except CentroidError as e:
+                logger.warning(f"AI质心预测跳过: {e}")
+            
+            ai_predicted_count = 0
+            if centroid_predictions is not None:
+                for row, best_cat_id, best_score in centroid_predictions.accepted(AI_PREDICTION_THRESHOLD):
+                    meta_dict = metadata_dicts[row]
+                    meta_dict['category'] = best_cat_id
+                    meta_dict['is_ai_predicted'] = True
+                    ai_predicted_count += 1
+                    if ai_predicted_count <= 10:  # 只打印前10个，避免输出过多
+                        filename = meta_dict.get('filename', 'Unknown')
+                        logger.debug(f"[AI预测] {filename} -> {best_cat_id} (相似度: {best_score:.3f})")
             
+            span.end(candidates=len(rows), predicted=ai_predicted_count)
             if ai_predicted_count > 0:
-                print(f"[INFO] AI质心预测完成，共预测 {ai_predicted_count} 个未分类项目")
+                logger.info(f"AI质心预测完成，共预测 {ai_predicted_count} 个未分类项目")
             else:
-                print(f"[INFO] AI质心预测完成，未发现需要预测的项目")
-            sys.stdout.flush()
+                logger.info("AI质心预测完成，未发现需要预测的项目")
         
         if QT_AVAILABLE:
             self.progress_signal.emit(80, "Saving cache...")
         
         # 5. 保存到缓存
+        span = log_span(logger, 'index.save', records=len(metadata_dicts))
         with open(self.metadata_cache_path, 'wb') as f:
             pickle.dump(metadata_dicts, f)
         
@@ -277,6 +295,36 @@ class DataProcessor(QObject):
         with open(self.index_info_path, 'wb') as f:
             pickle.dump(index_info, f)
         
+        # 类别整数编码（索引时生成一次，供取色 / 标签 / UMAP 监督使用）
+        category_codes = build_category_codes(metadata_dicts, ucs_manager=self.ucs_manager)
+        category_codes.save(self.category_codes_path)
+        
+        # 质心候选（调整阈值时复用，不必重新计算相似度）
+        if centroid_predictions is not None:
+            centroid_predictions.save(self.centroid_predictions_path)
+        
+        # 更新索引清单（写入时计算一次内容哈希）
+        manifest = self.load_manifest()
+        metadata_entry = manifest.record('metadata', self.metadata_cache_path, count=len(metadata_dicts))
+        manifest.record('embeddings', self.embeddings_cache_path, count=len(embeddings_float32))
+        manifest.record('category_codes', self.category_codes_path, count=len(category_codes))
+        if centroid_predictions is not None:
+            manifest.record('centroid_predictions', self.centroid_predictions_path, count=len(centroid_predictions))
+        
+        # 关键词索引（rowid = 元数据行号，与 texts 一一对应；记录所依据的元数据哈希）
+        lexical_index = self._build_lexical_index(texts)
+        if lexical_index is not None:
+            manifest.record('lexical_index', lexical_index.path, count=len(lexical_index), source=metadata_entry.sha)
+        else:
+            manifest.entries.pop('lexical_index', None)
+        manifest.save(self.manifest_path)
+        self._remove_stale_lexical_indexes(lexical_index.path if lexical_index is not None else None)
+        self._loaded_index = None
+        self._category_codes = category_codes
+        self._lexical_index = lexical_index
+        span.end()
+        build_span.end(records=len(metadata_dicts))
+        
         if QT_AVAILABLE:
             self.progress_signal.emit(100, "Complete")
         
@@ -293,17 +341,16 @@ class DataProcessor(QObject):
         rules_path = config_dir / "rules.json"
         
         if not rules_path.exists():
-            print(f"[WARNING] rules.json 不存在: {rules_path}")
-            print("   请先运行: python tools/generate_rules_json.py")
+            logger.warning(f"rules.json 不存在: {rules_path}，请先运行: python tools/generate_rules_json.py")
             self.strong_rules = {}
             return
         
         try:
             with open(rules_path, 'r', encoding='utf-8') as f:
                 self.strong_rules = json.load(f)
-            print(f"[INFO] 成功加载 {len(self.strong_rules)} 条强规则")
+            logger.info(f"成功加载 {len(self.strong_rules)} 条强规则")
         except Exception as e:
-            print(f"[ERROR] 加载 rules.json 失败: {e}")
+            logger.error(f"加载 rules.json 失败: {e}")
             self.strong_rules = {}
     
     def _load_platinum_centroids(self):
@@ -312,26 +359,69 @@ class DataProcessor(QObject):
         
         【754 CatID Source of Truth】保持 CatID 格式，不转换为 Category
         格式: {CatID: Vector}，例如 {"AIRBlow": vector, "WPNGun": vector}
+        
+        优先读取 .npy 矩阵 + 索引；没有时读取旧版 platinum_centroids_754.pkl
         """
+        if self.centroid_store.exists():
+            try:
+                centroids = self.centroid_store.load()
+            except CentroidError as e:
+                logger.exception(f"加载 Platinum Centroids 失败: {e}")
+                return
+            
+            # 【754 CatID Source of Truth】直接使用 CatID 作为 key，不转换
+            # 字典的值是矩阵的行视图，与堆叠后的矩阵共享内存
+            self.category_centroids = dict(zip(centroids.cat_ids.tolist(), centroids.matrix))
+            self._centroid_matrix = centroids
+            self._centroid_matrix_source = (id(self.category_centroids), len(self.category_centroids))
+            logger.info(f"成功加载 {len(self.category_centroids)} 个 CatID 质心（754 CatID Source of Truth）")
+            return
+        
         if not self.platinum_centroids_path.exists():
-            print(f"[WARNING] Platinum Centroids 文件不存在: {self.platinum_centroids_path}")
-            print("   请先运行: python tools/generate_platinum_centroids.py")
+            logger.warning(f"Platinum Centroids 文件不存在: {self.centroid_store.matrix_path}，请先运行: python tools/generate_platinum_centroids.py")
             return
         
+        # 旧版 pickle 质心（重新运行生成工具后改为 .npy）
         try:
             with open(self.platinum_centroids_path, 'rb') as f:
                 platinum_centroids = pickle.load(f)
             
-            # 【754 CatID Source of Truth】直接使用 CatID 作为 key，不转换
             # 格式: {CatID: Vector}，例如 {"AIRBlow": vector}
             self.category_centroids = platinum_centroids.copy()
+            self._centroid_matrix = None
             
-            print(f"[INFO] 成功加载 {len(self.category_centroids)} 个 CatID 质心（754 CatID Source of Truth）")
+            logger.info(f"成功加载 {len(self.category_centroids)} 个 CatID 质心（旧版 pickle，建议重新运行 tools/generate_platinum_centroids.py）")
             
         except Exception as e:
-            print(f"[ERROR] 加载 Platinum Centroids 失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"加载 Platinum Centroids 失败: {e}")
+    
+    def centroid_matrix(self) -> CentroidMatrix:
+        """
+        堆叠后的质心矩阵（category_centroids 被替换或增删后自动重新堆叠）
+        
+        Returns:
+            CentroidMatrix（行顺序与 category_centroids 一致）
+        """
+        source = (id(self.category_centroids), len(self.category_centroids))
+        if self._centroid_matrix is None or self._centroid_matrix_source != source:
+            self._centroid_matrix = CentroidMatrix.from_dict(self.category_centroids)
+            self._centroid_matrix_source = source
+        return self._centroid_matrix
+    
+    def load_centroid_predictions(self) -> Optional[CentroidPredictions]:
+        """
+        读取上次 build_index 保存的质心候选
+        
+        Returns:
+            CentroidPredictions；没有质心或文件不存在时返回 None
+        """
+        if not self.centroid_predictions_path.exists():
+            return None
+        try:
+            return CentroidPredictions.load(self.centroid_predictions_path)
+        except CentroidError as e:
+            logger.warning(str(e))
+            return None
     
     def _compute_category_centroids(self, metadata_list):
         """
@@ -342,8 +432,7 @@ class DataProcessor(QObject):
         
         保留此方法仅用于向后兼容，但不会被调用。
         """
-        print("[WARNING] _compute_category_centroids 已被废弃，请使用 Platinum Centroids")
-        print("   请运行: python tools/generate_platinum_centroids.py")
+        logger.warning("_compute_category_centroids 已被废弃，请使用 Platinum Centroids（运行: python tools/generate_platinum_centroids.py）")
         pass
     
     def _extract_category(self, meta_dict: Dict) -> Optional[Tuple[str, str]]:
@@ -430,18 +519,12 @@ class DataProcessor(QObject):
         try:
             # 向量化 rich_text（包含所有相关字段的拼接）
             vector = self.vector_engine.encode(rich_text)
-            best_cat_id = None
-            best_score = -1.0
             
-            # 与 754 个 UCS CatID 的向量质心比较（余弦相似度）
-            for cid, centroid in self.category_centroids.items():
-                score = np.dot(vector, centroid)
-                if score > best_score:
-                    best_score = score
-                    best_cat_id = cid
+            # 与 754 个 UCS CatID 的向量质心比较（余弦相似度，一次矩阵向量乘法）
+            best_cat_id, best_score = self.centroid_matrix().best_match(vector)
             
             # 相似度阈值: > 0.4（如果最高相似度 < 0.4，返回 "UNCATEGORIZED"）
-            if best_cat_id and best_score > 0.4:
+            if best_cat_id and best_score > AI_PREDICTION_THRESHOLD:
                 # 对AI预测结果也进行严格验证
                 if self.ucs_manager:
                     validated = self.ucs_manager.enforce_strict_category(best_cat_id)
@@ -452,19 +535,198 @@ class DataProcessor(QObject):
                 return "UNCATEGORIZED", f"未分类 (AI相似度过低:{best_score:.3f})"
                 
         except Exception as e:
-            print(f"AI Arbitration Error: {e}")
+            logger.warning(f"AI Arbitration Error: {e}")
             return "UNCATEGORIZED", f"未分类 (AI错误:{str(e)})"
 
         # 所有步骤都失败，返回 "UNCATEGORIZED"
         return "UNCATEGORIZED", "未分类"
     
+    def load_manifest(self) -> IndexManifest:
+        """
+        读取索引清单（只读一次，之后返回同一实例）
+        
+        Returns:
+            IndexManifest；清单文件不存在时为空清单（条目按需从 .npy 文件头补齐）
+        """
+        if self._manifest is None:
+            self._manifest = IndexManifest.load(self.manifest_path)
+        return self._manifest
+    
+    def describe_cache(self, name: str) -> Optional[ManifestEntry]:
+        """
+        获取缓存文件的清单条目（不加载数组数据）
+        
+        Args:
+            name: "embeddings" / "coordinates_ucs" / "coordinates_gravity" / "coordinates"
+        
+        Returns:
+            ManifestEntry；文件不存在时返回 None
+        """
+        path = self._cache_path_for(name)
+        manifest = self.load_manifest()
+        before = manifest.get(name)
+        entry = manifest.describe_npy(name, path)
+        if entry is not before:
+            # 清单过期（文件在清单外被改写）：按文件头刷新并写回
+            manifest.save(self.manifest_path)
+        return entry
+    
+    def load_category_codes(self) -> CategoryCodes:
+        """
+        读取类别整数编码（只读一次）
+        
+        旧缓存没有编码文件、或编码与元数据条数不一致时，从已加载的元数据重新生成并保存。
+        
+        Returns:
+            CategoryCodes
+        """
+        if self._category_codes is not None:
+            return self._category_codes
+        
+        metadata, _ = self.load_index()
+        codes = None
+        if self.category_codes_path.exists():
+            try:
+                codes = CategoryCodes.load(self.category_codes_path)
+            except CategoryCodesError as e:
+                logger.warning(str(e))
+            if codes is not None and len(codes) != len(metadata):
+                logger.warning(f"类别编码与元数据条数不一致: {len(codes)} vs {len(metadata)}，重新生成")
+                codes = None
+        
+        if codes is None:
+            if self.ucs_manager is None:
+                try:
+                    from core.ucs_manager import UCSManager
+                    self.ucs_manager = UCSManager()
+                    self.ucs_manager.load_all()
+                except Exception as e:
+                    logger.warning(f"无法初始化 UCSManager，主类别编码将全部为未分类: {e}")
+                    self.ucs_manager = None
+            codes = build_category_codes(metadata, ucs_manager=self.ucs_manager)
+            try:
+                codes.save(self.category_codes_path)
+                manifest = self.load_manifest()
+                manifest.record('category_codes', self.category_codes_path, count=len(codes))
+                manifest.save(self.manifest_path)
+            except OSError as e:
+                logger.warning(f"保存类别编码失败: {e}")
+        
+        self._category_codes = codes
+        return codes
+    
+    def _build_lexical_index(self, texts: List[str]) -> Optional[LexicalIndex]:
+        """
+        构建关键词索引；SQLite 不支持 FTS5 或写入失败时返回 None（搜索退化为纯向量）
+        
+        每次构建写入新的文件名：正在使用旧索引的搜索核心（例如重建图谱时的界面）仍打开着旧文件，
+        Windows 上无法替换被打开的文件。旧文件由 _remove_stale_lexical_indexes 清理。
+        """
+        # 不关闭旧索引：其它搜索核心可能仍在使用，引用释放后自动关闭
+        self._lexical_index = None
+        if not FTS5_AVAILABLE:
+            logger.warning("当前 SQLite 未启用 FTS5，跳过关键词索引（搜索只使用向量）")
+            return None
+        span = log_span(logger, 'index.lexical', texts=len(texts))
+        try:
+            path = self.cache_dir / f"{LEXICAL_INDEX_PREFIX}_{time.time_ns():x}.sqlite"
+            index = LexicalIndex.build(path, texts)
+        except (LexicalIndexError, OSError) as e:
+            logger.warning(f"构建关键词索引失败（搜索只使用向量）: {e}")
+            span.end(status='failed')
+            return None
+        span.end()
+        return index
+    
+    def load_lexical_index(self) -> Optional[LexicalIndex]:
+        """
+        读取关键词索引（只打开一次）
+        
+        清单中的索引条目记录了构建时元数据文件的内容哈希；旧缓存没有索引、
+        或元数据已变化（哈希不同）时，从已加载元数据的 rich_context_text 重新构建。
+        
+        Returns:
+            LexicalIndex；SQLite 不支持 FTS5 或构建失败时返回 None
+        """
+        if self._lexical_index is not None:
+            return self._lexical_index
+        
+        metadata, _ = self.load_index()
+        manifest = self.load_manifest()
+        metadata_sha = self._metadata_sha(manifest, len(metadata))
+        
+        index = None
+        entry = manifest.get('lexical_index')
+        if entry is not None and entry.source == metadata_sha:
+            try:
+                index = LexicalIndex.open(self.cache_dir / entry.file)
+            except LexicalIndexError as e:
+                logger.warning(str(e))
+        elif entry is not None:
+            logger.warning("关键词索引与当前元数据不一致（元数据已变化），重新构建")
+        
+        if index is None:
+            index = self._build_lexical_index([
+                meta.get('rich_context_text') or meta.get('semantic_text') or ''
+                for meta in metadata
+            ])
+            if index is not None:
+                manifest.record('lexical_index', index.path, count=len(index), source=metadata_sha)
+                manifest.save(self.manifest_path)
+                self._remove_stale_lexical_indexes(index.path)
+        
+        self._lexical_index = index
+        return index
+    
+    def _metadata_sha(self, manifest: IndexManifest, count: int) -> str:
+        """元数据缓存的内容哈希（清单条目与文件一致时直接使用，否则重新计算并记入清单）"""
+        entry = manifest.get('metadata')
+        if entry is None or entry.sha is None or not entry.matches_file(self.metadata_cache_path):
+            entry = manifest.record('metadata', self.metadata_cache_path, count=count)
+        return entry.sha
+    
+    def _remove_stale_lexical_indexes(self, keep: Optional[Path]):
+        """删除不再使用的关键词索引文件（仍被打开的文件在 Windows 上删除失败，留到下次清理）"""
+        for path in self.cache_dir.glob(f"{LEXICAL_INDEX_PREFIX}*.sqlite"):
+            if keep is not None and path == Path(keep):
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def _cache_path_for(self, name: str) -> Path:
+        """清单条目名 -> 缓存文件路径"""
+        paths = {
+            'metadata': self.metadata_cache_path,
+            'embeddings': self.embeddings_cache_path,
+            'coordinates': self.coordinates_cache_path,
+            'coordinates_ucs': self.coordinates_ucs_cache_path,
+            'coordinates_gravity': self.coordinates_gravity_cache_path,
+        }
+        if name not in paths:
+            raise DataProcessorError(f"未知的缓存条目: {name}")
+        return paths[name]
+    
+    def _coordinates_entry_name(self, mode: Optional[str]) -> str:
+        """坐标模式 -> 清单条目名"""
+        if mode in ("ucs", "gravity"):
+            return f"coordinates_{mode}"
+        return "coordinates"
+    
     def load_index(self) -> Tuple[List[Dict], np.ndarray]:
         """
         从缓存加载索引（毫秒级加载）
         
+        同一个 DataProcessor 只从磁盘读取一次，之后返回同一份（只读）数组，
+        SearchCore / SonicUniverse 等使用方共享，不再各自持有副本。
+        
         Returns:
             (metadata_list, embeddings_matrix) 元数据列表和向量矩阵
         """
+        if self._loaded_index is not None:
+            return self._loaded_index
+        
         if not self._cache_exists():
             raise DataProcessorError("缓存不存在，请先构建索引")
         
@@ -474,8 +736,15 @@ class DataProcessor(QObject):
         
         # 加载向量矩阵
         embeddings = np.load(self.embeddings_cache_path)
+        # 共享数组：禁止原地修改，需要修改的使用方必须自行复制
+        embeddings.flags.writeable = False
         
-        return metadata_dicts, embeddings
+        entry = self.describe_cache('embeddings')
+        if entry is not None and entry.count != len(metadata_dicts):
+            logger.warning(f"元数据条数与向量行数不一致: {len(metadata_dicts)} vs {entry.count}")
+        
+        self._loaded_index = (metadata_dicts, embeddings)
+        return self._loaded_index
     
     def load_coordinates(self, mode: str = "ucs") -> Optional[np.ndarray]:
         """
@@ -507,13 +776,13 @@ class DataProcessor(QObject):
             
             if valid_count == 0:
                 # 全部无效，删除损坏的缓存文件
-                print(f"[ERROR] 坐标文件全部无效（NaN/Inf），将删除并重新计算")
+                logger.error("坐标文件全部无效（NaN/Inf），将删除并重新计算")
                 coord_path.unlink()
                 return None
             elif valid_count < len(coords):
                 # 部分无效，报告但返回（调用方会过滤）
                 invalid_count = len(coords) - valid_count
-                print(f"[WARNING] 加载的坐标包含 {invalid_count} 个无效值（NaN/Inf），{valid_count} 个有效")
+                logger.warning(f"加载的坐标包含 {invalid_count} 个无效值（NaN/Inf），{valid_count} 个有效")
             
             return coords
         return None
@@ -537,12 +806,19 @@ class DataProcessor(QObject):
             coord_path = self.coordinates_ucs_cache_path
         
         np.save(coord_path, coordinates.astype(np.float32))
-        print(f"[INFO] 坐标已保存到: {coord_path} (mode={mode})")
+        
+        manifest = self.load_manifest()
+        manifest.record(coord_path.stem, coord_path, count=len(coordinates))
+        manifest.save(self.manifest_path)
+        logger.info(f"坐标已保存到: {coord_path} (mode={mode})")
     
     def validate_consistency(self, mode: str = "ucs") -> Tuple[bool, int, int]:
         """
         验证坐标文件与embeddings的一致性
         
+        只比较索引清单条目（或 .npy 文件头）中的行数，不加载数组数据。
+        坐标值的有效性（NaN/Inf）由 load_coordinates 负责检查。
+        
         Args:
             mode: 坐标模式 ("ucs", "gravity")
         
@@ -553,18 +829,17 @@ class DataProcessor(QObject):
             - coordinate_count: 坐标文件行数
         """
         # 检查embeddings文件
-        if not self.embeddings_cache_path.exists():
+        embeddings_entry = self.describe_cache('embeddings')
+        if embeddings_entry is None:
             return (False, 0, 0)
-        
-        embeddings = np.load(self.embeddings_cache_path)
-        embedding_count = len(embeddings)
+        embedding_count = embeddings_entry.count
         
         # 检查坐标文件
-        coords = self.load_coordinates(mode=mode)
-        if coords is None:
+        coords_entry = self.describe_cache(self._coordinates_entry_name(mode))
+        if coords_entry is None:
             return (False, embedding_count, 0)
         
-        coordinate_count = len(coords)
+        coordinate_count = coords_entry.count
         is_valid = (embedding_count == coordinate_count)
         
         return (is_valid, embedding_count, coordinate_count)
@@ -579,6 +854,19 @@ class DataProcessor(QObject):
             self.index_info_path.unlink()
         if self.coordinates_cache_path.exists():
             self.coordinates_cache_path.unlink()
+        if self.category_codes_path.exists():
+            self.category_codes_path.unlink()
+        if self.centroid_predictions_path.exists():
+            self.centroid_predictions_path.unlink()
+        if self._lexical_index is not None:
+            self._lexical_index.close()
+            self._lexical_index = None
+        self._remove_stale_lexical_indexes(None)
+        if self.manifest_path.exists():
+            self.manifest_path.unlink()
+        self._manifest = None
+        self._loaded_index = None
+        self._category_codes = None
 
 
 # ============================================================================
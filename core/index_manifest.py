@@ -0,0 +1,185 @@
+"""
+索引清单 (index manifest)
+记录每个缓存文件的行数、形状、dtype、大小、修改时间和内容哈希，
+一致性检查只比较清单条目或 .npy 文件头，不加载数组数据
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+MANIFEST_VERSION = 1
+_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class IndexManifestError(Exception):
+    """索引清单错误"""
+    pass
+
+
+def read_npy_header(path: Path) -> Tuple[Tuple[int, ...], str]:
+    """
+    只读取 .npy 文件头（不加载数据）
+
+    Returns:
+        (shape, dtype 字符串)
+    """
+    try:
+        with open(path, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    except (OSError, ValueError) as e:
+        raise IndexManifestError(f"无法读取 .npy 文件头 {path}: {e}") from e
+    return tuple(int(n) for n in shape), np.dtype(dtype).name
+
+
+def hash_file(path: Path) -> str:
+    """按块计算文件内容哈希（blake2b，16 字节摘要）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    """单个缓存文件的清单条目"""
+    file: str                       # 相对缓存目录的文件名
+    count: int                      # 行数（元数据条数 / 数组第一维）
+    shape: Tuple[int, ...] = ()     # 数组形状（非数组文件为空）
+    dtype: str = ""                 # 数组 dtype（非数组文件为空）
+    size: int = 0                   # 文件字节数
+    mtime_ns: int = 0               # 文件修改时间
+    sha: Optional[str] = None       # 内容哈希（由清单外写入的旧缓存为 None）
+    source: Optional[str] = None    # 派生文件：生成时源文件的内容哈希（如关键词索引 <- 元数据）
+
+    def matches_file(self, path: Path) -> bool:
+        """文件大小和修改时间是否与条目一致（即条目仍然有效）"""
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ManifestEntry':
+        data = dict(data)
+        data['shape'] = tuple(data.get('shape') or ())
+        return cls(**data)
+
+
+@dataclass
+class IndexManifest:
+    """
+    索引清单（cache/index_manifest.json）
+
+    条目名：metadata / embeddings / coordinates_ucs / coordinates_gravity / ...
+    """
+    version: int = MANIFEST_VERSION
+    updated: float = 0.0
+    entries: Dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> 'IndexManifest':
+        """读取清单；文件不存在或损坏时返回空清单"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION:
+                print(f"[WARNING] 索引清单版本不匹配，忽略: {path}")
+                return cls()
+            entries = {
+                name: ManifestEntry.from_dict(entry)
+                for name, entry in (data.get('entries') or {}).items()
+            }
+            return cls(version=data['version'], updated=data.get('updated', 0.0), entries=entries)
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print(f"[WARNING] 读取索引清单失败，忽略: {e}")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        """写入清单（先写临时文件再替换，避免半写状态）"""
+        path = Path(path)
+        self.updated = time.time()
+        data = {
+            'version': self.version,
+            'updated': self.updated,
+            'entries': {name: asdict(entry) for name, entry in self.entries.items()},
+        }
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def get(self, name: str) -> Optional[ManifestEntry]:
+        return self.entries.get(name)
+
+    def record(
+        self, name: str, path: Path, count: int, compute_hash: bool = True, source: Optional[str] = None
+    ) -> ManifestEntry:
+        """
+        为刚写入的缓存文件记录条目
+
+        Args:
+            name: 条目名
+            path: 文件路径
+            count: 行数
+            compute_hash: 是否计算内容哈希（写入时计算一次，读取时不再计算）
+            source: 派生文件的源文件内容哈希（源文件变化后据此判断派生文件过期）
+        """
+        path = Path(path)
+        stat = path.stat()
+        shape, dtype = ((), "")
+        if path.suffix == '.npy':
+            shape, dtype = read_npy_header(path)
+        entry = ManifestEntry(
+            file=path.name,
+            count=int(count),
+            shape=shape,
+            dtype=dtype,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha=hash_file(path) if compute_hash else None,
+            source=source,
+        )
+        self.entries[name] = entry
+        return entry
+
+    def describe_npy(self, name: str, path: Path) -> Optional[ManifestEntry]:
+        """
+        获取 .npy 缓存的条目
+
+        清单条目与文件一致时直接返回；否则只读文件头生成新条目（不计算哈希）。
+        文件不存在时返回 None。
+        """
+        path = Path(path)
+        if not path.exists():
+            self.entries.pop(name, None)
+            return None
+        entry = self.entries.get(name)
+        if entry is not None and entry.matches_file(path):
+            return entry
+        shape, _ = read_npy_header(path)
+        return self.record(name, path, count=shape[0] if shape else 0, compute_hash=False)
+
+    def verify(self, name: str, path: Path) -> bool:
+        """按内容哈希校验文件（没有哈希记录时只比较大小和修改时间）"""
+        entry = self.entries.get(name)
+        if entry is None or not Path(path).exists():
+            return False
+        if entry.sha is None:
+            return entry.matches_file(Path(path))
+        return hash_file(Path(path)) == entry.sha
@@ -0,0 +1,324 @@
+"""
+性能埋点
+上下文管理器计时、计数器和直方图，按需导出 Chrome trace（chrome://tracing / Perfetto 可直接打开）
+
+计时和直方图总是开启（每次只有两次 perf_counter 和一次追加）；
+trace 事件只在 start_trace() 之后记录。
+
+环境变量:
+    SONIC_COMPASS_TRACE: trace 输出路径，设置后启动即开始记录，进程退出时写出
+    SONIC_COMPASS_PERF_HUD: 设为 1 时画布默认显示性能 HUD
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+TRACE_ENV = 'SONIC_COMPASS_TRACE'
+PERF_HUD_ENV = 'SONIC_COMPASS_PERF_HUD'
+
+# 每个直方图保留的最近样本数（用于分位数）
+HISTOGRAM_SAMPLES = 1024
+# trace 缓冲区上限（超出后丢弃最早的事件）
+MAX_TRACE_EVENTS = 200_000
+
+# 进程内时间原点（trace 时间戳相对于它）
+_ORIGIN = time.perf_counter()
+# 启动时刻（入口脚本通过 set_process_start 记录；未记录时为本模块加载时刻）
+_PROCESS_START = _ORIGIN
+
+
+class Histogram:
+    """数值分布：累计 count / sum / min / max，分位数基于最近的样本"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'last', '_samples')
+
+    def __init__(self, samples: int = HISTOGRAM_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.last = 0.0
+        self._samples = deque(maxlen=samples)
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        """最近样本的分位数（p 取 0-100）"""
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        k = min(len(samples) - 1, max(0, int(round(p / 100.0 * (len(samples) - 1)))))
+        return samples[k]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 3),
+            'min': round(self.min, 3),
+            'p50': round(self.percentile(50), 3),
+            'p95': round(self.percentile(95), 3),
+            'max': round(self.max, 3),
+            'last': round(self.last, 3),
+        }
+
+
+class Timer:
+    """
+    一次计时（由 Instrumentation.timer 创建，创建时开始）
+
+    结束时把耗时（毫秒）记入同名直方图；正在记录 trace 时追加一条完整事件。
+    既可作为 with 语句使用，也可以手动 stop()。
+    """
+
+    __slots__ = ('_owner', 'name', 'category', 'args', '_t0', 'elapsed_ms')
+
+    def __init__(self, owner: 'Instrumentation', name: str, category: str, args: Dict[str, Any]):
+        self._owner = owner
+        self.name = name
+        self.category = category
+        self.args = args
+        self.elapsed_ms: Optional[float] = None
+        self._t0 = time.perf_counter()
+
+    def __enter__(self) -> 'Timer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.stop()
+        return False
+
+    def stop(self, **args) -> float:
+        """结束计时（重复调用返回第一次的结果），返回毫秒"""
+        if self.elapsed_ms is None:
+            self.args.update(args)
+            duration = time.perf_counter() - self._t0
+            self.elapsed_ms = duration * 1000.0
+            self._owner.record_span(self.name, self._t0, duration, self.category, self.args)
+        return self.elapsed_ms
+
+
+class Instrumentation:
+    """计时 / 计数 / 直方图注册表和 trace 缓冲区（进程内全局实例为 perf）"""
+
+    def __init__(self, max_trace_events: int = MAX_TRACE_EVENTS):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.tracing = False
+        self._trace_events = deque(maxlen=max_trace_events)
+        self._thread_names: Dict[int, str] = {}
+
+    # --- 记录 ---
+
+    def timer(self, name: str, category: str = 'app', **args) -> Timer:
+        """
+        计时上下文管理器
+
+        用法:
+            with perf.timer('search.rank', top_k=50):
+                ...
+        """
+        return Timer(self, name, category, args)
+
+    def timed(self, name: Optional[str] = None, category: str = 'app') -> Callable:
+        """函数计时装饰器（默认以函数限定名作为计时名）"""
+        def decorator(func):
+            timer_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Timer(self, timer_name, category, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, n: int = 1) -> int:
+        """计数器累加，返回当前值"""
+        with self._lock:
+            value = self.counters.get(name, 0) + n
+            self.counters[name] = value
+        if self.tracing:
+            self._append_event({
+                'name': name, 'ph': 'C', 'ts': self._ts(time.perf_counter()),
+                'pid': os.getpid(), 'tid': self._tid(), 'args': {'value': value},
+            })
+        return value
+
+    def observe(self, name: str, value: float) -> None:
+        """向直方图追加一个数值"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(value)
+
+    def mark(self, name: str, category: str = 'app', **args) -> None:
+        """瞬时事件（只在记录 trace 时写入）"""
+        if self.tracing:
+            self._append_event({
+                'name': name, 'cat': category, 'ph': 'i', 's': 'p',
+                'ts': self._ts(time.perf_counter()),
+                'pid': os.getpid(), 'tid': self._tid(), 'args': args,
+            })
+
+    def record_span(self, name: str, t0: float, duration_s: float, category: str = 'app',
+                    args: Optional[Dict[str, Any]] = None) -> None:
+        """
+        记录一段已完成的耗时（Timer 和 log_span 共用）
+
+        Args:
+            t0: 开始时刻（time.perf_counter()）
+            duration_s: 耗时（秒）
+        """
+        self.observe(name, duration_s * 1000.0)
+        if self.tracing:
+            event = {
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': self._ts(t0), 'dur': round(duration_s * 1e6, 3),
+                'pid': os.getpid(), 'tid': self._tid(),
+            }
+            if args:
+                event['args'] = args
+            self._append_event(event)
+
+    # --- trace ---
+
+    def start_trace(self) -> None:
+        """开始记录 trace 事件（清空之前的缓冲）"""
+        self._trace_events.clear()
+        self.tracing = True
+
+    def stop_trace(self) -> None:
+        self.tracing = False
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        return list(self._trace_events)
+
+    def dump_trace(self, path) -> Path:
+        """
+        写出 Chrome trace JSON（包含线程名元数据和当前计数器 / 直方图汇总）
+
+        Returns:
+            写出的路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        metadata_events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+            for tid, thread_name in list(self._thread_names.items())
+        ]
+        data = {
+            'traceEvents': metadata_events + self.trace_events(),
+            'displayTimeUnit': 'ms',
+            'otherData': self.snapshot(),
+        }
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        tmp_path.replace(path)
+        return path
+
+    # --- 读取 ---
+
+    def histogram(self, name: str) -> Optional[Histogram]:
+        return self.histograms.get(name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前计数器和直方图汇总（毫秒）"""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {name: h.summary() for name, h in self.histograms.items()}
+        return {'counters': counters, 'histograms': histograms}
+
+    def reset(self) -> None:
+        """清空计数器、直方图和 trace 缓冲"""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+        self._trace_events.clear()
+
+    # --- 内部 ---
+
+    def _append_event(self, event: Dict[str, Any]) -> None:
+        self._trace_events.append(event)
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    @staticmethod
+    def _ts(t: float) -> float:
+        """perf_counter 时刻 -> trace 时间戳（微秒）"""
+        return round((t - _ORIGIN) * 1e6, 3)
+
+
+perf = Instrumentation()
+
+
+def set_process_start(t0: float) -> None:
+    """
+    记录启动时刻（入口脚本在导入其它模块之前取 time.perf_counter()，导入后调用）
+
+    startup.first_frame 等启动指标从这里计时，包含导入 PySide6 / core 的耗时。
+    """
+    global _PROCESS_START
+    _PROCESS_START = t0
+
+
+def since_start_ms() -> float:
+    """距启动时刻（set_process_start 记录；未记录时为埋点模块加载）的毫秒数"""
+    return (time.perf_counter() - _PROCESS_START) * 1000.0
+
+
+def perf_hud_default() -> bool:
+    """环境变量是否要求默认显示性能 HUD"""
+    return os.environ.get(PERF_HUD_ENV, '').strip() not in ('', '0', 'false', 'False')
+
+
+def _start_trace_from_env() -> None:
+    trace_path = os.environ.get(TRACE_ENV)
+    if not trace_path:
+        return
+    perf.start_trace()
+
+    def _dump_at_exit():
+        # log 模块依赖本模块，这里延迟导入
+        from .log import get_logger
+        logger = get_logger('instrumentation')
+        try:
+            written = perf.dump_trace(trace_path)
+            logger.info(f"性能 trace 已写出: {written}")
+        except OSError as e:
+            logger.warning(f"写出性能 trace 失败: {e}")
+
+    atexit.register(_dump_at_exit)
+
+
+_start_trace_from_env()
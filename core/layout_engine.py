@@ -23,6 +23,7 @@ except ImportError:
     print("[WARNING] umap-learn not available, layout_engine will not work")
 
 from . import umap_config
+from .instrumentation import perf
 
 
 def load_ucs_coordinates_config(config_path: str = "data_config/ucs_coordinates.json") -> Dict[str, Dict[str, Any]]:
@@ -170,12 +171,52 @@ def _compute_local_umap_small(n_vectors: int, embeddings: np.ndarray) -> Optiona
         return None
 
 
+def _group_by_main_category_code(category_codes) -> Tuple[Dict[str, List[int]], List[int]]:
+    """按主类别编码分组（一次稳定排序，组内保持索引升序）"""
+    main_codes = np.asarray(category_codes.main_category_code)
+    order = np.argsort(main_codes, kind='stable')
+    sorted_codes = main_codes[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+    
+    category_groups = defaultdict(list)
+    uncategorized_indices = []
+    for code, members in zip(sorted_codes[starts].tolist(), np.split(order, starts[1:])):
+        if code < 0:
+            uncategorized_indices = members.tolist()
+        else:
+            category_groups[category_codes.main_category_table[code].upper()].extend(members.tolist())
+    return category_groups, uncategorized_indices
+
+
+def _group_by_main_category_name(metadata, ucs_manager, category_groups, uncategorized_indices):
+    """按主类别名称分组（没有类别编码时逐条查询 UCSManager）"""
+    for i, meta in enumerate(metadata):
+        # 获取CatID
+        cat_id = meta.get('category', '') if isinstance(meta, dict) else getattr(meta, 'category', '')
+        
+        if not cat_id or cat_id == 'UNCATEGORIZED':
+            uncategorized_indices.append(i)
+            continue
+        
+        # 获取主类别名称
+        if ucs_manager:
+            main_category = ucs_manager.get_main_category_by_id(cat_id)
+            if main_category and main_category != 'UNCATEGORIZED':
+                category_groups[main_category.upper()].append(i)
+            else:
+                uncategorized_indices.append(i)
+        else:
+            uncategorized_indices.append(i)
+
+
+@perf.timed('layout.ucs', 'layout')
 def compute_ucs_layout(
     metadata: List[Dict],
     embeddings: np.ndarray,
     ucs_manager,
     config_path: str = "data_config/ucs_coordinates.json",
-    use_parallel: bool = True
+    use_parallel: bool = True,
+    category_codes=None
 ) -> Tuple[np.ndarray, Dict[str, List[int]]]:
     """
     计算UCS模式布局（定锚群岛策略）
@@ -192,6 +233,7 @@ def compute_ucs_layout(
         ucs_manager: UCSManager实例
         config_path: UCS坐标配置文件路径
         use_parallel: 是否使用并行计算（默认True）
+        category_codes: CategoryCodes（可选；提供时按主类别编码分组，不再逐条查询 UCSManager）
         
     Returns:
         (coordinates_ucs, category_indices)
@@ -211,23 +253,10 @@ def compute_ucs_layout(
     category_groups = defaultdict(list)  # {category_name: [indices]}
     uncategorized_indices = []
     
-    for i, meta in enumerate(metadata):
-        # 获取CatID
-        cat_id = meta.get('category', '') if isinstance(meta, dict) else getattr(meta, 'category', '')
-        
-        if not cat_id or cat_id == 'UNCATEGORIZED':
-            uncategorized_indices.append(i)
-            continue
-        
-        # 获取主类别名称
-        if ucs_manager:
-            main_category = ucs_manager.get_main_category_by_id(cat_id)
-            if main_category and main_category != 'UNCATEGORIZED':
-                category_groups[main_category.upper()].append(i)
-            else:
-                uncategorized_indices.append(i)
-        else:
-            uncategorized_indices.append(i)
+    if category_codes is not None and len(category_codes) == len(metadata):
+        category_groups, uncategorized_indices = _group_by_main_category_code(category_codes)
+    else:
+        _group_by_main_category_name(metadata, ucs_manager, category_groups, uncategorized_indices)
     
     print(f"   分组完成: {len(category_groups)} 个类别, {len(uncategorized_indices)} 个未分类")
     
@@ -329,7 +358,8 @@ def _compute_category_layout(
             verbose=False  # 避免输出过多
         )
         
-        local_coords = reducer.fit_transform(embeddings)
+        with perf.timer('layout.local_umap', 'layout', category=category, points=n_vectors):
+            local_coords = reducer.fit_transform(embeddings)
     else:
         # 如果UMAP不可用，使用PCA降维
         from sklearn.decomposition import PCA
@@ -345,6 +375,7 @@ def _compute_category_layout(
     return (category, indices, final_coords)
 
 
+@perf.timed('layout.gravity', 'layout')
 def compute_gravity_layout(
     metadata: List[Dict],
     embeddings: np.ndarray
@@ -375,7 +406,8 @@ def compute_gravity_layout(
     
     # 运行纯无监督全局UMAP
     reducer = umap.UMAP(**params)
-    coords_2d = reducer.fit_transform(embeddings)
+    with perf.timer('layout.global_umap', 'layout', points=len(embeddings)):
+        coords_2d = reducer.fit_transform(embeddings)
     
     # 【归一化】将Gravity模式的坐标归一化到 0-3000 范围（与UCS模式保持一致）
     # 这样可以确保两种模式的坐标范围一致，便于UI切换
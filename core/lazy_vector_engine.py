@@ -0,0 +1,105 @@
+"""
+延迟加载的向量引擎
+浏览地图不需要模型：首次编码（或调用 preload）时才导入 torch 并加载 BGE-M3
+"""
+
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger('lazy_vector_engine')
+
+
+class LazyVectorEngine:
+    """
+    VectorEngine 的延迟加载代理
+
+    接口与 VectorEngine 一致（encode / encode_batch / get_embedding_dim），
+    第一次调用时在当前线程加载模型；preload() 可提前在后台线程加载。
+    加载是线程安全的，并发调用只会加载一次。
+    """
+
+    def __init__(self, model_path: str | Path = "./models/bge-m3"):
+        """
+        初始化代理（不加载模型）
+
+        Args:
+            model_path: 模型路径，同 VectorEngine
+        """
+        self.model_path = model_path
+        self._engine = None
+        self._lock = threading.Lock()
+        self._preload_thread: Optional[threading.Thread] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """模型是否已加载"""
+        return self._engine is not None
+
+    def load(self):
+        """
+        加载模型（已加载时直接返回）
+
+        Returns:
+            VectorEngine 实例
+        """
+        if self._engine is not None:
+            return self._engine
+        with self._lock:
+            if self._engine is None:
+                # torch / sentence_transformers 在这里才被导入
+                from .vector_engine import VectorEngine
+                self._engine = VectorEngine(model_path=self.model_path)
+        return self._engine
+
+    def preload(self) -> None:
+        """在后台线程中加载模型（重复调用无副作用）"""
+        if self._engine is not None or self._preload_thread is not None:
+            return
+        self._preload_thread = threading.Thread(
+            target=self._preload_worker,
+            name="VectorEnginePreload",
+            daemon=True
+        )
+        self._preload_thread.start()
+
+    def _preload_worker(self):
+        try:
+            self.load()
+        except Exception as e:
+            # 预加载失败不影响主流程，首次真正使用时会重新抛出
+            logger.warning(f"后台加载模型失败: {e}")
+            self._preload_thread = None
+
+    def encode_batch(
+        self,
+        texts: List[str],
+        batch_size: int = None,
+        show_progress: bool = True,
+        normalize_embeddings: bool = True
+    ) -> np.ndarray:
+        """批量编码文本为向量（见 VectorEngine.encode_batch）"""
+        return self.load().encode_batch(
+            texts,
+            batch_size=batch_size,
+            show_progress=show_progress,
+            normalize_embeddings=normalize_embeddings
+        )
+
+    def encode(self, text: str, normalize_embeddings: bool = True) -> np.ndarray:
+        """编码单个文本为向量（见 VectorEngine.encode）"""
+        return self.load().encode(text, normalize_embeddings=normalize_embeddings)
+
+    def get_embedding_dim(self) -> int:
+        """获取向量维度（见 VectorEngine.get_embedding_dim）"""
+        return self.load().get_embedding_dim()
+
+    def __getattr__(self, name):
+        # 其余属性（device、model 等）转发给真正的引擎
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
@@ -0,0 +1,211 @@
+"""
+关键词索引（SQLite FTS5 旁路文件）
+索引时把每条记录的 rich_context_text 写入无内容 FTS5 表（rowid = 元数据行号），
+搜索时按 BM25 取出候选行，供 SearchCore 的混合检索缩小向量打分范围
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def _probe_fts5() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+# 当前 Python 的 sqlite3 是否编译了 FTS5
+FTS5_AVAILABLE = _probe_fts5()
+
+LEXICAL_INDEX_VERSION = 1
+
+# 分词器：Unicode 词边界，忽略大小写和变音符号（Soundminer 元数据以英文为主）
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# 查询词：只保留字母数字（FTS5 语法字符不会进入 MATCH 表达式）
+_QUERY_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# 单次查询最多使用的词数
+MAX_QUERY_TOKENS = 16
+
+# 该长度及以上的查询词按前缀匹配（"boo" 命中 "BOOM"，厂商代码 / 库名常被截写）
+PREFIX_MIN_LENGTH = 3
+
+
+class LexicalIndexError(Exception):
+    """关键词索引错误"""
+    pass
+
+
+def build_match_expression(query: str) -> Optional[str]:
+    """
+    查询文本 -> FTS5 MATCH 表达式（各词 OR 连接，BM25 自然偏向命中更多词的记录）
+
+    Returns:
+        表达式；没有可用的词时返回 None
+    """
+    tokens = []
+    for token in _QUERY_TOKEN.findall(query.lower()):
+        token = token.strip('_')
+        if token and token not in tokens:
+            tokens.append(token)
+        if len(tokens) >= MAX_QUERY_TOKENS:
+            break
+    if not tokens:
+        return None
+    terms = [f'"{t}"*' if len(t) >= PREFIX_MIN_LENGTH else f'"{t}"' for t in tokens]
+    return " OR ".join(terms)
+
+
+class LexicalIndex:
+    """FTS5 关键词索引（只读打开，可在多个线程间共享）"""
+
+    def __init__(self, path: Path, conn: sqlite3.Connection, count: int):
+        self.path = Path(path)
+        self._conn = conn
+        self._lock = threading.Lock()
+        self.count = count
+
+    @classmethod
+    def build(cls, path, texts: Iterable[str], batch_size: int = 5000) -> 'LexicalIndex':
+        """
+        构建索引（先写临时文件再替换，构建中断不会留下半个索引）
+
+        Args:
+            path: 索引文件路径
+            texts: 每行元数据的文本（按元数据顺序，行号即 rowid）
+            batch_size: 每次 executemany 的行数
+        """
+        if not FTS5_AVAILABLE:
+            raise LexicalIndexError("当前 SQLite 未启用 FTS5，无法构建关键词索引")
+
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        conn = sqlite3.connect(str(tmp_path))
+        count = 0
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            # 无内容表：只存倒排索引，文本已在元数据缓存中
+            conn.execute(
+                f"CREATE VIRTUAL TABLE docs USING fts5(text, content='', tokenize='{FTS_TOKENIZER}')"
+            )
+            conn.execute("CREATE TABLE info (key TEXT PRIMARY KEY, value)")
+
+            batch = []
+            for row, text in enumerate(texts):
+                batch.append((row, text or ""))
+                if len(batch) >= batch_size:
+                    conn.executemany("INSERT INTO docs(rowid, text) VALUES (?, ?)", batch)
+                    batch.clear()
+                count = row + 1
+            if batch:
+                conn.executemany("INSERT INTO docs(rowid, text) VALUES (?, ?)", batch)
+            conn.execute("INSERT INTO docs(docs) VALUES ('optimize')")
+            conn.executemany(
+                "INSERT INTO info (key, value) VALUES (?, ?)",
+                [('version', LEXICAL_INDEX_VERSION), ('count', count)]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            raise LexicalIndexError(f"构建关键词索引失败: {e}") from e
+        finally:
+            conn.close()
+
+        tmp_path.replace(path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path) -> 'LexicalIndex':
+        """只读打开已构建的索引"""
+        path = Path(path)
+        if not path.exists():
+            raise LexicalIndexError(f"关键词索引不存在: {path}")
+        try:
+            conn = sqlite3.connect(
+                f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+            info = dict(conn.execute("SELECT key, value FROM info").fetchall())
+        except sqlite3.Error as e:
+            raise LexicalIndexError(f"无法打开关键词索引 {path}: {e}") from e
+        if int(info.get('version', 0)) != LEXICAL_INDEX_VERSION:
+            conn.close()
+            raise LexicalIndexError(f"关键词索引版本不匹配: {info.get('version')}")
+        return cls(path, conn, int(info.get('count', 0)))
+
+    def search(self, query: str, limit: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            limit: 最多返回的候选数
+
+        Returns:
+            (indices, scores)：元数据行号和 BM25 分数（越大越相关），按相关度降序
+        """
+        expression = build_match_expression(query)
+        if expression is None or limit <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT rowid, bm25(docs) FROM docs WHERE docs MATCH ? ORDER BY bm25(docs) LIMIT ?",
+                    (expression, int(limit))
+                ).fetchall()
+            except sqlite3.Error as e:
+                raise LexicalIndexError(f"关键词检索失败: {e}") from e
+
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        # SQLite 的 bm25() 越小越相关（负数），取反后越大越相关
+        scores = -np.fromiter((r[1] for r in rows), dtype=np.float32, count=len(rows))
+        return indices, scores
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    倒数排名融合 (RRF)：score(d) = Σ 1 / (k + rank_i(d))，rank 从 1 开始
+
+    Args:
+        rankings: 每路检索结果的行号数组（已按相关度降序）
+        k: 平滑常数（越大越平均地对待靠后的名次）
+
+    Returns:
+        (indices, scores)：按融合分数降序；同分时先出现在前一路结果中的排在前面
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, index in enumerate(ranking.tolist(), start=1):
+            fused[index] = fused.get(index, 0.0) + 1.0 / (k + rank)
+    if not fused:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    indices = np.fromiter(fused.keys(), dtype=np.int64, count=len(fused))
+    scores = np.fromiter(fused.values(), dtype=np.float64, count=len(fused))
+    order = np.argsort(-scores, kind='stable')
+    return indices[order], scores[order]
@@ -0,0 +1,292 @@
+"""
+统一日志
+分级日志（默认 INFO，DEBUG 关闭）、限频进度输出和阶段计时事件
+
+环境变量:
+    SONIC_COMPASS_LOG_LEVEL: 日志级别（DEBUG / INFO / WARNING / ERROR），默认 INFO
+    SONIC_COMPASS_LOG_FILE: 额外写入 JSON Lines 日志文件（每行一条记录，包含结构化事件）
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Union
+
+from .instrumentation import perf
+
+
+LOGGER_NAME = 'sonic_compass'
+LOG_LEVEL_ENV = 'SONIC_COMPASS_LOG_LEVEL'
+LOG_FILE_ENV = 'SONIC_COMPASS_LOG_FILE'
+DEFAULT_LEVEL = logging.INFO
+
+# 保留最近的阶段计时事件（供基准脚本 / 调试面板读取）
+MAX_SPAN_EVENTS = 2000
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+class _LevelTagFormatter(logging.Formatter):
+    """控制台格式：[LEVEL] message（与原有 print 输出一致）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return f"[{record.levelname}] {message}"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """JSON Lines 格式：时间、级别、模块、消息，以及 extra={'event': {...}} 中的结构化字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        event = getattr(record, 'event', None)
+        if event is not None:
+            data['event'] = event
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _parse_level(level: Union[int, str, None]) -> int:
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV) or DEFAULT_LEVEL
+    if isinstance(level, str):
+        value = logging.getLevelName(level.strip().upper())
+        return value if isinstance(value, int) else DEFAULT_LEVEL
+    return int(level)
+
+
+def setup_logging(
+    level: Union[int, str, None] = None,
+    log_file: Optional[str] = None,
+    force: bool = False
+) -> logging.Logger:
+    """
+    配置 sonic_compass 日志（重复调用只生效一次，force=True 时重新配置）
+
+    Args:
+        level: 日志级别，None 时读取环境变量，默认 INFO
+        log_file: JSON Lines 日志文件，None 时读取环境变量
+        force: 重新配置（例如脚本通过 --verbose 打开 DEBUG）
+
+    Returns:
+        根 logger（sonic_compass）
+    """
+    global _configured
+    root = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if _configured and not force:
+            return root
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(_LevelTagFormatter())
+        root.addHandler(console)
+
+        log_file = log_file or os.environ.get(LOG_FILE_ENV)
+        if log_file:
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(JsonLinesFormatter())
+            root.addHandler(file_handler)
+
+        root.setLevel(_parse_level(level))
+        root.propagate = False
+        _configured = True
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取子 logger（sonic_compass.<name>），首次使用时按默认配置初始化"""
+    if not _configured:
+        setup_logging()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def set_level(level: Union[int, str]) -> None:
+    """运行时调整日志级别"""
+    setup_logging().setLevel(_parse_level(level))
+
+
+# ---------------------------------------------------------------------------
+# 阶段计时
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SpanEvent:
+    """一次阶段计时"""
+    name: str
+    start: float            # time.time()
+    duration_ms: float
+    thread: str = ""
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_span_events = deque(maxlen=MAX_SPAN_EVENTS)
+
+
+class Span:
+    """
+    一次阶段计时（由 log_span 创建）
+
+    事件总是写入最近事件缓冲区（recent_spans）和性能埋点（直方图 / trace）；
+    日志只在 level 启用时输出。
+    """
+
+    def __init__(self, logger: logging.Logger, name: str, level: int, fields: Dict[str, Any]):
+        self.logger = logger
+        self.name = name
+        self.level = level
+        self.fields = fields
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.event: Optional[SpanEvent] = None
+
+    def __enter__(self) -> Dict[str, Any]:
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.end()
+        return False
+
+    def end(self, **fields) -> SpanEvent:
+        """结束计时（重复调用返回第一次的结果），可补充字段"""
+        if self.event is not None:
+            return self.event
+        self.fields.update(fields)
+        duration_ms = (time.perf_counter() - self._t0) * 1000.0
+        self.event = SpanEvent(
+            name=self.name,
+            start=self.start,
+            duration_ms=duration_ms,
+            thread=threading.current_thread().name,
+            fields=self.fields,
+        )
+        _span_events.append(self.event)
+        perf.record_span(self.name, self._t0, duration_ms / 1000.0, 'span', self.fields)
+        if self.logger.isEnabledFor(self.level):
+            detail = ", ".join(f"{k}={v}" for k, v in self.fields.items())
+            self.logger.log(
+                self.level,
+                f"{self.name}: {duration_ms:.1f} ms" + (f" ({detail})" if detail else ""),
+                extra={'event': {'type': 'span', **self.event.to_dict()}},
+            )
+        return self.event
+
+
+def log_span(logger: logging.Logger, name: str, level: int = logging.DEBUG, **fields) -> Span:
+    """
+    记录一个阶段的耗时（结构化事件）
+
+    既可以作为 with 语句使用（块内可以向返回的字典补充字段），
+    也可以手动结束：
+
+        with log_span(logger, 'scene.grid', points=n) as span:
+            ...
+            span['cells'] = len(grid_map)
+
+        span = log_span(logger, 'index.encode', texts=len(texts))
+        ...
+        span.end(dim=embeddings.shape[1])
+    """
+    return Span(logger, name, level, dict(fields))
+
+
+def recent_spans(name: Optional[str] = None) -> List[SpanEvent]:
+    """最近的阶段计时事件（name 为前缀过滤，如 'scene.'）"""
+    events = list(_span_events)
+    if name is None:
+        return events
+    return [e for e in events if e.name.startswith(name)]
+
+
+def clear_spans() -> None:
+    _span_events.clear()
+
+
+# ---------------------------------------------------------------------------
+# 限频进度
+# ---------------------------------------------------------------------------
+
+class ProgressReporter:
+    """
+    限频进度输出：循环内每次调用 update/advance 只做计数和时间比较，
+    距上次输出超过 interval 秒才写日志，避免逐批 print + flush
+
+    用法:
+        progress = ProgressReporter(logger, "AI 语义仲裁", total=len(items))
+        for item in items:
+            ...
+            progress.advance()
+        progress.finish()
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        label: str,
+        total: Optional[int] = None,
+        interval: float = 2.0,
+        level: int = logging.INFO
+    ):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.level = level
+        self.count = 0
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self._enabled = logger.isEnabledFor(level)
+
+    def advance(self, n: int = 1) -> None:
+        self.update(self.count + n)
+
+    def update(self, count: int) -> None:
+        self.count = count
+        if not self._enabled:
+            return
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self._report(now)
+
+    def _report(self, now: float) -> None:
+        elapsed = now - self._start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            percent = 100.0 * self.count / self.total
+            self.logger.log(
+                self.level,
+                f"[进度] {self.label}: {self.count}/{self.total} ({percent:.0f}%), {rate:.0f}/s"
+            )
+        else:
+            self.logger.log(self.level, f"[进度] {self.label}: {self.count}, {rate:.0f}/s")
+
+    def finish(self) -> float:
+        """输出汇总并返回总耗时（秒）"""
+        elapsed = time.perf_counter() - self._start
+        if self._enabled:
+            self.logger.log(self.level, f"[完成] {self.label}: {self.count} 条，耗时 {elapsed:.2f}s")
+        return elapsed
@@ -0,0 +1,144 @@
+"""
+语义散点引擎
+将全部向量投影到两条语义轴上（Scatter 模式）
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class ScatterEngineError(Exception):
+    """散点引擎错误"""
+    pass
+
+
+class ScatterEngine:
+    """
+    语义散点引擎 - 双极轴投影
+
+    每条轴的方向向量 = 正极点词向量均值 - 负极点词向量均值（归一化）。
+    极点文本只编码一次并缓存，切换轴时只需一次 (N, dim) @ (dim, 2) 矩阵乘法。
+    """
+
+    def __init__(self, search_core, axis_definitions: Optional[Sequence] = None):
+        """
+        初始化散点引擎
+
+        Args:
+            search_core: SearchCore 实例（使用其常驻内存的归一化向量矩阵和 vector_engine）
+            axis_definitions: ConfigManager.axis_definitions（AxisDefinition 列表），
+                              为空时只支持自由文本轴
+        """
+        self.search_core = search_core
+        self.axis_definitions = list(axis_definitions or [])
+
+        # 文本 -> 归一化向量（极点词缓存）
+        self._text_vectors: Dict[str, np.ndarray] = {}
+        # 轴规格 -> 方向向量
+        self._directions: Dict[str, np.ndarray] = {}
+
+    def find_axis(self, spec: str):
+        """
+        按 id / 英文名 / 中文名查找轴定义（不区分大小写）
+
+        Returns:
+            AxisDefinition；找不到时返回 None
+        """
+        key = spec.strip().lower()
+        if not key:
+            return None
+        for axis in self.axis_definitions:
+            names = [axis.id] + [str(v) for v in (axis.name or {}).values()]
+            if any(key == name.strip().lower() for name in names):
+                return axis
+        return None
+
+    def get_axis_direction(self, spec: str) -> np.ndarray:
+        """
+        获取轴方向向量（已缓存）
+
+        Args:
+            spec: 轴定义 id/名称，或任意文本（自由文本轴：正极点为该文本本身）
+
+        Returns:
+            (dim,) 归一化方向向量
+        """
+        spec = (spec or "").strip()
+        if not spec:
+            raise ScatterEngineError("轴文本不能为空")
+
+        direction = self._directions.get(spec)
+        if direction is not None:
+            return direction
+
+        axis = self.find_axis(spec)
+        if axis is not None:
+            positive = [pole.en for pole in axis.positive_pole if pole.en]
+            negative = [pole.en for pole in axis.negative_pole if pole.en]
+        else:
+            positive, negative = [spec], []
+
+        if not positive and not negative:
+            raise ScatterEngineError(f"轴 '{spec}' 没有可用的极点")
+
+        self._encode_texts(positive + negative)
+        direction = np.zeros(self.search_core.embeddings.shape[1], dtype=np.float32)
+        if positive:
+            direction += np.mean([self._text_vectors[t] for t in positive], axis=0)
+        if negative:
+            direction -= np.mean([self._text_vectors[t] for t in negative], axis=0)
+
+        norm = np.linalg.norm(direction)
+        if norm > 0:
+            direction /= norm
+        self._directions[spec] = direction
+        return direction
+
+    def project(self, x_axis: str, y_axis: str) -> np.ndarray:
+        """
+        将全部向量投影到 (x_axis, y_axis) 平面
+
+        Returns:
+            (N, 2) float32 投影值（未缩放到画布）
+        """
+        basis = np.column_stack([
+            self.get_axis_direction(x_axis),
+            self.get_axis_direction(y_axis)
+        ]).astype(self.search_core.embeddings.dtype, copy=False)  # (dim, 2)
+        return (self.search_core.embeddings @ basis).astype(np.float32, copy=False)
+
+    def project_to_canvas(
+        self,
+        x_axis: str,
+        y_axis: str,
+        canvas_range: Tuple[float, float] = (0.0, 3000.0)
+    ) -> np.ndarray:
+        """
+        投影并按轴分别缩放到画布范围（负极在左/上，正极在右/下）
+
+        Returns:
+            (N, 2) float64 场景坐标
+        """
+        projected = self.project(x_axis, y_axis).astype(np.float64)
+        low, high = canvas_range
+        min_v = projected.min(axis=0)
+        span = projected.max(axis=0) - min_v
+        span = np.where(span > 1e-9, span, 1.0)
+        return low + (projected - min_v) / span * (high - low)
+
+    def _encode_texts(self, texts: List[str]) -> None:
+        """批量编码尚未缓存的极点文本"""
+        missing = list(dict.fromkeys(t for t in texts if t not in self._text_vectors))
+        if not missing:
+            return
+        try:
+            vectors = self.search_core.vector_engine.encode_batch(
+                missing,
+                batch_size=len(missing),
+                show_progress=False,
+                normalize_embeddings=True
+            )
+        except Exception as e:
+            raise ScatterEngineError(f"极点编码失败: {e}") from e
+        for text, vector in zip(missing, np.asarray(vectors, dtype=np.float32)):
+            self._text_vectors[text] = vector
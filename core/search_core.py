@@ -1,12 +1,31 @@
 """
 搜索算法核心
-提供极速的向量检索功能
+提供极速的向量检索功能，以及关键词 (FTS5 BM25) + 向量的混合检索
 """
 
 import numpy as np
-from typing import List, Dict, Tuple, Optional
-from .vector_engine import VectorEngine
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 from .data_processor import DataProcessor
+from .instrumentation import perf
+from .log import get_logger
+from .lexical_index import LexicalIndex, LexicalIndexError, reciprocal_rank_fusion
+
+if TYPE_CHECKING:
+    # 仅用于类型标注，避免导入 search_core 时加载 torch
+    from .vector_engine import VectorEngine
+    from .category_codes import CategoryCodes
+
+
+logger = get_logger('search_core')
+
+# 检索模式：vector = 全量向量扫描；hybrid = 关键词候选 + 向量打分，RRF 融合
+SEARCH_MODES = ('vector', 'hybrid')
+
+# 混合检索中关键词阶段最多取出的候选数（向量只对这些行打分）
+LEXICAL_CANDIDATES = 2000
+
+# RRF 平滑常数
+RRF_K = 60
 
 
 class SearchCoreError(Exception):
@@ -19,25 +38,29 @@ class SearchCore:
     
     def __init__(
         self,
-        vector_engine: VectorEngine,
+        vector_engine: 'VectorEngine',
         processor: Optional[DataProcessor] = None,
         metadata: Optional[List[Dict]] = None,
-        embeddings: Optional[np.ndarray] = None
+        embeddings: Optional[np.ndarray] = None,
+        category_codes: Optional['CategoryCodes'] = None,
+        lexical_index: Optional[LexicalIndex] = None
     ):
         """
         初始化搜索核心
         
         Args:
-            vector_engine: VectorEngine 实例
+            vector_engine: VectorEngine 或 LazyVectorEngine 实例
             processor: DataProcessor 实例（用于加载数据）
             metadata: 元数据列表（如果直接提供）
             embeddings: 向量矩阵（如果直接提供）
+            category_codes: CategoryCodes（类别整数编码，用于分类过滤；可选）
+            lexical_index: LexicalIndex（关键词索引，用于混合检索；可选，提供 processor 时自动加载）
         """
         self.vector_engine = vector_engine
         
         # 加载数据
         if processor is not None:
-            print("[INFO] 从 DataProcessor 加载索引...")
+            logger.info("从 DataProcessor 加载索引...")
             self.metadata, self.embeddings = processor.load_index()
         elif metadata is not None and embeddings is not None:
             self.metadata = metadata
@@ -47,19 +70,42 @@ class SearchCore:
                 "必须提供 processor 或 (metadata, embeddings)"
             )
         
+        self.category_codes = category_codes
+        
+        # 关键词索引（没有时只能做纯向量检索）
+        if lexical_index is None and processor is not None:
+            try:
+                lexical_index = processor.load_lexical_index()
+            except Exception as e:
+                logger.warning(f"关键词索引不可用，搜索只使用向量: {e}")
+                lexical_index = None
+        self.lexical_index = lexical_index
+        self.search_mode = 'hybrid' if lexical_index is not None else 'vector'
+        
         # 确保向量是归一化的（用于余弦相似度计算）
         self.embeddings = self._normalize_vectors(self.embeddings)
         
-        print(f"[INFO] 搜索核心初始化完成")
-        print(f"      数据量: {len(self.metadata)} 条")
-        print(f"      向量维度: {self.embeddings.shape[1]}")
-        print(f"      向量已归一化: True")
+        logger.info(
+            f"搜索核心初始化完成: {len(self.metadata)} 条, 向量维度 {self.embeddings.shape[1]}（已归一化）, "
+            f"检索模式 {self.search_mode}"
+        )
+    
+    def set_lexical_index(self, lexical_index: Optional[LexicalIndex]):
+        """
+        设置关键词索引（后台构建完成后调用），有索引时切换到混合检索
+
+        进行中的查询已读取过检索模式，不受影响。
+        """
+        self.lexical_index = lexical_index
+        self.search_mode = 'hybrid' if lexical_index is not None else 'vector'
+        logger.info(f"检索模式: {self.search_mode}")
     
     def search_by_text(
         self,
         query: str,
         top_k: int = 50,
-        filter_category: Optional[str] = None
+        filter_category: Optional[str] = None,
+        mode: Optional[str] = None
     ) -> List[Tuple[Dict, float]]:
         """
         文本搜索：根据查询文本找到最相似的音频文件
@@ -68,51 +114,189 @@ class SearchCore:
             query: 查询文本
             top_k: 返回前K个结果
             filter_category: 可选的分类过滤（UCS分类）
+            mode: 检索模式（'vector' / 'hybrid'，默认使用 search_mode）
             
         Returns:
-            List of (metadata, score) 元组，按相似度降序排列
+            List of (metadata, score) 元组，按相关度降序排列
         """
         if not query or not query.strip():
             return []
         
+        with perf.timer('search.by_text', 'search', top_k=top_k):
+            indices, scores = self.search_indices(
+                query,
+                top_k=top_k,
+                filter_category=filter_category,
+                mode=mode
+            )
+        return [
+            (self.metadata[idx], score)
+            for idx, score in zip(indices.tolist(), scores.tolist())
+        ]
+    
+    @perf.timed('search.encode', 'search')
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        将查询文本转为归一化向量
+        
+        Args:
+            query: 查询文本
+            
+        Returns:
+            (dim,) 查询向量
+        """
         try:
-            # 1. 将查询文本转为向量
             query_vector = self.vector_engine.encode(
                 query.strip(),
                 normalize_embeddings=True
             )
-            query_vector = query_vector.reshape(1, -1)  # (1, dim)
+            return np.asarray(query_vector, dtype=self.embeddings.dtype).reshape(-1)
+        except Exception as e:
+            raise SearchCoreError(f"文本搜索失败: {e}") from e
+    
+    def search_indices_by_vector(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 50,
+        filter_category: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按查询向量检索，直接返回行索引（避免再用 recID 反查索引）
+        
+        Args:
+            query_vector: (dim,) 归一化查询向量
+            top_k: 返回前K个结果
+            filter_category: 可选的分类过滤（UCS分类）
             
-            # 2. 计算余弦相似度（使用矩阵运算，避免循环）
-            # cosine_similarity = dot(query, embeddings) / (||query|| * ||embeddings||)
+        Returns:
+            (indices, scores)：按相似度降序排列，只包含相似度大于0的结果
+        """
+        perf.count('search.queries')
+        timer = perf.timer('search.rank', 'search', rows=len(self.embeddings))
+        try:
+            # 计算余弦相似度（使用矩阵运算，避免循环）
             # 由于向量已归一化，||query|| = ||embeddings|| = 1
             # 所以 cosine_similarity = dot(query, embeddings)
-            similarities = np.dot(self.embeddings, query_vector.T).flatten()
+            similarities = self.embeddings @ np.asarray(query_vector).reshape(-1)
             
-            # 3. 应用分类过滤（如果指定）
+            # 应用分类过滤（如果指定）
             if filter_category:
-                mask = np.array([
-                    filter_category.lower() in str(meta.get('category', '')).lower()
-                    for meta in self.metadata
-                ])
+                mask = self._category_mask(filter_category)
                 similarities = np.where(mask, similarities, -1.0)
             
-            # 4. 获取 Top K
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            # 5. 构建结果
-            results = []
-            for idx in top_indices:
-                if similarities[idx] > 0:  # 只返回相似度大于0的结果
-                    results.append((
-                        self.metadata[idx],
-                        float(similarities[idx])
-                    ))
+            # 获取 Top K（先 argpartition 取候选，再对候选排序）
+            k = min(top_k, len(similarities))
+            if k <= 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            if k < len(similarities):
+                candidates = np.argpartition(similarities, -k)[-k:]
+            else:
+                candidates = np.arange(len(similarities))
+            top_indices = candidates[np.argsort(similarities[candidates])[::-1]]
             
-            return results
+            # 只返回相似度大于0的结果
+            top_scores = similarities[top_indices]
+            keep = top_scores > 0
+            return top_indices[keep].astype(np.int64), top_scores[keep].astype(np.float32)
             
         except Exception as e:
             raise SearchCoreError(f"文本搜索失败: {e}") from e
+        finally:
+            timer.stop()
+    
+    def search_indices(
+        self,
+        query: str,
+        query_vector: Optional[np.ndarray] = None,
+        top_k: int = 50,
+        filter_category: Optional[str] = None,
+        mode: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按检索模式分派，返回行索引
+        
+        Args:
+            query: 查询文本
+            query_vector: 已编码的查询向量（None 时在此编码）
+            top_k: 返回前K个结果
+            filter_category: 可选的分类过滤（UCS分类）
+            mode: 检索模式（默认使用 search_mode；没有关键词索引时 hybrid 退化为 vector）
+            
+        Returns:
+            (indices, scores)：按相关度降序排列
+        """
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise SearchCoreError(f"未知的检索模式: {mode}")
+        if mode == 'hybrid' and self.lexical_index is not None:
+            return self.search_indices_hybrid(
+                query, query_vector, top_k=top_k, filter_category=filter_category
+            )
+        if query_vector is None:
+            query_vector = self.encode_query(query)
+        return self.search_indices_by_vector(query_vector, top_k=top_k, filter_category=filter_category)
+    
+    def search_indices_hybrid(
+        self,
+        query: str,
+        query_vector: Optional[np.ndarray] = None,
+        top_k: int = 50,
+        filter_category: Optional[str] = None,
+        lexical_limit: int = LEXICAL_CANDIDATES,
+        rrf_k: int = RRF_K
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        混合检索：BM25 候选 + 向量打分，倒数排名融合 (RRF)
+        
+        关键词命中数不少于 top_k 时，向量只对关键词候选打分（不扫描整个矩阵）；
+        命中太少（例如纯描述性的查询）时退回全量向量检索，再与关键词结果融合。
+        
+        Args:
+            query: 查询文本
+            query_vector: 已编码的查询向量（None 时在此编码）
+            top_k: 返回前K个结果
+            filter_category: 可选的分类过滤（UCS分类）
+            lexical_limit: 关键词阶段最多取出的候选数
+            rrf_k: RRF 平滑常数
+            
+        Returns:
+            (indices, scores)：scores 为融合分数除以理论最大值（两路都排第一），范围 (0, 1]
+        """
+        if self.lexical_index is None:
+            raise SearchCoreError("没有关键词索引，无法进行混合检索")
+        
+        perf.count('search.hybrid_queries')
+        with perf.timer('search.hybrid', 'search', top_k=top_k):
+            try:
+                with perf.timer('search.lexical', 'search'):
+                    lexical, _ = self.lexical_index.search(query, limit=lexical_limit)
+            except LexicalIndexError as e:
+                raise SearchCoreError(f"关键词检索失败: {e}") from e
+            
+            # 索引与元数据不一致时忽略越界的行
+            lexical = lexical[lexical < len(self.embeddings)]
+            if filter_category and len(lexical):
+                lexical = lexical[self._category_mask(filter_category)[lexical]]
+            
+            if query_vector is None:
+                query_vector = self.encode_query(query)
+            query_vector = np.asarray(query_vector).reshape(-1)
+            
+            if len(lexical) >= top_k:
+                # 只对关键词候选做向量打分
+                with perf.timer('search.rank', 'search', rows=len(lexical)):
+                    similarities = self.embeddings[lexical] @ query_vector
+                    order = np.argsort(-similarities, kind='stable')
+                    semantic = lexical[order][similarities[order] > 0]
+            else:
+                semantic, _ = self.search_indices_by_vector(
+                    query_vector, top_k=top_k, filter_category=filter_category
+                )
+            
+            indices, fused = reciprocal_rank_fusion([lexical, semantic], k=rrf_k)
+            indices = indices[:top_k]
+            scores = fused[:top_k] / (2.0 / (rrf_k + 1))
+        return indices.astype(np.int64), scores.astype(np.float32)
     
     def search_by_id(
         self,
@@ -162,24 +346,28 @@ class SearchCore:
         
         return results
     
-    def calculate_gravity_forces(
+    def calculate_gravity_matrix(
         self,
-        target_pillars: List[str]
-    ) -> List[Dict[str, float]]:
+        target_pillars: List[str],
+        use_softmax: bool = False,
+        temperature: float = 1.0
+    ) -> Tuple[np.ndarray, List[str]]:
         """
-        计算引力：为UI的"引力视图"服务
+        计算引力矩阵：为UI的"引力视图"服务
         
-        计算库中每一个文件与指定"引力桩"（Pillars）的相似度
+        计算库中每一个文件与指定"引力桩"（Pillars）的相似度，以稠密矩阵返回
         
         Args:
             target_pillars: 引力桩列表，例如 ["Fire", "Ice", "Impact"]
+            use_softmax: 是否按行做 softmax 归一化（每个文件的权重和为 1）
+            temperature: softmax 温度，越小越"尖锐"（仅 use_softmax=True 时生效）
             
         Returns:
-            List of Dict，每个Dict包含每个文件到各桩的相似度权重
-            格式: [{"Fire": 0.85, "Ice": 0.12, "Impact": 0.03}, ...]
+            (weights, pillars): weights 为 (n_files, n_pillars) float32 矩阵，
+            pillars 为与列对应的引力桩标签
         """
         if not target_pillars:
-            return []
+            return np.zeros((len(self.metadata), 0), dtype=np.float32), []
         
         try:
             # 1. 将引力桩转为向量
@@ -189,6 +377,7 @@ class SearchCore:
                 show_progress=False,
                 normalize_embeddings=True
             )
+            pillar_vectors = np.asarray(pillar_vectors, dtype=self.embeddings.dtype)
             
             # 2. 计算每个文件与所有桩的相似度矩阵
             # embeddings: (n_files, dim)
@@ -197,28 +386,60 @@ class SearchCore:
             similarity_matrix = np.dot(self.embeddings, pillar_vectors.T)
             
             # 3. 将相似度转换为权重（可选：使用softmax归一化）
-            # 这里直接使用相似度值，也可以使用softmax
-            # weights = self._softmax(similarity_matrix, axis=1)
-            weights = similarity_matrix
-            
-            # 4. 构建结果
-            results = []
-            for i in range(len(self.metadata)):
-                pillar_weights = {
-                    pillar: float(weights[i, j])
-                    for j, pillar in enumerate(target_pillars)
-                }
-                results.append(pillar_weights)
+            if use_softmax:
+                weights = self._softmax(similarity_matrix / max(temperature, 1e-6), axis=1)
+            else:
+                weights = similarity_matrix
             
-            return results
+            return weights.astype(np.float32, copy=False), list(target_pillars)
             
         except Exception as e:
             raise SearchCoreError(f"引力计算失败: {e}") from e
     
+    def calculate_gravity_forces(
+        self,
+        target_pillars: List[str]
+    ) -> List[Dict[str, float]]:
+        """
+        计算引力（兼容旧接口，逐文件字典格式）
+        
+        大数据量时请使用 calculate_gravity_matrix，避免构建 N 个字典
+        
+        Args:
+            target_pillars: 引力桩列表，例如 ["Fire", "Ice", "Impact"]
+            
+        Returns:
+            List of Dict，每个Dict包含每个文件到各桩的相似度权重
+            格式: [{"Fire": 0.85, "Ice": 0.12, "Impact": 0.03}, ...]
+        """
+        if not target_pillars:
+            return []
+        
+        weights, pillars = self.calculate_gravity_matrix(target_pillars)
+        return [dict(zip(pillars, row)) for row in weights.tolist()]
+    
+    def _category_mask(self, filter_category: str) -> np.ndarray:
+        """
+        分类过滤掩码（CatID 包含过滤文本，不区分大小写）
+        
+        有类别编码时只对查找表中的每个 CatID 判断一次，再按编码索引展开。
+        """
+        needle = filter_category.lower()
+        codes = self.category_codes
+        if codes is not None and len(codes) == len(self.metadata):
+            return codes.catid_mask(lambda cat_id: needle in str(cat_id).lower())
+        return np.array([
+            needle in str(meta.get('category', '')).lower()
+            for meta in self.metadata
+        ])
+    
     def _normalize_vectors(self, vectors: np.ndarray) -> np.ndarray:
         """
         归一化向量（L2归一化）
         
+        已经归一化的矩阵（索引缓存中的向量通常如此）原样返回，
+        与 DataProcessor / SonicUniverse 共享同一份数组，不复制。
+        
         Args:
             vectors: 向量矩阵
             
@@ -226,6 +447,8 @@ class SearchCore:
             归一化后的向量矩阵
         """
         norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        if np.allclose(norms[norms > 0], 1.0, atol=1e-3):
+            return vectors
         norms = np.where(norms == 0, 1.0, norms)  # 避免除零
         return vectors / norms
     
@@ -4,6 +4,7 @@
 """
 
 from .importer import SoundminerImporter, AudioMetadata
+from .connection_pool import SQLiteReadPool
 from .config_loader import ConfigManager
 
 # 向后兼容：ConfigLoader 别名
@@ -12,6 +13,7 @@ ConfigLoader = ConfigManager
 __all__ = [
     'SoundminerImporter',
     'AudioMetadata',
+    'SQLiteReadPool',
     'ConfigManager',
     'ConfigLoader',
 ]
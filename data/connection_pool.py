@@ -0,0 +1,136 @@
+"""
+SQLite 只读连接池
+按线程分配只读 URI 连接（mode=ro，快照副本可用 immutable=1），并设置读路径的 PRAGMA：
+导入、检查器查询和后台线程各自持有连接，可以并行读取
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict
+
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# 内存映射大小（字节）：大库的顺序扫描直接读页缓存，不经过 read() 复制
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+# 每个连接的页缓存（KiB，PRAGMA cache_size 取负数表示 KiB）
+DEFAULT_CACHE_SIZE_KIB = 64 * 1024
+
+
+def build_readonly_uri(db_path, immutable: bool = False) -> str:
+    """
+    构建只读连接 URI
+
+    Args:
+        db_path: 数据库路径
+        immutable: 是否声明文件不会被修改（只用于快照副本：跳过锁和变更检测，源库被写入时会读到错误数据）
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return uri
+
+
+class SQLiteReadPool:
+    """
+    按线程分配的只读连接池
+
+    - connection() 返回调用线程自己的连接（第一次调用时创建）
+    - open_connection() 创建一个不归属任何线程的连接（调用方负责关闭），给会换线程的后台任务使用
+    - 所有连接都允许跨线程关闭：close() 可以在任意线程调用
+    """
+
+    def __init__(
+        self,
+        db_path,
+        immutable: bool = False,
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB
+    ):
+        """
+        初始化连接池（不立即打开连接）
+
+        Args:
+            db_path: 数据库路径
+            immutable: 数据库是否为不会被修改的快照副本
+            mmap_size: PRAGMA mmap_size（字节，0 表示关闭）
+            cache_size_kib: PRAGMA cache_size（KiB）
+        """
+        self.db_path = Path(db_path)
+        self.immutable = immutable
+        self.mmap_size = int(mmap_size)
+        self.cache_size_kib = int(cache_size_kib)
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}  # 线程 ident -> 连接
+        self._readonly_uri_supported = True
+
+    def open_connection(self) -> sqlite3.Connection:
+        """创建一个调优过的只读连接（row_factory = sqlite3.Row）"""
+        conn = None
+        if self._readonly_uri_supported:
+            try:
+                conn = sqlite3.connect(
+                    build_readonly_uri(self.db_path, self.immutable), uri=True, check_same_thread=False
+                )
+                # mode=ro 的错误（例如 WAL 库缺少 -shm 且目录不可写）在第一次读取时才出现
+                conn.execute("PRAGMA schema_version").fetchone()
+            except sqlite3.OperationalError as e:
+                if conn is not None:
+                    conn.close()
+                conn = None
+                self._readonly_uri_supported = False
+                logger.warning(f"无法以只读模式打开数据库，改用普通连接（query_only）: {e}")
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size = {-self.cache_size_kib}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """调用线程的连接（同一线程多次调用返回同一个连接）"""
+        ident = threading.get_ident()
+        with self._lock:
+            conn = self._connections.get(ident)
+        if conn is None:
+            conn = self.open_connection()
+            with self._lock:
+                self._connections[ident] = conn
+        return conn
+
+    def release(self):
+        """关闭调用线程的连接（后台线程结束前调用）"""
+        with self._lock:
+            conn = self._connections.pop(threading.get_ident(), None)
+        if conn is not None:
+            conn.close()
+
+    def has_connection(self) -> bool:
+        """调用线程是否已有连接"""
+        with self._lock:
+            return threading.get_ident() in self._connections
+
+    @property
+    def size(self) -> int:
+        """当前打开的线程连接数"""
+        with self._lock:
+            return len(self._connections)
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            conn.close()
+
+    def __repr__(self) -> str:
+        mode = "immutable" if self.immutable else "ro"
+        return f"SQLiteReadPool({self.db_path.name}, {mode}, {self.size} connections)"
+
@@ -8,6 +8,12 @@ from pathlib import Path
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from core.log import get_logger
+
+from .connection_pool import SQLiteReadPool
+
+logger = get_logger(__name__)
+
 
 @dataclass
 class AudioMetadata:
@@ -66,10 +72,23 @@ class SoundminerImporter:
         }
     }
     
+    # rich_context_text 使用的字段（按优先级排序）
+    RICH_CONTEXT_FIELDS = [
+        'Filename', 'filename',
+        'Description', 'description',
+        'Keywords', 'keywords',
+        'VendorCategory', 'vendorcategory', 'Vendor_Category',
+        'Library', 'library',
+        'BWDescription', 'bwdescription', 'BW_Description',
+        'Notes', 'notes',
+        'FXName', 'fxname', 'FX_Name'
+    ]
+    
     def __init__(
         self,
         db_path: str,
-        ucs_manager=None
+        ucs_manager=None,
+        immutable: bool = False
     ):
         """
         初始化导入器
@@ -77,21 +96,92 @@ class SoundminerImporter:
         Args:
             db_path: 数据库文件路径
             ucs_manager: UCSManager 实例（可选，用于处理分类）
+            immutable: 数据库是否为不会被修改的快照副本（只读连接加 immutable=1，跳过文件锁）
         """
         self.db_path = Path(db_path)
         if not self.db_path.exists():
             raise FileNotFoundError(f"数据库文件不存在: {db_path}")
         
         self.ucs_manager = ucs_manager
-        self.conn: Optional[sqlite3.Connection] = None
+        # 只读连接池：每个线程一个连接（导入、检查器、后台任务可以并行读取）
+        self.pool = SQLiteReadPool(self.db_path, immutable=immutable)
         self.table_name: Optional[str] = None
         self.field_mapping: Optional[Dict[str, str]] = None
+        # resolve_alias 结果缓存（每次调用都要线性扫描同义词表，而库中的分类 / 关键词大量重复）
+        self._alias_cache: Dict[str, Optional[str]] = {}
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """调用线程的只读连接"""
+        return self.pool.connection()
     
     def _connect(self):
-        """连接到数据库"""
-        if self.conn is None:
-            self.conn = sqlite3.connect(str(self.db_path))
-            self.conn.row_factory = sqlite3.Row
+        """确保调用线程已连接到数据库"""
+        self.pool.connection()
+    
+    def release_connection(self):
+        """关闭调用线程的连接（通过 conn 读库的后台线程结束前调用）"""
+        self.pool.release()
+    
+    def connect_readonly(self) -> sqlite3.Connection:
+        """
+        打开一个独立的只读连接（供会换线程的后台任务使用，调用方负责关闭）
+        
+        连接允许跨线程使用，调用方需保证同一时刻只有一个线程访问。
+        """
+        return self.pool.open_connection()
+    
+    def ensure_table(self) -> str:
+        """检测表名和字段映射（只在第一次调用时查询数据库）"""
+        if self.table_name is None:
+            self.table_name = self._detect_table_name()
+            self.field_mapping = self.FIELD_MAPPINGS.get(self.table_name, {})
+        return self.table_name
+    
+    def ensure_recid_index(self) -> bool:
+        """
+        确保 recID 列可以走索引查找（按 recID 批量取原始元数据时使用）
+        
+        recID 是 INTEGER PRIMARY KEY（rowid 别名）或已有以它开头的索引时什么都不做；
+        否则用一个短暂的读写连接创建索引。数据库只读、被占用或是快照副本（immutable，文件不能改动）时
+        返回 False，查询仍然可用，只是退化为全表扫描。
+        
+        Returns:
+            recID 是否有索引
+        """
+        table_name = self.ensure_table()
+        recid_field = self.field_mapping.get('recID', 'recID')
+        
+        conn = self.connect_readonly()
+        try:
+            for row in conn.execute(f"PRAGMA table_info({table_name})"):
+                if row['name'] == recid_field and row['pk'] == 1 and str(row['type']).upper() == 'INTEGER':
+                    return True
+            for index in conn.execute(f"PRAGMA index_list({table_name})").fetchall():
+                columns = conn.execute(f"PRAGMA index_info({index['name']})").fetchall()
+                if columns and columns[0]['name'] == recid_field:
+                    return True
+        finally:
+            conn.close()
+        
+        if self.pool.immutable:
+            logger.info(f"{table_name}.{recid_field} 没有索引，快照副本不创建索引（将使用全表扫描）")
+            return False
+        
+        try:
+            conn = sqlite3.connect(str(self.db_path), timeout=1.0)
+            try:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{recid_field} ON {table_name}({recid_field})"
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            logger.info(f"已为 {table_name}.{recid_field} 创建索引")
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"无法为 {table_name}.{recid_field} 创建索引（将使用全表扫描）: {e}")
+            return False
     
     def _detect_table_name(self) -> str:
         """自动检测可用的表名"""
@@ -140,19 +230,28 @@ class SoundminerImporter:
         
         # 尝试从分类中解析
         if category:
-            resolved = self.ucs_manager.resolve_alias(category)
+            resolved = self._resolve_alias(category)
             if resolved:
                 return resolved
         
         # 尝试从关键词中解析
         if keywords:
             for keyword in keywords.split():
-                resolved = self.ucs_manager.resolve_alias(keyword)
+                resolved = self._resolve_alias(keyword)
                 if resolved:
                     return resolved
         
         return category or ""
     
+    def _resolve_alias(self, keyword: str) -> Optional[str]:
+        """带缓存的 ucs_manager.resolve_alias"""
+        try:
+            return self._alias_cache[keyword]
+        except KeyError:
+            resolved = self.ucs_manager.resolve_alias(keyword)
+            self._alias_cache[keyword] = resolved
+            return resolved
+    
     def _build_semantic_text(self, row: sqlite3.Row, mapping: Dict[str, str]) -> str:
         """
         构建语义文本字段（向后兼容）
@@ -207,16 +306,7 @@ class SoundminerImporter:
         parts = []
         
         # Phase 3.5: 提取所有潜在元数据字段
-        priority_fields = [
-            'Filename', 'filename',
-            'Description', 'description',
-            'Keywords', 'keywords',
-            'VendorCategory', 'vendorcategory', 'Vendor_Category',
-            'Library', 'library',
-            'BWDescription', 'bwdescription', 'BW_Description',
-            'Notes', 'notes',
-            'FXName', 'fxname', 'FX_Name'
-        ]
+        priority_fields = self.RICH_CONTEXT_FIELDS
         
         # 按优先级提取字段
         for field in priority_fields:
@@ -237,6 +327,44 @@ class SoundminerImporter:
         
         return " ".join(parts)
     
+    @staticmethod
+    def _is_extended_field(col_lower: str) -> bool:
+        """是否为 AudioMetadata 扩展字段对应的列（与 import_all 中的匹配规则一致）"""
+        return (
+            ('vendor' in col_lower and 'category' in col_lower)
+            or col_lower == 'library'
+            or ('bw' in col_lower and 'description' in col_lower)
+            or col_lower == 'notes'
+            or ('fx' in col_lower and 'name' in col_lower)
+        )
+    
+    def projected_columns(self, all_columns: List[str]) -> List[str]:
+        """
+        导入需要读取的列（代替 SELECT *）
+        
+        包括字段映射中的基础字段、rich_context_text 会用到的列（含不区分大小写的回退匹配）
+        和扩展字段列；其余列（波形、时间码等）不读取。
+        """
+        self.ensure_table()
+        wanted = {name for name in self.field_mapping.values() if name}
+        rich_fields = [field.lower() for field in self.RICH_CONTEXT_FIELDS]
+        projected = []
+        for col in all_columns:
+            col_lower = col.lower()
+            if (
+                col in wanted
+                or any(field in col_lower for field in rich_fields)
+                or self._is_extended_field(col_lower)
+            ):
+                projected.append(col)
+        return projected
+    
+    def select_clause(self, columns: List[str]) -> str:
+        """列名列表 -> SELECT 列表（列名加引号）"""
+        if not columns:
+            return "*"
+        return ", ".join('"' + col.replace('"', '""') + '"' for col in columns)
+    
     def import_all(self, limit: Optional[int] = None) -> List[AudioMetadata]:
         """
         Phase 3.5: 导入所有音频元数据（扩展版）
@@ -250,15 +378,13 @@ class SoundminerImporter:
         self._connect()
         
         # 检测表名
-        if self.table_name is None:
-            self.table_name = self._detect_table_name()
-            self.field_mapping = self.FIELD_MAPPINGS.get(self.table_name, {})
+        self.ensure_table()
         
-        # Phase 3.5: 获取表的所有列
-        all_columns = self._get_table_columns(self.table_name)
+        # Phase 3.5: 获取表的所有列，只读取导入会用到的列
+        all_columns = self.projected_columns(self._get_table_columns(self.table_name))
         
         # 构建查询
-        query = f"SELECT * FROM {self.table_name}"
+        query = f"SELECT {self.select_clause(all_columns)} FROM {self.table_name}"
         if limit:
             query += f" LIMIT {limit}"
         
@@ -326,8 +452,6 @@ class SoundminerImporter:
         return results
     
     def close(self):
-        """关闭数据库连接"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """关闭所有线程的数据库连接"""
+        self.pool.close()
 
@@ -3,6 +3,11 @@ Sonic Compass 2.0 主入口文件（向后兼容）
 已重构到 ui/ 模块，此文件保留用于向后兼容
 """
 
+import time
+
+# 启动时刻：在导入 ui 之前取，启动指标包含导入耗时
+_PROCESS_START = time.perf_counter()
+
 # 向后兼容：重定向到新的模块结构
 from ui import SonicCompassMainWindow
 
@@ -12,6 +17,8 @@ __all__ = ['SonicCompassMainWindow']
 # 如果直接运行此文件，启动应用
 if __name__ == "__main__":
     import sys
+    from core.instrumentation import set_process_start
+    set_process_start(_PROCESS_START)
     from PySide6.QtWidgets import QApplication
     from PySide6.QtGui import QColor, QPalette
     
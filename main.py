@@ -3,11 +3,19 @@ Sonic Compass 2.0 主入口文件
 """
 
 import sys
+import time
+
+# 启动时刻：在导入 PySide6 / ui 之前取，启动指标包含导入耗时
+_PROCESS_START = time.perf_counter()
+
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QColor, QPalette
 
+from core.instrumentation import set_process_start
 from ui import SonicCompassMainWindow
 
+set_process_start(_PROCESS_START)
+
 
 def main():
     """主函数"""
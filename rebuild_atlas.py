@@ -3,6 +3,7 @@ Sonic Compass - 重建星图脚本
 """
 import sys
 import os
+import logging
 import time
 import numpy as np
 from pathlib import Path
@@ -15,14 +16,16 @@ if sys.platform == 'win32':
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from core.log import get_logger, setup_logging, log_span
+
+logger = get_logger(Path(__file__).stem)
+
 # 导入工具脚本
-print("[导入] 开始导入模块...", flush=True)
-sys.stdout.flush()
+logger.debug("[导入] 开始导入模块...")
 
 # 使用 importlib 动态导入，避免在导入时执行模块级代码
 try:
-    print("[导入] 导入 generate_platinum_centroids...", flush=True)
-    sys.stdout.flush()
+    logger.debug("[导入] 导入 generate_platinum_centroids...")
     import importlib.util
     spec = importlib.util.spec_from_file_location(
         "generate_platinum_centroids",
@@ -31,36 +34,27 @@ try:
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
     generate_platinum_centroids = module.generate_platinum_centroids
-    print("[导入] ✅ generate_platinum_centroids 导入成功", flush=True)
-    sys.stdout.flush()
+    plan_platinum_centroids = module.plan_platinum_centroids
+    logger.debug("[导入] ✅ generate_platinum_centroids 导入成功")
 except Exception as e:
-    print(f"❌ 无法导入质心生成工具: {e}", flush=True)
-    import traceback
-    traceback.print_exc()
-    sys.stdout.flush()
+    logger.exception(f"❌ 无法导入质心生成工具: {e}")
     sys.exit(1)
 
 try:
-    print("[导入] 导入 umap...", flush=True)
-    sys.stdout.flush()
+    logger.debug("[导入] 导入 umap...")
     import umap
-    print("✅ 检测到 UMAP 库", flush=True)
-    sys.stdout.flush()
+    logger.info("✅ 检测到 UMAP 库")
 except ImportError:
-    print("❌ 未检测到 UMAP！请先运行: pip install umap-learn", flush=True)
-    sys.stdout.flush()
+    logger.error("❌ 未检测到 UMAP！请先运行: pip install umap-learn")
     sys.exit(1)
 
 try:
-    print("[导入] 导入 sklearn...", flush=True)
-    sys.stdout.flush()
-    from sklearn.preprocessing import LabelEncoder
+    logger.debug("[导入] 导入 sklearn...")
+    import sklearn  # noqa: F401  inject_category_vectors 需要 OneHotEncoder
     SKLEARN_AVAILABLE = True
-    print("[导入] ✅ sklearn 导入成功", flush=True)
-    sys.stdout.flush()
+    logger.debug("[导入] ✅ sklearn 导入成功")
 except ImportError:
-    print("❌ 未检测到 scikit-learn！请先运行: pip install scikit-learn", flush=True)
-    sys.stdout.flush()
+    logger.error("❌ 未检测到 scikit-learn！请先运行: pip install scikit-learn")
     sys.exit(1)
 
 # 延迟导入：不在模块级别导入 data 和 core，避免在导入时触发初始化
@@ -77,44 +71,40 @@ def rebuild(mode: str = "both"):
             - "gravity": 只计算Gravity模式坐标
             - "both": 同时计算两种模式（默认）
     """
-    print("=" * 60, flush=True)
-    print(f"🚀 Sonic Compass: 正在重绘星系地图 (Rebuilding Atlas) - Mode: {mode}", flush=True)
-    print("=" * 60, flush=True)
-    sys.stdout.flush()
+    logger.info("=" * 60)
+    logger.info(f"🚀 Sonic Compass: 正在重绘星系地图 (Rebuilding Atlas) - Mode: {mode}")
+    logger.info("=" * 60)
     
     if mode not in ["ucs", "gravity", "both"]:
-        print(f"❌ 无效的模式: {mode}，请使用 'ucs', 'gravity' 或 'both'")
+        logger.error(f"❌ 无效的模式: {mode}，请使用 'ucs', 'gravity' 或 'both'")
         sys.exit(1)
 
     # 1. 检查并生成白金质心 (Phase 3.5 Critical Step)
-    centroid_path = Path("./cache/platinum_centroids_754.pkl")
-    print(f"[DEBUG] 检查质心文件: {centroid_path.absolute()}", flush=True)
-    print(f"[DEBUG] 文件存在: {centroid_path.exists()}", flush=True)
-    sys.stdout.flush()
+    # 对比每条 CatID 定义的哈希：没有变化时整步跳过（不加载模型），有变化时只重新编码变化的定义
+    try:
+        centroid_plan = plan_platinum_centroids()
+    except Exception as e:
+        logger.exception(f"❌ 无法检查质心缓存: {e}")
+        sys.exit(1)
     
-    if not centroid_path.exists():
-        print("\n[自动执行] 未检测到质心缓存，正在从 JSON 生成 753 个白金质心...", flush=True)
-        sys.stdout.flush()
+    if centroid_plan.up_to_date:
+        logger.info(f"白金质心已是最新（{len(centroid_plan.reused)} 个 CatID 定义未变化），跳过生成。")
+    else:
+        if centroid_plan.reason:
+            logger.info(f"[自动执行] {centroid_plan.reason}，正在从 JSON 生成白金质心...")
+        else:
+            logger.info(f"[自动执行] {len(centroid_plan.to_encode)} 个 CatID 定义有变化，正在增量更新白金质心...")
         try:
             # 调用工具脚本生成
-            print("[DEBUG] 开始调用 generate_platinum_centroids()...", flush=True)
-            sys.stdout.flush()
-            generate_platinum_centroids() 
-            print("✅ 白金质心生成完毕", flush=True)
-            sys.stdout.flush()
+            logger.debug("开始调用 generate_platinum_centroids()...")
+            generate_platinum_centroids()
+            logger.info("✅ 白金质心生成完毕")
         except Exception as e:
-            print(f"❌ 质心生成失败: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            sys.stdout.flush()
+            logger.exception(f"❌ 质心生成失败: {e}")
             sys.exit(1)
-    else:
-        print("\n[INFO] 检测到现有白金质心缓存，跳过生成。", flush=True)
-        sys.stdout.flush()
 
     # 2. 延迟导入并初始化核心组件
-    print("\n📦 初始化引擎...")
-    sys.stdout.flush()
+    logger.info("📦 初始化引擎...")
     
     # 【新增】从配置文件读取数据库路径
     from data.database_config import get_database_path
@@ -122,58 +112,44 @@ def rebuild(mode: str = "both"):
     CACHE_DIR = "./cache"
     
     if not Path(DB_PATH).exists():
-        print(f"❌ 数据库文件不存在: {DB_PATH}")
-        print("   请检查 data_config/user_config.json 中的 database_path 配置")
+        logger.error(f"❌ 数据库文件不存在: {DB_PATH}")
+        logger.info("   请检查 data_config/user_config.json 中的 database_path 配置")
         sys.exit(1)
     
-    print("   [步骤] 导入 data 模块...", flush=True)
-    sys.stdout.flush()
+    logger.debug("[步骤] 导入 data 模块...")
     try:
         from data import SoundminerImporter
-        print("   [步骤] ✅ SoundminerImporter 导入成功", flush=True)
-        sys.stdout.flush()
+        logger.debug("[步骤] ✅ SoundminerImporter 导入成功")
     except ImportError as e:
-        print(f"   ❌ 导入 SoundminerImporter 失败: {e}", flush=True)
-        sys.stdout.flush()
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"   ❌ 导入 SoundminerImporter 失败: {e}")
         sys.exit(1)
     
-    print("   [步骤] 导入 core 模块...", flush=True)
-    sys.stdout.flush()
+    logger.debug("[步骤] 导入 core 模块...")
     try:
         from core import (
             DataProcessor, VectorEngine, inject_category_vectors, umap_config,
             compute_ucs_layout, compute_gravity_layout, UCSManager
         )
-        print("   [步骤] ✅ DataProcessor 和 VectorEngine 导入成功", flush=True)
-        sys.stdout.flush()
+        logger.debug("[步骤] ✅ DataProcessor 和 VectorEngine 导入成功")
     except ImportError as e:
-        print(f"   ❌ 导入 core 模块失败: {e}", flush=True)
-        sys.stdout.flush()
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"   ❌ 导入 core 模块失败: {e}")
         sys.exit(1)
     
-    print("   正在初始化 SoundminerImporter...", flush=True)
-    sys.stdout.flush()
+    logger.info("   正在初始化 SoundminerImporter...")
     try:
         ucs_manager = UCSManager()
         ucs_manager.load_all()
         importer = SoundminerImporter(db_path=DB_PATH, ucs_manager=ucs_manager)
     except Exception as e:
-        print(f"   [WARNING] UCSManager 初始化失败，使用默认配置: {e}")
+        logger.warning(f"UCSManager 初始化失败，使用默认配置: {e}")
         importer = SoundminerImporter(db_path=DB_PATH)
         ucs_manager = None
     
-    print("   正在加载向量模型（这可能需要几秒钟）...", flush=True)
-    sys.stdout.flush()
+    logger.info("   正在加载向量模型（这可能需要几秒钟）...")
     vector_engine = VectorEngine(model_path="./models/bge-m3")
-    print("   ✅ 模型加载完成", flush=True)
-    sys.stdout.flush()
+    logger.info("   ✅ 模型加载完成")
     
-    print("   正在创建 DataProcessor...", flush=True)
-    sys.stdout.flush()
+    logger.info("   正在创建 DataProcessor...")
     processor = DataProcessor(
         importer=importer,
         vector_engine=vector_engine,
@@ -185,115 +161,70 @@ def rebuild(mode: str = "both"):
         # 确保processor有ucs_manager
         if ucs_manager:
             processor.ucs_manager = ucs_manager
-    print("   ✅ 初始化完成", flush=True)
-    sys.stdout.flush()
+    logger.info("   ✅ 初始化完成")
 
     # 3. 清除旧数据
-    print("\n🧹 清除旧缓存...")
-    sys.stdout.flush()
+    logger.info("🧹 清除旧缓存...")
     processor.clear_cache()
 
     # 4. 构建索引 (这将触发 AI 仲裁)
-    print("\n⚙️  开始计算...")
-    sys.stdout.flush()
+    logger.info("⚙️  开始计算...")
     start_time = time.time()
     
-    print("   [步骤 1/4] 加载数据并计算 Category 质心...")
-    sys.stdout.flush()
-    print("   [步骤 2/4] 向量化数据（使用 GPU 加速）...")
-    sys.stdout.flush()
+    logger.info("   [步骤 1/4] 加载数据并计算 Category 质心...")
+    logger.info("   [步骤 2/4] 向量化数据（使用 GPU 加速）...")
     
     try:
         metadata, embeddings = processor.build_index(
             limit=None,  # 处理所有数据
             force_rebuild=True  # 强制重建
         )
-        print(f"✅ 向量化完成 ({len(metadata)} 条记录)")
-        print(f"   耗时: {time.time() - start_time:.2f} 秒")
-        sys.stdout.flush()
+        logger.info(f"✅ 向量化完成 ({len(metadata)} 条记录)")
+        logger.info(f"   耗时: {time.time() - start_time:.2f} 秒")
     except Exception as e:
-        print(f"❌ 索引构建失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ 索引构建失败: {e}")
         sys.exit(1)
 
     # 5. 计算 UMAP
-    print("\n🗺️  计算 Supervised UMAP 坐标...")
-    sys.stdout.flush()
+    logger.info("🗺️  计算 Supervised UMAP 坐标...")
     try:
         # 加载刚刚生成的 embeddings 和 metadata
         meta, embeddings = processor.load_index()
         
         # 提取用于监督学习的标签（UCS主类别名称）
         # 关键：从 CatID（如 AMBFORST）映射到主类别名称（如 AMBIENCE），确保按82个主类别聚类
-        targets = []
-        missing_count = 0
-        
-        # 确保 ucs_manager 已初始化
+        # 确保 ucs_manager 已初始化（旧缓存没有类别编码时用于现场生成）
         if not processor.ucs_manager:
-            print("   [警告] UCSManager 未初始化，无法进行主类别映射")
-            sys.stdout.flush()
-        
-        for m in meta:
-            # metadata 的 'category' 字段存储的是 CatID（如 "AMBFORST"）
-            raw_cat = m.get('category', '') if isinstance(m, dict) else getattr(m, 'category', '')
-            
-            if not raw_cat or raw_cat == '' or raw_cat == 'UNCATEGORIZED':
-                # 缺失类别：标记为 "UNCATEGORIZED"，后续将编码为 -1
-                targets.append("UNCATEGORIZED")
-                missing_count += 1
-                continue
-            
-            # 使用 UCSManager 将 CatID 映射到主类别名称
-            if processor.ucs_manager:
-                target_label = processor.ucs_manager.get_main_category_by_id(raw_cat)
-            else:
-                target_label = "UNCATEGORIZED"
-            
-            # 验证：如果映射结果为 "UNCATEGORIZED"，标记为缺失
-            if target_label == "UNCATEGORIZED":
-                targets.append("UNCATEGORIZED")
-                missing_count += 1
-            else:
-                targets.append(target_label)  # 列表里是 [AMBIENCE, AMBIENCE, WEAPONS, WEAPONS, ...]
-        
-        # 【超级锚点策略】保存原始字符串列表（避免-1陷阱）
-        targets_original = targets.copy()  # 保存字符串列表，用于向量注入
+            logger.warning("   [警告] UCSManager 未初始化，无法进行主类别映射")
         
-        # 使用 LabelEncoder 编码为整数数组
-        # 将 "UNCATEGORIZED" 标记为特殊值，编码后再替换为 -1
-        label_encoder = LabelEncoder()
-        targets_encoded = label_encoder.fit_transform(targets)
+        # 类别整数编码（build_index 已生成）：CatID -> 主类别通过查找表完成
+        category_codes = processor.load_category_codes()
         
-        # 将 "UNCATEGORIZED" 的标签替换为 -1
-        uncategorized_label_idx = None
-        for i, cls in enumerate(label_encoder.classes_):
-            if cls == 'UNCATEGORIZED':
-                uncategorized_label_idx = i
-                break
+        # 【超级锚点策略】主类别字符串列表（避免-1陷阱，用于向量注入）
+        targets_original = category_codes.main_category_labels()
         
-        if uncategorized_label_idx is not None:
-            targets_encoded[targets_encoded == uncategorized_label_idx] = -1
+        # UMAP 监督标签：主类别编码，未分类为 -1
+        targets_encoded = category_codes.supervision_targets()
+        missing_count = int(np.count_nonzero(targets_encoded < 0))
         
         # 验证打印：检查唯一主类别数量
-        unique_cats = set([t for t in targets if t != 'UNCATEGORIZED'])
-        print(f"✅ [Supervision] Unique Main Categories found: {len(unique_cats)}")
+        unique_cats = set(category_codes.main_category_table[c] for c in np.unique(targets_encoded[targets_encoded >= 0]))
+        logger.info(f"✅ [Supervision] Unique Main Categories found: {len(unique_cats)}")
         if len(unique_cats) > 100:
-            print(f"⚠️  [警告] 唯一类别数过多 ({len(unique_cats)})，可能仍在使用 CatID 而非主类别名称")
+            logger.warning(f"⚠️  [警告] 唯一类别数过多 ({len(unique_cats)})，可能仍在使用 CatID 而非主类别名称")
         elif len(unique_cats) < 5:
-            print(f"⚠️  [警告] 分类过少 ({len(unique_cats)})，请检查 AI 仲裁逻辑")
+            logger.warning(f"⚠️  [警告] 分类过少 ({len(unique_cats)})，请检查 AI 仲裁逻辑")
         else:
-            print(f"📋 Sample Labels: {list(sorted(unique_cats))[:15]}")
+            logger.info(f"📋 Sample Labels: {list(sorted(unique_cats))[:15]}")
         
         if missing_count > 0:
-            print(f"   [统计] 缺失类别数量: {missing_count} (已标记为 -1)")
-        sys.stdout.flush()
+            logger.info(f"   [统计] 缺失类别数量: {missing_count} (已标记为 -1)")
 
         # 根据模式选择计算方式
         if mode in ["ucs", "both"]:
-            print("\n" + "=" * 60)
-            print("🗺️  UCS模式: 定锚群岛策略 (Fixed Archipelago Strategy)")
-            print("=" * 60)
+            logger.info("=" * 60)
+            logger.info("🗺️  UCS模式: 定锚群岛策略 (Fixed Archipelago Strategy)")
+            logger.info("=" * 60)
             
             # 确保UCSManager已初始化
             if not ucs_manager:
@@ -302,50 +233,49 @@ def rebuild(mode: str = "both"):
                     ucs_manager.load_all()
                     processor.ucs_manager = ucs_manager
                 except Exception as e:
-                    print(f"❌ UCSManager 初始化失败: {e}")
+                    logger.error(f"❌ UCSManager 初始化失败: {e}")
                     if mode == "ucs":
                         sys.exit(1)
             
             # 使用新的布局引擎计算UCS坐标
             try:
-                coords_ucs, _ = compute_ucs_layout(
-                    metadata=meta,
-                    embeddings=embeddings,
-                    ucs_manager=ucs_manager,
-                    config_path="data_config/ucs_coordinates.json",
-                    use_parallel=True
-                )
+                with log_span(logger, 'layout.ucs', level=logging.INFO, points=len(meta)):
+                    coords_ucs, _ = compute_ucs_layout(
+                        metadata=meta,
+                        embeddings=embeddings,
+                        ucs_manager=ucs_manager,
+                        config_path="data_config/ucs_coordinates.json",
+                        use_parallel=True,
+                        category_codes=category_codes
+                    )
                 processor.save_coordinates(coords_ucs, mode="ucs")
-                print("✅ UCS坐标计算完成并保存")
+                logger.info("✅ UCS坐标计算完成并保存")
             except FileNotFoundError as e:
-                print(f"❌ UCS模式需要配置文件: {e}")
-                print("   请先运行: python tools/extract_category_centroids.py")
+                logger.error(f"❌ UCS模式需要配置文件: {e}")
+                logger.info("   请先运行: python tools/extract_category_centroids.py")
                 if mode == "ucs":
                     sys.exit(1)
             except Exception as e:
-                print(f"❌ UCS模式计算失败: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception(f"❌ UCS模式计算失败: {e}")
                 if mode == "ucs":
                     sys.exit(1)
         
         if mode in ["gravity", "both"]:
-            print("\n" + "=" * 60)
-            print("🌌 Gravity模式: 纯无监督全局UMAP")
-            print("=" * 60)
+            logger.info("=" * 60)
+            logger.info("🌌 Gravity模式: 纯无监督全局UMAP")
+            logger.info("=" * 60)
             
             # 使用新的布局引擎计算Gravity坐标
             try:
-                coords_gravity = compute_gravity_layout(
-                    metadata=meta,
-                    embeddings=embeddings
-                )
+                with log_span(logger, 'layout.gravity', level=logging.INFO, points=len(meta)):
+                    coords_gravity = compute_gravity_layout(
+                        metadata=meta,
+                        embeddings=embeddings
+                    )
                 processor.save_coordinates(coords_gravity, mode="gravity")
-                print("✅ Gravity坐标计算完成并保存")
+                logger.info("✅ Gravity坐标计算完成并保存")
             except Exception as e:
-                print(f"❌ Gravity模式计算失败: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception(f"❌ Gravity模式计算失败: {e}")
                 if mode == "gravity":
                     sys.exit(1)
         
@@ -354,8 +284,8 @@ def rebuild(mode: str = "both"):
         # 旧逻辑已被新的layout_engine替代
         if False:  # 禁用旧逻辑
             # 【超级锚点策略】向量注入：将主类别的One-Hot向量注入到音频embedding中
-            print("   ⚓ 正在实施超级锚点策略 (Super-Anchor Strategy)...", flush=True)
-            print("   强制同一主类别的数据聚集，解决'大陆漂移'问题...", flush=True)
+            logger.info("   ⚓ 正在实施超级锚点策略 (Super-Anchor Strategy)...")
+            logger.info("   强制同一主类别的数据聚集，解决'大陆漂移'问题...")
             injection_params = umap_config.get_injection_params()
             X_combined, _ = inject_category_vectors(
                 embeddings=embeddings,
@@ -363,17 +293,15 @@ def rebuild(mode: str = "both"):
                 audio_weight=injection_params['audio_weight'],
                 category_weight=injection_params['category_weight']
             )
-            print(f"   ✅ 向量注入完成: {embeddings.shape} -> {X_combined.shape}", flush=True)
-            print(f"   音频权重: {injection_params['audio_weight']}, 类别锚点权重: {injection_params['category_weight']}", flush=True)
-            sys.stdout.flush()
+            logger.info(f"   ✅ 向量注入完成: {embeddings.shape} -> {X_combined.shape}")
+            logger.info(f"   音频权重: {injection_params['audio_weight']}, 类别锚点权重: {injection_params['category_weight']}")
 
             # 从统一配置获取UMAP参数
             umap_params = umap_config.get_umap_params()
             reducer = umap.UMAP(**umap_params)
             
-            print("   [进度] 正在运行 UMAP fit_transform（这可能需要几分钟）...")
-            print("   [提示] UMAP 会显示详细的计算进度信息")
-            sys.stdout.flush()
+            logger.info("   [进度] 正在运行 UMAP fit_transform（这可能需要几分钟）...")
+            logger.info("   [提示] UMAP 会显示详细的计算进度信息")
             
             # 记录开始时间
             umap_start = time.time()
@@ -381,8 +309,7 @@ def rebuild(mode: str = "both"):
             coords_2d = reducer.fit_transform(X_combined, y=targets_encoded)
             umap_elapsed = time.time() - umap_start
             
-            print(f"   ✅ UMAP 计算完成（耗时 {umap_elapsed:.1f} 秒）")
-            sys.stdout.flush()
+            logger.info(f"   ✅ UMAP 计算完成（耗时 {umap_elapsed:.1f} 秒）")
             
             # 归一化
             min_coords = coords_2d.min(axis=0)
@@ -391,22 +318,19 @@ def rebuild(mode: str = "both"):
             coords_2d = (coords_2d - min_coords) * scale
             
             processor.save_coordinates(coords_2d, mode="legacy")
-            print("✅ 坐标计算完成并保存")
-            sys.stdout.flush()
+            logger.info("✅ 坐标计算完成并保存")
 
     except Exception as e:
-        print(f"❌ UMAP 计算失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ UMAP 计算失败: {e}")
         sys.exit(1)
 
     # 6. 完成
     total_time = time.time() - start_time
-    print("\n" + "=" * 60)
-    print("✅ 重建完成！现在请运行 python main.py")
-    print(f"   总耗时: {total_time:.2f} 秒")
-    print(f"   数据量: {len(metadata)} 条记录")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("✅ 重建完成！现在请运行 python main.py")
+    logger.info(f"   总耗时: {total_time:.2f} 秒")
+    logger.info(f"   数据量: {len(metadata)} 条记录")
+    logger.info("=" * 60)
 
 if __name__ == "__main__":
     import argparse
@@ -415,20 +339,19 @@ if __name__ == "__main__":
     parser.add_argument('--mode', type=str, default='both',
                        choices=['ucs', 'gravity', 'both'],
                        help='计算模式: ucs (UCS模式), gravity (Gravity模式), both (两者都计算，默认)')
+    parser.add_argument('--verbose', action='store_true', help='输出 DEBUG 日志')
     
     args = parser.parse_args()
+    if args.verbose:
+        setup_logging(logging.DEBUG, force=True)
     
     # 立即输出，确保用户能看到脚本开始运行
-    print("[启动] rebuild_atlas.py 开始运行...", flush=True)
-    sys.stdout.flush()
+    logger.info("[启动] rebuild_atlas.py 开始运行...")
     try:
         rebuild(mode=args.mode)
     except KeyboardInterrupt:
-        print("\n[中断] 用户中断了脚本执行", flush=True)
+        logger.info("[中断] 用户中断了脚本执行")
         sys.exit(1)
     except Exception as e:
-        print(f"\n[错误] 脚本执行失败: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        sys.stdout.flush()
+        logger.exception(f"[错误] 脚本执行失败: {e}")
         sys.exit(1)
@@ -17,22 +17,26 @@ if sys.platform == 'win32':
 # 确保能找到模块
 sys.path.insert(0, str(Path(__file__).parent))
 
+from core.log import get_logger
+
+logger = get_logger(Path(__file__).stem)
+
 from data import SoundminerImporter
 from core import DataProcessor, VectorEngine
 
 
 def rebuild_vectors_only():
     """仅重新向量化（保留现有UMAP坐标）"""
-    print("=" * 60)
-    print("🔄 Sonic Compass: 重新向量化 (Rebuild Vectors Only)")
-    print("=" * 60)
-    print("⚠️  警告: 重新向量化后，现有UMAP坐标将不再匹配！")
-    print("   建议: 向量化完成后，运行 python recalculate_umap.py")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("🔄 Sonic Compass: 重新向量化 (Rebuild Vectors Only)")
+    logger.info("=" * 60)
+    logger.warning("⚠️  警告: 重新向量化后，现有UMAP坐标将不再匹配！")
+    logger.info("   建议: 向量化完成后，运行 python recalculate_umap.py")
+    logger.info("=" * 60)
     
     reply = input("\n是否继续？(y/n): ")
     if reply.lower() != 'y':
-        print("已取消")
+        logger.info("已取消")
         return
     
     # 1. 配置路径（从配置文件读取）
@@ -41,12 +45,12 @@ def rebuild_vectors_only():
     CACHE_DIR = "./cache"
     
     if not Path(DB_PATH).exists():
-        print(f"❌ 数据库文件不存在: {DB_PATH}")
-        print("   请检查 data_config/user_config.json 中的 database_path 配置")
+        logger.error(f"❌ 数据库文件不存在: {DB_PATH}")
+        logger.info("   请检查 data_config/user_config.json 中的 database_path 配置")
         sys.exit(1)
     
     # 2. 初始化核心组件
-    print("\n📦 初始化引擎...")
+    logger.info("📦 初始化引擎...")
     importer = SoundminerImporter(db_path=DB_PATH)
     vector_engine = VectorEngine(model_path="./models/bge-m3")
     
@@ -57,7 +61,7 @@ def rebuild_vectors_only():
     )
     
     # 3. 重新向量化
-    print("\n⚙️  开始向量化（这可能需要几分钟）...")
+    logger.info("⚙️  开始向量化（这可能需要几分钟）...")
     start_time = time.time()
     
     metadata, embeddings = processor.build_index(
@@ -65,18 +69,18 @@ def rebuild_vectors_only():
         force_rebuild=True  # 强制重建
     )
     
-    print(f"✅ 向量化完成 ({len(metadata)} 条记录)")
-    print(f"   耗时: {time.time() - start_time:.2f} 秒")
+    logger.info(f"✅ 向量化完成 ({len(metadata)} 条记录)")
+    logger.info(f"   耗时: {time.time() - start_time:.2f} 秒")
     
     # 4. 完成
     total_time = time.time() - start_time
-    print("\n" + "=" * 60)
-    print(f"✅ 向量化完成！")
-    print(f"   总耗时: {total_time:.2f} 秒")
-    print(f"   数据量: {len(metadata)} 条记录")
-    print("=" * 60)
-    print("\n⚠️  注意: 现有UMAP坐标已失效，请运行:")
-    print("   python recalculate_umap.py")
+    logger.info("=" * 60)
+    logger.info(f"✅ 向量化完成！")
+    logger.info(f"   总耗时: {total_time:.2f} 秒")
+    logger.info(f"   数据量: {len(metadata)} 条记录")
+    logger.info("=" * 60)
+    logger.warning("⚠️  注意: 现有UMAP坐标已失效，请运行:")
+    logger.info("   python recalculate_umap.py")
 
 
 if __name__ == "__main__":
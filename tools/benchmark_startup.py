@@ -0,0 +1,91 @@
+"""
+启动耗时基准
+测量 import core / ui、主窗口构建和首帧（完整场景就绪）耗时
+
+用法:
+    python tools/benchmark_startup.py              # 默认：模型延迟加载
+    python tools/benchmark_startup.py --eager-model  # 对比：启动时同步加载模型
+    python tools/benchmark_startup.py --offscreen    # 无显示环境（CI）
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def run_startup_benchmark(eager_model: bool = False, timeout_s: float = 120.0):
+    """运行启动耗时基准"""
+    print("=" * 60)
+    print("[START] 启动耗时基准" + ("（同步加载模型）" if eager_model else "（模型延迟加载）"))
+    print("=" * 60)
+
+    t0 = time.perf_counter()
+
+    # --- 1. 导入 ---
+    import core  # noqa: F401
+    from core.instrumentation import set_process_start
+    set_process_start(t0)
+    t_core = time.perf_counter()
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QElapsedTimer
+    from ui import SonicCompassMainWindow
+    t_ui = time.perf_counter()
+
+    heavy = [name for name in ('torch', 'sentence_transformers', 'umap') if name in sys.modules]
+    print(f"  import core: {t_core - t0:.2f}s")
+    print(f"  import ui:   {t_ui - t_core:.2f}s")
+    print(f"  已导入的重型模块: {heavy or '无'}")
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # --- 2. 构建主窗口（包含 _load_data） ---
+    window = SonicCompassMainWindow()
+    if eager_model and window.vector_engine is not None:
+        window.vector_engine.load()
+    t_window = time.perf_counter()
+    print(f"  主窗口构建: {t_window - t_ui:.2f}s")
+
+    # --- 3. 首帧：显示窗口并等待完整场景就绪 ---
+    window.show()
+    ready = {'done': window.visualizer is None}
+    if window.visualizer is not None:
+        window.visualizer.scene_ready.connect(lambda: ready.update(done=True))
+        if not window.visualizer._build_threads:
+            # 同步构建：场景已经就绪
+            ready['done'] = True
+
+    timer = QElapsedTimer()
+    timer.start()
+    while not ready['done'] and timer.elapsed() < timeout_s * 1000:
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+    t_frame = time.perf_counter()
+
+    if not ready['done']:
+        print(f"  [WARNING] {timeout_s:.0f}s 内场景未就绪")
+    print(f"  首帧（场景就绪）: {t_frame - t_window:.2f}s")
+
+    model_loaded = window.vector_engine is not None and window.vector_engine.is_loaded
+    print("=" * 60)
+    print(f"[RESULT] 启动到首帧总耗时: {t_frame - t0:.2f}s（模型已加载: {model_loaded}）")
+    print("=" * 60)
+
+    window.close()
+    return t_frame - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sonic Compass 启动耗时基准")
+    parser.add_argument('--eager-model', action='store_true', help='启动时同步加载模型（对比旧行为）')
+    parser.add_argument('--offscreen', action='store_true', help='使用 offscreen 平台（无显示环境）')
+    parser.add_argument('--timeout', type=float, default=120.0, help='等待场景就绪的超时（秒）')
+    args = parser.parse_args()
+
+    if args.offscreen:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    run_startup_benchmark(eager_model=args.eager_model, timeout_s=args.timeout)
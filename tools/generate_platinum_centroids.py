@@ -1,27 +1,31 @@
 """
 生成 Platinum Centroids（白金质心）
 从 ucs_definitions.json 读取 UCS 定义，生成标准质心向量文件
+
+增量生成：每条 CatID 定义记录哈希，只重新编码新增或有变化的定义，
+定义和模型都没有变化时直接跳过（不加载模型）
+
+用法:
+    python tools/generate_platinum_centroids.py            # 增量更新
+    python tools/generate_platinum_centroids.py --force    # 全部重新编码
+    python tools/generate_platinum_centroids.py --check    # 只检查是否需要更新
 """
 
+import argparse
 import json
-import pickle
 import sys
 from pathlib import Path
 
 # 注意：不在模块级别修改 sys.stdout，避免在导入时卡住
 # 编码修复将在函数内部进行
 
+DEFAULT_DEFINITIONS_PATH = Path("data_config/ucs_definitions.json")
+DEFAULT_CACHE_DIR = Path("cache")
+DEFAULT_MODEL_PATH = "./models/bge-m3"
 
-def generate_platinum_centroids():
-    """
-    从 ucs_definitions.json 生成 Platinum Centroids
-    
-    流程：
-    1. 加载 data_config/ucs_definitions.json
-    2. 使用 VectorEngine 编码每个 CatID 的描述文本
-    3. 保存为 cache/platinum_centroids.pkl (格式: {CatID: Vector})
-    """
-    # 修复 Windows 终端编码问题（在函数内部执行）
+
+def _fix_console_encoding():
+    """修复 Windows 终端编码问题（在函数内部执行）"""
     if sys.platform == 'win32':
         try:
             import io
@@ -31,132 +35,240 @@ def generate_platinum_centroids():
                 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
         except:
             pass  # 如果已经设置过，忽略错误
-    
+
     # 确保能找到模块（在函数内部执行，避免在导入时卡住）
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    
+    project_root = str(Path(__file__).parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+
+def load_definitions(json_path=DEFAULT_DEFINITIONS_PATH, verbose: bool = False) -> dict:
+    """
+    读取 UCS 定义（跳过空描述）
+
+    Returns:
+        {CatID: 描述文本}（保持 JSON 中的顺序）
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        ucs_definitions = json.load(f)
+
+    definitions = {}
+    for catid, description in ucs_definitions.items():
+        if not description or not str(description).strip():
+            if verbose:
+                print(f"   [WARNING] CatID {catid} 的描述为空，跳过")
+            continue
+        definitions[catid] = str(description).strip()
+    return definitions
+
+
+def plan_platinum_centroids(
+    json_path=DEFAULT_DEFINITIONS_PATH,
+    cache_dir=DEFAULT_CACHE_DIR,
+    model_path: str = DEFAULT_MODEL_PATH
+):
+    """
+    对比 UCS 定义与已保存的质心（只读文件和计算哈希，不加载模型）
+
+    Returns:
+        CentroidPlan（plan.up_to_date 为 True 时无需重新生成）
+    """
+    _fix_console_encoding()
+    from core.centroids import CentroidStore
+
+    return CentroidStore(cache_dir).plan(load_definitions(json_path), str(model_path))
+
+
+def generate_platinum_centroids(
+    force: bool = False,
+    json_path=DEFAULT_DEFINITIONS_PATH,
+    cache_dir=DEFAULT_CACHE_DIR,
+    model_path: str = DEFAULT_MODEL_PATH
+) -> bool:
+    """
+    从 ucs_definitions.json 生成 Platinum Centroids
+
+    流程：
+    1. 加载 data_config/ucs_definitions.json
+    2. 与已保存的质心比较定义哈希，得出需要重新编码的 CatID
+    3. 使用 VectorEngine 只编码这些 CatID 的描述文本
+    4. 保存为 cache/platinum_centroids.npy（矩阵）+ cache/platinum_centroids_index.json（CatID 顺序、定义哈希、矩阵哈希）
+
+    Args:
+        force: 忽略已保存的质心，全部重新编码
+        json_path: UCS 定义文件
+        cache_dir: 缓存目录
+        model_path: 编码模型路径（模型变化时全部重新编码）
+
+    Returns:
+        是否写入了新的质心（已是最新时返回 False）
+    """
+    _fix_console_encoding()
+
     print("=" * 60)
     print("✨ 生成 Platinum Centroids (白金质心)")
     print("=" * 60)
-    
+
     # 1. 配置路径
-    json_path = Path("data_config/ucs_definitions.json")
-    cache_dir = Path("cache")
+    json_path = Path(json_path)
+    cache_dir = Path(cache_dir)
     cache_dir.mkdir(exist_ok=True)
-    output_path = cache_dir / "platinum_centroids_754.pkl"  # 更新文件名以反映 754 个 CatID
-    
+    model_id = str(model_path)
+
+    from core.centroids import CentroidError, CentroidMatrix, CentroidPlan, CentroidStore
+    store = CentroidStore(cache_dir)
+
     # 2. 检查 JSON 文件是否存在
     if not json_path.exists():
         print(f"❌ JSON 文件不存在: {json_path}")
         print("   请先创建 ucs_definitions.json 文件")
         sys.exit(1)
-    
+
     # 3. 加载 JSON
     print(f"\n📂 加载 UCS 定义文件: {json_path}")
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            ucs_definitions = json.load(f)
-        print(f"   ✅ 加载成功，共 {len(ucs_definitions)} 个 CatID 定义")
+        definitions = load_definitions(json_path, verbose=True)
+        print(f"   ✅ 加载成功，共 {len(definitions)} 个有效 CatID 定义")
     except Exception as e:
         print(f"   ❌ 加载失败: {e}")
         sys.exit(1)
-    
-    # 4. 延迟导入并初始化 VectorEngine（避免在模块导入时加载模型）
-    print("\n🤖 初始化向量引擎...")
-    sys.stdout.flush()
-    try:
-        from core.vector_engine import VectorEngine
-        print("   [步骤] 导入 VectorEngine 模块...", flush=True)
-        sys.stdout.flush()
-        vector_engine = VectorEngine(model_path="./models/bge-m3")
-        print("   ✅ 向量引擎初始化完成", flush=True)
-        sys.stdout.flush()
-    except Exception as e:
-        print(f"   ❌ 向量引擎初始化失败: {e}", flush=True)
-        sys.stdout.flush()
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-    
-    # 5. 延迟导入并初始化 CategoryColorMapper（用于验证 CatID）
-    print("\n🎨 初始化 CategoryColorMapper...")
-    sys.stdout.flush()
-    try:
-        from core.category_color_mapper import CategoryColorMapper
-        print("   [步骤] 导入 CategoryColorMapper 模块...", flush=True)
-        sys.stdout.flush()
-        mapper = CategoryColorMapper()
-        print("   ✅ CategoryColorMapper 初始化完成", flush=True)
+
+    # 4. 对比已保存的质心（定义哈希 + 模型）
+    if force:
+        plan = CentroidPlan(to_encode=list(definitions), reason="--force")
+    else:
+        plan = store.plan(definitions, model_id)
+
+    if plan.up_to_date:
+        print(f"\n✅ 质心已是最新（{len(plan.reused)} 个 CatID 定义未变化），跳过生成")
+        return False
+
+    if plan.reason:
+        print(f"\n🔁 全部重新编码: {plan.reason}")
+    else:
+        print(f"\n🔁 增量更新: 重新编码 {len(plan.to_encode)} 个，沿用 {len(plan.reused)} 个，删除 {len(plan.removed)} 个")
+
+    # 沿用的向量（从已保存的矩阵中取出）
+    reused_vectors = {}
+    if plan.reused:
+        try:
+            stored = store.load()
+            reused_vectors = dict(zip(stored.cat_ids.tolist(), stored.matrix))
+        except CentroidError as e:
+            print(f"   [WARNING] 无法读取已保存的质心，全部重新编码: {e}")
+            plan = CentroidPlan(to_encode=list(definitions), reason=str(e))
+
+    encoded_vectors = {}
+    if plan.to_encode:
+        # 5. 延迟导入并初始化 VectorEngine（避免在模块导入时加载模型）
+        print("\n🤖 初始化向量引擎...")
         sys.stdout.flush()
-    except Exception as e:
-        print(f"   [WARNING] CategoryColorMapper 初始化失败: {e}", flush=True)
+        try:
+            from core.vector_engine import VectorEngine
+            print("   [步骤] 导入 VectorEngine 模块...", flush=True)
+            sys.stdout.flush()
+            vector_engine = VectorEngine(model_path=model_id)
+            print("   ✅ 向量引擎初始化完成", flush=True)
+            sys.stdout.flush()
+        except Exception as e:
+            print(f"   ❌ 向量引擎初始化失败: {e}", flush=True)
+            sys.stdout.flush()
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+        # 6. 延迟导入并初始化 CategoryColorMapper（用于验证 CatID）
+        print("\n🎨 初始化 CategoryColorMapper...")
         sys.stdout.flush()
-        mapper = None
-    
-    # 6. 准备文本列表（按 CatID 顺序）
-    print("\n📝 准备编码文本...")
-    catids = []
-    descriptions = []
-    
-    for catid, description in ucs_definitions.items():
-        if not description or not str(description).strip():
-            print(f"   [WARNING] CatID {catid} 的描述为空，跳过")
-            continue
-        
-        # 验证 CatID 是否有效（可选）
+        try:
+            from core.category_color_mapper import CategoryColorMapper
+            print("   [步骤] 导入 CategoryColorMapper 模块...", flush=True)
+            sys.stdout.flush()
+            mapper = CategoryColorMapper()
+            print("   ✅ CategoryColorMapper 初始化完成", flush=True)
+            sys.stdout.flush()
+        except Exception as e:
+            print(f"   [WARNING] CategoryColorMapper 初始化失败: {e}", flush=True)
+            sys.stdout.flush()
+            mapper = None
+
+        # 验证 CatID 是否有效（可选，只检查需要编码的 CatID）
         if mapper:
-            category = mapper.get_category_from_catid(catid)
-            if not category:
-                print(f"   [WARNING] CatID {catid} 无法映射到 Category，但将继续处理")
-        
-        catids.append(catid)
-        descriptions.append(str(description).strip())
-    
-    print(f"   ✅ 准备完成，共 {len(catids)} 个有效定义")
-    
-    # 7. 批量编码为向量
-    print("\n🔄 开始编码向量（这可能需要一些时间）...")
-    try:
-        embeddings = vector_engine.encode_batch(
-            descriptions,
-            batch_size=32,
-            show_progress=True,
-            normalize_embeddings=True
-        )
-        print(f"   ✅ 编码完成，向量维度: {embeddings.shape}")
-    except Exception as e:
-        print(f"   ❌ 编码失败: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-    
-    # 8. 构建质心字典 {CatID: Vector}
-    print("\n💎 构建 Platinum Centroids 字典...")
+            for catid in plan.to_encode:
+                if not mapper.get_category_from_catid(catid):
+                    print(f"   [WARNING] CatID {catid} 无法映射到 Category，但将继续处理")
+
+        # 7. 批量编码为向量
+        print(f"\n🔄 开始编码 {len(plan.to_encode)} 个定义（这可能需要一些时间）...")
+        try:
+            embeddings = vector_engine.encode_batch(
+                [definitions[catid] for catid in plan.to_encode],
+                batch_size=32,
+                show_progress=True,
+                normalize_embeddings=True
+            )
+            print(f"   ✅ 编码完成，向量维度: {embeddings.shape}")
+        except Exception as e:
+            print(f"   ❌ 编码失败: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+        encoded_vectors = dict(zip(plan.to_encode, embeddings))
+
+    # 8. 按定义顺序堆叠质心矩阵
+    print("\n💎 构建 Platinum Centroids 矩阵...")
     platinum_centroids = {}
-    for i, catid in enumerate(catids):
-        platinum_centroids[catid] = embeddings[i]
-    
+    for catid in definitions:
+        vector = encoded_vectors.get(catid)
+        platinum_centroids[catid] = vector if vector is not None else reused_vectors[catid]
+    centroids = CentroidMatrix.from_dict(platinum_centroids)
+
     # 9. 保存到文件
-    print(f"\n💾 保存到: {output_path}")
+    print(f"\n💾 保存到: {store.matrix_path}")
     try:
-        with open(output_path, 'wb') as f:
-            pickle.dump(platinum_centroids, f)
-        print(f"   ✅ 保存成功")
+        store.save(centroids, definitions, model_id)
+        print(f"   ✅ 保存成功（索引: {store.index_path}）")
     except Exception as e:
         print(f"   ❌ 保存失败: {e}")
         sys.exit(1)
-    
+
     # 10. 统计信息
     print("\n" + "=" * 60)
     print("✅ Platinum Centroids (754 CatID) 生成完成！")
-    print(f"   文件路径: {output_path}")
-    print(f"   CatID 数量: {len(platinum_centroids)}")
-    print(f"   向量维度: {embeddings.shape[1]}")
+    print(f"   文件路径: {store.matrix_path}")
+    print(f"   CatID 数量: {len(centroids)}")
+    print(f"   向量维度: {centroids.dim}")
     print("=" * 60)
     print("\n👉 现在可以运行: python rebuild_atlas.py")
     print("   【754 CatID Source of Truth】AI 仲裁将基于这 754 个精确定义进行匹配")
+    return True
 
 
-if __name__ == "__main__":
-    generate_platinum_centroids()
+def main():
+    parser = argparse.ArgumentParser(description='生成 Platinum Centroids（增量）')
+    parser.add_argument('--force', action='store_true', help='忽略已保存的质心，全部重新编码')
+    parser.add_argument('--check', action='store_true', help='只检查是否需要更新（需要时退出码为 1）')
+    parser.add_argument('--definitions', default=str(DEFAULT_DEFINITIONS_PATH), help='UCS 定义文件')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='缓存目录')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='编码模型路径')
+    args = parser.parse_args()
 
+    if args.check:
+        plan = plan_platinum_centroids(args.definitions, args.cache_dir, args.model)
+        if plan.up_to_date:
+            print(f"✅ 质心已是最新（{len(plan.reused)} 个 CatID）")
+            sys.exit(0)
+        reason = f"（{plan.reason}）" if plan.reason else ""
+        print(f"需要更新: 重新编码 {len(plan.to_encode)} 个，删除 {len(plan.removed)} 个{reason}")
+        sys.exit(1)
+
+    generate_platinum_centroids(
+        force=args.force,
+        json_path=args.definitions,
+        cache_dir=args.cache_dir,
+        model_path=args.model
+    )
+
+
+if __name__ == "__main__":
+    main()
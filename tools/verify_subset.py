@@ -43,9 +43,7 @@ def query_by_keyword(importer: SoundminerImporter, keyword: str, limit: int = 50
     importer._connect()
     
     # 【修复】确保表名已检测
-    if importer.table_name is None:
-        importer.table_name = importer._detect_table_name()
-        importer.field_mapping = importer.FIELD_MAPPINGS.get(importer.table_name, {})
+    importer.ensure_table()
     
     cursor = importer.conn.cursor()
     
@@ -68,8 +66,9 @@ def query_by_keyword(importer: SoundminerImporter, keyword: str, limit: int = 50
         if col_lower == 'keywords' and keywords_col is None:
             keywords_col = col
     
-    # 使用实际字段名构建查询
+    # 使用实际字段名构建查询（只读取会用到的列）
     table_name = importer.table_name
+    select_list = importer.select_clause(importer.projected_columns(column_names))
     conditions = []
     params = []
     
@@ -86,11 +85,11 @@ def query_by_keyword(importer: SoundminerImporter, keyword: str, limit: int = 50
     if not conditions:
         # 如果没有找到任何字段，使用通配符查询所有列
         print(f"[WARNING] 未找到 filename/description/keywords 字段，使用通配符查询")
-        query = f"SELECT * FROM {table_name} LIMIT ?"
+        query = f"SELECT {select_list} FROM {table_name} LIMIT ?"
         cursor.execute(query, (limit,))
     else:
         query = f"""
-            SELECT * FROM {table_name}
+            SELECT {select_list} FROM {table_name}
             WHERE {' OR '.join(conditions)}
             LIMIT ?
         """
@@ -634,15 +633,14 @@ def query_all_data(importer: SoundminerImporter, limit: int = 10000) -> List[Dic
     importer._connect()
     
     # 【修复】确保表名已检测
-    if importer.table_name is None:
-        importer.table_name = importer._detect_table_name()
-        importer.field_mapping = importer.FIELD_MAPPINGS.get(importer.table_name, {})
+    importer.ensure_table()
     
     cursor = importer.conn.cursor()
     table_name = importer.table_name
+    select_list = importer.select_clause(importer.projected_columns(importer._get_table_columns(table_name)))
     
-    # 查询所有数据
-    query = f"SELECT * FROM {table_name} LIMIT ?"
+    # 查询所有数据（只读取会用到的列）
+    query = f"SELECT {select_list} FROM {table_name} LIMIT ?"
     cursor.execute(query, (limit,))
     
     rows = cursor.fetchall()
@@ -5,12 +5,14 @@ UI 组件模块
 from .canvas_view import CanvasView
 from .search_bar import SearchBar
 from .inspector_panel import InspectorPanel
+from .asset_list_model import AssetListModel
 from .universal_tagger import UniversalTagger
 
 __all__ = [
     'CanvasView',
     'SearchBar',
     'InspectorPanel',
+    'AssetListModel',
     'UniversalTagger',
 ]
 
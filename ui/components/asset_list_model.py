@@ -0,0 +1,213 @@
+"""
+资产列表模型 - 检查器面板多选列表的虚拟化数据源
+只持有选择结果和一个行顺序数组：视图只为可见行调用 data()，行数按块增长（fetchMore），
+排序先排出前面可见的一块，其余部分在事件循环空闲时再排
+"""
+
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+
+import numpy as np
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+
+
+class AssetListModel(QAbstractListModel):
+    """
+    选择结果的列表模型
+
+    - items: 元数据序列（LazyMetadataList 或普通 list），不复制
+    - scores: 全局点索引 -> 相似度分数（搜索结果），用于按分数排序
+    - 行顺序保存在 order 数组中（行号 -> items 中的位置）
+    """
+
+    MetadataRole = Qt.ItemDataRole.UserRole
+    SourceIndexRole = Qt.ItemDataRole.UserRole + 1
+    ScoreRole = Qt.ItemDataRole.UserRole + 2
+
+    # 排序方式：selection = 原始选择顺序，score = 分数降序，filename = 文件名升序
+    SORT_KEYS = ('selection', 'score', 'filename')
+
+    # 每次 fetchMore 增加的行数（也是排序时先排好的行数）
+    FETCH_CHUNK = 500
+
+    def __init__(self, items: Sequence, scores: Optional[Dict[int, float]] = None, parent=None):
+        super().__init__(parent)
+        self._items = items
+        indices = getattr(items, 'indices', None)
+        # 全局点索引（LazyMetadataList 才有；普通 list 用位置代替）
+        self._source_indices = (
+            np.asarray(indices, dtype=np.int64) if indices is not None
+            else np.arange(len(items), dtype=np.int64)
+        )
+        self._has_source_indices = indices is not None
+        self._scores = scores or {}
+        self._order = np.arange(len(items), dtype=np.int64)
+        self._loaded = min(self.FETCH_CHUNK, len(items))
+        self._sorted_upto = len(items)  # order[:_sorted_upto] 已排好；其余部分只保证不小于前面
+        self._sort_keys: Optional[np.ndarray] = None
+        self.sort_key = 'selection'
+
+        self._tail_timer = QTimer(self)
+        self._tail_timer.setSingleShot(True)
+        self._tail_timer.setInterval(0)
+        self._tail_timer.timeout.connect(self._sort_tail)
+
+    @property
+    def has_scores(self) -> bool:
+        """选择中是否有带分数的条目"""
+        return self._has_source_indices and bool(self._scores)
+
+    def total_count(self) -> int:
+        """选择总数（rowCount 只返回已加载的行数）"""
+        return len(self._items)
+
+    # ---- QAbstractListModel 接口 ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._items)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        end = min(len(self._items), self._loaded + self.FETCH_CHUNK)
+        if end <= self._loaded:
+            return
+        if end > self._sorted_upto:
+            # 滚动比后台排序快：先同步排完
+            self._sort_tail()
+        self.beginInsertRows(QModelIndex(), self._loaded, end - 1)
+        self._loaded = end
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        row = index.row()
+        position = int(self._order[row])
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            meta = self._items[position]
+            filename = meta.get('filename') or meta.get('filepath', 'Unknown')
+            subcategory = meta.get('subcategory', 'N/A')
+            text = f"{row + 1}. {filename}"
+            if subcategory and subcategory != 'N/A':
+                text += f" [{subcategory}]"
+            return text
+        if role == self.MetadataRole:
+            return self._items[position]
+        if role == self.SourceIndexRole:
+            return int(self._source_indices[position])
+        if role == self.ScoreRole:
+            return self._score_at(position)
+        return None
+
+    # ---- 访问 ----
+
+    def metadata_at(self, row: int) -> Dict:
+        """第 row 行的元数据（row 可以超出已加载范围）"""
+        return self._items[int(self._order[row])]
+
+    def rows_metadata(self, start: int, end: int) -> List[Dict]:
+        """[start, end) 行的元数据（按当前顺序，自动截断到选择总数）"""
+        start = max(0, start)
+        end = min(len(self._items), end)
+        if end > self._sorted_upto:
+            self._sort_tail()
+        return [self._items[int(p)] for p in self._order[start:end]]
+
+    def _score_at(self, position: int) -> Optional[float]:
+        if not self._has_source_indices:
+            return None
+        return self._scores.get(int(self._source_indices[position]))
+
+    # ---- 排序 ----
+
+    def _build_sort_keys(self, key: str) -> np.ndarray:
+        if key == 'score':
+            # 分数降序：取负后升序排列；无分数的排在最后
+            values = np.full(len(self._items), np.inf, dtype=np.float64)
+            if self.has_scores:
+                for position, source in enumerate(self._source_indices.tolist()):
+                    score = self._scores.get(source)
+                    if score is not None:
+                        values[position] = -score
+            return values
+        # 文件名升序（不区分大小写）
+        return np.array(
+            [(meta.get('filename') or meta.get('filepath') or '').lower() for meta in self._items],
+            dtype=str
+        )
+
+    @staticmethod
+    def _stable_partition(keys: np.ndarray, head: int):
+        """
+        选出排序后前 head 个位置（O(n)，0 < head < len(keys)）
+
+        argpartition 对等于分界值的条目取舍是任意的；这里按原始位置取前面的，
+        保证前 head 行与完整的稳定排序一致。
+
+        Returns:
+            (head 个位置, 其余位置)，都按原始位置升序
+        """
+        pivot = keys[np.argpartition(keys, head - 1)[head - 1]]
+        less = np.flatnonzero(keys < pivot)
+        equal = np.flatnonzero(keys == pivot)
+        need = head - len(less)
+        head_part = np.concatenate([less, equal[:need]])
+        tail_part = np.concatenate([np.flatnonzero(keys > pivot), equal[need:]])
+        return head_part, tail_part
+
+    def sort_by(self, key: str):
+        """
+        按 key 重新排序（视图回到顶部）
+
+        先用 argpartition 选出前 FETCH_CHUNK 行并排好，立即显示；
+        其余行保证排在它们之后，在事件循环空闲时（或滚动到时）再排好。
+        同值按原始位置排列（包括跨越前后两部分的同值），结果与完整的稳定排序一致。
+        """
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"未知排序方式: {key}，支持: {self.SORT_KEYS}")
+
+        self._tail_timer.stop()
+        self.beginResetModel()
+        self.sort_key = key
+        n = len(self._items)
+        self._loaded = min(self.FETCH_CHUNK, n)
+
+        if key == 'selection' or n == 0:
+            self._order = np.arange(n, dtype=np.int64)
+            self._sort_keys = None
+            self._sorted_upto = n
+        else:
+            keys = self._build_sort_keys(key)
+            head = self._loaded
+            if head < n:
+                head_part, tail_part = self._stable_partition(keys, head)
+                head_part = head_part[np.lexsort((head_part, keys[head_part]))]
+                self._order = np.concatenate([head_part, tail_part]).astype(np.int64)
+                self._sort_keys = keys
+                self._sorted_upto = head
+                self._tail_timer.start()
+            else:
+                self._order = np.lexsort((np.arange(n), keys)).astype(np.int64)
+                self._sort_keys = None
+                self._sorted_upto = n
+        self.endResetModel()
+
+    def _sort_tail(self):
+        """排好 order[_sorted_upto:]（这些行都在可见范围之外，不需要通知视图）"""
+        self._tail_timer.stop()
+        if self._sort_keys is None or self._sorted_upto >= len(self._order):
+            return
+        tail = self._order[self._sorted_upto:]
+        keys = self._sort_keys[tail]
+        self._order[self._sorted_upto:] = tail[np.lexsort((tail, keys))]
+        self._sorted_upto = len(self._order)
+        self._sort_keys = None
@@ -2,17 +2,41 @@
 画布视图 - 支持缩放和平移，LOD 切换
 """
 
+import time
+from pathlib import Path
+
 from PySide6.QtWidgets import QGraphicsView, QFrame
 from PySide6.QtCore import Qt, Signal, QRectF, QPointF
-from PySide6.QtGui import QColor, QPainter, QPen, QBrush
+from PySide6.QtGui import QColor, QPainter, QPen, QBrush, QPolygonF, QFont
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
 
+from core.instrumentation import perf, perf_hud_default, since_start_ms
+from core.log import get_logger
+
+logger = get_logger('canvas_view')
+
+
+# 性能 trace 输出目录（F4 开始 / 停止记录）
+TRACE_DIR = Path("cache/traces")
+# 超过该间隔的两帧视为空闲后的重绘，不计入帧间隔
+FRAME_IDLE_GAP_MS = 500.0
+# HUD 中显示的阶段耗时（直方图名, 显示名）
+HUD_STAGES = (
+    ('render.hex_paint', 'hex paint'),
+    ('render.scatter_paint', 'scatter paint'),
+    ('scene.snapshot', 'scene build'),
+    ('scene.search_gravity', 'search gravity'),
+    ('search.encode', 'search encode'),
+    ('search.rank', 'search rank'),
+)
+
 
 class CanvasView(QGraphicsView):
     """画布视图 - 支持缩放和平移，LOD 切换"""
     
     zoom_changed = Signal(float)
     selection_made = Signal(QRectF)  # 框选完成信号，传递场景坐标矩形
+    lasso_made = Signal(QPolygonF)  # 套索选择完成信号，传递场景坐标多边形
     mouse_moved = Signal(QPointF)  # 鼠标坐标变化信号（类属性）
     
     def __init__(self, parent=None):
@@ -49,6 +73,10 @@ class CanvasView(QGraphicsView):
         self._selection_start_pos = None
         self._is_selecting = False
         
+        # 套索相关（Shift + 右键拖拽）
+        self._lasso_points = []  # 场景坐标
+        self._is_lassoing = False
+        
         # 启用鼠标跟踪（用于双击事件和坐标显示）
         self.setMouseTracking(True)
         
@@ -58,6 +86,46 @@ class CanvasView(QGraphicsView):
         self.show_range_circle = False  # 是否显示范围圆圈
         self.current_mouse_scene_pos = QPointF()  # 存储鼠标当前场景坐标
         self.range_radius = 100.0  # 范围圆圈的半径（场景坐标单位）
+        
+        # 性能 HUD 与帧耗时统计（F3 切换 HUD，F4 开始 / 停止 trace 记录）
+        self.show_perf_hud = perf_hud_default()
+        self._last_frame_time = None
+        self._first_frame_painted = False
+    
+    @property
+    def tracks_frame_times(self) -> bool:
+        """只在 HUD 显示或正在记录 trace 时统计帧耗时"""
+        return self.show_perf_hud or perf.tracing
+    
+    def toggle_perf_hud(self):
+        """切换性能 HUD"""
+        self.show_perf_hud = not self.show_perf_hud
+        self._last_frame_time = None
+        self.viewport().update()
+    
+    def toggle_trace_recording(self):
+        """
+        开始 / 停止性能 trace 记录
+        
+        停止时写出 Chrome trace JSON 到 cache/traces/（可用 chrome://tracing 或 Perfetto 打开）
+        
+        Returns:
+            停止时为写出的路径，开始时为 None
+        """
+        if not perf.tracing:
+            perf.start_trace()
+            logger.info("性能 trace 记录已开始（再按 F4 停止并写出）")
+            return None
+        
+        perf.stop_trace()
+        path = TRACE_DIR / time.strftime("trace_%Y%m%d_%H%M%S.json")
+        try:
+            perf.dump_trace(path)
+            logger.info(f"性能 trace 已写出: {path}")
+        except OSError as e:
+            logger.warning(f"写出性能 trace 失败: {e}")
+            return None
+        return path
     
     def _calculate_min_zoom(self) -> float:
         """计算最小缩放级别（刚好能看到全图）"""
@@ -183,6 +251,12 @@ class CanvasView(QGraphicsView):
         if event.key() == Qt.Key.Key_R and event.modifiers() == Qt.KeyboardModifier.NoModifier:
             self.reset_view()
             event.accept()
+        elif event.key() == Qt.Key.Key_F3:
+            self.toggle_perf_hud()
+            event.accept()
+        elif event.key() == Qt.Key.Key_F4:
+            self.toggle_trace_recording()
+            event.accept()
         else:
             super().keyPressEvent(event)
     
@@ -195,6 +269,9 @@ class CanvasView(QGraphicsView):
         self.current_mouse_scene_pos = scene_pos
         # 发送鼠标移动信号（类属性 Signal 可以直接调用 emit）
         self.mouse_moved.emit(scene_pos)
+        if self._is_lassoing:
+            self._lasso_points.append(scene_pos)
+            self.viewport().update()
         # 如果需要显示范围圆圈，触发重绘
         if self.show_range_circle:
             self.viewport().update()
@@ -204,6 +281,12 @@ class CanvasView(QGraphicsView):
         if event.button() == Qt.MouseButton.LeftButton:
             # 左键：拖拽平移
             self.setDragMode(self.DragMode.ScrollHandDrag)
+        elif (event.button() == Qt.MouseButton.RightButton
+                and event.modifiers() & Qt.KeyboardModifier.ShiftModifier):
+            # Shift + 右键：套索
+            self.setDragMode(self.DragMode.NoDrag)
+            self._lasso_points = [self.mapToScene(event.pos())]
+            self._is_lassoing = True
         elif event.button() == Qt.MouseButton.RightButton:
             # 右键：框选
             self.setDragMode(self.DragMode.RubberBandDrag)
@@ -213,7 +296,15 @@ class CanvasView(QGraphicsView):
     
     def mouseReleaseEvent(self, event):
         """鼠标释放事件"""
-        if event.button() == Qt.MouseButton.RightButton and self._is_selecting:
+        if event.button() == Qt.MouseButton.RightButton and self._is_lassoing:
+            # 套索完成
+            self._is_lassoing = False
+            if len(self._lasso_points) >= 3:
+                self.lasso_made.emit(QPolygonF(self._lasso_points))
+            self._lasso_points = []
+            self.viewport().update()
+            self.setDragMode(self.DragMode.ScrollHandDrag)
+        elif event.button() == Qt.MouseButton.RightButton and self._is_selecting:
             # 右键框选完成
             self._is_selecting = False
             selection_rect = self.rubberBandRect()
@@ -260,9 +351,13 @@ class CanvasView(QGraphicsView):
     
     def paintEvent(self, event):
         """重写绘制事件，添加坐标轴和范围圆圈"""
+        frame_start = time.perf_counter()
+        
         # 先调用父类的绘制（绘制场景内容）
         super().paintEvent(event)
         
+        self._record_frame(frame_start)
+        
         # 如果需要绘制坐标轴或范围圆圈，在顶层绘制
         if self.show_axes or self.show_range_circle:
             painter = QPainter(self.viewport())
@@ -281,6 +376,79 @@ class CanvasView(QGraphicsView):
                 self._draw_range_circle(painter, viewport_rect)
             
             painter.end()
+        
+        if self._is_lassoing and len(self._lasso_points) >= 2:
+            painter = QPainter(self.viewport())
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            self._draw_lasso(painter)
+            painter.end()
+        
+        if self.show_perf_hud:
+            painter = QPainter(self.viewport())
+            self._draw_perf_hud(painter)
+            painter.end()
+    
+    def _record_frame(self, frame_start: float):
+        """记录一帧的场景绘制耗时和帧间隔"""
+        if not self._first_frame_painted:
+            # 首帧：从进程启动到画面出现的时间
+            self._first_frame_painted = True
+            perf.observe('startup.first_frame', since_start_ms())
+            perf.mark('startup.first_frame', 'startup')
+        
+        if not self.tracks_frame_times:
+            return
+        
+        now = time.perf_counter()
+        perf.record_span('frame.paint', frame_start, now - frame_start, 'render')
+        if self._last_frame_time is not None:
+            interval_ms = (frame_start - self._last_frame_time) * 1000.0
+            if interval_ms < FRAME_IDLE_GAP_MS:
+                perf.observe('frame.interval', interval_ms)
+        self._last_frame_time = frame_start
+    
+    def _draw_perf_hud(self, painter: QPainter):
+        """在左上角绘制性能 HUD：帧率、帧耗时分位数和各阶段最近耗时"""
+        lines = []
+        interval = perf.histogram('frame.interval')
+        if interval is not None and interval.count:
+            p50 = interval.percentile(50)
+            fps = 1000.0 / p50 if p50 > 0 else 0.0
+            lines.append(f"FPS {fps:5.1f}")
+        frame = perf.histogram('frame.paint')
+        if frame is not None and frame.count:
+            lines.append(f"frame p50 {frame.percentile(50):6.2f} ms  p95 {frame.percentile(95):6.2f} ms")
+        for name, label in HUD_STAGES:
+            histogram = perf.histogram(name)
+            if histogram is not None and histogram.count:
+                lines.append(f"{label:<15}{histogram.last:8.2f} ms  (n={histogram.count})")
+        if perf.tracing:
+            lines.append("● REC trace (F4 停止)")
+        if not lines:
+            lines.append("perf: 等待数据…")
+        
+        font = QFont("Consolas", 9)
+        painter.setFont(font)
+        metrics = painter.fontMetrics()
+        line_height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 16
+        height = line_height * len(lines) + 12
+        
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRoundedRect(QRectF(8, 8, width, height), 4, 4)
+        painter.setPen(QColor(160, 230, 160))
+        y = 8 + 6 + metrics.ascent()
+        for line in lines:
+            painter.drawText(QPointF(16, y), line)
+            y += line_height
+    
+    def _draw_lasso(self, painter: QPainter):
+        """绘制正在拖拽的套索路径"""
+        polygon = self.mapFromScene(QPolygonF(self._lasso_points))
+        painter.setPen(QPen(QColor(94, 106, 210, 220), 1.5, Qt.PenStyle.DashLine))
+        painter.setBrush(QBrush(QColor(94, 106, 210, 40)))
+        painter.drawPolygon(polygon)
     
     def _draw_axes(self, painter: QPainter, viewport_rect: QRectF, scene_rect: QRectF):
         """
@@ -2,11 +2,38 @@
 检查器面板 - 显示选中项的详情
 """
 
-from PySide6.QtWidgets import QScrollArea, QWidget, QVBoxLayout, QLabel, QFrame, QTreeWidget, QTreeWidgetItem
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QScrollArea, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QTreeWidget, QTreeWidgetItem,
+    QListView, QComboBox, QAbstractItemView
+)
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont, QColor
-from typing import List, Dict, Optional
-from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+
+from core.log import get_logger
+
+from ui.metadata_fetcher import MetadataFetcher, normalize_recid
+from ui.library_indexer import LibraryIndexer
+from .asset_list_model import AssetListModel
+
+logger = get_logger(__name__)
+
+
+# 选中列表时预取的条目数（列表前部）
+PREFETCH_LIST_HEAD = 200
+# 单选详情时预取前后相邻条目的半径
+PREFETCH_NEIGHBOR_RADIUS = 25
+# 资产列表滚动停止多久后预取可见行的原始元数据（毫秒）
+VISIBLE_PREFETCH_DELAY_MS = 80
+# 可见行预取时上下额外多取的行数
+VISIBLE_PREFETCH_MARGIN = 20
+
+# 资产列表排序选项：(显示文本, AssetListModel 排序键)
+ASSET_SORT_OPTIONS = (
+    ("Selection order", 'selection'),
+    ("Score", 'score'),
+    ("Filename", 'filename'),
+)
 
 
 class InspectorPanel(QScrollArea):
@@ -28,7 +55,27 @@ class InspectorPanel(QScrollArea):
         
         # 存储 importer 实例用于获取原始数据
         self.importer = None
-        self.raw_metadata_cache = {}  # recID -> raw_metadata 缓存
+        self.metadata_fetcher: Optional[MetadataFetcher] = None  # 后台批量查询 + LRU 缓存
+        
+        # 当前选择（用于预取相邻条目）
+        self._selection: Sequence[Dict] = []
+        self._selection_positions: Optional[Dict] = None  # recID -> 在选择中的位置（首次需要时构建）
+        # 搜索结果分数：全局点索引 -> 分数（资产列表按分数排序用）
+        self.search_scores: Dict[int, float] = {}
+        # 多选资产列表（虚拟化模型）
+        self.asset_model: Optional[AssetListModel] = None
+        self.asset_view: Optional[QListView] = None
+        self._visible_prefetch_timer = QTimer(self)
+        self._visible_prefetch_timer.setSingleShot(True)
+        self._visible_prefetch_timer.setInterval(VISIBLE_PREFETCH_DELAY_MS)
+        self._visible_prefetch_timer.timeout.connect(self._prefetch_visible_rows)
+        # 库文件树：后台目录索引 + 最近一次结果 (LibraryIndex, {文件夹路径: FolderStats})
+        self.library_indexer: Optional[LibraryIndexer] = None
+        self._library_result = None
+        self._color_mapper = None
+        self._mapped_catids: Dict[str, bool] = {}
+        # 正在等待原始数据的详情：(recID, 渲染元数据)
+        self._awaiting_raw = None
         
         self.clear()
     
@@ -39,56 +86,111 @@ class InspectorPanel(QScrollArea):
         Args:
             importer: SoundminerImporter 实例
         """
+        if self.metadata_fetcher is not None:
+            self.metadata_fetcher.close()
+            self.metadata_fetcher.deleteLater()
+            self.metadata_fetcher = None
+        
         self.importer = importer
-        self.raw_metadata_cache.clear()  # 清空缓存
+        self._awaiting_raw = None
+        if importer is None:
+            return
+        
+        try:
+            self.metadata_fetcher = MetadataFetcher(importer, parent=self)
+            self.metadata_fetcher.metadata_ready.connect(self._on_raw_metadata_ready)
+            self.metadata_fetcher.fetch_failed.connect(self._on_raw_metadata_failed)
+        except Exception as e:
+            logger.warning(f"无法初始化原始元数据查询: {e}")
+            self.metadata_fetcher = None
+    
+    @staticmethod
+    def _recid_of(file_data: Dict):
+        return file_data.get('recID') or file_data.get('recid') or file_data.get('id')
     
     def _get_raw_metadata(self, file_data: Dict) -> Optional[Dict]:
         """
-        从数据库获取原始元数据
+        从缓存获取原始元数据（不访问数据库；未缓存时排队到后台优先查询）
         
         Args:
             file_data: 渲染用的元数据（可能经过处理）
             
         Returns:
-            原始元数据字典，如果无法获取则返回 None
+            原始元数据字典；未缓存、查询中或数据库中不存在时返回 None
         """
-        if not self.importer:
+        if self.metadata_fetcher is None:
             return None
         
-        # 获取 recID
-        recid = file_data.get('recID') or file_data.get('recid') or file_data.get('id')
+        recid = self._recid_of(file_data)
         if not recid:
             return None
         
-        # 检查缓存
-        if recid in self.raw_metadata_cache:
-            return self.raw_metadata_cache[recid]
-        
-        # 从数据库查询原始数据
-        try:
-            self.importer._connect()
-            if not self.importer.table_name:
-                self.importer.table_name = self.importer._detect_table_name()
-                self.importer.field_mapping = self.importer.FIELD_MAPPINGS.get(self.importer.table_name, {})
-            
-            cursor = self.importer.conn.cursor()
-            recid_field = self.importer.field_mapping.get('recID', 'recID')
-            query = f"SELECT * FROM {self.importer.table_name} WHERE {recid_field} = ?"
-            cursor.execute(query, (recid,))
-            row = cursor.fetchone()
-            
-            if row:
-                # 转换为字典
-                raw_meta = dict(row)
-                self.raw_metadata_cache[recid] = raw_meta
-                return raw_meta
-        except Exception as e:
-            print(f"[WARNING] 无法从数据库获取原始元数据 (recID={recid}): {e}")
+        raw_meta = self.metadata_fetcher.get(recid)
+        if raw_meta is None:
+            self.metadata_fetcher.request([recid], urgent=True)
+            return None
+        return raw_meta or None
+    
+    def set_search_scores(self, scores: Optional[Dict[int, float]]):
+        """
+        设置当前搜索结果的分数（之后打开的资产列表可按分数排序）
         
-        return None
+        Args:
+            scores: 全局点索引 -> 相似度分数；None 表示清空
+        """
+        self.search_scores = dict(scores) if scores else {}
+    
+    def _set_selection(self, metadata_list: Sequence[Dict]):
+        """记录当前选择并预取列表前部的原始元数据"""
+        self._selection = metadata_list
+        self._selection_positions = None
+        if self.metadata_fetcher is not None:
+            self.metadata_fetcher.request(self._recids_of(metadata_list[:PREFETCH_LIST_HEAD]))
+    
+    def _recids_of(self, metadata_list: Sequence[Dict]) -> List:
+        return [normalize_recid(self._recid_of(meta)) for meta in metadata_list]
+    
+    def _prefetch_neighbors(self, recid):
+        """预取当前选择中与 recID 相邻的条目（列表中上下翻看时直接命中缓存）"""
+        if self.metadata_fetcher is None or len(self._selection) < 2:
+            return
+        if self._selection_positions is None:
+            self._selection_positions = {
+                recid_: i for i, recid_ in enumerate(self._recids_of(self._selection))
+            }
+        position = self._selection_positions.get(normalize_recid(recid))
+        if position is None:
+            return
+        start = max(0, position - PREFETCH_NEIGHBOR_RADIUS)
+        end = position + PREFETCH_NEIGHBOR_RADIUS + 1
+        # 先向后再向前：列表通常自上而下浏览
+        self.metadata_fetcher.request(
+            self._recids_of(self._selection[position + 1:end])
+            + self._recids_of(self._selection[start:position])[::-1]
+        )
+    
+    def _on_raw_metadata_ready(self, rows: Dict):
+        """后台查询完成：正在显示的详情还在等这条数据时重新绘制"""
+        if self._awaiting_raw is None:
+            return
+        recid, metadata = self._awaiting_raw
+        if recid in rows:
+            self._awaiting_raw = None
+            self.show_metadata(metadata)
+    
+    def _on_raw_metadata_failed(self, error: str):
+        logger.warning(f"无法从数据库获取原始元数据: {error}")
+        self._awaiting_raw = None
     
     def clear(self):
         """清空面板"""
+        self._awaiting_raw = None
+        self._visible_prefetch_timer.stop()
+        if self.asset_model is not None:
+            # 模型是面板的子对象，不删除会连同整份选择一直留在内存中
+            self.asset_model.deleteLater()
+        self.asset_model = None
+        self.asset_view = None
         while self.layout.count():
             child = self.layout.takeAt(0)
             if child.widget():
@@ -129,6 +231,7 @@ class InspectorPanel(QScrollArea):
         """)
         self.library_tree.setMaximumHeight(200)
         self.layout.addWidget(self.library_tree)
+        self._populate_library_tree()
         
         self.layout.addStretch()
     
@@ -144,11 +247,25 @@ class InspectorPanel(QScrollArea):
         self.layout.addWidget(title)
         
         # 获取原始元数据
+        recid = self._recid_of(metadata)
         raw_metadata = self._get_raw_metadata(metadata)
+        if recid:
+            self._prefetch_neighbors(recid)
+        pending = False
+        if not raw_metadata and self.metadata_fetcher is not None and recid:
+            pending = self.metadata_fetcher.is_pending(recid)
+            if not pending:
+                # 后台查询可能在 request() 之后已经完成（缓存已写入，通知还在排队），再查一次缓存
+                raw_metadata = self.metadata_fetcher.get(recid) or None
         if not raw_metadata:
-            # 如果无法获取原始数据，使用传入的 metadata（向后兼容）
+            # 原始数据未到或无法获取时，先用传入的 metadata 显示（向后兼容）；到达后自动刷新
             raw_metadata = metadata
-            print("[WARNING] 无法获取原始元数据，使用渲染数据")
+            if pending:
+                self._awaiting_raw = (normalize_recid(recid), metadata)
+                loading_label = QLabel("<span style='color: #5F636E; font-size: 11px;'>Loading raw metadata...</span>")
+                self.layout.addWidget(loading_label)
+            elif self.importer is not None:
+                logger.warning("无法获取原始元数据，使用渲染数据")
         
         # 原始元数据部分
         raw_section_title = QLabel("RAW METADATA")
@@ -233,6 +350,7 @@ class InspectorPanel(QScrollArea):
     def show_metadata_list(self, metadata_list: List[Dict], hex_key=None):
         """显示六边形内所有数据的列表"""
         self.clear()
+        self._set_selection(metadata_list)
         
         title = QLabel("INSPECTOR")
         title_font = QFont("Segoe UI", 16, QFont.Weight.Bold)
@@ -297,6 +415,7 @@ class InspectorPanel(QScrollArea):
             metadata_list: 元数据列表，长度为1时显示详情，>1时显示列表
         """
         self.clear()
+        self._set_selection(metadata_list)
         
         if len(metadata_list) == 1:
             # 单选：显示波形大图和详细属性
@@ -305,10 +424,12 @@ class InspectorPanel(QScrollArea):
             # 多选：显示紧凑列表
             self._show_asset_list(metadata_list)
     
-    def _show_asset_list(self, metadata_list: List[Dict]):
-        """显示资产列表（QListWidget）"""
-        from PySide6.QtWidgets import QListWidget, QListWidgetItem
+    def _show_asset_list(self, metadata_list: Sequence[Dict]):
+        """
+        显示资产列表（虚拟化：QListView + AssetListModel）
         
+        只为可见行生成文本，行数按块增长；上万条的选择也能立即打开。
+        """
         title = QLabel("INSPECTOR")
         title_font = QFont("Segoe UI", 16, QFont.Weight.Bold)
         title_font.setLetterSpacing(QFont.SpacingType.AbsoluteSpacing, 2)
@@ -321,105 +442,167 @@ class InspectorPanel(QScrollArea):
         count_label.setStyleSheet("color: #8B9FFF; font-size: 14px; margin-bottom: 10px;")
         self.layout.addWidget(count_label)
         
-        # 创建列表控件
-        list_widget = QListWidget()
-        list_widget.setStyleSheet("""
-            QListWidget {
+        model = AssetListModel(metadata_list, scores=self.search_scores, parent=self)
+        
+        # 排序选择
+        sort_row = QHBoxLayout()
+        sort_label = QLabel("Sort:")
+        sort_label.setStyleSheet("color: #5F636E; font-size: 11px;")
+        sort_row.addWidget(sort_label)
+        sort_combo = QComboBox()
+        for text, key in ASSET_SORT_OPTIONS:
+            sort_combo.addItem(text, key)
+            if key == 'score' and not model.has_scores:
+                sort_combo.model().item(sort_combo.count() - 1).setEnabled(False)
+        sort_combo.currentIndexChanged.connect(
+            lambda _: self._sort_asset_list(sort_combo.currentData())
+        )
+        sort_row.addWidget(sort_combo, 1)
+        self.layout.addLayout(sort_row)
+        
+        # 创建列表视图
+        list_view = QListView()
+        list_view.setUniformItemSizes(True)  # 行高一致：滚动时不必逐行测量
+        list_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        list_view.setStyleSheet("""
+            QListView {
                 background-color: #1C1E24;
                 border: 1px solid #2A2D35;
                 border-radius: 4px;
                 color: #E1E4E8;
                 font-size: 12px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #2A2D35;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #2A2D35;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #5E6AD2;
                 color: white;
             }
         """)
-        
-        # 添加列表项
-        for i, meta in enumerate(metadata_list):
-            filename = meta.get('filename') or meta.get('filepath', 'Unknown')
-            subcategory = meta.get('subcategory', 'N/A')
-            
-            # 创建列表项文本
-            item_text = f"{i+1}. {filename}"
-            if subcategory and subcategory != 'N/A':
-                item_text += f" [{subcategory}]"
-            
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.ItemDataRole.UserRole, meta)  # 存储metadata
-            list_widget.addItem(item)
+        list_view.setModel(model)
         
         # 连接点击事件：点击列表项进入单选详情模式
-        list_widget.itemClicked.connect(lambda item: self.show_metadata(item.data(Qt.ItemDataRole.UserRole)))
-        
-        self.layout.addWidget(list_widget)
+        list_view.clicked.connect(
+            lambda index: self.show_metadata(index.data(AssetListModel.MetadataRole))
+        )
+        # 滚动或加载更多行后预取可见行的原始元数据
+        list_view.verticalScrollBar().valueChanged.connect(self._visible_prefetch_timer.start)
+        model.rowsInserted.connect(self._visible_prefetch_timer.start)
+        model.modelReset.connect(self._visible_prefetch_timer.start)
+        
+        self.asset_model = model
+        self.asset_view = list_view
+        self.layout.addWidget(list_view)
         self.layout.addStretch()
+        self._visible_prefetch_timer.start()
     
-    def _build_library_tree(self, library_root: Optional[str], metadata_list: List[Dict]):
+    def _sort_asset_list(self, key: str):
+        """切换资产列表的排序方式"""
+        if self.asset_model is None:
+            return
+        self.asset_model.sort_by(key)
+        if self.asset_view is not None:
+            self.asset_view.scrollToTop()
+    
+    def _prefetch_visible_rows(self):
+        """预取资产列表可见行（上下各多取几行）的原始元数据"""
+        if self.asset_model is None or self.asset_view is None or self.metadata_fetcher is None:
+            return
+        viewport = self.asset_view.viewport()
+        first = self.asset_view.indexAt(viewport.rect().topLeft())
+        last = self.asset_view.indexAt(viewport.rect().bottomLeft())
+        start = first.row() if first.isValid() else 0
+        end = (last.row() if last.isValid() else start + VISIBLE_PREFETCH_MARGIN) + 1
+        self.metadata_fetcher.request(self._recids_of(
+            self.asset_model.rows_metadata(start - VISIBLE_PREFETCH_MARGIN, end + VISIBLE_PREFETCH_MARGIN)
+        ))
+    
+    def _build_library_tree(self, library_root: Optional[str], metadata_list: Sequence[Dict]):
         """
-        构建库文件树
+        构建库文件树（后台扫描 + 统计，结果到达后填充）
+        
+        库根目录只在第一次出现时扫描文件夹结构，之后按 filepath 在内存索引中定位，
+        不再访问文件系统；目录变化由 LibraryIndexer 监视并增量重扫。
         
         Args:
             library_root: 库根路径
             metadata_list: 元数据列表
         """
         self.library_tree.clear()
+        self._library_result = None
         
-        if not library_root or not Path(library_root).exists():
+        if not library_root:
+            if self.library_indexer is not None:
+                self.library_indexer.cancel()
             return
         
-        try:
-            # 扫描库根目录下的一级子文件夹
-            root_path = Path(library_root)
-            subdirs = [d for d in root_path.iterdir() if d.is_dir()]
-            
-            if not subdirs:
-                return
-            
-            # 统计每个文件夹的映射数量
-            library_stats = {}
-            for subdir in subdirs:
-                subdir_str = str(subdir)
-                mapped_count = 0
-                total_count = 0
-                
-                # 与 metadata 中的 filepath 进行前缀匹配
-                for meta in metadata_list:
-                    filepath = meta.get('filepath', '')
-                    if filepath and filepath.startswith(subdir_str):
-                        total_count += 1
-                        # 检查是否有有效的category（非UNCATEGORIZED）
-                        cat_id = meta.get('category', '')
-                        if cat_id:
-                            try:
-                                from core.category_color_mapper import CategoryColorMapper
-                                mapper = CategoryColorMapper()
-                                category = mapper.get_category_from_catid(cat_id)
-                                if category and category != "UNCATEGORIZED":
-                                    mapped_count += 1
-                            except Exception:
-                                pass
-                
-                library_stats[subdir.name] = (mapped_count, total_count)
-            
-            # 创建树节点
-            for subdir_name, (mapped, total) in sorted(library_stats.items()):
-                item = QTreeWidgetItem(self.library_tree)
-                item.setText(0, f"{subdir_name} ({mapped}/{total})")
-                if mapped > 0:
-                    item.setForeground(0, QColor("#8B9FFF"))
-                else:
-                    item.setForeground(0, QColor("#5F636E"))
+        if self._color_mapper is None:
+            try:
+                from core.category_color_mapper import CategoryColorMapper
+                self._color_mapper = CategoryColorMapper()
+            except Exception as e:
+                logger.warning(f"无法加载类别映射，库文件树不统计映射数量: {e}")
+        
+        if self.library_indexer is None:
+            self.library_indexer = LibraryIndexer(parent=self)
+            self.library_indexer.index_ready.connect(self._on_library_index_ready)
+            self.library_indexer.index_failed.connect(self._on_library_index_failed)
+        self.library_indexer.update(
+            library_root, metadata_list, self._is_meta_mapped
+        )
+    
+    def _is_meta_mapped(self, meta: Dict) -> bool:
+        """是否有有效主类别（非 UNCATEGORIZED）；按 CatID 缓存结果，后台线程调用"""
+        cat_id = meta.get('category', '')
+        if not cat_id:
+            return False
+        mapped = self._mapped_catids.get(cat_id)
+        if mapped is None:
+            category = self._color_mapper.get_category_from_catid(cat_id) if self._color_mapper else None
+            mapped = bool(category) and category != "UNCATEGORIZED"
+            self._mapped_catids[cat_id] = mapped
+        return mapped
+    
+    def _on_library_index_ready(self, generation: int, index, stats: Dict):
+        # 目录变化触发的重扫会产生新的代号，只要求是索引服务的最新代号
+        if self.library_indexer.is_stale(generation):
+            return
+        self._library_result = (index, stats)
+        self.library_indexer.watch(index)
+        self._populate_library_tree()
+    
+    def _on_library_index_failed(self, generation: int, error: str):
+        if not self.library_indexer.is_stale(generation):
+            logger.warning(f"构建库文件树失败: {error}")
+    
+    def _populate_library_tree(self):
+        """用最近一次的索引和统计填充库文件树（纯内存操作）"""
+        self.library_tree.clear()
+        if self._library_result is None:
+            return
+        index, stats = self._library_result
         
-        except Exception as e:
-            print(f"[WARNING] 构建库文件树失败: {e}")
-
+        def add_folder(parent_item, folder, show_empty):
+            folder_stats = stats.get(folder.path)
+            mapped, total = (folder_stats.mapped, folder_stats.total) if folder_stats else (0, 0)
+            if total == 0 and not show_empty:
+                return
+            item = QTreeWidgetItem(parent_item)
+            item.setText(0, f"{folder.name} ({mapped}/{total})")
+            if mapped > 0:
+                item.setForeground(0, QColor("#8B9FFF"))
+            else:
+                item.setForeground(0, QColor("#5F636E"))
+            # 子文件夹只显示包含文件的
+            for child in folder.sorted_children():
+                add_folder(item, child, False)
+        
+        # 第一层文件夹全部显示（与库根目录结构一致）
+        for folder in index.root.sorted_children():
+            add_folder(self.library_tree, folder, True)
+    
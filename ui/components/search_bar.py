@@ -3,7 +3,7 @@
 """
 
 from PySide6.QtWidgets import QLineEdit, QGraphicsDropShadowEffect
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QColor, QFont
 
 
@@ -12,7 +12,10 @@ class SearchBar(QLineEdit):
     
     search_requested = Signal(str)
     
-    def __init__(self, parent=None):
+    # 输入停止多久后自动搜索（毫秒）
+    DEBOUNCE_MS = 300
+    
+    def __init__(self, parent=None, debounce_ms: int = DEBOUNCE_MS):
         super().__init__(parent)
         self.setPlaceholderText("🔍 搜索音频文件...")
         self.setFixedHeight(45)
@@ -28,12 +31,40 @@ class SearchBar(QLineEdit):
         shadow.setColor(QColor(0, 0, 0, 150))
         shadow.setOffset(0, 3)
         self.setGraphicsEffect(shadow)
+        
+        # 输入防抖：停止输入 debounce_ms 后才发出搜索请求
+        self._last_emitted = None
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self._emit_search)
+        self.textChanged.connect(self._on_text_changed)
+    
+    def _on_text_changed(self, text: str):
+        """文本变化：重新开始防抖计时"""
+        self._debounce_timer.start()
+    
+    def _emit_search(self, force: bool = False):
+        """
+        发出搜索请求（空文本表示清空搜索）
+        
+        Args:
+            force: 即使与上次查询相同也发出（回车键）
+        """
+        self._debounce_timer.stop()
+        query = self.text().strip()
+        if not force and query == self._last_emitted:
+            return
+        if not query and self._last_emitted is None:
+            return
+        self._last_emitted = query
+        self.search_requested.emit(query)
     
     def keyPressEvent(self, event):
         """键盘事件"""
         if event.key() == Qt.Key.Key_Return or event.key() == Qt.Key.Key_Enter:
-            query = self.text().strip()
-            if query:
-                self.search_requested.emit(query)
+            # 回车立即搜索，跳过防抖
+            if self.text().strip():
+                self._emit_search(force=True)
         super().keyPressEvent(event)
 
@@ -0,0 +1,319 @@
+"""
+库目录索引 - 后台扫描库根目录的文件夹结构，供检查器面板的库文件树使用
+每个根目录只扫描一次（os.scandir，只记录文件夹），之后由文件系统监视增量更新；
+选中文件按 filepath 在内存树中定位，不再访问文件系统（库通常在 NAS 上）
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from core.instrumentation import perf
+
+
+# 扫描深度（根目录下第几层文件夹为止）：库文件树只显示前几层
+MAX_SCAN_DEPTH = 3
+
+# 监视的目录数上限（根目录 + 第一层文件夹；网络盘上监视句柄代价较高）
+MAX_WATCHED_DIRS = 256
+
+# 目录变化后多久重新扫描（毫秒，合并短时间内的多次变化）
+RESCAN_DEBOUNCE_MS = 1000
+
+
+def normalize_path(path: str) -> str:
+    """统一分隔符和大小写规则（Soundminer 中的路径可能来自另一个平台）"""
+    return os.path.normcase(os.path.normpath(str(path).replace('\\', '/')))
+
+
+@dataclass
+class LibraryFolder:
+    """索引中的一个文件夹"""
+    name: str
+    path: str
+    children: Dict[str, 'LibraryFolder'] = field(default_factory=dict)  # normcase 名称 -> 子文件夹
+
+    def sorted_children(self) -> List['LibraryFolder']:
+        return sorted(self.children.values(), key=lambda folder: folder.name.lower())
+
+
+@dataclass
+class FolderStats:
+    """文件夹下选中文件的统计"""
+    mapped: int = 0  # 有有效主类别的文件数
+    total: int = 0
+
+
+def scan_folder(path: str, depth: int = MAX_SCAN_DEPTH) -> LibraryFolder:
+    """
+    用 os.scandir 扫描文件夹结构（只记录子文件夹，不跟随符号链接）
+
+    Args:
+        path: 文件夹路径
+        depth: 向下扫描的层数（1 表示只扫描直接子文件夹）
+    """
+    root = LibraryFolder(name=os.path.basename(os.path.normpath(path)) or path, path=path)
+    stack = [(root, 1)]
+    while stack:
+        folder, level = stack.pop()
+        try:
+            with os.scandir(folder.path) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                    except OSError:
+                        continue
+                    child = LibraryFolder(name=entry.name, path=entry.path)
+                    folder.children[os.path.normcase(entry.name)] = child
+                    if level < depth:
+                        stack.append((child, level + 1))
+        except OSError:
+            # 无权限 / 网络中断：保留已扫描到的部分
+            continue
+    return root
+
+
+class LibraryIndex:
+    """库根目录的内存文件夹树"""
+
+    def __init__(self, root_path: str, root: LibraryFolder):
+        self.root_path = root_path
+        self.root = root
+        self._root_prefix = normalize_path(root_path).rstrip(os.sep) + os.sep
+
+    def relative_parts(self, filepath: str) -> Optional[Tuple[str, ...]]:
+        """filepath 在库根目录下的路径分量（normcase）；不在库内返回 None"""
+        if not filepath:
+            return None
+        normalized = normalize_path(filepath)
+        if not normalized.startswith(self._root_prefix):
+            return None
+        return tuple(normalized[len(self._root_prefix):].split(os.sep))
+
+    def resolve(self, filepath: str) -> List[LibraryFolder]:
+        """
+        filepath 所在的文件夹链（从第一层文件夹到索引中最深的匹配文件夹）
+
+        Returns:
+            文件夹列表；不在任何已索引文件夹内时为空
+        """
+        parts = self.relative_parts(filepath)
+        chain = []
+        if not parts:
+            return chain
+        folder = self.root
+        # 最后一个分量是文件名
+        for part in parts[:-1]:
+            folder = folder.children.get(part)
+            if folder is None:
+                break
+            chain.append(folder)
+        return chain
+
+    def find(self, path: str) -> Optional[LibraryFolder]:
+        """按路径查找已索引的文件夹"""
+        if normalize_path(path) == normalize_path(self.root_path):
+            return self.root
+        parts = self.relative_parts(path)
+        folder = self.root
+        for part in parts or ():
+            if not part:
+                continue
+            folder = folder.children.get(part)
+            if folder is None:
+                return None
+        return folder if parts else None
+
+    def compute_stats(
+        self,
+        metadata_list: Sequence[Dict],
+        is_mapped: Callable[[Dict], bool]
+    ) -> Dict[str, FolderStats]:
+        """
+        按文件夹统计选中文件（只用内存树，不访问文件系统）
+
+        Returns:
+            文件夹路径 -> FolderStats（文件计入其所在文件夹链上的每一层）
+        """
+        stats: Dict[str, FolderStats] = {}
+        for meta in metadata_list:
+            chain = self.resolve(meta.get('filepath', ''))
+            if not chain:
+                continue
+            mapped = is_mapped(meta)
+            for folder in chain:
+                entry = stats.get(folder.path)
+                if entry is None:
+                    entry = stats[folder.path] = FolderStats()
+                entry.total += 1
+                if mapped:
+                    entry.mapped += 1
+        return stats
+
+
+class _IndexTask(QRunnable):
+    """扫描（需要时）+ 统计任务"""
+
+    def __init__(self, indexer: 'LibraryIndexer', generation: int, root_path: str, metadata_list, is_mapped):
+        super().__init__()
+        self._indexer = indexer
+        self.generation = generation
+        self.root_path = root_path
+        self.metadata_list = metadata_list
+        self.is_mapped = is_mapped
+
+    def run(self):
+        indexer = self._indexer
+        try:
+            index = indexer._index_for(self.root_path)
+            if indexer.is_stale(self.generation):
+                return
+            stats = {}
+            if self.metadata_list is not None:
+                with perf.timer('library.stats', 'library', files=len(self.metadata_list)):
+                    stats = index.compute_stats(self.metadata_list, self.is_mapped)
+            if not indexer.is_stale(self.generation):
+                indexer.index_ready.emit(self.generation, index, stats)
+        except Exception as e:
+            if not indexer.is_stale(self.generation):
+                indexer.index_failed.emit(self.generation, str(e))
+
+
+class LibraryIndexer(QObject):
+    """
+    库目录索引服务
+
+    - update() 提交（根目录, 选择）：根目录首次出现时在后台扫描，之后只做内存统计
+    - index_ready 只为最新一次提交发射（generation, LibraryIndex, {文件夹路径: FolderStats}）
+    - 监视根目录和第一层文件夹，变化后在后台重扫对应子树并重新发射结果
+    """
+
+    index_ready = Signal(int, object, object)  # generation, LibraryIndex, stats
+    index_failed = Signal(int, str)  # generation, 错误信息
+
+    def __init__(self, scan_depth: int = MAX_SCAN_DEPTH, parent=None):
+        super().__init__(parent)
+        self.scan_depth = scan_depth
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._indexes: Dict[str, LibraryIndex] = {}  # 规范化根路径 -> 索引
+        self._pending_rescans = set()  # 待重扫的文件夹（下一个任务统一处理）
+
+        # 最近一次提交（目录变化时用它重新统计）
+        self._root_path: Optional[str] = None
+        self._metadata_list = None
+        self._is_mapped = None
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed_dirs = set()
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(RESCAN_DEBOUNCE_MS)
+        self._rescan_timer.timeout.connect(self._rescan_changed)
+
+    def is_stale(self, generation: int) -> bool:
+        with self._lock:
+            return generation != self._generation
+
+    def cached_index(self, root_path: str) -> Optional[LibraryIndex]:
+        """已扫描的索引（未扫描返回 None）"""
+        with self._lock:
+            return self._indexes.get(normalize_path(root_path))
+
+    def update(self, root_path: str, metadata_list=None, is_mapped=None) -> int:
+        """
+        提交根目录和当前选择，后台得出索引和统计
+
+        Args:
+            root_path: 库根目录
+            metadata_list: 要统计的元数据序列（None 表示只建索引）
+            is_mapped: meta -> 是否有有效主类别
+
+        Returns:
+            本次提交的代号
+        """
+        self._root_path = root_path
+        self._metadata_list = metadata_list
+        self._is_mapped = is_mapped or (lambda meta: False)
+        return self._submit(())
+
+    def _submit(self, rescan_paths: Sequence[str]) -> int:
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._pending_rescans.update(rescan_paths)
+        # 排队中的旧任务直接丢弃（待重扫的文件夹已合并，不会丢失）
+        self._pool.clear()
+        self._pool.start(_IndexTask(
+            self, generation, self._root_path, self._metadata_list, self._is_mapped
+        ))
+        return generation
+
+    def cancel(self):
+        """作废进行中的提交（已扫描的索引保留）"""
+        with self._lock:
+            self._generation += 1
+        self._pool.clear()
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
+
+    # ---- 后台线程 ----
+
+    def _index_for(self, root_path: str) -> LibraryIndex:
+        """取出（或扫描出）根目录的索引；待重扫的文件夹重新扫描其子树"""
+        key = normalize_path(root_path)
+        with self._lock:
+            index = self._indexes.get(key)
+            rescan_paths = sorted(self._pending_rescans)
+            self._pending_rescans.clear()
+
+        if index is None:
+            with perf.timer('library.scan', 'library'):
+                index = LibraryIndex(root_path, scan_folder(root_path, self.scan_depth))
+            with self._lock:
+                self._indexes[key] = index
+            return index
+
+        for path in rescan_paths:
+            folder = index.find(path)
+            if folder is None:
+                continue
+            depth = self.scan_depth - (len(index.relative_parts(path) or ()) if folder is not index.root else 0)
+            with perf.timer('library.rescan', 'library'):
+                fresh = scan_folder(folder.path, max(1, depth))
+            # 整体替换 children（读取方持有的旧字典保持不变）
+            folder.children = fresh.children
+        return index
+
+    # ---- 文件系统监视（GUI 线程） ----
+
+    def watch(self, index: LibraryIndex):
+        """监视根目录和第一层文件夹（数量有上限）"""
+        wanted = [index.root.path] + [folder.path for folder in index.root.sorted_children()]
+        wanted = wanted[:MAX_WATCHED_DIRS]
+        current = set(self._watcher.directories())
+        stale = [path for path in current if path not in wanted]
+        if stale:
+            self._watcher.removePaths(stale)
+        missing = [path for path in wanted if path not in current]
+        if missing:
+            self._watcher.addPaths(missing)
+
+    def _on_directory_changed(self, path: str):
+        self._changed_dirs.add(path)
+        self._rescan_timer.start()
+
+    def _rescan_changed(self):
+        if self._root_path is None or not self._changed_dirs:
+            return
+        changed, self._changed_dirs = sorted(self._changed_dirs), set()
+        self._submit(changed)
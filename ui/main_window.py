@@ -17,11 +17,31 @@ from PySide6.QtCore import Qt, QRectF, QPointF
 
 from ui.components import CanvasView, SearchBar, InspectorPanel, UniversalTagger
 from ui.visualizer import SonicUniverse
+from ui.search_worker import SearchWorker
 from ui.styles import GLOBAL_STYLESHEET
-from core import DataProcessor, SearchCore, VectorEngine, UCSManager, inject_category_vectors, umap_config
+from core import DataProcessor, SearchCore, ScatterEngine, LazyVectorEngine, UCSManager, inject_category_vectors, umap_config
+from core.instrumentation import perf
 from data import SoundminerImporter, ConfigManager
 
 
+# 在搜索线程池中执行的模型计算（首次使用时会加载模型，不能放在 GUI 线程）
+GRAVITY_TASK = 'gravity_pillars'
+SCATTER_TASK = 'scatter_axes'
+
+# 在后台线程池中执行的关键词索引加载 / 构建（完成前搜索只使用向量）
+LEXICAL_TASK = 'lexical_index'
+
+# 默认引力桩（从 pillars_data.csv 中选择几个代表性的）
+DEFAULT_GRAVITY_PILLARS = [
+    "Fire, burning, ash, lava, destruction",
+    "Ice, cold, frozen, crystal, winter",
+    "Electric, spark, lightning, energy, buzz",
+    "Organic, nature, forest, wood, magic",
+    "Sci-Fi, space, alien, futuristic, tech",
+    "Dark, horror, ghost, spectral, eerie"
+]
+
+
 class UMAPRecalcThread(QThread):
     """UMAP重新计算线程 - 仅重新计算坐标，使用现有向量缓存"""
     
@@ -51,7 +71,7 @@ class UMAPRecalcThread(QThread):
                 ucs_manager=ucs_manager
             )
             
-            vector_engine = VectorEngine(model_path="./models/bge-m3")
+            vector_engine = LazyVectorEngine(model_path="./models/bge-m3")
             
             # 创建处理器
             processor = DataProcessor(
@@ -68,32 +88,16 @@ class UMAPRecalcThread(QThread):
             self.progress_signal.emit(10, "Loading existing vectors...")
             metadata, embeddings = processor.load_index()
             
-            # 提取 Category 并编码
+            # 类别整数编码（索引时生成，旧缓存按需补齐）
             self.progress_signal.emit(30, "Encoding categories...")
-            try:
-                from core.category_color_mapper import CategoryColorMapper
-                mapper = CategoryColorMapper()
-            except Exception:
-                mapper = None
-            
-            categories = []
-            for meta in metadata:
-                cat_id = meta.get('category', '')
-                if mapper:
-                    category = mapper.get_category_from_catid(cat_id)
-                    if not category:
-                        category = "UNCATEGORIZED"
-                else:
-                    category = "UNCATEGORIZED"
-                categories.append(category)
+            processor.ucs_manager = ucs_manager
+            category_codes = processor.load_category_codes()
             
-            # 【超级锚点策略】保存原始字符串列表（用于向量注入）
-            categories_original = categories.copy()
+            # 【超级锚点策略】主类别字符串列表（用于向量注入）
+            categories_original = category_codes.main_category_labels()
             
-            # 使用 LabelEncoder 编码
-            from sklearn.preprocessing import LabelEncoder
-            label_encoder = LabelEncoder()
-            targets = label_encoder.fit_transform(categories)
+            # UMAP 监督标签：主类别编码，未分类为 -1
+            targets = category_codes.supervision_targets()
             
             # 【超级锚点策略】向量注入：将主类别的One-Hot向量注入到音频embedding中
             self.progress_signal.emit(45, "Applying Super-Anchor Strategy...")
@@ -152,6 +156,7 @@ class AtlasBuilderThread(QThread):
     
     def run(self):
         """执行构建流程"""
+        importer = None
         try:
             self.progress_signal.emit(5, "Initializing components...")
             
@@ -168,7 +173,7 @@ class AtlasBuilderThread(QThread):
                 ucs_manager=ucs_manager
             )
             
-            vector_engine = VectorEngine(model_path="./models/bge-m3")
+            vector_engine = LazyVectorEngine(model_path="./models/bge-m3")
             
             # 创建处理器
             processor = DataProcessor(
@@ -204,33 +209,16 @@ class AtlasBuilderThread(QThread):
             self.progress_signal.emit(70, "Computing UMAP coordinates...")
             
             import umap
-            from sklearn.preprocessing import LabelEncoder
             import numpy as np
             
-            # 提取 Category 并编码
-            try:
-                from core.category_color_mapper import CategoryColorMapper
-                mapper = CategoryColorMapper()
-            except Exception:
-                mapper = None
-            
-            categories = []
-            for meta in metadata:
-                cat_id = meta.get('category', '')
-                if mapper:
-                    category = mapper.get_category_from_catid(cat_id)
-                    if not category:
-                        category = "UNCATEGORIZED"
-                else:
-                    category = "UNCATEGORIZED"
-                categories.append(category)
+            # 类别整数编码（build_index 已生成）
+            category_codes = processor.load_category_codes()
             
-            # 【超级锚点策略】保存原始字符串列表（用于向量注入）
-            categories_original = categories.copy()
+            # 【超级锚点策略】主类别字符串列表（用于向量注入）
+            categories_original = category_codes.main_category_labels()
             
-            # 使用 LabelEncoder 编码
-            label_encoder = LabelEncoder()
-            targets = label_encoder.fit_transform(categories)
+            # UMAP 监督标签：主类别编码，未分类为 -1
+            targets = category_codes.supervision_targets()
             
             # 【超级锚点策略】向量注入：将主类别的One-Hot向量注入到音频embedding中
             self.progress_signal.emit(75, "Applying Super-Anchor Strategy...")
@@ -271,6 +259,10 @@ class AtlasBuilderThread(QThread):
             import traceback
             traceback.print_exc()
             self.error_signal.emit(error_msg)
+        finally:
+            # 本线程读库用的连接（带 mmap）不会再被使用，线程结束前关闭
+            if importer is not None:
+                importer.release_connection()
 
 
 class SonicCompassMainWindow(QMainWindow):
@@ -284,6 +276,8 @@ class SonicCompassMainWindow(QMainWindow):
         # 核心组件
         self.processor: Optional[DataProcessor] = None
         self.search_core: Optional[SearchCore] = None
+        self.search_worker: Optional[SearchWorker] = None
+        self.vector_engine: Optional[LazyVectorEngine] = None  # 首次搜索时才加载模型
         self.visualizer: Optional[SonicUniverse] = None
         
         # 右键菜单
@@ -307,10 +301,12 @@ class SonicCompassMainWindow(QMainWindow):
         self._apply_global_styles()
         
         # 初始化UI
-        self._setup_ui()
+        with perf.timer('startup.setup_ui', 'startup'):
+            self._setup_ui()
         
         # 加载数据
-        self._load_data()
+        with perf.timer('startup.load_data', 'startup'):
+            self._load_data()
     
     def _apply_global_styles(self):
         """应用全局样式表"""
@@ -345,6 +341,7 @@ class SonicCompassMainWindow(QMainWindow):
         self.search_bar = SearchBar()
         self.search_bar.setObjectName("search_bar")
         self.search_bar.search_requested.connect(self._on_search)
+        self.search_bar.textEdited.connect(self._warm_up_model)
         search_container_layout.addWidget(self.search_bar)
         
         canvas_layout.addWidget(search_container)
@@ -353,6 +350,7 @@ class SonicCompassMainWindow(QMainWindow):
         self.canvas_view = CanvasView()
         self.canvas_view.zoom_changed.connect(self._on_zoom_changed)
         self.canvas_view.selection_made.connect(self._on_selection_made)
+        self.canvas_view.lasso_made.connect(self._on_lasso_made)
         self.canvas_view.mouse_moved.connect(self._on_mouse_moved)  # 连接鼠标移动信号
         canvas_layout.addWidget(self.canvas_view)
         
@@ -665,7 +663,9 @@ class SonicCompassMainWindow(QMainWindow):
             # 保存 importer 实例供 InspectorPanel 使用
             self.importer = importer
             
-            vector_engine = VectorEngine(model_path="./models/bge-m3")
+            # 模型延迟加载：浏览地图不需要模型，首次搜索（或开始输入）时在后台加载
+            vector_engine = LazyVectorEngine(model_path="./models/bge-m3")
+            self.vector_engine = vector_engine
             
             # 创建处理器
             self.processor = DataProcessor(
@@ -715,24 +715,52 @@ class SonicCompassMainWindow(QMainWindow):
                     else:
                         print(f"[DEBUG] 加载{current_mode}模式坐标: shape={coords_2d.shape}, 有效={valid_count}/{len(coords_2d)}, range=[{coords_2d[valid_mask].min(axis=0)}, {coords_2d[valid_mask].max(axis=0)}]")
             
-            # 创建搜索核心
+            # 类别整数编码（分类过滤 / 取色 / 标签共用）
+            self.processor.ucs_manager = ucs_manager
+            category_codes = self.processor.load_category_codes()
+            
+            # 创建搜索核心（先只用向量检索，关键词索引在后台就绪后切换到混合检索）
             self.search_core = SearchCore(
                 vector_engine=vector_engine,
                 metadata=metadata,
-                embeddings=embeddings
+                embeddings=embeddings,
+                category_codes=category_codes
+            )
+            
+            # 后台搜索线程（替换旧的调度器，旧查询全部作废）
+            if self.search_worker:
+                self.search_worker.cancel()
+                self.search_worker.cancel_task(GRAVITY_TASK)
+                self.search_worker.cancel_task(SCATTER_TASK)
+                self.search_worker.cancel_task(LEXICAL_TASK)
+            self.search_worker = SearchWorker(self.search_core, self)
+            self.search_worker.results_ready.connect(self._on_search_results)
+            self.search_worker.search_failed.connect(self._on_search_failed)
+            self.search_worker.task_ready.connect(self._on_model_task_ready)
+            self.search_worker.task_failed.connect(self._on_model_task_failed)
+            
+            # 关键词索引（旧缓存没有索引时需要构建，大库要几秒，放到后台线程）
+            search_core, processor = self.search_core, self.processor
+            self.search_worker.submit_task(
+                LEXICAL_TASK, lambda: (search_core, processor.load_lexical_index()), background=True
             )
             
             # 创建可视化场景
             print(f"[DEBUG] 创建可视化场景: metadata={len(metadata)}, embeddings={embeddings.shape}, coords_2d={coords_2d.shape if coords_2d is not None else None}")
+            # 与 SearchCore 共享同一份向量矩阵
             self.visualizer = SonicUniverse(
                 metadata,
-                embeddings,
+                self.search_core.embeddings,
                 coords_2d=coords_2d,
                 hex_size=50.0,
                 search_core=self.search_core,  # 传入 search_core 用于 Scatter 模式
-                ucs_manager=ucs_manager  # 传入 ucs_manager 用于标签生成
+                ucs_manager=ucs_manager,  # 传入 ucs_manager 用于标签生成
+                scatter_engine=ScatterEngine(self.search_core, self.config_manager.axis_definitions),
+                category_codes=category_codes
             )
             self.canvas_view.setScene(self.visualizer)
+            # 场景在后台构建：先显示密度预览，完整场景就绪后更新状态
+            self.visualizer.scene_ready.connect(self._on_scene_ready)
             
             # 检查场景矩形
             scene_rect = self.visualizer.sceneRect()
@@ -779,7 +807,7 @@ class SonicCompassMainWindow(QMainWindow):
             self.progress_bar.setVisible(False)
             self.progress_label.setVisible(False)
             
-            self.status_label.setText(f"Loaded {len(metadata)} items")
+            self.status_label.setText(f"Loaded {len(metadata)} items (building scene...)")
             # 注意：不关闭 importer，因为 InspectorPanel 需要它来查询原始数据
             # importer.close()
             
@@ -794,6 +822,11 @@ class SonicCompassMainWindow(QMainWindow):
             self.progress_bar.setVisible(False)
             self.progress_label.setVisible(False)
     
+    def _on_scene_ready(self):
+        """完整场景（标签、空间索引）构建完成"""
+        if self.visualizer is not None:
+            self.status_label.setText(f"Loaded {len(self.visualizer.metadata)} items")
+    
     def _on_progress_updated(self, progress: int, description: str):
         """进度更新槽函数"""
         self.progress_bar.setValue(progress)
@@ -815,7 +848,7 @@ class SonicCompassMainWindow(QMainWindow):
                 self.status_label.setText(f"Library path set: {directory}")
                 # 更新 Inspector 面板的库文件树
                 if hasattr(self.inspector, '_build_library_tree') and self.processor:
-                    metadata, _ = self.processor.load_index()
+                    metadata, _ = self.processor.load_index()  # 已缓存，不会重新读盘
                     self.inspector._build_library_tree(self.config_manager.library_root, metadata)
             except Exception as e:
                 self.status_label.setText(f"Error saving library path: {str(e)}")
@@ -935,7 +968,8 @@ class SonicCompassMainWindow(QMainWindow):
                         embeddings=embeddings,
                         ucs_manager=processor.ucs_manager,
                         config_path="data_config/ucs_coordinates.json",
-                        use_parallel=False  # UI中使用顺序执行
+                        use_parallel=False,  # UI中使用顺序执行
+                        category_codes=processor.load_category_codes()
                     )
                     print(f"[INFO] UCS模式坐标计算完成")
                     return coords_2d
@@ -1116,7 +1150,8 @@ class SonicCompassMainWindow(QMainWindow):
         if mode == 'explorer':
             self.explorer_btn.setChecked(True)
             self.gravity_btn.setChecked(False)
-            # 切换到 Explorer 模式
+            # 切换到 Explorer 模式（作废尚未完成的引力计算）
+            self.search_worker.cancel_task(GRAVITY_TASK)
             self.visualizer.set_view_mode('explorer')
             self.status_label.setText("● Explorer Mode")
         else:
@@ -1125,32 +1160,37 @@ class SonicCompassMainWindow(QMainWindow):
             # 切换到 Gravity 模式
             self._activate_gravity_mode()
     
+    def _model_pending(self) -> bool:
+        """模型是否尚未加载（首次编码需要等待模型加载）"""
+        return self.vector_engine is not None and not getattr(self.vector_engine, 'is_loaded', True)
+    
     def _activate_gravity_mode(self):
-        """激活引力视图模式"""
-        if not self.visualizer or not self.search_core:
+        """激活引力视图模式（引力桩编码在搜索线程池中执行，完成后在 _apply_gravity_weights 中应用）"""
+        if not self.visualizer or not self.search_core or not self.search_worker:
             return
         
-        try:
+        if self._model_pending():
+            self.status_label.setText("● Loading model for Gravity Mode...")
+        else:
             self.status_label.setText("● Switching to Gravity Mode...")
-            
-            # 加载Gravity模式坐标
-            self._load_coordinates_for_mode("gravity")
-            
-            # 选择默认引力桩（从 pillars_data.csv 中选择几个代表性的）
-            default_pillars = [
-                "Fire, burning, ash, lava, destruction",
-                "Ice, cold, frozen, crystal, winter",
-                "Electric, spark, lightning, energy, buzz",
-                "Organic, nature, forest, wood, magic",
-                "Sci-Fi, space, alien, futuristic, tech",
-                "Dark, horror, ghost, spectral, eerie"
-            ]
-            
-            # 计算引力权重
-            gravity_weights = self.search_core.calculate_gravity_forces(default_pillars)
-            
-            # 设置引力桩和权重
-            pillar_names = [f"Pillar {i+1}" for i in range(len(default_pillars))]
+        
+        pillars = list(DEFAULT_GRAVITY_PILLARS)
+        search_core = self.search_core
+        
+        def compute():
+            # 计算引力权重（稠密矩阵，softmax 使每个文件偏向最相近的桩）
+            weights, _ = search_core.calculate_gravity_matrix(pillars, use_softmax=True, temperature=0.05)
+            return pillars, weights
+        
+        self.search_worker.submit_task(GRAVITY_TASK, compute)
+    
+    def _apply_gravity_weights(self, pillars, gravity_weights):
+        """引力权重计算完成（GUI 线程）"""
+        if not self.gravity_btn.isChecked():
+            return
+        try:
+            # 设置引力桩和权重（引力坐标在此计算）
+            pillar_names = [f"Pillar {i+1}" for i in range(len(pillars))]
             self.visualizer.set_gravity_pillars(pillar_names, gravity_weights)
             
             # 切换到引力视图
@@ -1164,6 +1204,32 @@ class SonicCompassMainWindow(QMainWindow):
             import traceback
             traceback.print_exc()
     
+    def _on_model_task_ready(self, generation: int, name: str, result):
+        """搜索线程池中的模型计算完成（GUI 线程）"""
+        if name == LEXICAL_TASK:
+            search_core, lexical_index = result
+            # 索引属于已被替换的搜索核心（重新加载数据）时丢弃
+            if search_core is self.search_core and lexical_index is not None:
+                self.search_core.set_lexical_index(lexical_index)
+            return
+        if not self.visualizer or self.search_worker.is_task_stale(name, generation):
+            return
+        if name == GRAVITY_TASK:
+            self._apply_gravity_weights(*result)
+        elif name == SCATTER_TASK:
+            self._apply_scatter_coords(*result)
+    
+    def _on_model_task_failed(self, generation: int, name: str, error_msg: str):
+        """搜索线程池中的模型计算失败"""
+        if self.search_worker.is_task_stale(name, generation):
+            return
+        if name == LEXICAL_TASK:
+            # 关键词索引不可用不影响使用：搜索继续只用向量
+            print(f"[WARNING] 关键词索引不可用，搜索只使用向量: {error_msg}")
+            return
+        self.status_label.setText(f"● Error: {error_msg}")
+        print(f"[ERROR] {name} 计算失败: {error_msg}")
+    
     def _show_context_menu(self, x: int, y: int, data: dict):
         """显示右键菜单"""
         if self.context_menu:
@@ -1203,10 +1269,34 @@ class SonicCompassMainWindow(QMainWindow):
         self.axis_config['y'] = self.y_axis_input.text()
         
         if checked:
-            # 激活 Scatter 模式
+            # 激活 Scatter 模式（投影坐标在搜索线程池中计算，完成后再切换视图）
+            if self.visualizer and self.search_worker:
+                if self._model_pending():
+                    self.status_label.setText("● Loading model for Scatter Mode...")
+                else:
+                    self.status_label.setText("● Computing axes...")
+                config = dict(self.axis_config)
+                visualizer = self.visualizer
+                self.search_worker.submit_task(
+                    SCATTER_TASK, lambda: (config, visualizer.compute_axis_coords(config))
+                )
+            else:
+                self.status_label.setText("● Scatter Mode Active")
+        else:
+            # 返回 Explorer 模式（作废尚未完成的投影计算）
+            if self.search_worker:
+                self.search_worker.cancel_task(SCATTER_TASK)
             if self.visualizer:
-                self.visualizer.set_view_mode('scatter')
-                self.visualizer.set_axis_config(self.axis_config)
+                self.visualizer.set_view_mode('explorer')
+            self.status_label.setText("● Explorer Mode")
+    
+    def _apply_scatter_coords(self, config, coords):
+        """Scatter 投影坐标计算完成（GUI 线程）"""
+        if not self.axis_config.get('active', False):
+            return
+        self.visualizer.apply_axis_coords(config, coords)
+        self.visualizer.set_view_mode('scatter')
+        self.status_label.setText("● Scatter Mode Active")
     
     def _on_show_axes_toggled(self, checked: bool):
         """坐标轴显示开关"""
@@ -1227,12 +1317,6 @@ class SonicCompassMainWindow(QMainWindow):
         
         # 更新状态标签（可选）
         # self.status_label.setText(f"Mouse: ({scene_pos.x():.1f}, {scene_pos.y():.1f})")
-            self.status_label.setText("● Scatter Mode Active")
-        else:
-            # 返回 Explorer 模式
-            if self.visualizer:
-                self.visualizer.set_view_mode('explorer')
-            self.status_label.setText("● Explorer Mode")
     
     def _on_zoom_changed(self, zoom_level: float):
         """缩放级别改变"""
@@ -1248,56 +1332,83 @@ class SonicCompassMainWindow(QMainWindow):
         selected_metadata = self.visualizer.get_items_in_rect(selection_rect)
         
         if selected_metadata:
-            # 显示在检查器面板
-            self.inspector.show_metadata_list(selected_metadata)
+            # 显示在检查器面板（单选显示详情，多选走虚拟列表）
+            self.inspector.update_selection(selected_metadata)
         else:
             # 如果没有选中任何项，清空面板
             self.inspector.clear()
     
+    def _on_lasso_made(self, polygon):
+        """套索选择完成 - 显示多边形内的所有文件"""
+        if not self.visualizer:
+            return
+        
+        selected_metadata = self.visualizer.get_items_in_polygon(polygon)
+        
+        if selected_metadata:
+            self.inspector.update_selection(selected_metadata)
+        else:
+            self.inspector.clear()
+    
     def _on_search(self, query: str):
-        """搜索处理 - 搜索时自动切换到 Gravity 模式"""
+        """搜索处理 - 提交到后台搜索线程，结果到达后自动切换到 Gravity 模式"""
         if not self.search_core or not self.visualizer:
             return
         
-        try:
-            if not query.strip():
-                # 清空搜索，返回 Explorer 模式
-                self.visualizer.clear_highlights()
-                self.visualizer.set_view_mode('explorer')
-                self.explorer_btn.setChecked(True)
-                self.gravity_btn.setChecked(False)
-                self.status_label.setText("● Explorer Mode")
-                return
-            
+        if not query.strip():
+            # 清空搜索：作废进行中的查询，返回 Explorer 模式
+            if self.search_worker:
+                self.search_worker.cancel()
+            self.visualizer.clear_highlights()
+            self.inspector.set_search_scores(None)
+            self.visualizer.set_view_mode('explorer')
+            self.explorer_btn.setChecked(True)
+            self.gravity_btn.setChecked(False)
+            self.status_label.setText("● Explorer Mode")
+            return
+        
+        if self.vector_engine is not None and not self.vector_engine.is_loaded:
+            self.status_label.setText(f"Loading model, then searching: {query}...")
+        else:
             self.status_label.setText(f"Searching: {query}...")
-            
-            # 执行搜索
-            results = self.search_core.search_by_text(query, top_k=50)
-            
-            if results:
-                # 获取结果索引和相关性分数
-                result_indices = []
-                result_scores = {}
-                for metadata, score in results:
-                    # 找到对应的索引
-                    for i, meta in enumerate(self.search_core.metadata):
-                        if meta.get('recID') == metadata.get('recID'):
-                            result_indices.append(i)
-                            result_scores[i] = score
-                            break
-                
-                # 切换到 Gravity 模式并应用螺旋排列
+        
+        # 执行搜索（旧查询自动作废，只投递最新结果；搜索结果会替换尚未完成的默认引力桩）
+        self.search_worker.cancel_task(GRAVITY_TASK)
+        self.search_worker.submit(query.strip(), top_k=50)
+    
+    def _warm_up_model(self, text: str):
+        """用户开始输入时在后台预加载模型，缩短首次搜索等待"""
+        if self.vector_engine is not None and text.strip():
+            self.vector_engine.preload()
+    
+    def _on_search_results(self, generation: int, query: str, indices, scores):
+        """搜索结果到达（GUI 线程）"""
+        if not self.visualizer or self.search_worker.is_stale(generation):
+            return
+        
+        try:
+            if len(indices) > 0:
+                # 切换到 Gravity 模式并应用螺旋排列（索引与 SearchCore.metadata 一致）
                 self.gravity_btn.setChecked(True)
                 self.explorer_btn.setChecked(False)
-                self.visualizer.apply_search_gravity(result_indices, result_scores)
+                self.visualizer.apply_search_gravity(indices.tolist(), scores.tolist())
+                self.inspector.set_search_scores(dict(zip(indices.tolist(), scores.tolist())))
                 
-                self.status_label.setText(f"● Found {len(results)} results (Gravity Mode)")
+                self.status_label.setText(f"● Found {len(indices)} results (Gravity Mode)")
             else:
                 self.status_label.setText("No results found")
                 self.visualizer.clear_highlights()
+                self.inspector.set_search_scores(None)
                 
         except Exception as e:
             self.status_label.setText(f"Search error: {str(e)}")
             print(f"[ERROR] 搜索失败: {e}")
+    
+    def _on_search_failed(self, generation: int, error_msg: str):
+        """后台搜索失败"""
+        if self.search_worker.is_stale(generation):
+            return
+        self.status_label.setText(f"Search error: {error_msg}")
+        print(f"[ERROR] 搜索失败: {error_msg}")
 
 
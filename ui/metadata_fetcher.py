@@ -0,0 +1,207 @@
+"""
+原始元数据获取服务 - 检查器面板按 recID 读取数据库原始行
+后台线程 + 独立只读连接，批量 WHERE recID IN (...) 查询，结果放入有界 LRU 缓存
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from core.instrumentation import perf
+
+
+# 单条 IN 查询的最大参数个数（低于旧版 SQLite 的 999 变量上限）
+FETCH_BATCH_SIZE = 500
+
+# LRU 缓存容量（条）
+DEFAULT_CACHE_SIZE = 4096
+
+
+def normalize_recid(value):
+    """recID 统一为 int（数据库和渲染数据中可能是字符串）"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class _FetchTask(QRunnable):
+    """取数任务：循环取出待查 recID，按批查询，直到队列为空"""
+
+    def __init__(self, fetcher: 'MetadataFetcher'):
+        super().__init__()
+        self._fetcher = fetcher
+
+    def run(self):
+        fetcher = self._fetcher
+        try:
+            while True:
+                batch = fetcher._take_batch()
+                if not batch:
+                    return
+                rows = fetcher._query_batch(batch)
+                if rows is None:
+                    return
+                fetcher.metadata_ready.emit(rows)
+        except Exception as e:
+            fetcher._abort_pending()
+            fetcher.fetch_failed.emit(str(e))
+
+
+class MetadataFetcher(QObject):
+    """
+    原始元数据获取服务
+
+    - get() 只读缓存，GUI 线程调用，不访问数据库
+    - request() 把未缓存的 recID 排队（urgent=True 插到队首），后台按批查询
+    - metadata_ready 发射 {recID: 原始行字典}（跨线程排队投递到 GUI 线程）；
+      数据库中不存在的 recID 以空字典缓存，不会重复查询
+    """
+
+    metadata_ready = Signal(object)  # {recID: dict}
+    fetch_failed = Signal(str)  # 错误信息
+
+    def __init__(self, importer, cache_size: int = DEFAULT_CACHE_SIZE, parent=None):
+        """
+        初始化获取服务
+
+        Args:
+            importer: SoundminerImporter 实例（只使用其路径和表结构，不共享连接）
+            cache_size: LRU 缓存容量
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.importer = importer
+        self.cache_size = max(1, int(cache_size))
+        self.table_name = importer.ensure_table()
+        self.recid_field = importer.field_mapping.get('recID', 'recID')
+
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[object, Dict]' = OrderedDict()
+        self._queue: 'OrderedDict[object, None]' = OrderedDict()  # 待查询（有序、去重）
+        self._in_flight = set()
+        self._task_running = False
+        self._closed = False
+        self._conn = None  # 只在后台线程中创建和使用
+
+        # 单线程池：同一时刻只有一个任务访问只读连接
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+    def get(self, recid) -> Optional[Dict]:
+        """读取缓存（命中时刷新 LRU 顺序），未缓存返回 None"""
+        key = normalize_recid(recid)
+        with self._lock:
+            row = self._cache.get(key)
+            if row is not None:
+                self._cache.move_to_end(key)
+        perf.count('inspector.cache_hit' if row is not None else 'inspector.cache_miss')
+        return row
+
+    def is_pending(self, recid) -> bool:
+        """该 recID 是否正在排队或查询中"""
+        key = normalize_recid(recid)
+        with self._lock:
+            return key in self._queue or key in self._in_flight
+
+    def request(self, recids: Iterable, urgent: bool = False) -> int:
+        """
+        请求获取一组 recID（已缓存或已在排队的跳过）
+
+        Args:
+            recids: recID 序列（按期望的查询顺序）
+            urgent: 是否插到队首（当前显示的条目），否则排在队尾（预取）
+
+        Returns:
+            新排队的数量
+        """
+        with self._lock:
+            if self._closed:
+                return 0
+            added = []
+            for recid in recids:
+                if recid is None or recid == '':
+                    continue
+                key = normalize_recid(recid)
+                if key in self._cache or key in self._in_flight:
+                    continue
+                if key in self._queue:
+                    if urgent:
+                        self._queue.move_to_end(key, last=False)
+                    continue
+                self._queue[key] = None
+                added.append(key)
+            if urgent:
+                for key in reversed(added):
+                    self._queue.move_to_end(key, last=False)
+            start_task = bool(self._queue) and not self._task_running
+            if start_task:
+                self._task_running = True
+
+        if start_task:
+            self._pool.start(_FetchTask(self))
+        return len(added)
+
+    def clear_cache(self):
+        """清空缓存（不影响排队中的请求）"""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self, timeout_ms: int = 2000):
+        """停止服务：丢弃排队请求，等待进行中的查询结束并关闭连接"""
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+        self._pool.clear()
+        self._pool.waitForDone(timeout_ms)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---- 以下在后台线程中调用 ----
+
+    def _take_batch(self) -> List:
+        with self._lock:
+            if self._closed or not self._queue:
+                self._task_running = False
+                return []
+            batch = []
+            while self._queue and len(batch) < FETCH_BATCH_SIZE:
+                key, _ = self._queue.popitem(last=False)
+                batch.append(key)
+            self._in_flight.update(batch)
+            return batch
+
+    def _abort_pending(self):
+        with self._lock:
+            self._in_flight.clear()
+            self._queue.clear()
+            self._task_running = False
+
+    def _query_batch(self, batch: List) -> Optional[Dict]:
+        """查询一批 recID，写入缓存并返回 {recID: 行字典}；服务已关闭时返回 None"""
+        if self._conn is None:
+            self.importer.ensure_recid_index()
+            self._conn = self.importer.connect_readonly()
+
+        with perf.timer('inspector.fetch_batch', 'inspector', rows=len(batch)):
+            placeholders = ", ".join("?" * len(batch))
+            cursor = self._conn.execute(
+                f"SELECT * FROM {self.table_name} WHERE {self.recid_field} IN ({placeholders})",
+                batch
+            )
+            rows = {normalize_recid(row[self.recid_field]): dict(row) for row in cursor}
+
+        result = {key: rows.get(key, {}) for key in batch}
+        with self._lock:
+            self._in_flight.difference_update(batch)
+            if self._closed:
+                return None
+            for key, row in result.items():
+                self._cache[key] = row
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
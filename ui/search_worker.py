@@ -0,0 +1,177 @@
+"""
+异步搜索 - 在线程池中执行模型推理和相似度扫描
+每次提交分配一个代号 (generation)，只有最新代号的结果会被投递
+
+引力桩 / 散点轴等其它需要模型的计算也通过 submit_task 在同一个线程池中执行，
+首次使用时的模型加载不会阻塞 GUI 线程；不需要模型的耗时任务（如构建关键词索引）
+使用独立的后台线程池，不阻塞查询
+"""
+
+import threading
+from typing import Callable, Dict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from core.instrumentation import perf
+
+
+class _SearchTask(QRunnable):
+    """单次搜索任务（线程池中执行）"""
+
+    def __init__(self, worker: 'SearchWorker', generation: int, query: str, top_k: int):
+        super().__init__()
+        self._worker = worker
+        self.generation = generation
+        self.query = query
+        self.top_k = top_k
+
+    def run(self):
+        worker = self._worker
+        try:
+            # 排队期间已有更新的查询：直接放弃
+            if worker.is_stale(self.generation):
+                return
+
+            # 1. 模型推理（不可中断，完成后再检查是否过期）
+            query_vector = worker.search_core.encode_query(self.query)
+            if worker.is_stale(self.generation):
+                perf.count('search.stale_dropped')
+                return
+
+            # 2. 检索 + Top K（有关键词索引时为 BM25 候选 + 向量打分的混合检索）
+            indices, scores = worker.search_core.search_indices(self.query, query_vector, top_k=self.top_k)
+            if worker.is_stale(self.generation):
+                perf.count('search.stale_dropped')
+                return
+
+            worker.results_ready.emit(self.generation, self.query, indices, scores)
+        except Exception as e:
+            if not worker.is_stale(self.generation):
+                worker.search_failed.emit(self.generation, str(e))
+
+
+class _ModelTask(QRunnable):
+    """后台计算（需要模型时与搜索共用单线程池）"""
+
+    def __init__(self, worker: 'SearchWorker', name: str, generation: int, fn: Callable[[], object]):
+        super().__init__()
+        self._worker = worker
+        self.name = name
+        self.generation = generation
+        self.fn = fn
+
+    def run(self):
+        worker = self._worker
+        try:
+            if worker.is_task_stale(self.name, self.generation):
+                return
+            result = self.fn()
+            if not worker.is_task_stale(self.name, self.generation):
+                worker.task_ready.emit(self.generation, self.name, result)
+        except Exception as e:
+            if not worker.is_task_stale(self.name, self.generation):
+                worker.task_failed.emit(self.generation, self.name, str(e))
+
+
+class SearchWorker(QObject):
+    """
+    搜索调度器
+
+    - submit() 提交查询并返回代号，旧查询自动作废
+    - cancel() 作废所有进行中的查询
+    - results_ready / search_failed 只会为最新代号发射（信号跨线程排队投递到 GUI 线程）
+    - submit_task() 在同一线程池中执行其它需要模型的计算（background=True 时在独立线程池中执行），
+      每个任务名独立计代号，task_ready / task_failed 只为该任务名的最新代号发射
+    """
+
+    results_ready = Signal(int, str, object, object)  # generation, query, indices, scores
+    search_failed = Signal(int, str)  # generation, 错误信息
+    task_ready = Signal(int, str, object)  # generation, 任务名, 结果
+    task_failed = Signal(int, str, str)  # generation, 任务名, 错误信息
+
+    def __init__(self, search_core, parent=None):
+        """
+        初始化搜索调度器
+
+        Args:
+            search_core: SearchCore 实例
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.search_core = search_core
+        self._generation = 0
+        self._task_generations: Dict[str, int] = {}  # 任务名 -> 最新代号
+        self._lock = threading.Lock()
+
+        # 单线程池：查询按顺序执行（模型推理本身不是线程安全的）
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        # 不需要模型的耗时任务（不占用查询线程）
+        self._background_pool = QThreadPool(self)
+        self._background_pool.setMaxThreadCount(1)
+
+    @property
+    def current_generation(self) -> int:
+        """最新提交的查询代号"""
+        with self._lock:
+            return self._generation
+
+    def is_stale(self, generation: int) -> bool:
+        """该代号是否已被更新的查询或 cancel() 作废"""
+        with self._lock:
+            return generation != self._generation
+
+    def submit(self, query: str, top_k: int = 50) -> int:
+        """
+        提交查询
+
+        Returns:
+            本次查询的代号
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        # 排队中的旧查询在开始时检查代号后直接退出
+        # （不调用 pool.clear()，以免丢弃排队中的 submit_task 任务）
+        self._pool.start(_SearchTask(self, generation, query, top_k))
+        return generation
+
+    def cancel(self):
+        """作废所有进行中的查询（正在执行的推理会在下一个检查点退出）"""
+        with self._lock:
+            self._generation += 1
+
+    def is_task_stale(self, name: str, generation: int) -> bool:
+        """该代号是否已被同名的新任务或 cancel_task() 作废"""
+        with self._lock:
+            return generation != self._task_generations.get(name, 0)
+
+    def submit_task(self, name: str, fn: Callable[[], object], background: bool = False) -> int:
+        """
+        在线程池中执行 fn()（可能触发模型加载），结果通过 task_ready 投递到 GUI 线程
+
+        Args:
+            name: 任务名（同名的旧任务自动作废）
+            fn: 无参数的计算函数，不能访问场景 / 控件
+            background: 在独立线程池中执行（fn 不使用模型，不阻塞查询）
+
+        Returns:
+            本次任务的代号
+        """
+        with self._lock:
+            generation = self._task_generations.get(name, 0) + 1
+            self._task_generations[name] = generation
+        pool = self._background_pool if background else self._pool
+        pool.start(_ModelTask(self, name, generation, fn))
+        return generation
+
+    def cancel_task(self, name: str):
+        """作废同名的进行中任务（已开始的计算会完成，但结果不会投递）"""
+        with self._lock:
+            self._task_generations[name] = self._task_generations.get(name, 0) + 1
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        """等待线程池空闲（退出程序时使用）"""
+        done = self._pool.waitForDone(timeout_ms)
+        return self._background_pool.waitForDone(timeout_ms) and done
@@ -0,0 +1,212 @@
+"""
+LOD 标签的数组内核 - 逐格众数、连通域、碰撞剔除
+全部基于整数编码和 NumPy 数组，不在 Python 层逐点循环
+"""
+
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# 六边形轴向坐标的 3 个"正向"邻居（另外 3 个由对称性覆盖）
+_HALF_NEIGHBOR_OFFSETS = ((1, 0), (1, -1), (0, 1))
+
+
+def flatten_grid_map(grid_map: Dict, cells: Optional[Sequence] = None):
+    """
+    将 (q, r) -> [indices] 展平为数组
+
+    Args:
+        grid_map: 网格字典
+        cells: 只展平这些格子（None 表示全部）
+
+    Returns:
+        (cells, cell_q, cell_r, point_cell, point_indices)
+        - cells: 非空格子列表（与 cell_q / cell_r 对齐）
+        - point_cell: (M,) 每个点所属格子的序号
+        - point_indices: (M,) 点在元数据中的索引
+    """
+    if cells is None:
+        cells = list(grid_map.keys())
+    members = []
+    kept_cells = []
+    for cell in cells:
+        indices = grid_map.get(cell)
+        if indices:
+            kept_cells.append(cell)
+            members.append(indices)
+
+    n_cells = len(kept_cells)
+    if n_cells == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return [], empty, empty, empty, empty
+
+    counts = np.fromiter(map(len, members), dtype=np.int64, count=n_cells)
+    point_indices = np.fromiter(chain.from_iterable(members), dtype=np.int64, count=int(counts.sum()))
+    point_cell = np.repeat(np.arange(n_cells, dtype=np.int64), counts)
+    cell_qr = np.array(kept_cells, dtype=np.int64).reshape(-1, 2)
+    return kept_cells, cell_qr[:, 0], cell_qr[:, 1], point_cell, point_indices
+
+
+def grouped_mode(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    分组众数：每组中出现最多的非负整数值（并列时取较小值）
+
+    Args:
+        group: (M,) 组序号
+        values: (M,) 非负整数值，负数表示忽略
+        n_groups: 组数
+
+    Returns:
+        (n_groups,) int64，没有有效值的组为 -1
+    """
+    mode = np.full(n_groups, -1, dtype=np.int64)
+    valid = values >= 0
+    if not valid.any():
+        return mode
+    group = group[valid].astype(np.int64)
+    values = values[valid].astype(np.int64)
+    n_values = int(values.max()) + 1
+
+    # 组合键的分组计数（bincount 在键空间不大时更快，否则退回到 unique）
+    keys = group * n_values + values
+    if n_groups * n_values <= 4 * len(keys) + 1_000_000:
+        counts = np.bincount(keys, minlength=n_groups * n_values).reshape(n_groups, n_values)
+        best = counts.argmax(axis=1)
+        has_value = counts[np.arange(n_groups), best] > 0
+        mode[has_value] = best[has_value]
+        return mode
+
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    key_group = unique_keys // n_values
+    key_value = unique_keys % n_values
+    # 按 (组, 计数降序, 值升序) 排序，每组第一项即众数
+    order = np.lexsort((key_value, -counts, key_group))
+    first = np.concatenate(([True], np.diff(key_group[order]) != 0))
+    mode[key_group[order][first]] = key_value[order][first]
+    return mode
+
+
+def connected_components(cell_q: np.ndarray, cell_r: np.ndarray, cell_labels: np.ndarray) -> np.ndarray:
+    """
+    同标签六边形的连通域（并查集，按整数格子序号合并）
+
+    Args:
+        cell_q, cell_r: (C,) 格子轴向坐标
+        cell_labels: (C,) 格子标签（整数），负数表示不参与
+
+    Returns:
+        (C,) 连通域根序号（同一连通域的格子取相同值；不参与的格子为自身序号）
+    """
+    n = len(cell_q)
+    parent = np.arange(n, dtype=np.int64)
+    if n == 0:
+        return parent
+
+    # (q, r) -> 格子序号：压成整数键后排序 + 二分查找
+    q = cell_q.astype(np.int64)
+    r = cell_r.astype(np.int64)
+    q_min, r_min = q.min() - 1, r.min() - 1
+    r_span = int(r.max() - r_min) + 2
+    keys = (q - q_min) * r_span + (r - r_min)
+    key_order = np.argsort(keys)
+    sorted_keys = keys[key_order]
+
+    edges_a, edges_b = [], []
+    for dq, dr in _HALF_NEIGHBOR_OFFSETS:
+        neighbor_keys = (q + dq - q_min) * r_span + (r + dr - r_min)
+        pos = np.searchsorted(sorted_keys, neighbor_keys)
+        pos = np.minimum(pos, n - 1)
+        found = sorted_keys[pos] == neighbor_keys
+        src = np.flatnonzero(found)
+        dst = key_order[pos[found]]
+        same = (cell_labels[src] == cell_labels[dst]) & (cell_labels[src] >= 0)
+        edges_a.append(src[same])
+        edges_b.append(dst[same])
+
+    a = np.concatenate(edges_a)
+    b = np.concatenate(edges_b)
+    if len(a) == 0:
+        return parent
+
+    # 向量化并查集：按边把两端挂到较小的根上，再路径压缩，直到不再变化
+    while True:
+        root_a = parent[a]
+        root_b = parent[b]
+        low = np.minimum(root_a, root_b)
+        new_parent = parent.copy()
+        np.minimum.at(new_parent, root_a, low)
+        np.minimum.at(new_parent, root_b, low)
+        while True:
+            compressed = new_parent[new_parent]
+            if np.array_equal(compressed, new_parent):
+                break
+            new_parent = compressed
+        if np.array_equal(new_parent, parent):
+            return parent
+        parent = new_parent
+
+
+class SpatialHash:
+    """
+    均匀网格空间哈希：矩形重叠测试只检查所在桶内的已放置矩形
+
+    桶边长取标签的典型尺寸时，每次测试只涉及常数个矩形。
+    """
+
+    def __init__(self, bucket_size: float):
+        self.bucket_size = max(float(bucket_size), 1e-6)
+        self._buckets: Dict[Tuple[int, int], List[Tuple[float, float, float, float]]] = {}
+
+    def _bucket_range(self, x0, y0, x1, y1):
+        size = self.bucket_size
+        return (
+            range(int(np.floor(x0 / size)), int(np.floor(x1 / size)) + 1),
+            range(int(np.floor(y0 / size)), int(np.floor(y1 / size)) + 1),
+        )
+
+    def overlaps(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        """是否与已插入的矩形相交（边界接触不算相交）"""
+        xs, ys = self._bucket_range(x0, y0, x1, y1)
+        buckets = self._buckets
+        for bx in xs:
+            for by in ys:
+                for px0, py0, px1, py1 in buckets.get((bx, by), ()):
+                    if x0 < px1 and px0 < x1 and y0 < py1 and py0 < y1:
+                        return True
+        return False
+
+    def insert(self, x0: float, y0: float, x1: float, y1: float) -> None:
+        rect = (x0, y0, x1, y1)
+        xs, ys = self._bucket_range(x0, y0, x1, y1)
+        for bx in xs:
+            for by in ys:
+                self._buckets.setdefault((bx, by), []).append(rect)
+
+
+def cull_overlapping_rects(rects: np.ndarray, bucket_size: Optional[float] = None) -> np.ndarray:
+    """
+    按顺序（优先级从高到低）贪心放置矩形，丢弃与已放置矩形相交的
+
+    Args:
+        rects: (K, 4) 矩形 (x0, y0, x1, y1)，已按优先级排序
+        bucket_size: 空间哈希桶边长，默认取矩形尺寸中位数
+
+    Returns:
+        (K,) bool，True 表示保留
+    """
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    kept = np.zeros(len(rects), dtype=bool)
+    if len(rects) == 0:
+        return kept
+    if bucket_size is None:
+        extents = np.maximum(rects[:, 2] - rects[:, 0], rects[:, 3] - rects[:, 1])
+        bucket_size = float(np.median(extents)) or 1.0
+
+    spatial_hash = SpatialHash(bucket_size)
+    for i, (x0, y0, x1, y1) in enumerate(rects.tolist()):
+        if not spatial_hash.overlaps(x0, y0, x1, y1):
+            spatial_hash.insert(x0, y0, x1, y1)
+            kept[i] = True
+    return kept
@@ -0,0 +1,143 @@
+"""
+场景后台构建 - 不可变场景快照 + 构建线程
+将六边形分箱、KDTree、颜色路径和标签生成移出 GUI 线程
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+
+class GridMapOverlay(Mapping):
+    """
+    网格字典的写时复制视图：底层网格（不复制、不修改）+ 改动过的格子
+
+    增量重新分箱只写入改动的格子，不复制整个网格；changes 中值为 None 表示格子已被删除。
+    后台补全快照时用 to_dict() 合并为普通字典。
+    """
+
+    def __init__(self, base: Mapping, changes: Dict[Tuple[int, int], Optional[List[int]]]):
+        if isinstance(base, GridMapOverlay):
+            # 叠加在已有视图上：合并改动，底层始终是普通字典
+            merged = dict(base.changes)
+            merged.update(changes)
+            base, changes = base.base, merged
+        self.base = base
+        self.changes = changes
+        added = sum(1 for cell, members in changes.items() if members is not None and cell not in base)
+        removed = sum(1 for cell, members in changes.items() if members is None and cell in base)
+        self._len = len(base) + added - removed
+
+    def __getitem__(self, cell):
+        if cell in self.changes:
+            members = self.changes[cell]
+            if members is None:
+                raise KeyError(cell)
+            return members
+        return self.base[cell]
+
+    def __contains__(self, cell):
+        if cell in self.changes:
+            return self.changes[cell] is not None
+        return cell in self.base
+
+    def __iter__(self):
+        changes = self.changes
+        for cell in self.base:
+            if cell not in changes:
+                yield cell
+        for cell, members in changes.items():
+            if members is not None:
+                yield cell
+
+    def __len__(self):
+        return self._len
+
+    def items(self):
+        changes = self.changes
+        for cell, members in self.base.items():
+            if cell not in changes:
+                yield cell, members
+        for cell, members in changes.items():
+            if members is not None:
+                yield cell, members
+
+    def to_dict(self) -> Dict[Tuple[int, int], List[int]]:
+        """合并为普通字典（O(格子数)，在后台线程调用）"""
+        return dict(self.items())
+
+
+@dataclass(frozen=True)
+class SceneSnapshot:
+    """
+    场景快照（构建完成后只读，由 GUI 线程整体替换）
+
+    预览快照 (is_preview=True) 只包含网格分箱和密度路径，
+    完整快照额外包含 KDTree、类别颜色、标签和散点颜色。
+    增量快照 tree 为 None（KDTree 在后台重建中）。
+    """
+    generation: int
+    norm_coords: np.ndarray
+    metadata: List[Dict]
+    grid_map: Dict[Tuple[int, int], List[int]]
+    color_batches: List[Tuple[Any, Any, Any]]  # [(QColor, QPainterPath, tile), ...]
+    is_preview: bool = True
+    tree: Optional[Any] = None
+    hex_colors: Optional[Dict[Tuple[int, int], Any]] = None
+    category_labels: Optional[List[Dict]] = None
+    subcategory_labels: Optional[Dict[Tuple[int, int], Dict]] = None
+    cell_categories: Optional[Dict[Tuple[int, int], str]] = None  # (q, r) -> 大类名称，增量更新标签用
+    point_colors: Optional[np.ndarray] = None  # (N, 4) uint8 RGBA
+
+
+class SceneBuildThread(QThread):
+    """场景构建线程 - 先产出预览快照，再产出完整快照"""
+
+    preview_signal = Signal(int)  # generation，预览快照就绪
+    finished_signal = Signal(int)  # generation，完整快照就绪
+    error_signal = Signal(int, str)  # generation, 错误信息
+
+    def __init__(
+        self,
+        generation: int,
+        preview_fn: Callable[[], SceneSnapshot],
+        build_fn: Callable[[SceneSnapshot], SceneSnapshot],
+        parent=None
+    ):
+        """
+        初始化构建线程
+
+        Args:
+            generation: 构建代号（场景只接受最新代号的结果）
+            preview_fn: 生成预览快照的函数（在后台线程执行）
+            build_fn: 基于预览快照生成完整快照的函数（在后台线程执行）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.generation = generation
+        self._preview_fn = preview_fn
+        self._build_fn = build_fn
+        # 存储结果，主线程读取（信号只传递代号，不传递数据）
+        self.preview_snapshot: Optional[SceneSnapshot] = None
+        self.snapshot: Optional[SceneSnapshot] = None
+
+    def run(self):
+        """执行构建流程"""
+        try:
+            self.preview_snapshot = self._preview_fn()
+            self.preview_signal.emit(self.generation)
+
+            # 已有更新的构建请求时放弃剩余工作
+            if self.isInterruptionRequested():
+                return
+
+            self.snapshot = self._build_fn(self.preview_snapshot)
+            if not self.isInterruptionRequested():
+                self.finished_signal.emit(self.generation)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.error_signal.emit(self.generation, str(e))
@@ -0,0 +1,68 @@
+"""
+框选 / 套索选择工具 - 向量化命中测试 + 惰性元数据
+"""
+
+from collections.abc import Sequence
+from typing import Dict, List
+
+import numpy as np
+
+
+def points_in_polygon(points: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """
+    向量化的点在多边形内判定（奇偶射线法）
+
+    Args:
+        points: (N, 2) 待测点
+        vertices: (M, 2) 多边形顶点（首尾无需重复）
+
+    Returns:
+        (N,) bool 数组
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    inside = np.zeros(len(points), dtype=bool)
+    if len(points) == 0 or len(vertices) < 3:
+        return inside
+
+    x = points[:, 0]
+    y = points[:, 1]
+    xj, yj = vertices[-1]
+    # 按边循环（边数通常远小于点数），每条边对所有点做一次数组运算
+    for xi, yi in vertices:
+        crosses = (yi > y) != (yj > y)
+        if crosses.any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_intersect = (xj - xi) * (y - yi) / (yj - yi) + xi
+            inside ^= crosses & (x < x_intersect)
+        xj, yj = xi, yi
+    return inside
+
+
+class LazyMetadataList(Sequence):
+    """
+    选择结果：持有索引数组，按需取出元数据
+
+    兼容原来的 List[Dict] 用法（len / 切片 / 迭代），
+    但在只显示前几十项时不会为全部选中项构建列表。
+    """
+
+    def __init__(self, metadata: List[Dict], indices: np.ndarray):
+        self._metadata = metadata
+        indices = np.asarray(indices, dtype=np.int64)
+        self.indices = indices[(indices >= 0) & (indices < len(metadata))]
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._metadata[int(i)] for i in self.indices[item]]
+        return self._metadata[int(self.indices[item])]
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self._metadata[int(i)]
+
+    def __repr__(self) -> str:
+        return f"LazyMetadataList({len(self)} items)"
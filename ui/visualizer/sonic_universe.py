@@ -3,20 +3,29 @@ ui/visualizer/sonic_universe.py
 可视化引擎 - 修复版 (Fix: Interaction, Layout, Rendering)
 """
 
+import logging
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 from PySide6.QtWidgets import QGraphicsScene, QGraphicsItem, QStyleOptionGraphicsItem, QWidget
-from PySide6.QtCore import Qt, QPointF, QRectF, Signal
+from PySide6.QtCore import Qt, QPointF, QRectF, Signal, QDeadlineTimer
 from PySide6.QtGui import QColor, QPen, QBrush, QPolygonF, QPainter, QRadialGradient, QFont, QStaticText, QPainterPath
 import math
 import sys
+import bisect
 from pathlib import Path
-from collections import Counter
+from dataclasses import replace
+
+from .scene_builder import GridMapOverlay, SceneSnapshot, SceneBuildThread
+from .selection import LazyMetadataList, points_in_polygon
+from .label_engine import (
+    flatten_grid_map, grouped_mode,
+    connected_components, cull_overlapping_rects
+)
 
 # 导入 Category 颜色映射器
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 try:
-    from core.category_color_mapper import CategoryColorMapper
+    from core.category_color_mapper import CategoryColorMapper, build_rgba_lut, rgba_to_argb32
 except ImportError:
     CategoryColorMapper = None
 
@@ -25,6 +34,22 @@ try:
 except ImportError:
     UCSManager = None
 
+try:
+    from core.category_codes import build_category_codes
+except ImportError:
+    build_category_codes = None
+
+try:
+    from core.scatter_engine import ScatterEngine, ScatterEngineError
+except ImportError:
+    ScatterEngine = None
+    ScatterEngineError = Exception
+
+from core.log import get_logger, log_span
+from core.instrumentation import perf
+
+logger = get_logger('visualizer')
+
 # 尝试导入 KDTree 用于极速查询
 try:
     from scipy.spatial import cKDTree
@@ -32,11 +57,24 @@ try:
 except ImportError:
     SCIPY_AVAILABLE = False
 
-try:
-    import umap
-    UMAP_AVAILABLE = True
-except ImportError:
-    UMAP_AVAILABLE = False
+
+# 严格网格参数（Phase 3.5：保留 2px 物理间隙，形成"地砖"分离感）
+HEX_GAP_RATIO = 0.95
+# 每个六边形在 QPainterPath 中占用的元素数（moveTo + 5 lineTo + closeSubpath）
+HEX_PATH_ELEMENTS = 7
+# 颜色批次按空间分块的边长（以六边形列宽为单位），分块越小剔除越精细、drawPath 次数越多
+HEX_TILE_CELLS = 8
+
+# 预览阶段（标签与颜色尚未就绪）的密度灰阶，由稀到密
+PREVIEW_DENSITY_COLORS = ['#2A2D35', '#3A3E48', '#4C515E', '#5F636E']
+
+# 向日葵螺旋布局的黄金角度（137.508°）
+GOLDEN_ANGLE_RAD = math.radians(137.508)
+
+# 引力桩布局：桩均匀分布在画布中心周围（半径占画布短边的比例），
+# 最终位置 = 70% 引力位置 + 30% 原始位置
+GRAVITY_PILLAR_RADIUS_RATIO = 0.4
+GRAVITY_BLEND = 0.7
 
 
 class HexGridLayer(QGraphicsItem):
@@ -50,7 +88,7 @@ class HexGridLayer(QGraphicsItem):
             try:
                 cls._color_mapper = CategoryColorMapper()
             except Exception as e:
-                print(f"[WARNING] 初始化 CategoryColorMapper 失败: {e}")
+                logger.warning(f"初始化 CategoryColorMapper 失败: {e}")
         return cls._color_mapper
     
     def __init__(self, size, ucs_manager=None):
@@ -67,25 +105,30 @@ class HexGridLayer(QGraphicsItem):
         self.current_zoom = 1.0
         self.current_lod = 0
         
+        # 渲染缓存（set_data 时失效）
+        self._hex_template = None  # 以原点为中心的单位六边形模板 (QPolygonF)
+        self._hex_template_key = None  # (hex_size, gap_ratio)
+        self._pen_brush_cache = {}  # (rgba, lod) -> (QPen, QBrush)
+        self._hex_colors = {}  # (q, r) -> QColor
+        self._color_batches = None  # [(QColor, QPainterPath, tile)] 按 (颜色, 空间分块) 分组的预构建路径
+        self.category_codes = None  # 索引时生成的 CategoryCodes（由 SonicUniverse 传入）
+        self._category_code_cache = None  # (metadata, CategoryCodes) 没有预生成编码时的后备
+        self._hex_color_lut_cache = None  # (catid_table, (K+1, 4) uint8) 六边形颜色查找表
+        self.last_paint_stats = {}  # 最近一次 paint 的绘制量（渲染基准 / 性能 HUD 读取）
+        
     def set_data(self, grid_map, metadata, coords):
-        import sys
-        print(f"[DEBUG] HexGridLayer.set_data: start, grid_map={len(grid_map)}", flush=True)
-        sys.stdout.flush()
+        logger.debug(f"HexGridLayer.set_data: start, grid_map={len(grid_map)}")
         
         self.grid_data = grid_map
         self.metadata = metadata
         self.coords = coords
         self.prepareGeometryChange()
+        self._invalidate_render_cache()
         
         # 生成标签
-        print(f"[DEBUG] HexGridLayer.set_data: 开始生成标签，网格数量={len(grid_map)}", flush=True)
-        sys.stdout.flush()
-        self._generate_labels(metadata)
-        print(f"[DEBUG] HexGridLayer.set_data: 标签生成完成", flush=True)
-        sys.stdout.flush()
-        
-        print(f"[DEBUG] HexGridLayer.set_data: done", flush=True)
-        sys.stdout.flush()
+        with log_span(logger, 'hex_layer.labels', cells=len(grid_map)):
+            self._generate_labels(metadata)
+        logger.debug("HexGridLayer.set_data: done")
     
     def _get_hex_neighbors(self, q, r):
         """获取六边形的6个相邻坐标"""
@@ -100,205 +143,267 @@ class HexGridLayer(QGraphicsItem):
         ]
         return [(q + dq, r + dr) for dq, dr in directions]
     
-    def _find_connected_components(self, category_positions):
+    def _generate_labels(self, metadata):
+        """生成 LOD 标签 (基于 CatID 反查)"""
+        self.category_labels, self.subcategory_labels = self.compute_labels(self.grid_data, metadata)
+    
+    def compute_labels(self, grid_map, metadata):
         """
-        使用BFS找到连通域（岛屿）
-        返回: [(category, [(q, r), ...]), ...] 每个连通域及其六边形坐标列表
+        计算 LOD 标签（不修改图层状态，可在后台线程调用）
+        
+        Returns:
+            (category_labels, subcategory_labels)
+        """
+        cell_categories, subcategory_labels = self.compute_cell_labels(grid_map, metadata)
+        category_labels = self.compute_category_labels(grid_map, metadata, cell_categories)
+        return category_labels, subcategory_labels
+    
+    def _category_codes(self, metadata):
         """
-        visited = set()
-        components = []
+        元数据 CatID 的整数编码
         
-        for category, positions in category_positions.items():
-            # 为该类别建立位置集合以便快速查找
-            position_set = set(positions)
-            
-            # 对每个未访问的位置进行BFS
-            for start_pos in positions:
-                if start_pos in visited:
-                    continue
-                
-                # BFS遍历连通域
-                component = []
-                queue = [start_pos]
-                visited.add(start_pos)
-                
-                while queue:
-                    current_q, current_r = queue.pop(0)
-                    component.append((current_q, current_r))
-                    
-                    # 检查所有邻居
-                    for neighbor in self._get_hex_neighbors(current_q, current_r):
-                        if neighbor in position_set and neighbor not in visited:
-                            visited.add(neighbor)
-                            queue.append(neighbor)
-                
-                if component:
-                    components.append((category, component))
+        优先使用索引时生成的 category_codes；条数不一致（或没有）时按 metadata 对象
+        现场编码一次并缓存。
         
-        return components
+        Returns:
+            (codes, table): (N,) int16，未分类为 -1；table[code] -> CatID
+        """
+        codes = self.category_codes
+        if codes is not None and len(codes) == len(metadata):
+            return codes.catid_code, codes.catid_table
+        cached = self._category_code_cache
+        if cached is None or cached[0] is not metadata or len(cached[1]) != len(metadata):
+            cached = (metadata, build_category_codes(metadata))
+            self._category_code_cache = cached
+        return cached[1].catid_code, cached[1].catid_table
     
-    def _generate_labels(self, metadata):
-        """生成 LOD 标签 (基于 CatID 反查)"""
-        self.category_labels = []
-        self.subcategory_labels = {}
-        category_positions = {}
-        mapper = self._get_color_mapper()
+    def _cell_mode_catids(self, grid_map, metadata, cells=None):
+        """
+        每个格子的众数 CatID（整数编码上的分组计数）
         
-        total_hexes = len(self.grid_data)
-        processed = 0
+        Returns:
+            (cells, mode_codes, table)：mode_codes 与 cells 对齐，没有有效 CatID 的格子为 -1
+        """
+        cell_list, _, _, point_cell, point_indices = flatten_grid_map(grid_map, cells)
+        codes, table = self._category_codes(metadata)
+        if not cell_list:
+            return cell_list, np.zeros(0, dtype=np.int64), table
+        point_codes = np.full(len(point_indices), -1, dtype=np.int32)
+        in_range = point_indices < len(codes)
+        point_codes[in_range] = codes[point_indices[in_range]]
+        return cell_list, grouped_mode(point_cell, point_codes, len(cell_list)), table
+    
+    def compute_cell_labels(self, grid_map, metadata, cells=None):
+        """
+        逐六边形计算大类名称与子类标签（可只计算部分格子，用于增量更新）
         
-        for (q, r), indices in self.grid_data.items():
-            if not indices: continue
-            processed += 1
-            if processed % 1000 == 0:
-                print(f"[DEBUG] _generate_labels: 已处理 {processed}/{total_hexes} 个六边形...", flush=True)
-            
-            # 统计该六边形内的 CatID（现在 metadata['category'] 存储的是 CatID）
-            cat_ids = []
-            for idx in indices:
-                if idx < len(metadata):
-                    cat_id = metadata[idx].get('category', 'UNCATEGORIZED')
-                    if cat_id and cat_id != 'UNCATEGORIZED':
-                        cat_ids.append(cat_id)
+        每格众数 CatID 通过整数编码的分组计数一次求出，
+        UCSManager / 颜色查询按 CatID 去重，只对出现的每个 CatID 查一次。
+        
+        Args:
+            grid_map: (q, r) -> [indices]
+            metadata: 元数据列表
+            cells: 需要计算的格子，None 表示全部
             
-            if not cat_ids:
+        Returns:
+            (cell_categories, subcategory_labels): (q, r) -> 大类名称 / 子类标签
+        """
+        cell_categories = {}
+        subcategory_labels = {}
+        
+        cell_list, mode_codes, table = self._cell_mode_catids(grid_map, metadata, cells)
+        
+        mapper = self._get_color_mapper()
+        info_cache = {}  # code -> (cat_name, sub_name, color)
+        for (q, r), code in zip(cell_list, mode_codes.tolist()):
+            if code < 0:
                 continue
-            
-            # 找到出现最多的 CatID
-            from collections import Counter
-            mode_cat_id = Counter(cat_ids).most_common(1)[0][0]
-            
-            # 【关键】通过 UCSManager 反查信息
-            # 优先使用 get_main_category_by_id 获取主类别名称（确保是主类别，如 "AMBIENCE"）
-            cat_name = mode_cat_id  # 默认显示 CatID
-            sub_name = ""
-            color = QColor('#666666')
-            main_category = None  # 用于颜色查询的主类别名称
-            
-            if self.ucs_manager:
-                # 优先使用 get_main_category_by_id（确保是主类别名称）
-                main_category = self.ucs_manager.get_main_category_by_id(mode_cat_id)
-                if main_category != "UNCATEGORIZED":
-                    cat_name = main_category  # 使用主类别名称（如 "AMBIENCE"）
-                else:
-                    # 回退到 get_catid_info
-                    info = self.ucs_manager.get_catid_info(mode_cat_id)
-                    if info and info.get('category_name'):
-                        cat_name = info.get('category_name').upper()
-                        main_category = cat_name  # 使用 category_name 作为主类别
-                    else:
-                        # 最后回退：使用 CatID 前缀启发式
-                        if len(mode_cat_id) >= 3:
-                            cat_name = mode_cat_id[:3]  # "AMBFORST" -> "AMB"
-                        else:
-                            cat_name = mode_cat_id  # 最后回退到 CatID
-                
-                # 获取子类别信息
-                info = self.ucs_manager.get_catid_info(mode_cat_id)
-                if info:
-                    sub_name = info.get('subcategory_name', '')  # LOD1: GUN
-            
-            # 获取颜色：优先使用主类别名称，回退到 CatID
-            if mapper:
-                if main_category and main_category != "UNCATEGORIZED":
-                    color = mapper.get_color(main_category) or mapper.get_color(mode_cat_id)
-                else:
-                    color = mapper.get_color(mode_cat_id)
-                # 【修复】使用 name() 比较颜色值
-                if not color or color.name() == '#ffffff':
-                    # 如果颜色获取失败，使用哈希颜色
-                    color = self._get_color_safe(mode_cat_id)
-            
-            # LOD 0 聚类准备（按 Category Name 分组）
-            if cat_name not in category_positions:
-                category_positions[cat_name] = []
-            category_positions[cat_name].append((q, r))
-            
-            # LOD 1 标签（每个 Hex 的子类标签）
-            center = self._hex_to_pixel(q, r)
-            
-            # 确保获取子类信息：优先从已获取的 info 中提取，否则重新查询
-            if not sub_name or sub_name == "UNKNOWN":
-                if mode_cat_id and self.ucs_manager:
-                    info = self.ucs_manager.get_catid_info(mode_cat_id)
-                    if info:
-                        sub_name = info.get('subcategory_name', '')
-                        # 如果 subcategory_name 是 "UNKNOWN"，尝试从 catid_to_category 直接获取
-                        if not sub_name or sub_name == "UNKNOWN":
-                            if hasattr(self.ucs_manager, 'catid_to_category') and mode_cat_id in self.ucs_manager.catid_to_category:
-                                cat_obj = self.ucs_manager.catid_to_category[mode_cat_id]
-                                if cat_obj and cat_obj.subcategory:
-                                    sub_name = cat_obj.subcategory.strip().upper()
-            
-            # 过滤掉 "UNKNOWN" 和空字符串，只显示有效的子类名称
-            if sub_name and sub_name != "UNKNOWN" and sub_name.strip() and len(sub_name) > 0:
-                self.subcategory_labels[(q, r)] = {
+            info = info_cache.get(code)
+            if info is None:
+                info = self._catid_label_info(table[code], mapper)
+                info_cache[code] = info
+            cat_name, sub_name, color = info
+            cell_categories[(q, r)] = cat_name
+            if sub_name:
+                subcategory_labels[(q, r)] = {
                     'text': sub_name,
-                    'pos': center,
+                    'pos': self._hex_to_pixel(q, r),
                     'color': color
                 }
+        
+        return cell_categories, subcategory_labels
+    
+    def patch_cell_labels(self, grid_map, metadata, cell_categories, subcategory_labels, affected_cells):
+        """
+        只重算受影响格子的标签，返回新的字典（不修改传入的字典）
+        
+        Returns:
+            (cell_categories, subcategory_labels)
+        """
+        cell_categories = dict(cell_categories) if cell_categories else {}
+        subcategory_labels = dict(subcategory_labels) if subcategory_labels else {}
+        for cell in affected_cells:
+            cell_categories.pop(cell, None)
+            subcategory_labels.pop(cell, None)
+        patched_categories, patched_labels = self.compute_cell_labels(grid_map, metadata, list(affected_cells))
+        cell_categories.update(patched_categories)
+        subcategory_labels.update(patched_labels)
+        return cell_categories, subcategory_labels
+    
+    def _catid_label_info(self, mode_cat_id, mapper):
+        """
+        单个 CatID 的标签信息（大类名称、子类名称、颜色）
+        
+        Returns:
+            (cat_name, sub_name, color)；没有有效子类名称时 sub_name 为 None
+        """
+        # 【关键】通过 UCSManager 反查信息
+        # 优先使用 get_main_category_by_id 获取主类别名称（确保是主类别，如 "AMBIENCE"）
+        cat_name = mode_cat_id  # 默认显示 CatID
+        sub_name = ""
+        color = QColor('#666666')
+        main_category = None  # 用于颜色查询的主类别名称
+        
+        if self.ucs_manager:
+            # 优先使用 get_main_category_by_id（确保是主类别名称）
+            main_category = self.ucs_manager.get_main_category_by_id(mode_cat_id)
+            if main_category != "UNCATEGORIZED":
+                cat_name = main_category  # 使用主类别名称（如 "AMBIENCE"）
+            else:
+                # 回退到 get_catid_info
+                info = self.ucs_manager.get_catid_info(mode_cat_id)
+                if info and info.get('category_name'):
+                    cat_name = info.get('category_name').upper()
+                    main_category = cat_name  # 使用 category_name 作为主类别
+                else:
+                    # 最后回退：使用 CatID 前缀启发式
+                    if len(mode_cat_id) >= 3:
+                        cat_name = mode_cat_id[:3]  # "AMBFORST" -> "AMB"
+                    else:
+                        cat_name = mode_cat_id  # 最后回退到 CatID
+            
+            # 获取子类别信息
+            info = self.ucs_manager.get_catid_info(mode_cat_id)
+            if info:
+                sub_name = info.get('subcategory_name', '')  # LOD1: GUN
+                # 如果 subcategory_name 是 "UNKNOWN"，尝试从 catid_to_category 直接获取
+                if not sub_name or sub_name == "UNKNOWN":
+                    if hasattr(self.ucs_manager, 'catid_to_category') and mode_cat_id in self.ucs_manager.catid_to_category:
+                        cat_obj = self.ucs_manager.catid_to_category[mode_cat_id]
+                        if cat_obj and cat_obj.subcategory:
+                            sub_name = cat_obj.subcategory.strip().upper()
+        
+        # 获取颜色：优先使用主类别名称，回退到 CatID
+        if mapper:
+            if main_category and main_category != "UNCATEGORIZED":
+                color = mapper.get_color(main_category) or mapper.get_color(mode_cat_id)
+            else:
+                color = mapper.get_color(mode_cat_id)
+            # 【修复】使用 name() 比较颜色值
+            if not color or color.name() == '#ffffff':
+                # 如果颜色获取失败，使用哈希颜色
+                color = self._get_color_safe(mode_cat_id)
+        
+        # 过滤掉 "UNKNOWN" 和空字符串，只显示有效的子类名称
+        if not sub_name or sub_name == "UNKNOWN" or not sub_name.strip():
+            sub_name = None
+        return cat_name, sub_name, color
+    
+    def _catid_region_color(self, cid, mapper):
+        """大类标签（片区）的代表颜色：优先使用主类别名称查询"""
+        if not mapper:
+            return QColor('#666666')  # 默认灰色，不使用白色
+        if self.ucs_manager:
+            main_cat = self.ucs_manager.get_main_category_by_id(cid)
+            if main_cat != "UNCATEGORIZED":
+                c = mapper.get_color(main_cat) or mapper.get_color(cid)
+            else:
+                c = mapper.get_color(cid)
+        else:
+            c = mapper.get_color(cid)
+        # 【修复】使用 name() 比较颜色值
+        if c and c.name() != '#ffffff':
+            return c
+        # 如果颜色获取失败，使用哈希颜色
+        return self._get_color_safe(cid)
 
+    def compute_category_labels(self, grid_map, metadata, cell_categories):
+        """
+        基于逐格大类名称计算 LOD0 大类标签（连通域）
+        
+        连通域由整数格子序号上的并查集求出，中心和面积由分组求和得到。
+        
+        Returns:
+            category_labels 列表
+        """
+        category_labels = []
+        if not cell_categories:
+            return category_labels
+        mapper = self._get_color_mapper()
+        
+        # LOD 0 聚类准备（按 Category Name 编码为整数）
+        cells = list(cell_categories.keys())
+        names, name_codes = np.unique(
+            np.array(list(cell_categories.values()), dtype=object).astype(str),
+            return_inverse=True
+        )
+        cell_qr = np.array(cells, dtype=np.int64).reshape(-1, 2)
+        
         # 生成大类标签（连通域）
-        print(f"[DEBUG] _generate_labels: 开始查找连通域，类别数量={len(category_positions)}", flush=True)
-        if category_positions:
-            components = self._find_connected_components(category_positions)
-            print(f"[DEBUG] _generate_labels: 连通域查找完成，共 {len(components)} 个连通域", flush=True)
-            # 过滤小岛屿：只显示较大的连通域（片区），像地图那样一个片区一个标签
-            # 阈值 >= 5 确保只显示较大的片区，而不是每个蜂窝都显示标签
-            large_components = [c for c in components if len(c[1]) >= 5]
-            print(f"[DEBUG] _generate_labels: 过滤后剩余 {len(large_components)} 个标签区域（阈值 >= 5）", flush=True)
+        roots = connected_components(cell_qr[:, 0], cell_qr[:, 1], name_codes)
+        _, component, sizes = np.unique(roots, return_inverse=True, return_counts=True)
+        n_components = len(sizes)
+        sum_q = np.bincount(component, weights=cell_qr[:, 0], minlength=n_components)
+        sum_r = np.bincount(component, weights=cell_qr[:, 1], minlength=n_components)
+        # 每个连通域的第一个格子（按 cell_categories 顺序）用于取代表颜色
+        first_cell = np.full(n_components, len(cells), dtype=np.int64)
+        np.minimum.at(first_cell, component, np.arange(len(cells), dtype=np.int64))
+        
+        # 过滤小岛屿：只显示较大的连通域（片区），像地图那样一个片区一个标签
+        # 阈值 >= 5 确保只显示较大的片区，而不是每个蜂窝都显示标签
+        large = np.flatnonzero(sizes >= 5)
+        logger.debug(f"_generate_labels: 共 {n_components} 个连通域，{len(large)} 个标签区域（阈值 >= 5）")
+        
+        color_cache = {}  # CatID -> QColor
+        for k in large.tolist():
+            area = int(sizes[k])
+            sample_cell = first_cell[k]
+            category = names[name_codes[sample_cell]]
+            # 计算几何中心
+            center = self._hex_to_pixel(sum_q[k] / area, sum_r[k] / area)
+        
+            # 获取颜色：从该组中找个代表颜色
+            color = QColor('#666666')
+            indices = grid_map.get(cells[sample_cell])
+            if mapper and indices and indices[0] < len(metadata):
+                cid = metadata[indices[0]].get('category', '')
+                color = color_cache.get(cid)
+                if color is None:
+                    color = self._catid_region_color(cid, mapper)
+                    color_cache[cid] = color
+            
+            # 动态字体大小：大幅增加基准大小
+            # 原始逻辑太小，针对高分屏和全局概览需要更大
+            if area < 3:
+                font_size = 12  # 原 8 -> 12
+            elif area < 10:
+                font_size = 16  # 原 10 -> 16
+            else:
+                font_size = 24  # 原 14 -> 24
             
-            for category, coords in large_components:
-                # 计算几何中心
-                avg_q = sum(c[0] for c in coords) / len(coords)
-                avg_r = sum(c[1] for c in coords) / len(coords)
-                center = self._hex_to_pixel(avg_q, avg_r)
-        
-                # 获取颜色：优先使用主类别名称查询
-                color = QColor('#666666')  # 默认灰色，不使用白色
-                if mapper:
-                    # 尝试从该组中找个代表颜色
-                    sample_hex = coords[0]
-                    if sample_hex in self.grid_data:
-                        idx = self.grid_data[sample_hex][0]
-                        if idx < len(metadata):
-                            cid = metadata[idx].get('category', '')
-                            # 优先使用主类别名称查询颜色
-                            if self.ucs_manager:
-                                main_cat = self.ucs_manager.get_main_category_by_id(cid)
-                                if main_cat != "UNCATEGORIZED":
-                                    c = mapper.get_color(main_cat) or mapper.get_color(cid)
-                                else:
-                                    c = mapper.get_color(cid)
-                            else:
-                                c = mapper.get_color(cid)
-                            # 【修复】使用 name() 比较颜色值
-                            if c and c.name() != '#ffffff':
-                                color = c
-                            else:
-                                # 如果颜色获取失败，使用哈希颜色
-                                color = self._get_color_safe(cid)
-                
-                # 动态字体大小：大幅增加基准大小
-                # 原始逻辑太小，针对高分屏和全局概览需要更大
-                if len(coords) < 3:
-                    font_size = 12  # 原 8 -> 12
-                elif len(coords) < 10:
-                    font_size = 16  # 原 10 -> 16
-                else:
-                    font_size = 24  # 原 14 -> 24
-                
-                # 颜色策略：与 Hex 统一，但为了可读性，大幅提亮
-                # 这样既有"统一感"，又能看清
-                text_color = color.lighter(180)  # 提亮 80%
-                
-                self.category_labels.append({
-                    'text': category,  # 显示 Category Name (如 WEAPONS)
-                    'pos': center,
-                    'color': text_color,  # 存入提亮后的颜色
-                    'area': len(coords),
-                    'font_size': font_size
-                })
+            # 颜色策略：与 Hex 统一，但为了可读性，大幅提亮
+            # 这样既有"统一感"，又能看清
+            text_color = color.lighter(180)  # 提亮 80%
+            
+            category_labels.append({
+                'text': category,  # 显示 Category Name (如 WEAPONS)
+                'pos': center,
+                'color': text_color,  # 存入提亮后的颜色
+                'area': area,
+                'font_size': font_size
+            })
+        
+        return category_labels
     
     def _get_color_safe(self, key_str):
         """
@@ -333,108 +438,273 @@ class HexGridLayer(QGraphicsItem):
         # 给定一个超大范围，确保不被错误裁剪
         return QRectF(-100000, -100000, 200000, 200000)
 
+    @perf.timed('render.hex_paint', 'render')
     def paint(self, painter, option, widget):
         """修复的核心绘制逻辑"""
         clip_rect = option.exposedRect
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # 严格网格参数（Phase 3.5：保留 2px 物理间隙）
-        gap_ratio = 0.95  # 确保 2px 物理间隙，形成"地砖"分离感
         lod = self.current_lod
-        
-        mapper = self._get_color_mapper()
+        batches_drawn = 0
+        hexes_drawn = 0
         
         # 1. 绘制六边形 (Strict Grid Mode)
-        for (q, r), indices in self.grid_data.items():
-            if not indices:
-                continue
-                
-            # 【关键修复】不再使用数据重心，而是使用严格的网格中心
-            center = self._hex_to_pixel(q, r)
-                
-            # 视锥剔除
-            hex_size = self.hex_size
-            if not clip_rect.intersects(QRectF(center.x() - hex_size, center.y() - hex_size, hex_size*2, hex_size*2)):
+        # 按 (颜色, 空间分块) 批量绘制：每块一次 drawPath，视野外的分块整体跳过
+        for color, path, _tile in self._get_color_batches():
+            # 视锥剔除（以分块为单位，分块包围盒紧凑）
+            if not clip_rect.intersects(path.boundingRect()):
                 continue
-                
-            # 颜色逻辑修正：强制统一颜色
-            color = QColor('#333333')  # 默认深灰
-            if len(indices) > 0:
-                # 获取众数 CatID
-                cat_ids = []
-                for idx in indices:
-                    if idx < len(self.metadata):
-                        cat_id = self.metadata[idx].get('category', 'UNCATEGORIZED')
-                        if cat_id and cat_id != 'UNCATEGORIZED': 
-                            cat_ids.append(cat_id)
-                
-                if cat_ids:
-                    from collections import Counter
-                    mode_cat_id = Counter(cat_ids).most_common(1)[0][0]
-                    
-                    # 使用安全的颜色获取方法，确保总是返回有效颜色
-                    color = self._get_color_safe(mode_cat_id)
-                    
-                    # [Critical Fix] 
-                    # 无论 LOD 如何，首先尝试获取 "Main Category" 的颜色
-                    # 确保 LOD1 和 LOD0 视觉统一
-                    mapper = self._get_color_mapper()
-                    if mapper and self.ucs_manager:
-                        main_cat = self.ucs_manager.get_main_category_by_id(mode_cat_id)
-                        # 如果找到了主分类 (e.g., "WEAPONS")，优先用主分类取色
-                        if main_cat and main_cat != "UNCATEGORIZED":
-                            main_color = mapper.get_color(main_cat)
-                            # 【修复】使用 name() 比较颜色值，而不是对象引用
-                            if main_color and main_color.name() != '#333333':
-                                color = main_color
-                else:
-                    # 如果没有有效的 cat_ids，使用默认灰色（这是合理的）
-                    pass
-            
-            # 绘制单个六边形
-            self._draw_single_hex(painter, center, len(indices), gap_ratio, color, lod)
+            pen, brush = self._get_pen_brush(color, lod)
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            painter.drawPath(path)
+            batches_drawn += 1
+            hexes_drawn += path.elementCount() // HEX_PATH_ELEMENTS
 
         # 2. 绘制标签
+        labels_drawn = 0
         if lod == 0 and self.show_category_labels:
-            self._draw_category_labels(painter, clip_rect)
+            labels_drawn = self._draw_category_labels(painter, clip_rect)
         elif lod == 1 and self.show_subcategory_labels:
-            self._draw_subcategory_labels(painter, clip_rect)
+            labels_drawn = self._draw_subcategory_labels(painter, clip_rect)
+        
+        # hexes 为提交绘制的六边形数（按分块剔除，块内由 Qt 裁剪）
+        self.last_paint_stats = {'batches': batches_drawn, 'hexes': hexes_drawn, 'labels': labels_drawn}
     
-    def _draw_single_hex(self, painter, center, density, gap_ratio, color, lod):
-        """
-        Phase 3.5 修复：蜂窝地形风格
-        - LOD 0/1: 独立六边形，填充 20% 透明度，描边 100% 透明度，1px 宽度
-        - 保留 2px 物理间隙（gap_ratio = 0.95）
+    def _invalidate_render_cache(self):
+        """数据变化时清空颜色与路径缓存（模板和 Pen/Brush 与数据无关，保留）"""
+        self._hex_colors = {}
+        self._color_batches = None
+    
+    def _get_hex_template(self, gap_ratio=HEX_GAP_RATIO):
         """
-        # 保留间隙：使用 0.95 缩放，确保 2px 物理间隙
-        size = self.hex_size * gap_ratio
+        获取以原点为中心的六边形模板
         
-        hex_poly = QPolygonF()
-        for i in range(6):
-            angle = math.pi / 3 * i
-            x = center.x() + size * math.cos(angle)
-            y = center.y() + size * math.sin(angle)
-            hex_poly.append(QPointF(x, y))
+        hex_size 和 gap_ratio 不变时只计算一次三角函数，绘制时平移即可
+        """
+        key = (self.hex_size, gap_ratio)
+        if self._hex_template is None or self._hex_template_key != key:
+            size = self.hex_size * gap_ratio
+            template = QPolygonF()
+            for i in range(6):
+                angle = math.pi / 3 * i
+                template.append(QPointF(size * math.cos(angle), size * math.sin(angle)))
+            self._hex_template = template
+            self._hex_template_key = key
+        return self._hex_template
+    
+    def _get_pen_brush(self, color, lod):
+        """
+        Phase 3.5 蜂窝地形风格的 Pen/Brush（按 (颜色, LOD) 缓存）
+        - LOD 0/1: 填充 20% 透明度，描边 100% 透明度，1px 宽度
+        - LOD 2: 极淡背景，细边框
+        """
+        style_lod = 0 if lod in (0, 1) else 2
+        key = (color.rgba(), style_lod)
+        cached = self._pen_brush_cache.get(key)
+        if cached is not None:
+            return cached
         
         fill_color = QColor(color)
         stroke_color = QColor(color)
-        
-        if lod == 0 or lod == 1:
-            # LOD 0/1: 蜂窝地形风格（晶莹剔透的六边形）
-            # 填充：UCS 颜色，透明度 20% (alpha ≈ 50)
+        if style_lod == 0:
             fill_color.setAlpha(50)  # 20% 透明度
-            # 描边：UCS 颜色，透明度 100%，宽度 1px
             stroke_color.setAlpha(255)  # 100% 不透明
-            painter.setPen(QPen(stroke_color, 1.0))
-            painter.setBrush(QBrush(fill_color))
+            pen = QPen(stroke_color, 1.0)
         else:
-            # LOD 2: 极淡背景，细边框
             fill_color.setAlpha(20)  # 更淡
             stroke_color.setAlpha(60)
-            painter.setPen(QPen(stroke_color, 0.5))
-            painter.setBrush(QBrush(fill_color))
+            pen = QPen(stroke_color, 0.5)
+        
+        cached = (pen, QBrush(fill_color))
+        self._pen_brush_cache[key] = cached
+        return cached
+    
+    def compute_hex_colors(self, grid_map, metadata, cells=None):
+        """
+        计算六边形颜色（众数 CatID → 主类别颜色），没有有效 CatID 的格子为深灰
+        
+        众数通过整数编码一次求出，颜色按 CatID 去重查询。
+        
+        Returns:
+            (q, r) -> QColor
+        """
+        cell_list, mode_codes, table = self._cell_mode_catids(grid_map, metadata, cells)
+        if not cell_list:
+            return {}
+        
+        # 查找表一次取色（没有有效 CatID 的格子编码为 -1，对应末行默认灰色），
+        # 再按 ARGB 去重，每种颜色只创建一个 QColor
+        argb = rgba_to_argb32(self._hex_color_lut(table)[mode_codes])
+        unique_argb, inverse = np.unique(argb, return_inverse=True)
+        colors = [QColor.fromRgba(int(value)) for value in unique_argb.tolist()]
+        return {cell: colors[i] for cell, i in zip(cell_list, inverse.ravel().tolist())}
+    
+    def _hex_color_lut(self, table):
+        """
+        CatID 编码 -> 六边形颜色的 RGBA 查找表（按查找表对象缓存）
+        
+        Returns:
+            (len(table) + 1, 4) uint8，末行为默认灰色
+        """
+        cached = self._hex_color_lut_cache
+        if cached is not None and cached[0] is table and len(cached[1]) == len(table) + 1:
+            return cached[1]
+        lut = build_rgba_lut([self._catid_hex_color(cat_id) for cat_id in table])
+        self._hex_color_lut_cache = (table, lut)
+        return lut
+    
+    def _catid_hex_color(self, mode_cat_id):
+        """单个 CatID 的六边形颜色"""
+        # 使用安全的颜色获取方法，确保总是返回有效颜色
+        color = self._get_color_safe(mode_cat_id)
+        
+        # [Critical Fix] 
+        # 无论 LOD 如何，首先尝试获取 "Main Category" 的颜色
+        # 确保 LOD1 和 LOD0 视觉统一
+        mapper = self._get_color_mapper()
+        if mapper and self.ucs_manager:
+            main_cat = self.ucs_manager.get_main_category_by_id(mode_cat_id)
+            # 如果找到了主分类 (e.g., "WEAPONS")，优先用主分类取色
+            if main_cat and main_cat != "UNCATEGORIZED":
+                main_color = mapper.get_color(main_cat)
+                # 【修复】使用 name() 比较颜色值，而不是对象引用
+                if main_color and main_color.name() != '#333333':
+                    color = main_color
+        return color
+    
+    def _get_color_batches(self):
+        """
+        按 (颜色, 空间分块) 分组的六边形路径（惰性构建，数据不变时复用）
         
-        painter.drawPolygon(hex_poly)
+        Returns:
+            [(QColor, QPainterPath, tile), ...]
+        """
+        if self._color_batches is None:
+            self._hex_colors, self._color_batches = self.build_color_batches(
+                self.grid_data, self.metadata, self._hex_colors
+            )
+        return self._color_batches
+    
+    def _tile_of(self, center):
+        """六边形中心所在的空间分块 (tx, ty)"""
+        tile_px = self.hex_size * 1.5 * HEX_TILE_CELLS
+        return (int(center.x() // tile_px), int(center.y() // tile_px))
+    
+    def _add_to_batch(self, paths, color, center, template):
+        """把一个六边形追加到 (颜色, 分块) 对应的路径"""
+        tile = self._tile_of(center)
+        entry = paths.get((color.rgba(), tile))
+        if entry is None:
+            entry = (color, QPainterPath(), tile)
+            paths[(color.rgba(), tile)] = entry
+        entry[1].addPolygon(template.translated(center))
+        entry[1].closeSubpath()
+    
+    def build_color_batches(self, grid_map, metadata, hex_colors=None):
+        """
+        计算每个六边形的颜色并按 (颜色, 空间分块) 分组构建路径（不修改图层状态，可在后台线程调用）
+        
+        Args:
+            grid_map: (q, r) -> [indices]
+            metadata: 元数据列表
+            hex_colors: 已知的 (q, r) -> QColor，命中时跳过颜色计算
+            
+        Returns:
+            (hex_colors, [(QColor, QPainterPath, tile), ...])
+        """
+        hex_colors = dict(hex_colors) if hex_colors else {}
+        missing = [cell for cell, indices in grid_map.items() if indices and cell not in hex_colors]
+        if missing:
+            hex_colors.update(self.compute_hex_colors(grid_map, metadata, missing))
+        
+        template = self._get_hex_template()
+        paths = {}  # (rgba, tile) -> (QColor, QPainterPath, tile)
+        for (q, r), indices in grid_map.items():
+            if not indices:
+                continue
+            # 【关键修复】不再使用数据重心，而是使用严格的网格中心
+            self._add_to_batch(paths, hex_colors[(q, r)], self._hex_to_pixel(q, r), template)
+        
+        return hex_colors, list(paths.values())
+    
+    def patch_color_batches(self, grid_map, metadata, hex_colors, color_batches, affected_cells):
+        """
+        增量更新颜色路径：只重算受影响格子的颜色，只重建受影响的 (颜色, 分块) 路径
+        
+        Args:
+            affected_cells: 点数发生变化的格子 (q, r) 集合
+            
+        Returns:
+            (hex_colors, [(QColor, QPainterPath, tile), ...])，均为新对象
+        """
+        hex_colors = dict(hex_colors) if hex_colors else {}
+        dirty = set()  # 需要重建路径的 (rgba, tile)
+        for cell in affected_cells:
+            old_color = hex_colors.pop(cell, None)
+            if old_color is not None:
+                dirty.add((old_color.rgba(), self._tile_of(self._hex_to_pixel(*cell))))
+        patched = self.compute_hex_colors(grid_map, metadata, list(affected_cells))
+        for cell, color in patched.items():
+            dirty.add((color.rgba(), self._tile_of(self._hex_to_pixel(*cell))))
+        hex_colors.update(patched)
+        
+        if not dirty:
+            return hex_colors, list(color_batches)
+        
+        template = self._get_hex_template()
+        paths = {}  # (rgba, tile) -> (QColor, QPainterPath, tile)
+        for (q, r), color in hex_colors.items():
+            center = self._hex_to_pixel(q, r)
+            tile = self._tile_of(center)
+            if (color.rgba(), tile) not in dirty:
+                continue
+            self._add_to_batch(paths, color, center, template)
+        
+        kept = [batch for batch in color_batches if (batch[0].rgba(), batch[2]) not in dirty]
+        return hex_colors, kept + list(paths.values())
+    
+    def build_density_batches(self, grid_map):
+        """
+        预览用的密度分组路径：不查询类别颜色，只按数据量分 4 档灰度
+        
+        Returns:
+            [(QColor, QPainterPath, tile), ...]
+        """
+        template = self._get_hex_template()
+        level_colors = [QColor(color) for color in PREVIEW_DENSITY_COLORS]
+        paths = {}  # (rgba, tile) -> (QColor, QPainterPath, tile)
+        for (q, r), indices in grid_map.items():
+            if not indices:
+                continue
+            # 对数分档：1 / 2-7 / 8-63 / 64+
+            count = len(indices)
+            if count >= 64:
+                level = 3
+            elif count >= 8:
+                level = 2
+            elif count >= 2:
+                level = 1
+            else:
+                level = 0
+            self._add_to_batch(paths, level_colors[level], self._hex_to_pixel(q, r), template)
+        return list(paths.values())
+    
+    def apply_snapshot(self, snapshot):
+        """
+        原子替换图层数据（SceneSnapshot 由后台线程构建）
+        
+        预览快照只包含网格与密度路径，标签为空
+        """
+        self.prepareGeometryChange()
+        self.grid_data = snapshot.grid_map
+        self.metadata = snapshot.metadata
+        self.coords = snapshot.norm_coords
+        self._hex_colors = snapshot.hex_colors or {}
+        self._color_batches = snapshot.color_batches
+        self.category_labels = snapshot.category_labels or []
+        self.subcategory_labels = snapshot.subcategory_labels or {}
+        self.update()
     
     def _hex_to_pixel(self, q, r):
         size = self.hex_size
@@ -446,6 +716,8 @@ class HexGridLayer(QGraphicsItem):
         """
         碰撞剔除：按面积从大到小排序，依次放置标签，如果重叠则丢弃
         
+        重叠测试使用均匀空间哈希，每个标签只与邻近桶内的已放置标签比较。
+        
         Args:
             candidate_labels: 候选标签列表，每个元素包含 'text', 'pos', 'color', 'area'
             
@@ -458,48 +730,36 @@ class HexGridLayer(QGraphicsItem):
         # 按面积从大到小排序（已经在外部排序，这里确保）
         candidate_labels.sort(key=lambda x: x.get('area', 0), reverse=True)
         
-        placed_labels = []
-        placed_rects = []  # 存储已放置标签的 BoundingBox
-        
-        for label in candidate_labels:
-            text = label['text']
-            pos = label['pos']
-            
-            # 估算标签的 BoundingBox（基于文本长度和字号）
-            # 使用 hex_size * 0.8 作为基础字号
-            base_font_size = self.hex_size * 0.8
-            zoom_factor = max(0.3, self.current_zoom)
-            font_size = int(base_font_size / pow(zoom_factor, 0.5))
-        
-            # 估算文本宽度和高度（粗略估算：每个字符宽度约为 font_size * 0.6）
-            text_width = len(text) * font_size * 0.6
-            text_height = font_size * 1.2
-            
-            # 添加边距
-            margin = 10
-            label_rect = QRectF(
-                pos.x() - text_width / 2 - margin,
-                pos.y() - text_height / 2 - margin,
-                text_width + margin * 2,
-                text_height + margin * 2
-            )
-                    
-            # 检查是否与已放置的标签重叠
-            overlaps = False
-            for placed_rect in placed_rects:
-                if label_rect.intersects(placed_rect):
-                    overlaps = True
-                    break
-            
-            # 如果不重叠，添加到已放置列表
-            if not overlaps:
-                placed_labels.append(label)
-                placed_rects.append(label_rect)
-        
-        return placed_labels
+        # 估算标签的 BoundingBox（基于文本长度和字号）
+        # 使用 hex_size * 0.8 作为基础字号
+        base_font_size = self.hex_size * 0.8
+        zoom_factor = max(0.3, self.current_zoom)
+        font_size = int(base_font_size / pow(zoom_factor, 0.5))
+        margin = 10
+        
+        # 估算文本宽度和高度（粗略估算：每个字符宽度约为 font_size * 0.6）
+        rects = self._label_rects(candidate_labels, font_size, margin)
+        kept = cull_overlapping_rects(rects)
+        return [label for label, keep in zip(candidate_labels, kept.tolist()) if keep]
+    
+    @staticmethod
+    def _label_rects(labels, font_size, margin):
+        """估算标签矩形 (K, 4) = (x0, y0, x1, y1)，文本宽度按每字符 font_size * 0.6 计"""
+        count = len(labels)
+        pos = np.fromiter(
+            (v for label in labels for v in (label['pos'].x(), label['pos'].y())),
+            dtype=np.float64, count=count * 2
+        ).reshape(count, 2)
+        text_len = np.fromiter((len(label['text']) for label in labels), dtype=np.float64, count=count)
+        half_w = text_len * font_size * 0.6 / 2 + margin
+        half_h = font_size * 1.2 / 2 + margin
+        return np.column_stack([
+            pos[:, 0] - half_w, pos[:, 1] - half_h,
+            pos[:, 0] + half_w, pos[:, 1] + half_h
+        ])
     
     def _draw_category_labels(self, painter, clip_rect):
-        """修复：使用 label 中的 color，智能选择文字颜色确保可读性"""
+        """修复：使用 label 中的 color，智能选择文字颜色确保可读性，返回绘制的标签数"""
         # 调整基础字号计算，避免缩放时字太小
         base_size = self.hex_size * 2.0  # 增大基数
         zoom = max(0.1, self.current_zoom)
@@ -509,6 +769,7 @@ class HexGridLayer(QGraphicsItem):
         font.setLetterSpacing(QFont.SpacingType.AbsoluteSpacing, 2)
         painter.setFont(font)
         
+        drawn = 0
         for label in self.category_labels:
             if not clip_rect.contains(label['pos']):
                     continue
@@ -537,10 +798,12 @@ class HexGridLayer(QGraphicsItem):
             # 或者保留描边但调细
             painter.setPen(text_color)
             painter.drawText(int(x), int(y), text)
+            drawn += 1
+        return drawn
     
     def _greedy_grid_culling(self, label_items):
         """
-        Greedy Grid 避让算法：将屏幕划分为虚拟网格，按优先级放置标签
+        Greedy Grid 避让算法：按优先级放置标签，与已放置标签重叠的丢弃
         
         Args:
             label_items: 标签项列表，每个元素包含 (q, r), label_data, 数据量
@@ -554,57 +817,23 @@ class HexGridLayer(QGraphicsItem):
         # 按数据量从大到小排序（优先级）
         label_items.sort(key=lambda x: x[2], reverse=True)
         
-        # 虚拟网格大小（可根据屏幕分辨率调整）
-        grid_width = 100
-        grid_height = 50
-        
-        # 使用字典存储已占用的网格位置（O(1)查找）
-        occupied_grids = set()
-        
-        filtered_items = []
-        
-        for (q, r), label_data, data_count in label_items:
-            pos = label_data['pos']
-            
-            # 计算标签占据的网格位置
-            grid_x = int(pos.x() / grid_width)
-            grid_y = int(pos.y() / grid_height)
-            
-            # 估算标签占据的网格范围（考虑文本大小）
-            font_size = int(self.hex_size * 0.6)
-            text_width = len(label_data['text']) * font_size * 0.6
-            text_height = font_size * 1.2
-            margin = 5
-            
-            grid_span_x = max(1, int((text_width + margin * 2) / grid_width) + 1)
-            grid_span_y = max(1, int((text_height + margin * 2) / grid_height) + 1)
-            
-            # 检查该标签占据的所有网格是否已被占用
-            overlaps = False
-            for dx in range(grid_span_x):
-                for dy in range(grid_span_y):
-                    grid_key = (grid_x + dx, grid_y + dy)
-                    if grid_key in occupied_grids:
-                        overlaps = True
-                        break
-                if overlaps:
-                    break
-            
-            # 如果不重叠，添加到已占用网格并保留标签
-            if not overlaps:
-                for dx in range(grid_span_x):
-                    for dy in range(grid_span_y):
-                        occupied_grids.add((grid_x + dx, grid_y + dy))
-                filtered_items.append(((q, r), label_data))
-        
-        return filtered_items
+        # 估算标签占据的范围（考虑文本大小），空间哈希桶取虚拟网格宽度 100
+        font_size = int(self.hex_size * 0.6)
+        rects = self._label_rects([label_data for _, label_data, _ in label_items], font_size, 5)
+        kept = cull_overlapping_rects(rects, bucket_size=100)
+        return [
+            ((q, r), label_data)
+            for ((q, r), label_data, _), keep in zip(label_items, kept.tolist())
+            if keep
+        ]
     
     def _draw_subcategory_labels(self, painter, clip_rect):
-        """修复：使用 label_data 中的 color，智能选择文字颜色确保可读性"""
+        """修复：使用 label_data 中的 color，智能选择文字颜色确保可读性，返回绘制的标签数"""
         base_size = self.hex_size * 0.5
         font = QFont("Segoe UI", int(base_size), QFont.Weight.DemiBold)
         painter.setFont(font)
         
+        drawn = 0
         for (q, r), label_data in self.subcategory_labels.items():
             pos = label_data['pos']
             if not clip_rect.contains(pos):
@@ -641,6 +870,8 @@ class HexGridLayer(QGraphicsItem):
             # 2. 绘制主体文字（使用智能选择的颜色）
             painter.setPen(text_color)
             painter.drawText(int(x), int(y), text)
+            drawn += 1
+        return drawn
         
     def update_lod(self, zoom):
         self.current_zoom = zoom
@@ -665,35 +896,54 @@ class DetailScatterLayer(QGraphicsItem):
     def __init__(self):
         super().__init__()
         self.points = None # (N, 2) numpy array
-        self.colors = None # (N, 3) or (N, 4)
+        self.colors = None # (N, 4) uint8 RGBA
+        self._point_argb = []  # 与 colors 对齐的 ARGB 整数
         self.visible = False
         self.hex_size = 50
         self.hex_grid_data = None  # 存储 hex_grid_data 用于动态采样
+        self.last_paint_stats = {}  # 最近一次 paint 的绘制量（渲染基准 / 性能 HUD 读取）
     
-    def set_data(self, coords, metadata, hex_grid_data=None):
+    def set_data(self, coords, metadata, hex_grid_data=None, colors=None, category_codes=None):
         """
         Phase 3.5: 存储原始数据，在 paint 时进行动态对数密度采样
+        
+        Args:
+            colors: 预计算的 (N, 4) uint8 RGBA（后台构建场景时传入），为 None 时现场计算
+            category_codes: 索引时生成的 CategoryCodes（现场计算颜色时使用）
         """
         self.points = coords
         self.metadata = metadata
         self.hex_grid_data = hex_grid_data  # 保存用于动态采样
         
         # 预计算颜色 (提升渲染性能)
-        self.colors = []
-        try:
-            mapper = CategoryColorMapper()
-        except:
-            mapper = None
-            
-        # 批量生成颜色列表
-        for meta in metadata:
-            if mapper:
-                # 现在 metadata['category'] 存储的是 CatID
-                c = mapper.get_color(meta.get('category', ''))
-                # 存为 RGBA tuple
-                self.colors.append((c.red(), c.green(), c.blue(), 180))
-            else:
-                self.colors.append((200, 200, 200, 150))
+        if colors is None:
+            colors = self.compute_point_colors(metadata, category_codes)
+        if colors is not self.colors:
+            # paint 时直接用 QColor.fromRgba，不再逐点拆分 RGBA（增量更新沿用同一颜色数组时不重算）
+            self._point_argb = rgba_to_argb32(colors).tolist()
+        self.colors = colors
+        self.update()
+    
+    @staticmethod
+    def compute_point_colors(metadata, category_codes=None):
+        """
+        批量生成每个点的颜色（不依赖图层状态，可在后台线程调用）
+        
+        按 CatID 编码查表一次取色：颜色只对查找表中的每个 CatID 计算一次。
+        
+        Returns:
+            (N, 4) uint8 RGBA
+        """
+        n = len(metadata)
+        mapper = HexGridLayer._get_color_mapper()
+        if mapper is None:
+            return np.tile(np.array([200, 200, 200, 150], dtype=np.uint8), (n, 1))
+        
+        # 现在 metadata['category'] 存储的是 CatID
+        if category_codes is None or len(category_codes) != n:
+            category_codes = build_category_codes(metadata)
+        lut = mapper.build_color_lut(category_codes.catid_table, alpha=180)
+        return lut[category_codes.catid_code]
     
     def _calculate_visible_points(self, total_count):
         """
@@ -733,12 +983,14 @@ class DetailScatterLayer(QGraphicsItem):
     def boundingRect(self):
         return QRectF(-100000, -100000, 200000, 200000)
         
+    @perf.timed('render.scatter_paint', 'render')
     def paint(self, painter, option, widget):
         """
         Phase 3.5: 动态对数密度采样渲染
         - 根据每个六边形的数据量动态决定显示点数
         - 300条数据显示明显多于5条数据
         """
+        self.last_paint_stats = {'hexes': 0, 'points': 0}
         if not self.visible or self.points is None or self.hex_grid_data is None:
             return
         
@@ -754,6 +1006,7 @@ class DetailScatterLayer(QGraphicsItem):
         
         # Phase 3.5: 按六边形进行动态密度采样
         rendered_count = 0
+        hexes_visited = 0
         max_total_points = 5000  # 全局限制，防止卡死
         
         for (q, r), indices in self.hex_grid_data.items():
@@ -775,6 +1028,8 @@ class DetailScatterLayer(QGraphicsItem):
                 center_y + hex_radius < y1 or center_y - hex_radius > y2):
                 continue
             
+            hexes_visited += 1
+            
             # 动态对数密度采样
             total_count = len(indices)
             num_visible = self._calculate_visible_points(total_count)
@@ -803,8 +1058,7 @@ class DetailScatterLayer(QGraphicsItem):
                     
                     # 确保在视口内
                     if x1 <= offset_x <= x2 and y1 <= offset_y <= y2:
-                        r, g, b, a = self.colors[idx]
-                        painter.setBrush(QColor(r, g, b, a))
+                        painter.setBrush(QColor.fromRgba(self._point_argb[idx]))
                         painter.drawEllipse(QPointF(offset_x, offset_y), 2, 2)
                         rendered_count += 1
             else:
@@ -817,13 +1071,14 @@ class DetailScatterLayer(QGraphicsItem):
                     
                     # 视口裁剪
                     if x1 <= x <= x2 and y1 <= y <= y2:
-                        r, g, b, a = self.colors[idx]
-                        painter.setBrush(QColor(r, g, b, a))
+                        painter.setBrush(QColor.fromRgba(self._point_argb[idx]))
                         painter.drawEllipse(QPointF(x, y), 2, 2)
                         rendered_count += 1
             
             if rendered_count >= max_total_points:
                 break
+        
+        self.last_paint_stats = {'hexes': hexes_visited, 'points': rendered_count}
 
     def update_lod(self, zoom):
         # LOD 2 (Zoom >= 2.5) 才显示
@@ -840,11 +1095,20 @@ class SonicUniverse(QGraphicsScene):
     """Sonic Universe 可视化场景 - 修复版"""
     
     # 信号定义
-    assets_selected = Signal(list)  # 传递metadata列表
+    assets_selected = Signal(object)  # 传递metadata序列（LazyMetadataList）
+    scene_ready = Signal()  # 完整场景（KDTree + 标签）构建完成
     
-    def __init__(self, metadata, embeddings, coords_2d=None, hex_size=50.0, search_core=None, ucs_manager=None, parent=None):
+    def __init__(self, metadata, embeddings, coords_2d=None, hex_size=50.0, search_core=None, ucs_manager=None, parent=None, async_build=True, scatter_engine=None, category_codes=None):
         super().__init__(parent)
         
+        # 后台构建状态：只接受最新 generation 的快照
+        self.async_build = async_build
+        self._scene_generation = 0
+        self._build_threads = {}  # generation -> SceneBuildThread
+        self._current_snapshot = None  # 当前显示的 SceneSnapshot
+        self._rebin_buffers = None  # 增量分箱的坐标双缓冲: (当前坐标, 备用坐标, 备用坐标中过期的行)
+        self._hex_center_cache = None  # (coords, 每个点所在六边形中心)，框选用
+        
         # 设置场景背景色（深色背景）
         self.setBackgroundBrush(QColor('#0B0C0E'))
         
@@ -853,20 +1117,22 @@ class SonicUniverse(QGraphicsScene):
         self.hex_size = float(hex_size)
         self.search_core = search_core
         self.ucs_manager = ucs_manager  # UCSManager 实例
+        self.category_codes = category_codes  # CategoryCodes（索引时生成的类别整数编码）
         
         # 坐标处理
         self.coords_2d = coords_2d
         if self.coords_2d is None:
-            print("[WARNING] coords_2d 为 None，使用随机坐标作为后备")
+            logger.warning("coords_2d 为 None，使用随机坐标作为后备")
             # Fallback for safety
             self.coords_2d = np.random.rand(len(metadata), 2) * 10000
         else:
-            print(f"[DEBUG] SonicUniverse 初始化: coords_2d shape={self.coords_2d.shape}, range=[{self.coords_2d.min(axis=0)}, {self.coords_2d.max(axis=0)}]")
-        
-        # 归一化坐标
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"SonicUniverse 初始化: coords_2d shape={self.coords_2d.shape}, range=[{self.coords_2d.min(axis=0)}, {self.coords_2d.max(axis=0)}]")
+            
+            # 归一化坐标
             self._normalize_coordinates()
-        if hasattr(self, 'norm_coords') and self.norm_coords is not None:
-            print(f"[DEBUG] 归一化后: norm_coords shape={self.norm_coords.shape}, range=[{self.norm_coords.min(axis=0)}, {self.norm_coords.max(axis=0)}]")
+        if getattr(self, 'norm_coords', None) is not None and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"归一化后: norm_coords shape={self.norm_coords.shape}, range=[{self.norm_coords.min(axis=0)}, {self.norm_coords.max(axis=0)}]")
         
         # 构建空间索引 (用于极速点击检测) - 将在 _build_scene_data 中使用最终显示坐标构建
         self.tree = None
@@ -874,6 +1140,7 @@ class SonicUniverse(QGraphicsScene):
 
         # 核心数据结构
         self.hex_layer = HexGridLayer(self.hex_size, ucs_manager=self.ucs_manager)
+        self.hex_layer.category_codes = category_codes
         self.scatter_layer = DetailScatterLayer()
         self.addItem(self.hex_layer)
         self.addItem(self.scatter_layer)
@@ -886,20 +1153,24 @@ class SonicUniverse(QGraphicsScene):
         self.view_mode = 'explorer'
         self.original_coords_2d = self.norm_coords.copy() if hasattr(self, 'norm_coords') else None
         self.gravity_coords_2d = None
+        self._gravity_moved_indices = np.zeros(0, dtype=np.int64)  # 上次引力布局移动过的点
         self.scatter_coords_2d = None
         self.axis_config = None
+        self.scatter_engine = scatter_engine  # 语义轴投影（Scatter 模式）
         self.gravity_pillars = []
-        self.gravity_weights = None
+        self.gravity_weights = None  # (N, P) float32 引力矩阵
+        self.gravity_pillar_positions = None  # (P, 2) 引力桩场景坐标
+        self._gravity_base_coords = None  # 引力桩布局；None 表示以原始布局为底
         self.highlighted_indices = set()
         self.current_zoom = 1.0
         
         # 构建网格
-        print("[DEBUG] 开始调用 _build_scene_data...")
+        logger.debug("开始调用 _build_scene_data...")
         if hasattr(self, 'norm_coords') and self.norm_coords is not None:
             self._build_scene_data(self.norm_coords)
         else:
-            print("[WARNING] norm_coords 尚未初始化，跳过 _build_scene_data")
-        print(f"[DEBUG] _build_scene_data 完成，场景矩形: {self.sceneRect()}")
+            logger.warning("norm_coords 尚未初始化，跳过 _build_scene_data")
+        logger.debug(f"_build_scene_data 完成，场景矩形: {self.sceneRect()}")
     
     def set_data(self, metadata, coords, embeddings=None):
         """设置数据：修复视口重置 Bug"""
@@ -958,14 +1229,14 @@ class SonicUniverse(QGraphicsScene):
         valid_mask = np.isfinite(self.coords_2d).all(axis=1)
         if not valid_mask.all():
             invalid_count = np.sum(~valid_mask)
-            print(f"[WARNING] 发现 {invalid_count} 个无效坐标（NaN/Inf），将被过滤")
+            logger.warning(f"发现 {invalid_count} 个无效坐标（NaN/Inf），将被过滤")
             self.coords_2d = self.coords_2d[valid_mask]
             # 同时更新 metadata，确保索引对应
             if hasattr(self, 'metadata') and len(self.metadata) == len(valid_mask):
                 self.metadata = [self.metadata[i] for i in range(len(valid_mask)) if valid_mask[i]]
         
         if len(self.coords_2d) == 0:
-            print("[ERROR] 过滤无效坐标后，没有有效数据")
+            logger.error("过滤无效坐标后，没有有效数据")
             return
         
         # 1. 坐标归一化到紧凑场景 (3000x3000) - 减少数据分散，让蜂窝更密集
@@ -976,7 +1247,7 @@ class SonicUniverse(QGraphicsScene):
         
         # 【修复】再次检查归一化后的坐标
         if np.any(~np.isfinite(self.norm_coords)):
-            print("[ERROR] 归一化后仍有无效坐标，使用默认坐标")
+            logger.error("归一化后仍有无效坐标，使用默认坐标")
             self.norm_coords = np.random.rand(len(self.coords_2d), 2) * 3000.0
     
     def _constrain_points_to_hex(self, coords):
@@ -986,173 +1257,356 @@ class SonicUniverse(QGraphicsScene):
         规则 A (吸附)：计算每个点所属的六边形，获取该六边形的像素中心
         规则 B (内缩)：将点的位置限制在六边形中心的一定半径内 (hex_size * 0.9)
         规则 C (螺旋布局)：同一六边形内的多个点使用向日葵螺旋排列
+        
+        全部为数组运算：按六边形分组排序得到组内序号，一次性计算角度与半径。
         """
         if coords is None or len(coords) == 0:
             return coords
         
-        # 黄金角度（度转弧度）
-        GOLDEN_ANGLE_RAD = math.radians(137.508)
+        coords = np.asarray(coords, dtype=np.float64)
+        n = len(coords)
         
-        constrained_coords = np.zeros_like(coords)
-        hex_point_map = {}  # (q, r) -> [indices in this hex]
+        # 步骤 1: 将每个点分配到对应的六边形，并按 (六边形, 索引) 分组
+        q, r = self._pixel_to_hex_array(coords)
+        order, starts, counts = self._group_by_hex(q, r)
         
-        # 步骤 1: 将每个点分配到对应的六边形
-        for idx, (x, y) in enumerate(coords):
-            q, r = self._pixel_to_hex(x, y)
-            if (q, r) not in hex_point_map:
-                hex_point_map[(q, r)] = []
-            hex_point_map[(q, r)].append(idx)
+        # 组内序号（按索引排序保证确定性）与所在组的点数
+        group_sizes = np.repeat(counts, counts)
+        ranks_sorted = np.arange(n) - np.repeat(starts, counts)
+        ranks = np.empty(n, dtype=np.int64)
+        sizes = np.empty(n, dtype=np.int64)
+        ranks[order] = ranks_sorted
+        sizes[order] = group_sizes
         
-        # 步骤 2: 为每个六边形内的点计算规整化位置（向日葵螺旋布局）
+        # 步骤 2: 向日葵螺旋布局
+        # 对于最后一个点 i = total_points - 1，r = c * sqrt(i) < max_radius
+        # 所以 c = max_radius / sqrt(total_points - 1)；单点 c = 0，直接放在中心
         max_radius = self.hex_size * 0.9  # 内缩到 90% 半径，确保不落在缝隙
+        c = np.where(sizes > 1, max_radius / np.sqrt(np.maximum(sizes - 1, 1)), 0.0)
+        radius = c * np.sqrt(ranks)
+        angle = ranks * GOLDEN_ANGLE_RAD
         
-        for (q, r), point_indices in hex_point_map.items():
-            hex_center = self._hex_to_pixel(q, r)
-            center_x, center_y = hex_center.x(), hex_center.y()
-            
-            # 按索引排序保证确定性
-            sorted_indices = sorted(point_indices)
-            total_points = len(sorted_indices)
-            
-            if total_points == 1:
-                # 如果只有一个点，直接放在中心
-                idx = sorted_indices[0]
-                constrained_coords[idx] = [center_x, center_y]
-        else:
-                # 多个点：使用向日葵螺旋布局
-                # 计算缩放系数 c，确保最大半径 < hex_size * 0.9
-                # 对于最后一个点 i = total_points - 1，r = c * sqrt(i) < max_radius
-                # 所以 c = max_radius / sqrt(total_points - 1)
-                if total_points > 1:
-                    c = max_radius / math.sqrt(total_points - 1)
-                else:
-                    c = 0.0
-                
-                for spiral_index, idx in enumerate(sorted_indices):
-                    # 螺旋角度：使用黄金角度（137.508°）
-                    angle = spiral_index * GOLDEN_ANGLE_RAD
-                    
-                    # 半径：r = c * sqrt(i)，确保最大半径 < hex_size * 0.9
-                    radius = c * math.sqrt(spiral_index)
-                    
-                    # 计算偏移位置
-                    offset_x = radius * math.cos(angle)
-                    offset_y = radius * math.sin(angle)
-                    
-                    constrained_coords[idx] = [
-                        center_x + offset_x,
-                        center_y + offset_y
-                    ]
-        
+        constrained_coords = self._hex_to_pixel_array(q, r)
+        constrained_coords[:, 0] += radius * np.cos(angle)
+        constrained_coords[:, 1] += radius * np.sin(angle)
         return constrained_coords
     
-    def _build_scene_data(self, norm_coords=None):
-        """构建场景数据"""
-        import sys
-        print("[DEBUG] build: start", flush=True)
-        sys.stdout.flush()
+    def _pixel_to_hex_array(self, coords):
+        """
+        批量像素坐标 -> 六边形轴向坐标（与 _pixel_to_hex 结果一致）
+        
+        Returns:
+            (q, r) 两个 int64 数组；无效坐标映射到 (0, 0)
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        finite = np.isfinite(coords).all(axis=1)
+        x = np.where(finite, coords[:, 0], 0.0)
+        y = np.where(finite, coords[:, 1], 0.0)
+        
+        size = self.hex_size
+        fq = (2./3 * x) / size
+        fr = (-1./3 * x + math.sqrt(3)/3 * y) / size
+        fs = -fq - fr
+        
+        # 轴向坐标四舍五入算法（round 与 Python 内置一致，均为银行家舍入）
+        rq, rr, rs = np.round(fq), np.round(fr), np.round(fs)
+        q_diff, r_diff, s_diff = np.abs(rq - fq), np.abs(rr - fr), np.abs(rs - fs)
+        fix_q = (q_diff > r_diff) & (q_diff > s_diff)
+        fix_r = ~fix_q & (r_diff > s_diff)
+        rq = np.where(fix_q, -rr - rs, rq)
+        rr = np.where(fix_r, -rq - rs, rr)
+        return rq.astype(np.int64), rr.astype(np.int64)
+    
+    def _hex_to_pixel_array(self, q, r):
+        """批量六边形坐标 -> 像素中心，返回 (N, 2) float64"""
+        size = self.hex_size
+        q = np.asarray(q, dtype=np.float64)
+        r = np.asarray(r, dtype=np.float64)
+        return np.column_stack([
+            size * (3./2 * q),
+            size * (math.sqrt(3)/2 * q + math.sqrt(3) * r)
+        ])
+    
+    @staticmethod
+    def _group_by_hex(q, r):
+        """
+        按六边形分组（稳定排序，组内保持原索引升序）
+        
+        Returns:
+            (order, starts, counts): order 为排序后的点索引，
+            starts/counts 为每组在 order 中的起点和长度
+        """
+        n = len(q)
+        if n == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        # 将 (q, r) 压成单个整数键
+        r_min = r.min()
+        r_span = int(r.max() - r_min) + 1
+        keys = (q - q.min()) * r_span + (r - r_min)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_keys)) + 1))
+        counts = np.diff(np.append(starts, n))
+        return order, starts, counts
+    
+    @perf.timed('scene.build_request', 'scene')
+    def _build_scene_data(self, norm_coords=None, grid_map=None):
+        """
+        构建场景数据
+        
+        async_build=True 时在 SceneBuildThread 中构建：先显示密度预览，
+        KDTree、颜色和标签完成后整体替换；否则在当前线程同步完成。
+        传入 grid_map 时跳过六边形分箱（增量更新已算好网格）。
+        """
+        logger.debug("build: start")
         
         # 如果没传参数，使用 self.norm_coords 作为 fallback
         if norm_coords is None:
             norm_coords = getattr(self, 'norm_coords', None)
             if norm_coords is None:
-                print("[ERROR] _build_scene_data: norm_coords is None and self.norm_coords is also None!", flush=True)
+                logger.error("_build_scene_data: norm_coords is None and self.norm_coords is also None!")
             return
         
         # 强校验传入参数
         if len(norm_coords) == 0:
-            print("[ERROR] _build_scene_data: Received empty coords!", flush=True)
+            logger.error("_build_scene_data: Received empty coords!")
             return
 
-        print(f"[DEBUG] build: Building hex grid for {len(norm_coords)} items...", flush=True)
-        sys.stdout.flush()
+        logger.debug(f"build: Building hex grid for {len(norm_coords)} items...")
         
-        # 清理旧数据
-        print("[DEBUG] build: 清理旧数据...", flush=True)
-        sys.stdout.flush()
-        if hasattr(self, 'hex_layer'):
-            self.hex_layer.grid_data.clear()
-        if hasattr(self, 'scatter_layer'):
-            self.scatter_layer.points = None
+        self.norm_coords = norm_coords
+        
+        # 场景矩形只依赖坐标范围，同步设置，保证视图适配立即可用
+        self._update_scene_rect(norm_coords)
+        
+        self._scene_generation += 1
+        generation = self._scene_generation
+        metadata = self.metadata
+        perf.count('scene.builds')
         
+        def preview_fn():
+            return self._compute_scene_preview(generation, norm_coords, metadata, grid_map)
+        
+        if not self.async_build:
+            self._apply_scene_snapshot(self._compute_scene_snapshot(preview_fn()))
+            logger.debug("build: 完成！")
+            return
+        
+        # 旧的构建线程结果已过期，请求其尽快停止
+        for thread in self._build_threads.values():
+            thread.requestInterruption()
+        
+        thread = SceneBuildThread(generation, preview_fn, self._compute_scene_snapshot)
+        thread.preview_signal.connect(self._on_scene_preview_ready)
+        thread.finished_signal.connect(self._on_scene_build_finished)
+        thread.error_signal.connect(self._on_scene_build_error)
+        thread.finished.connect(lambda g=generation: self._on_build_thread_done(g))
+        self._build_threads[generation] = thread
+        thread.start()
+        logger.debug(f"build: 已提交后台构建 (generation={generation})")
+    
+    def _bin_points_to_hex(self, norm_coords):
+        """将坐标分配到六边形网格，返回 (q, r) -> [indices]"""
         # 【修复】过滤 NaN 坐标
         valid_mask = np.isfinite(norm_coords).all(axis=1)
         if not valid_mask.all():
             invalid_count = np.sum(~valid_mask)
-            print(f"[WARNING] 构建网格时发现 {invalid_count} 个无效坐标，将被跳过", flush=True)
-            valid_indices = np.where(valid_mask)[0]
-        else:
-            valid_indices = np.arange(len(norm_coords))
+            logger.warning(f"构建网格时发现 {invalid_count} 个无效坐标，将被跳过")
+        valid_indices = np.flatnonzero(valid_mask)
+        
+        q, r = self._pixel_to_hex_array(norm_coords[valid_indices])
+        order, starts, counts = self._group_by_hex(q, r)
         
-        # 构建网格索引
-        print("[DEBUG] build: 构建网格索引...", flush=True)
-        sys.stdout.flush()
         grid_map = {}
-        for array_idx, data_idx in enumerate(valid_indices):
-            x, y = norm_coords[data_idx]
-            # 【修复】再次检查单个坐标
-            if not (np.isfinite(x) and np.isfinite(y)):
-                continue
-            try:
-                q, r = self._pixel_to_hex(x, y)
-                if (q, r) not in grid_map:
-                    grid_map[(q, r)] = []
-                grid_map[(q, r)].append(data_idx)
-            except (ValueError, OverflowError) as e:
-                # 跳过无法转换的坐标
-                print(f"[WARNING] 跳过无效坐标 ({x}, {y}): {e}", flush=True)
-                continue
-            # 每处理 5000 条输出一次进度
-            if (array_idx + 1) % 5000 == 0:
-                print(f"[DEBUG] build: 已处理 {array_idx + 1}/{len(valid_indices)} 个点...", flush=True)
-                sys.stdout.flush()
+        if len(order) > 0:
+            sorted_indices = valid_indices[order]
+            cell_q = q[order[starts]].tolist()
+            cell_r = r[order[starts]].tolist()
+            for cq, cr, members in zip(cell_q, cell_r, np.split(sorted_indices, starts[1:])):
+                grid_map[(cq, cr)] = members.tolist()
+        
+        logger.debug(f"build: grid_map={len(grid_map)}")
+        return grid_map
+    
+    def _compute_scene_preview(self, generation, norm_coords, metadata, grid_map=None):
+        """第一阶段：网格分箱 + 密度路径（可在后台线程调用）"""
+        if grid_map is None:
+            with log_span(logger, 'scene.bin', points=len(norm_coords)) as span:
+                grid_map = self._bin_points_to_hex(norm_coords)
+                span['cells'] = len(grid_map)
+        with log_span(logger, 'scene.density_paths', cells=len(grid_map)):
+            color_batches = self.hex_layer.build_density_batches(grid_map)
+        return SceneSnapshot(
+            generation=generation,
+            norm_coords=norm_coords,
+            metadata=metadata,
+            grid_map=grid_map,
+            color_batches=color_batches,
+            is_preview=True
+        )
+    
+    @perf.timed('scene.snapshot', 'scene')
+    def _compute_scene_snapshot(self, preview):
+        """第二阶段：KDTree、类别颜色、标签和散点颜色（可在后台线程调用）"""
+        tree = None
+        n_cells = len(preview.grid_map)
+        # 使用原始坐标构建空间索引（用于点击检测）
+        if SCIPY_AVAILABLE and len(preview.norm_coords) > 0:
+            with log_span(logger, 'scene.kdtree', points=len(preview.norm_coords)):
+                tree = cKDTree(preview.norm_coords)
+        
+        with log_span(logger, 'scene.color_paths', cells=n_cells):
+            hex_colors, color_batches = self.hex_layer.build_color_batches(preview.grid_map, preview.metadata)
+        
+        with log_span(logger, 'scene.labels', cells=n_cells):
+            cell_categories, subcategory_labels = self.hex_layer.compute_cell_labels(preview.grid_map, preview.metadata)
+            category_labels = self.hex_layer.compute_category_labels(preview.grid_map, preview.metadata, cell_categories)
+        
+        with log_span(logger, 'scene.point_colors', points=len(preview.metadata)):
+            point_colors = DetailScatterLayer.compute_point_colors(preview.metadata, self.category_codes)
+        
+        return replace(
+            preview,
+            is_preview=False,
+            tree=tree,
+            hex_colors=hex_colors,
+            color_batches=color_batches,
+            category_labels=category_labels,
+            subcategory_labels=subcategory_labels,
+            cell_categories=cell_categories,
+            point_colors=point_colors
+        )
+    
+    def _apply_scene_delta(self, norm_coords, grid_map, affected_cells):
+        """
+        增量更新：基于当前完整快照，只修补受影响格子的颜色路径和子类标签
         
-        print(f"[DEBUG] build: grid_map={len(grid_map)}", flush=True)
-        sys.stdout.flush()
-            
-        # 存储原始坐标（用于点击检测）
-        self.current_display_coords = norm_coords
+        立即替换快照（KDTree 暂时置空），KDTree 与大类连通域标签在后台重建。
+        """
+        base = self._current_snapshot
+        hex_colors, color_batches = self.hex_layer.patch_color_batches(
+            grid_map, base.metadata, base.hex_colors, base.color_batches, affected_cells
+        )
+        cell_categories, subcategory_labels = self.hex_layer.patch_cell_labels(
+            grid_map, base.metadata, base.cell_categories, base.subcategory_labels, affected_cells
+        )
+        
+        self._scene_generation += 1
+        generation = self._scene_generation
         self.norm_coords = norm_coords
+        snapshot = replace(
+            base,
+            generation=generation,
+            norm_coords=norm_coords,
+            grid_map=grid_map,
+            color_batches=color_batches,
+            hex_colors=hex_colors,
+            subcategory_labels=subcategory_labels,
+            cell_categories=cell_categories,
+            tree=None
+        )
+        self._apply_scene_snapshot(snapshot, notify=False)
+        logger.debug(f"build: 增量更新 {len(affected_cells)} 个格子 (generation={generation})")
         
-        # 使用原始坐标构建空间索引（用于点击检测）
-        print("[DEBUG] build: 构建 KDTree 空间索引...", flush=True)
-        sys.stdout.flush()
-        if SCIPY_AVAILABLE and len(norm_coords) > 0:
-            self.tree = cKDTree(norm_coords)
-            print("[DEBUG] build: KDTree 构建完成", flush=True)
-            sys.stdout.flush()
-            
-        # 将数据传递给图层
-        print("[DEBUG] build: before hex_layer.set_data", flush=True)
-        sys.stdout.flush()
-        if hasattr(self, 'hex_layer'):
-            try:
-                self.hex_layer.set_data(grid_map, self.metadata, norm_coords)
-                print("[DEBUG] build: after hex_layer.set_data", flush=True)
-                sys.stdout.flush()
-            except Exception as e:
-                print(f"[ERROR] build: hex_layer.set_data 失败: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
-                sys.stdout.flush()
+        if not self.async_build:
+            self._apply_scene_snapshot(self._complete_scene_delta(snapshot))
+            return
         
-        print("[DEBUG] build: before scatter_layer.set_data", flush=True)
-        sys.stdout.flush()
-        if hasattr(self, 'scatter_layer'):
-            try:
-                self.scatter_layer.set_hex_size(self.hex_size)
-                self.scatter_layer.set_data(norm_coords, self.metadata, grid_map)
-                print("[DEBUG] build: after scatter_layer.set_data", flush=True)
-                sys.stdout.flush()
-            except Exception as e:
-                print(f"[ERROR] build: scatter_layer.set_data 失败: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
-                sys.stdout.flush()
-        
-        # 设置场景矩形（确保覆盖 0-3000 范围）
-        print("[DEBUG] build: 设置场景矩形...", flush=True)
-        sys.stdout.flush()
+        for thread in self._build_threads.values():
+            thread.requestInterruption()
+        
+        thread = SceneBuildThread(generation, lambda: snapshot, self._complete_scene_delta)
+        thread.preview_signal.connect(self._on_scene_preview_ready)
+        thread.finished_signal.connect(self._on_scene_build_finished)
+        thread.error_signal.connect(self._on_scene_build_error)
+        thread.finished.connect(lambda g=generation: self._on_build_thread_done(g))
+        self._build_threads[generation] = thread
+        thread.start()
+    
+    def _complete_scene_delta(self, snapshot):
+        """增量更新的后台部分：重建 KDTree 和大类连通域标签，合并写时复制网格（可在后台线程调用）"""
+        tree = None
+        if SCIPY_AVAILABLE and len(snapshot.norm_coords) > 0:
+            tree = cKDTree(snapshot.norm_coords)
+        grid_map = snapshot.grid_map
+        if isinstance(grid_map, GridMapOverlay):
+            grid_map = grid_map.to_dict()
+        category_labels = self.hex_layer.compute_category_labels(
+            grid_map, snapshot.metadata, snapshot.cell_categories
+        )
+        return replace(snapshot, tree=tree, grid_map=grid_map, category_labels=category_labels)
+    
+    @perf.timed('scene.apply', 'scene')
+    def _apply_scene_snapshot(self, snapshot, notify=True):
+        """在 GUI 线程中整体替换场景数据"""
+        self._current_snapshot = snapshot
+        # 存储原始坐标（用于点击检测）
+        self.current_display_coords = snapshot.norm_coords
+        self.tree = snapshot.tree
+        
+        self.hex_layer.apply_snapshot(snapshot)
+        
+        self.scatter_layer.set_hex_size(self.hex_size)
+        if snapshot.is_preview:
+            # 散点颜色尚未计算，预览阶段不绘制散点
+            self.scatter_layer.points = None
+        else:
+            self.scatter_layer.set_data(
+                snapshot.norm_coords,
+                snapshot.metadata,
+                snapshot.grid_map,
+                colors=snapshot.point_colors,
+                category_codes=self.category_codes
+            )
+            if notify:
+                self.scene_ready.emit()
+        
+        self.update()
+    
+    def _on_scene_preview_ready(self, generation):
+        """预览快照就绪（过期代号直接丢弃）"""
+        thread = self._build_threads.get(generation)
+        if generation != self._scene_generation or thread is None or thread.preview_snapshot is None:
+            return
+        if thread.preview_snapshot is self._current_snapshot:
+            # 增量更新的快照已在 GUI 线程应用
+            return
+        self._apply_scene_snapshot(thread.preview_snapshot)
+        logger.debug(f"build: 预览已显示 (generation={generation})")
+    
+    def _on_scene_build_finished(self, generation):
+        """完整快照就绪（过期代号直接丢弃）"""
+        thread = self._build_threads.get(generation)
+        if generation != self._scene_generation or thread is None or thread.snapshot is None:
+            return
+        self._apply_scene_snapshot(thread.snapshot)
+        logger.debug(f"build: 完成！(generation={generation})")
+    
+    def _on_scene_build_error(self, generation, error_msg):
+        """构建失败"""
+        logger.error(f"build: 后台构建失败 (generation={generation}): {error_msg}")
+    
+    def _on_build_thread_done(self, generation):
+        """线程结束后释放引用"""
+        thread = self._build_threads.pop(generation, None)
+        if thread is not None:
+            thread.deleteLater()
+    
+    def wait_for_scene(self, timeout_ms: int = -1) -> bool:
+        """
+        等待所有后台构建线程结束（脚本/测试使用；结果仍通过事件循环投递）
+        
+        Returns:
+            是否在超时前全部结束
+        """
+        for thread in list(self._build_threads.values()):
+            if not thread.wait(timeout_ms if timeout_ms >= 0 else QDeadlineTimer.Forever):
+                return False
+        return True
+    
+    def _update_scene_rect(self, norm_coords):
+        """设置场景矩形（确保覆盖 0-3000 范围）"""
         if len(norm_coords) > 0:
             min_coords = norm_coords.min(axis=0)
             max_coords = norm_coords.max(axis=0)
@@ -1176,16 +1630,11 @@ class SonicUniverse(QGraphicsScene):
                 scene_max_y - scene_min_y
             )
             self.setSceneRect(rect)
-            print(f"[DEBUG] build: 场景矩形设置完成: {rect} (覆盖 0-3000 范围)", flush=True)
-            sys.stdout.flush()
+            logger.debug(f"build: 场景矩形设置完成: {rect} (覆盖 0-3000 范围)")
         else:
-            print("[WARNING] norm_coords 为空，使用默认场景矩形 (0-3000)", flush=True)
-            sys.stdout.flush()
+            logger.warning("norm_coords 为空，使用默认场景矩形 (0-3000)")
             # 使用固定的 0-3000 范围（带边距）
             self.setSceneRect(-100, -100, 3200, 3200)
-        
-        print("[DEBUG] build: 完成！", flush=True)
-        sys.stdout.flush()
     
     def mousePressEvent(self, event):
         """处理鼠标点击，检测点击的六边形"""
@@ -1195,7 +1644,8 @@ class SonicUniverse(QGraphicsScene):
         # 检查是否点击了有数据的六边形
         if hasattr(self, 'hex_layer') and (q, r) in self.hex_layer.grid_data:
             indices = self.hex_layer.grid_data[(q, r)]
-            metadata_list = [self.metadata[i] for i in indices if i < len(self.metadata)]
+            # 惰性元数据：密集格子里的上万个点不必在点击时全部取出
+            metadata_list = LazyMetadataList(self.metadata, indices)
             
             # 发射信号
             if metadata_list:
@@ -1237,6 +1687,15 @@ class SonicUniverse(QGraphicsScene):
         return int(rq), int(rr)
 
     # --- 交互核心：手动命中测试 ---
+    def _current_lod_level(self) -> int:
+        """当前缩放对应的 LOD 级别（0/1 为六边形级，2 为散点级）"""
+        current_lod = self.current_zoom
+        if current_lod < 0.6:
+            return 0
+        elif current_lod < 1.8:
+            return 1
+        return 2
+    
     def find_closest_data(self, scene_pos):
         """
         找到鼠标点击位置最近的数据
@@ -1244,13 +1703,7 @@ class SonicUniverse(QGraphicsScene):
         - LOD < 2: 返回该六边形内的所有数据列表
         - LOD >= 2: 返回单个文件的详细信息
         """
-        current_lod = self.current_zoom
-        if current_lod < 0.6:
-            lod_level = 0
-        elif current_lod < 1.8:
-            lod_level = 1
-        else:
-            lod_level = 2
+        lod_level = self._current_lod_level()
         
         # LOD 门控：LOD < 2 时返回六边形内所有数据
         if lod_level < 2:
@@ -1278,11 +1731,15 @@ class SonicUniverse(QGraphicsScene):
             return None
         
         # LOD >= 2: 使用KDTree进行精确的最近邻搜索
-        if self.tree is None or self.current_display_coords is None:
+        if self.current_display_coords is None:
             return None
         
         try:
-            dist, idx = self.tree.query([scene_pos.x(), scene_pos.y()], distance_upper_bound=20)
+            if self.tree is not None:
+                dist, idx = self.tree.query([scene_pos.x(), scene_pos.y()], distance_upper_bound=20)
+            else:
+                # KDTree 正在后台重建：在点击位置附近的六边形内暴力查找
+                dist, idx = self._nearest_in_cells(scene_pos.x(), scene_pos.y(), 20)
             
             if dist == float('inf') or idx >= len(self.metadata):
                 return None
@@ -1294,9 +1751,31 @@ class SonicUniverse(QGraphicsScene):
                 'pos': self.current_display_coords[int(idx)]
             }
         except Exception as e:
-            print(f"[ERROR] find_closest_data 失败: {e}")
+            logger.error(f"find_closest_data 失败: {e}")
             return None
         
+    def _nearest_in_cells(self, x, y, max_distance):
+        """
+        在 (x, y) 所在六边形及其邻居中查找最近点（KDTree 不可用时的后备）
+        
+        Returns:
+            (dist, idx)；未找到时 dist 为 inf，idx 为 len(metadata)
+        """
+        q, r = self._pixel_to_hex(x, y)
+        candidates = list(self.hex_layer.grid_data.get((q, r), ()))
+        for cell in self.hex_layer._get_hex_neighbors(q, r):
+            candidates.extend(self.hex_layer.grid_data.get(cell, ()))
+        if not candidates:
+            return float('inf'), len(self.metadata)
+        
+        candidates = np.asarray(candidates, dtype=np.int64)
+        deltas = self.current_display_coords[candidates] - np.array([x, y])
+        dists = np.hypot(deltas[:, 0], deltas[:, 1])
+        best = int(np.argmin(dists))
+        if dists[best] > max_distance:
+            return float('inf'), len(self.metadata)
+        return float(dists[best]), int(candidates[best])
+    
     def find_items_in_rect(self, rect):
         """找到框选区域内的所有数据"""
         if not hasattr(self, 'norm_coords') or self.norm_coords is None:
@@ -1332,22 +1811,41 @@ class SonicUniverse(QGraphicsScene):
     
     def set_view_mode(self, mode: str):
         """设置视图模式"""
+        previous_mode = self.view_mode
         self.view_mode = mode
         # 根据模式更新坐标
-        if mode == 'explorer' and self.original_coords_2d is not None:
+        if (mode == 'explorer' and previous_mode == 'gravity' and self._gravity_base_coords is None
+                and len(self._gravity_moved_indices) > 0 and self._can_rebin_incrementally()):
+            # 搜索引力只移动了少量点：增量归位即可
+            moved = self._gravity_moved_indices
+            self.gravity_coords_2d[moved] = self.original_coords_2d[moved]
+            self._gravity_moved_indices = np.zeros(0, dtype=np.int64)
+            self._rebin_moved_points(moved, self.original_coords_2d)
+        elif mode == 'explorer' and self.original_coords_2d is not None:
             self.coords_2d = self.original_coords_2d.copy()
             self._rebuild_layers()
         elif mode == 'scatter' and self.scatter_coords_2d is not None:
+            # 投影坐标已缩放到 0-3000 场景坐标
             self.coords_2d = self.scatter_coords_2d.copy()
-            self._rebuild_layers()
+            self._rebuild_layers(normalize=False)
         elif mode == 'gravity' and self.gravity_coords_2d is not None:
+            # 引力坐标已在场景坐标系内（围绕画布中心布局），不再重新归一化
             self.coords_2d = self.gravity_coords_2d.copy()
-            self._rebuild_layers()
+            self._rebuild_layers(normalize=False)
     
-    def _rebuild_layers(self):
-        """重建渲染层（当坐标改变时）"""
+    def _rebuild_layers(self, normalize: bool = True):
+        """
+        重建渲染层（当坐标改变时）
+        
+        Args:
+            normalize: 是否将 coords_2d 重新归一化到 0-3000；
+                       False 表示 coords_2d 已是场景坐标
+        """
         # 重新归一化坐标
-        self._normalize_coordinates()
+        if normalize:
+            self._normalize_coordinates()
+        else:
+            self.norm_coords = self.coords_2d
         
         # 重建场景数据（这会更新图层和空间索引）
         # 传入 self.norm_coords 确保参数正确传递
@@ -1356,24 +1854,108 @@ class SonicUniverse(QGraphicsScene):
         else:
             self._build_scene_data()
     
-    def set_gravity_pillars(self, pillars: List[str], weights: Optional[List[Dict[str, float]]] = None):
-        """设置引力桩"""
-        self.gravity_pillars = pillars
+    def set_gravity_pillars(self, pillars: List[str], weights=None):
+        """
+        设置引力桩并计算引力坐标
+        
+        Args:
+            pillars: 引力桩标签
+            weights: (N, P) 引力矩阵（SearchCore.calculate_gravity_matrix 的输出），
+                     也兼容旧的 List[Dict[str, float]] 格式
+        """
+        self.gravity_pillars = list(pillars)
+        if weights is not None and not isinstance(weights, np.ndarray):
+            # 旧格式：逐文件字典
+            weights = np.array(
+                [[w.get(p, 0.0) for p in self.gravity_pillars] for w in weights],
+                dtype=np.float32
+            )
         self.gravity_weights = weights
-        # 计算引力坐标（这里简化实现，实际应该调用 calculate_gravity_forces）
-        # 暂时保持原坐标
+        
         if weights is not None and self.original_coords_2d is not None:
-            # TODO: 实现引力坐标计算
-            self.gravity_coords_2d = self.original_coords_2d.copy()
+            self.gravity_coords_2d = self._compute_gravity_coords(weights)
+            self._gravity_base_coords = self.gravity_coords_2d.copy()
+            self._gravity_moved_indices = np.zeros(0, dtype=np.int64)
+    
+    def _compute_gravity_coords(self, weights: np.ndarray) -> np.ndarray:
+        """
+        引力坐标（向量化）：桩均匀分布在画布中心周围，
+        每个点移向按权重加权的桩位置，再与原始位置混合
+        
+        Args:
+            weights: (N, P) 引力矩阵，负值视为 0
+            
+        Returns:
+            (N, 2) 引力坐标
+        """
+        base = self.original_coords_2d
+        weights = np.asarray(weights, dtype=np.float32)
+        n_pillars = weights.shape[1] if weights.ndim == 2 else 0
+        if n_pillars == 0 or len(weights) != len(base):
+            logger.warning(f"引力矩阵形状 {weights.shape} 与坐标数量 {len(base)} 不匹配，保持原坐标")
+            return base.copy()
+        
+        # 引力桩位置（从正上方开始顺时针分布）
+        scene_rect = self.sceneRect()
+        center = np.array([scene_rect.center().x(), scene_rect.center().y()])
+        radius = min(scene_rect.width(), scene_rect.height()) * GRAVITY_PILLAR_RADIUS_RATIO
+        angles = 2 * np.pi * np.arange(n_pillars) / n_pillars - np.pi / 2
+        pillar_positions = center + radius * np.column_stack([np.cos(angles), np.sin(angles)])
+        self.gravity_pillar_positions = pillar_positions
+        
+        # 按行归一化权重：加权平均位置 = Σ(桩位置 × 归一化权重)
+        weights = np.clip(weights, 0.0, None)
+        row_sums = weights.sum(axis=1, keepdims=True)
+        has_weight = row_sums[:, 0] > 0
+        pulled = (weights / np.where(row_sums > 0, row_sums, 1.0)) @ pillar_positions
+        pulled[~has_weight] = base[~has_weight]
+        
+        return GRAVITY_BLEND * pulled + (1.0 - GRAVITY_BLEND) * base
     
     def set_axis_config(self, config: Dict):
-        """设置轴配置（Scatter 模式）"""
+        """
+        设置轴配置（Scatter 模式）
+        
+        Args:
+            config: {'active': bool, 'x': 轴文本, 'y': 轴文本}；轴文本可以是
+                    axis_definitions.json 中的轴 id/名称，也可以是任意词
+        """
+        self.apply_axis_coords(config, self.compute_axis_coords(config))
+    
+    def compute_axis_coords(self, config: Dict) -> Optional[np.ndarray]:
+        """
+        计算 Scatter 坐标（不访问场景，可在后台线程调用；极点编码可能触发模型加载）
+        
+        Returns:
+            (N, 2) 场景坐标；未激活或计算失败时返回 None
+        """
+        if not config.get('active', False) or self.search_core is None:
+            return None
+        
+        x_axis, y_axis = config.get('x', ''), config.get('y', '')
+        if not x_axis.strip() or not y_axis.strip():
+            logger.warning("Scatter 模式需要同时设置 X/Y 轴")
+            return None
+        
+        if self.scatter_engine is None:
+            self.scatter_engine = ScatterEngine(self.search_core)
+        
+        try:
+            coords = self.scatter_engine.project_to_canvas(x_axis, y_axis)
+        except ScatterEngineError as e:
+            logger.error(f"Scatter 坐标计算失败: {e}")
+            return None
+        
+        if self.original_coords_2d is not None and len(coords) != len(self.original_coords_2d):
+            logger.warning(f"向量数量 {len(coords)} 与坐标数量 {len(self.original_coords_2d)} 不一致，跳过 Scatter 投影")
+            return None
+        return coords
+    
+    def apply_axis_coords(self, config: Dict, coords: Optional[np.ndarray]):
+        """应用 compute_axis_coords 的结果（GUI 线程）"""
         self.axis_config = config
-        if config.get('active', False) and self.search_core is not None:
-            # TODO: 实现 Scatter 坐标计算
-            # 暂时保持原坐标
-            if self.original_coords_2d is not None:
-                self.scatter_coords_2d = self.original_coords_2d.copy()
+        if coords is not None:
+            self.scatter_coords_2d = coords
     
     def clear_highlights(self):
         """清除高亮"""
@@ -1381,10 +1963,15 @@ class SonicUniverse(QGraphicsScene):
         if hasattr(self, 'scatter_layer'):
             self.scatter_layer.set_highlighted_indices(set())
     
+    @perf.timed('scene.search_gravity', 'scene')
     def apply_search_gravity(self, indices: List[int], scores: Optional[List[float]] = None):
         """
         应用搜索引力（向日葵螺旋布局）
         将相关节点按相似度分数螺旋排列在中心
+        
+        Args:
+            indices: 结果点索引
+            scores: 相似度分数（与 indices 一一对应的列表，或 index -> score 字典）
         """
         if not indices or self.original_coords_2d is None:
             return
@@ -1395,21 +1982,28 @@ class SonicUniverse(QGraphicsScene):
             self.scatter_layer.set_highlighted_indices(self.highlighted_indices)
         
         # 初始化 gravity_coords_2d
+        base_coords = self._gravity_base()
         if self.gravity_coords_2d is None:
-            self.gravity_coords_2d = self.original_coords_2d.copy()
+            self.gravity_coords_2d = base_coords.copy()
+        
+        # 上一次查询移动过的点先归位
+        previous_moved = self._gravity_moved_indices
+        if len(previous_moved) > 0:
+            self.gravity_coords_2d[previous_moved] = base_coords[previous_moved]
         
         # 准备分数（如果没有提供，使用默认值）
-        if scores is None:
-            scores = [1.0] * len(indices)
-        elif len(scores) != len(indices):
-            scores = [1.0] * len(indices)
-        
-        # 按分数降序排序
-        sorted_items = sorted(
-            zip(indices, scores), 
-            key=lambda x: x[1], 
-            reverse=True
-        )
+        index_array = np.asarray(indices, dtype=np.int64)
+        if isinstance(scores, dict):
+            score_array = np.array([scores.get(i, 1.0) for i in indices], dtype=np.float64)
+        elif scores is None or len(scores) != len(indices):
+            score_array = np.ones(len(index_array), dtype=np.float64)
+        else:
+            score_array = np.asarray(scores, dtype=np.float64)
+        
+        # 按分数降序排序（稳定排序，同分保持原顺序）
+        order = np.argsort(-score_array, kind='stable')
+        index_array = index_array[order]
+        score_array = score_array[order]
         
         # 计算画布中心
         scene_rect = self.sceneRect()
@@ -1417,31 +2011,118 @@ class SonicUniverse(QGraphicsScene):
         center_y = scene_rect.center().y()
         max_radius = min(scene_rect.width(), scene_rect.height()) * 0.4
         
-        # 黄金角度（度转弧度）
-        GOLDEN_ANGLE_DEG = 137.508
-        GOLDEN_ANGLE_RAD = math.radians(GOLDEN_ANGLE_DEG)
+        # 向日葵螺旋布局：角度按名次，半径按分数（分数越高越靠近中心）
+        spiral_index = np.arange(len(index_array))
+        angle = spiral_index * GOLDEN_ANGLE_RAD
+        radius = (1.0 - score_array) * max_radius
         
-        # 更新坐标：向日葵螺旋布局
-        for idx, (item_idx, score) in enumerate(sorted_items):
-            if item_idx >= len(self.gravity_coords_2d):
-                continue
-            
-            # 计算角度和半径
-            angle = idx * GOLDEN_ANGLE_RAD
-            radius_factor = 1.0 - score  # 分数越高越靠近中心
-            r = radius_factor * max_radius
-            
-            # 计算新位置
-            x = center_x + r * math.cos(angle)
-            y = center_y + r * math.sin(angle)
-            
-            self.gravity_coords_2d[item_idx] = np.array([x, y])
+        in_range = (index_array >= 0) & (index_array < len(self.gravity_coords_2d))
+        moved = index_array[in_range]
+        self.gravity_coords_2d[moved, 0] = center_x + radius[in_range] * np.cos(angle[in_range])
+        self.gravity_coords_2d[moved, 1] = center_y + radius[in_range] * np.sin(angle[in_range])
         
         # 非匹配项：淡出（保持原坐标，在渲染时降低透明度）
         # 实际淡出逻辑在 DetailScatterLayer 中处理
         
-        # 切换到 gravity 模式
-        self.set_view_mode('gravity')
+        changed = np.union1d(previous_moved, moved)
+        self._gravity_moved_indices = np.unique(moved)
+        
+        # explorer 场景只有在引力以原始布局为底时才与目标布局只差移动过的点
+        incremental_modes = ('gravity', 'explorer') if self._gravity_base_coords is None else ('gravity',)
+        if self.view_mode in incremental_modes and self._can_rebin_incrementally():
+            # 当前场景与原始布局只差移动过的点：只重新分箱这些点
+            self.view_mode = 'gravity'
+            self._rebin_moved_points(changed, self.gravity_coords_2d)
+        else:
+            # 切换到 gravity 模式
+            self.set_view_mode('gravity')
+    
+    def _gravity_base(self) -> np.ndarray:
+        """搜索引力的底图：有引力桩布局时用桩布局，否则用原始布局"""
+        if self._gravity_base_coords is not None and len(self._gravity_base_coords) == len(self.original_coords_2d):
+            return self._gravity_base_coords
+        return self.original_coords_2d
+    
+    def _can_rebin_incrementally(self) -> bool:
+        """当前场景网格是否可以在其基础上增量更新"""
+        snapshot = self._current_snapshot
+        return (
+            snapshot is not None
+            and not snapshot.is_preview
+            and snapshot.generation == self._scene_generation
+            and snapshot.cell_categories is not None
+            and self.gravity_coords_2d is not None
+            and len(snapshot.norm_coords) == len(self.gravity_coords_2d)
+        )
+    
+    def _writable_coords_buffer(self, current: np.ndarray) -> np.ndarray:
+        """
+        返回与 current 内容相同、可以原地写入的坐标数组（双缓冲）
+        
+        current 被当前快照引用，不能修改；上一次增量分箱换下来的数组只被过期快照引用，
+        只需把它过期的行同步过来。没有可用的备用数组时（首次增量更新或场景已整体重建）才完整复制。
+        """
+        buffers = self._rebin_buffers
+        if buffers is not None and buffers[0] is current and buffers[1].shape == current.shape:
+            _, spare, stale_rows = buffers
+            spare[stale_rows] = current[stale_rows]
+            if self._hex_center_cache is not None and self._hex_center_cache[0] is spare:
+                # 缓存按数组身份命中，原地写入后作废
+                self._hex_center_cache = None
+            return spare
+        return current.copy()
+    
+    def _rebin_moved_points(self, moved_indices, new_coords):
+        """
+        只对移动过的点重新分箱，其余网格保持不变
+        
+        分箱、坐标写入和网格修改都只涉及 k 个移动的点和它们所在的格子：
+        坐标写入双缓冲中的备用数组，网格以写时复制视图（GridMapOverlay）叠加在旧网格上，
+        旧快照引用的数据都不修改。合并网格和重建 KDTree 在后台完成。
+        
+        Args:
+            moved_indices: 移动过的点索引数组
+            new_coords: 新的完整坐标数组（已在场景坐标系内）
+        """
+        moved_indices = np.asarray(moved_indices, dtype=np.int64)
+        current = self._current_snapshot.norm_coords
+        base_grid = self._current_snapshot.grid_map
+        norm_coords = self._writable_coords_buffer(current)
+        changes = {}  # (q, r) -> 新的成员列表（写时复制）
+        
+        if len(moved_indices) > 0:
+            old_q, old_r = self._pixel_to_hex_array(norm_coords[moved_indices])
+            norm_coords[moved_indices] = new_coords[moved_indices]
+            new_q, new_r = self._pixel_to_hex_array(norm_coords[moved_indices])
+            
+            crossed = (old_q != new_q) | (old_r != new_r)
+            
+            def cell_for_write(cell):
+                members = changes.get(cell)
+                if members is None:
+                    members = list(base_grid.get(cell, ()))
+                    changes[cell] = members
+                return members
+            
+            for idx, oq, orr, nq, nr in zip(
+                moved_indices[crossed].tolist(),
+                old_q[crossed].tolist(), old_r[crossed].tolist(),
+                new_q[crossed].tolist(), new_r[crossed].tolist()
+            ):
+                old_cell = cell_for_write((oq, orr))
+                if idx in old_cell:
+                    old_cell.remove(idx)
+                bisect.insort(cell_for_write((nq, nr)), idx)
+        
+        affected_cells = set(changes)
+        for cell in affected_cells:
+            if not changes[cell]:
+                changes[cell] = None
+        
+        # 换下来的 current 与新坐标只在 moved_indices 行不同
+        self._rebin_buffers = (norm_coords, current, moved_indices)
+        self.coords_2d = norm_coords
+        self._apply_scene_delta(norm_coords, GridMapOverlay(base_grid, changes), affected_cells)
     
     def update_coordinates(self, new_coords_2d: np.ndarray):
         """
@@ -1451,13 +2132,13 @@ class SonicUniverse(QGraphicsScene):
             new_coords_2d: 新的坐标数组 (N, 2)
         """
         if new_coords_2d is None or len(new_coords_2d) == 0:
-            print("[WARNING] 尝试更新坐标，但新坐标为空")
+            logger.warning("尝试更新坐标，但新坐标为空")
             return
         
         # 检查坐标有效性
         valid_mask = np.isfinite(new_coords_2d).all(axis=1)
         if np.sum(valid_mask) == 0:
-            print("[ERROR] 新坐标全部无效，无法更新")
+            logger.error("新坐标全部无效，无法更新")
             return
         
         # 更新坐标
@@ -1484,9 +2165,9 @@ class SonicUniverse(QGraphicsScene):
         
         # 更新视图
         self.update()
-        print(f"[INFO] 坐标已更新: shape={self.coords_2d.shape}, range=[{self.coords_2d[valid_mask].min(axis=0)}, {self.coords_2d[valid_mask].max(axis=0)}]")
+        logger.info(f"坐标已更新: shape={self.coords_2d.shape}, range=[{self.coords_2d[valid_mask].min(axis=0)}, {self.coords_2d[valid_mask].max(axis=0)}]")
     
-    def get_items_in_rect(self, rect: QRectF) -> List[Dict]:
+    def get_items_in_rect(self, rect: QRectF) -> Sequence[Dict]:
         """
         获取框选矩形区域内的所有文件元数据
         
@@ -1494,68 +2175,96 @@ class SonicUniverse(QGraphicsScene):
             rect: 场景坐标中的矩形区域
             
         Returns:
-            元数据列表
+            元数据序列（惰性取出，索引见 .indices）
         """
-        if self.coords_2d is None or len(self.coords_2d) == 0:
-            return []
+        return LazyMetadataList(self.metadata, self.get_indices_in_rect(rect))
+    
+    def get_items_in_polygon(self, polygon: QPolygonF) -> Sequence[Dict]:
+        """
+        获取套索多边形内的所有文件元数据
         
-        selected_metadata = []
-        selected_indices = set()
+        Args:
+            polygon: 场景坐标中的多边形
+            
+        Returns:
+            元数据序列（惰性取出，索引见 .indices）
+        """
+        return LazyMetadataList(self.metadata, self.get_indices_in_polygon(polygon))
+    
+    def get_indices_in_rect(self, rect: QRectF) -> np.ndarray:
+        """
+        框选命中测试（向量化）
         
-        # 1. 获取框选区域内的所有点
-        for i, (x, y) in enumerate(self.coords_2d):
-            if rect.contains(QPointF(x, y)):
-                if i < len(self.metadata):
-                    selected_indices.add(i)
+        LOD < 2 时按六边形选择：格子与矩形相交则选中格内所有点；
+        LOD >= 2 时按散点的精确位置选择。
         
-        # 2. 获取框选区域内的所有六边形（通过 hex_layer）
-        if hasattr(self, 'hex_layer'):
-            # 扩展矩形以确保包含边缘六边形
-            margin = self.hex_size * 2
-            expanded_rect = QRectF(rect)
-            expanded_rect.adjust(-margin, -margin, margin, margin)
-            
-            # 计算需要检查的六边形范围
-            min_q, min_r = self._pixel_to_hex(expanded_rect.left(), expanded_rect.top())
-            max_q, max_r = self._pixel_to_hex(expanded_rect.right(), expanded_rect.bottom())
-            
-            # 扩展范围以确保覆盖
-            min_q -= 1
-            min_r -= 1
-            max_q += 1
-            max_r += 1
-            
-            # 检查每个六边形是否与框选区域相交
-            for q in range(min_q, max_q + 1):
-                for r in range(min_r, max_r + 1):
-                    hex_key = (q, r)
-                    if hex_key not in self.hex_layer.grid_data:
-                        continue
-                    
-                    data = self.hex_layer.grid_data[hex_key]
-                    center = self._hex_to_pixel(q, r)
-                    
-                    # 检查六边形中心是否在框选区域内
-                    # 或者框选区域是否与六边形相交
-                    hex_size = self.hex_size
-                    hex_rect = QRectF(
-                        center.x() - hex_size,
-                        center.y() - hex_size,
-                        hex_size * 2,
-                        hex_size * 2
-                    )
-                    
-                    if rect.intersects(hex_rect):
-                        # 添加该六边形内的所有点
-                        for idx in data.get('indices', []):
-                            if idx < len(self.metadata):
-                                selected_indices.add(idx)
+        Returns:
+            升序的点索引数组
+        """
+        test_coords, margin = self._selection_test_coords()
+        if test_coords is None:
+            return np.zeros(0, dtype=np.int64)
+        
+        rect = rect.normalized()
+        mask = (
+            (test_coords[:, 0] >= rect.left() - margin)
+            & (test_coords[:, 0] <= rect.right() + margin)
+            & (test_coords[:, 1] >= rect.top() - margin)
+            & (test_coords[:, 1] <= rect.bottom() + margin)
+        )
+        return np.flatnonzero(mask)
+    
+    def get_indices_in_polygon(self, polygon: QPolygonF) -> np.ndarray:
+        """
+        套索命中测试（向量化）
         
-        # 3. 收集所有选中项的元数据
-        for idx in sorted(selected_indices):
-            if idx < len(self.metadata):
-                selected_metadata.append(self.metadata[idx])
+        LOD < 2 时判断点所在六边形的中心，LOD >= 2 时判断散点本身。
         
-        return selected_metadata
+        Returns:
+            升序的点索引数组
+        """
+        test_coords, _ = self._selection_test_coords()
+        if test_coords is None or polygon.count() < 3:
+            return np.zeros(0, dtype=np.int64)
+        
+        vertices = np.array([(p.x(), p.y()) for p in polygon], dtype=np.float64)
+        
+        # 先用包围盒粗筛，再做精确判定
+        min_x, min_y = vertices.min(axis=0)
+        max_x, max_y = vertices.max(axis=0)
+        candidates = np.flatnonzero(
+            (test_coords[:, 0] >= min_x) & (test_coords[:, 0] <= max_x)
+            & (test_coords[:, 1] >= min_y) & (test_coords[:, 1] <= max_y)
+        )
+        inside = points_in_polygon(test_coords[candidates], vertices)
+        return candidates[inside]
+    
+    def _selection_test_coords(self):
+        """
+        选择时参与命中测试的坐标
+        
+        Returns:
+            (coords, margin): LOD < 2 为各点所在六边形中心，margin 为六边形半径；
+            LOD >= 2 为当前显示坐标，margin 为 0。无数据时 coords 为 None
+        """
+        coords = self.current_display_coords
+        if coords is None:
+            coords = getattr(self, 'norm_coords', None)
+        if coords is None or len(coords) == 0:
+            return None, 0.0
         
-  
\ No newline at end of file
+        if self._current_lod_level() >= 2:
+            return coords, 0.0
+        return self._point_hex_centers(coords), self.hex_size
+    
+    def _point_hex_centers(self, coords):
+        """每个点所在六边形的中心 (N, 2)，按坐标数组缓存；无效坐标为 NaN"""
+        cache = self._hex_center_cache
+        if cache is not None and cache[0] is coords:
+            return cache[1]
+        
+        q, r = self._pixel_to_hex_array(coords)
+        centers = self._hex_to_pixel_array(q, r)
+        centers[~np.isfinite(coords).all(axis=1)] = np.nan
+        self._hex_center_cache = (coords, centers)
+        return centers